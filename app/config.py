@@ -8,3 +8,101 @@ MILVUS_USER = os.getenv("MILVUS_USER")
 MILVUS_PASSWORD = os.getenv("MILVUS_PASSWORD")
 MILVUS_TOKEN = os.getenv("MILVUS_TOKEN")
 MILVUS_URI = os.getenv("MILVUS_URI")
+# Connection pools (one gRPC channel per alias): searches and ingestion traffic use separate pools,
+# and every alias is probed in the background every MILVUS_HEALTH_CHECK_SECONDS (0 disables the probes)
+MILVUS_QUERY_POOL_SIZE = int(os.getenv("MILVUS_QUERY_POOL_SIZE", "4"))
+MILVUS_INGEST_POOL_SIZE = int(os.getenv("MILVUS_INGEST_POOL_SIZE", "4"))
+MILVUS_HEALTH_CHECK_SECONDS = float(os.getenv("MILVUS_HEALTH_CHECK_SECONDS", "15"))
+# Retrieval awaits Milvus searches and reads through an asyncio client (false: each one holds a worker
+# thread); query embedding and reranking run on RETRIEVAL_MODEL_WORKERS threads
+MILVUS_ASYNC_CLIENT = os.getenv("MILVUS_ASYNC_CLIENT", "true").lower() == "true"
+RETRIEVAL_MODEL_WORKERS = int(os.getenv("RETRIEVAL_MODEL_WORKERS", "4"))
+
+# Vector store backend: "milvus" (server) or "embedded" (in-process, memory-mapped files under EMBEDDED_STORE_DIR)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "milvus")
+EMBEDDED_STORE_DIR = os.getenv("EMBEDDED_STORE_DIR", "vector_store")
+EMBEDDED_INDEX = os.getenv("EMBEDDED_INDEX", "auto")  # flat, graph, or auto (graph from EMBEDDED_GRAPH_MIN_ROWS rows)
+EMBEDDED_GRAPH_MIN_ROWS = int(os.getenv("EMBEDDED_GRAPH_MIN_ROWS", "50000"))
+
+# Distance metric of new collections (L2, IP or COSINE; embeddings are normalized, so the ranking is the same)
+VECTOR_METRIC = os.getenv("VECTOR_METRIC", "L2").upper()
+# New collections hash repo_name into this many partitions (Milvus partition key), so repo-scoped searches
+# only scan the matching partitions (0 = no partition key)
+VECTOR_PARTITIONS = int(os.getenv("VECTOR_PARTITIONS", "64"))
+
+# External chunk-text store: only vectors and filterable scalars stay in the vector store (empty = text stays there)
+DOCUMENT_STORE_DIR = os.getenv("DOCUMENT_STORE_DIR", "")
+
+# Hybrid retrieval: BM25 index of chunk text built at ingest time (empty disables), fused with the dense
+# results by reciprocal rank fusion when HYBRID_SEARCH is on (opt-in) or a request sends "hybrid": true
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR", "lexical_index")
+LEXICAL_MAX_DF_RATIO = float(os.getenv("LEXICAL_MAX_DF_RATIO", "0.5"))  # skip query terms found in more chunks
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "false").lower() == "true"
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_RERANK_FACTOR = int(os.getenv("HYBRID_RERANK_FACTOR", "2"))  # fused candidates per result sent to the reranker
+
+# Vector index policy: "auto" picks HNSW / IVF_SQ8 / IVF_PQ from the row count, or force HNSW, IVF_FLAT, IVF_SQ8, IVF_PQ
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "auto")
+VECTOR_INDEX_OVERRIDES = os.getenv("VECTOR_INDEX_OVERRIDES", "")  # per collection, e.g. "forum_docs:IVF_SQ8,big:auto"
+VECTOR_INDEX_HNSW_MAX_ROWS = int(os.getenv("VECTOR_INDEX_HNSW_MAX_ROWS", "1000000"))
+VECTOR_INDEX_PQ_MIN_ROWS = int(os.getenv("VECTOR_INDEX_PQ_MIN_ROWS", "10000000"))
+# Default search breadth; requests may override with ef / nprobe
+VECTOR_SEARCH_EF = int(os.getenv("VECTOR_SEARCH_EF", "64"))
+VECTOR_SEARCH_NPROBE = int(os.getenv("VECTOR_SEARCH_NPROBE", "0"))  # 0 = derived from the index's nlist
+
+# Ingestion job scheduler
+INGESTION_MAX_CONCURRENT_JOBS = int(os.getenv("INGESTION_MAX_CONCURRENT_JOBS", 2))
+INGESTION_JOB_HISTORY = int(os.getenv("INGESTION_JOB_HISTORY", 100))
+
+# Milvus insert path
+INSERT_MAX_BATCH_BYTES = int(os.getenv("INSERT_MAX_BATCH_BYTES", 16 * 1024 * 1024))
+INSERT_WORKERS = int(os.getenv("INSERT_WORKERS", 4))
+INSERT_FLUSH_INTERVAL = float(os.getenv("INSERT_FLUSH_INTERVAL", 0))  # seconds, 0 = flush only at the end
+INSERT_FLUSH_ROWS = int(os.getenv("INSERT_FLUSH_ROWS", 0))  # rows, 0 = flush only at the end
+
+# Bulk import (Parquet files in the Milvus object store)
+BULK_IMPORT_BUCKET = os.getenv("BULK_IMPORT_BUCKET", "a-bucket")
+BULK_IMPORT_ENDPOINT = os.getenv("BULK_IMPORT_ENDPOINT", "localhost:9000")
+BULK_IMPORT_ACCESS_KEY = os.getenv("BULK_IMPORT_ACCESS_KEY", "minioadmin")
+BULK_IMPORT_SECRET_KEY = os.getenv("BULK_IMPORT_SECRET_KEY", "minioadmin")
+
+# Content analysis: wall-clock budget per file before features fall back to a prefix
+ANALYZER_MAX_SECONDS = float(os.getenv("ANALYZER_MAX_SECONDS", "2.0"))
+
+# Chunking: chunk size and overlap in embedding-model tokens (size is capped to the model's 512-token input)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "510"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+# Forum ingestion: chunks per embedding/insert batch and batches buffered between parsing and embedding
+FORUM_BATCH_SIZE = int(os.getenv("FORUM_BATCH_SIZE", "256"))
+FORUM_MAX_IN_FLIGHT_BATCHES = int(os.getenv("FORUM_MAX_IN_FLIGHT_BATCHES", "4"))
+FORUM_CHUNK_WORKERS = int(os.getenv("FORUM_CHUNK_WORKERS", "4"))
+FORUM_EMBED_BATCH_SIZE = int(os.getenv("FORUM_EMBED_BATCH_SIZE", "32"))
+
+# Near-duplicate chunks of the same repository are dropped before embedding: MinHash LSH index per
+# collection under this directory (opt-in; empty disables)
+NEAR_DUPLICATE_DIR = os.getenv("NEAR_DUPLICATE_DIR", "")
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.85"))  # estimated Jaccard similarity
+
+# Repository ingestion journal: checkpoints and spilled embeddings for resuming failed runs (empty disables)
+INGESTION_JOURNAL_DIR = os.getenv("INGESTION_JOURNAL_DIR", "ingestion_journals")
+
+# GitHub access shared by all ingesters in the process: one pooled session and one request budget
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+GITHUB_REQUESTS_PER_SECOND = float(os.getenv("GITHUB_REQUESTS_PER_SECOND", "10"))  # 0 = no client-side limit
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "50"))  # pause when fewer API calls remain
+GITHUB_HTTP_POOL_SIZE = int(os.getenv("GITHUB_HTTP_POOL_SIZE", "32"))
+# Base URLs GitHub requests are sent to (point at a mirror or the load-test fixture server)
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_RAW_URL = os.getenv("GITHUB_RAW_URL", "https://raw.githubusercontent.com").rstrip("/")
+
+# Shared embedding engine and bulk (organization-wide) ingestion
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+BULK_MAX_CONCURRENT_REPOS = int(os.getenv("BULK_MAX_CONCURRENT_REPOS", "4"))
+
+# Local repository ingestion via the API: checkouts/mirrors must live under this directory (empty disables)
+LOCAL_REPOSITORY_ROOT = os.getenv("LOCAL_REPOSITORY_ROOT", "")
+
+# Admin endpoints (profiler): callers must send this key in X-Admin-Key (empty disables them)
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
@@ -4,8 +4,9 @@ GitHub Ingestion Models
 Pydantic models for GitHub repository ingestion API requests and responses.
 """
 
-from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, HttpUrl
+from typing import Any, Dict, List, Optional
 
 
 class IngestionRequest(BaseModel):
@@ -13,12 +14,26 @@ class IngestionRequest(BaseModel):
     collection_name: str
     github_url: HttpUrl
     branch: Optional[str] = "main"
+    # Checkout/mirror (relative to LOCAL_REPOSITORY_ROOT) read instead of the GitHub API
+    local_path: Optional[str] = None
+
+
+class BulkIngestionRequest(BaseModel):
+    """Request model for ingesting many repositories (a list and/or a whole organization)."""
+    collection_name: str
+    repositories: Optional[List[HttpUrl]] = None
+    org: Optional[str] = None
+    branch: Optional[str] = "main"
+    include_forks: bool = False
+    include_archived: bool = False
+    max_concurrent_repos: Optional[int] = Field(default=None, ge=1)
 
 
 class IngestionResponse(BaseModel):
     """Response model for GitHub repository ingestion."""
     success: bool
     message: str
+    job_id: Optional[str] = None
     stats: Optional[dict] = None
 
 
@@ -26,4 +41,26 @@ class IngestionStatusResponse(BaseModel):
     """Response model for ingestion service status."""
     success: bool
     message: str
-    active_collections: int
\ No newline at end of file
+    active_collections: int
+    running_jobs: int = 0
+    queued_jobs: int = 0
+    max_concurrent_jobs: int = 0
+
+
+class IngestionJobStatus(BaseModel):
+    """Status, per-stage progress and outcome of an ingestion job."""
+    job_id: str
+    collection_name: str
+    params: Dict[str, Any]
+    state: str
+    progress: Dict[str, Any]
+    stats: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class IngestionJobListResponse(BaseModel):
+    """Response model for listing ingestion jobs."""
+    jobs: List[IngestionJobStatus]
@@ -1,13 +1,36 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Dict, Any, Optional
 
 
 class RetrieveRequest(BaseModel):
-    query: str
+    query: Optional[str] = None
+    # Batch of queries searched concurrently (instead of query); results are returned per query, in order
+    queries: Optional[List[str]] = Field(default=None, min_length=1, max_length=64)
     collection_name: str = "beaglemind_col"
     n_results: int = 10
     include_metadata: bool = True
     rerank: bool = True
+    debug: bool = False  # Include stage timings and candidate/token counts in the response
+    # Search breadth overrides: ef for HNSW indexes, nprobe for IVF indexes (recall vs latency)
+    ef: Optional[int] = Field(default=None, ge=1, le=32768)
+    nprobe: Optional[int] = Field(default=None, ge=1, le=65536)
+    # Only search these repositories (repo_name values, e.g. "docs.beagleboard.io" or "beagleboard_forum")
+    repos: Optional[List[str]] = Field(default=None, max_length=100)
+    # Fuse dense results with the BM25 lexical index (default: HYBRID_SEARCH)
+    hybrid: Optional[bool] = None
+    # Score thresholds, applied in the vector search (range search) before reranking: minimum cosine
+    # similarity and/or maximum squared L2 distance (embeddings are normalized: distance = 2 - 2 * similarity)
+    min_similarity: Optional[float] = Field(default=None, ge=-1.0, le=1.0)
+    max_distance: Optional[float] = Field(default=None, ge=0.0, le=4.0)
+    # Stream NDJSON (application/x-ndjson) and end with a summary line: one line per hit in rank order,
+    # or with queries, one line per query's results as each query finishes
+    stream: bool = False
+
+    @model_validator(mode="after")
+    def _one_query_form(self):
+        if (self.query is None) == (self.queries is None):
+            raise ValueError("Send either query or queries")
+        return self
 
 
 class DocumentMetadata(BaseModel):
@@ -21,6 +44,14 @@ class DocumentMetadata(BaseModel):
     language: Optional[str] = None
     has_code: Optional[bool] = None
     repo_name: Optional[str] = None
+    links: Optional[Dict[str, List[str]]] = None  # {"images": [...], "attachments": [...]} referenced by the chunk
+
+
+class RetrieveDebug(BaseModel):
+    timings_ms: Dict[str, float]  # tokenize, embed, search, lexical, documents, rerank, serialize, total
+    # query_tokens, search_limit, candidates, lexical_candidates, lexical_only, documents_fetched,
+    # rerank_pairs, rerank_padded_tokens, results
+    counts: Dict[str, int]
 
 
 class RetrieveResponse(BaseModel):
@@ -29,3 +60,4 @@ class RetrieveResponse(BaseModel):
     distances: List[List[float]]
     total_found: int
     filtered_results: int
+    debug: Optional[RetrieveDebug] = None
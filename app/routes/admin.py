@@ -0,0 +1,73 @@
+"""
+Admin Router
+
+Operator-only endpoints, authenticated with the ADMIN_API_KEY shared secret.
+"""
+
+import asyncio
+import hmac
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+
+from app.config import ADMIN_API_KEY, PROFILER_MAX_SECONDS
+from app.services.milvus_pool import pool_stats
+from app.services.profiler import PROFILE_TARGETS, profile_process
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Reject the request unless X-Admin-Key matches ADMIN_API_KEY."""
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+@router.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    target: str = Query("all", description=f"Threads to sample: {', '.join(PROFILE_TARGETS)}"),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    interval_ms: float = Query(10.0, ge=1, le=1000)
+):
+    """
+    Sample the live process for `seconds` and return the profile.
+    
+    `collapsed` returns flamegraph.pl-compatible text; `speedscope` returns a
+    JSON document for https://www.speedscope.app. Only one profile runs at a time.
+    
+    Args:
+        seconds: Sampling duration (capped at PROFILER_MAX_SECONDS)
+        target: "requests" (event loop and request worker threads), "ingestion"
+            (job, repository, file, insert and embedding threads) or "all"
+        format: Output format
+        interval_ms: Milliseconds between samples
+    """
+    if target not in PROFILE_TARGETS:
+        raise HTTPException(status_code=400, detail=f"Unknown target '{target}'")
+    seconds = min(seconds, PROFILER_MAX_SECONDS)
+    logger.info(f"[ADMIN] Profiling '{target}' threads for {seconds:.1f}s")
+    
+    # Sampling runs on a worker thread so the event loop keeps serving (and can be profiled)
+    profiler = await asyncio.to_thread(profile_process, seconds, target, interval_ms / 1000)
+    if profiler is None:
+        raise HTTPException(status_code=409, detail="Another profile is already running")
+    
+    if format == "speedscope":
+        return JSONResponse(
+            content=profiler.speedscope(),
+            headers={"Content-Disposition": f'attachment; filename="profile-{target}.speedscope.json"'}
+        )
+    return Response(content=profiler.collapsed(), media_type="text/plain")
+
+
+@router.get("/admin/milvus-pools", dependencies=[Depends(require_admin)])
+async def milvus_pools():
+    """Healthy connections, checkouts and reconnects of each Milvus connection pool opened so far."""
+    return pool_stats()
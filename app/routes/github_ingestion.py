@@ -4,33 +4,36 @@ GitHub Ingestion Router
 API endpoints for ingesting GitHub repositories into Milvus collections.
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
+from typing import Optional
 import logging
 
 from app.services.github_ingestion_service import github_ingestion_service
-from app.models.github_ingestion import IngestionRequest, IngestionResponse, IngestionStatusResponse
+from app.services.ingestion_jobs import JOB_QUEUED, JOB_RUNNING
+from app.models.github_ingestion import (
+    IngestionRequest, BulkIngestionRequest, IngestionResponse, IngestionStatusResponse,
+    IngestionJobStatus, IngestionJobListResponse
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/ingest-data", response_model=IngestionResponse)
-async def ingest_github_repository(
-    request: IngestionRequest,
-    background_tasks: BackgroundTasks
-):
+@router.post("/ingest-data", response_model=IngestionResponse, status_code=202)
+async def ingest_github_repository(request: IngestionRequest):
     """
-    Ingest a GitHub repository into a Milvus collection.
+    Queue ingestion of a GitHub repository into a Milvus collection.
     
     If the collection exists, the new repository data will be appended.
     If the collection doesn't exist, it will be created.
+    The request returns immediately with a job id; poll
+    `/ingest-data/jobs/{job_id}` for progress and the final stats.
     
     Args:
         request: IngestionRequest containing collection_name, github_url, and optional branch
-        background_tasks: FastAPI background tasks for async processing
         
     Returns:
-        IngestionResponse with success status and details
+        IngestionResponse with the queued job id
     """
     try:
         logger.info(f"[ROUTER] Received ingestion request for {request.github_url} into {request.collection_name}")
@@ -54,28 +57,25 @@ async def ingest_github_repository(
                 detail="Invalid GitHub URL. Must start with https://github.com/"
             )
         
-        logger.info(f"[ROUTER] Starting ingestion process...")
-        
-        # Start ingestion (now runs in thread pool to avoid blocking)
-        result = await github_ingestion_service.ingest_repository(
-            collection_name=request.collection_name,
-            github_url=github_url_str,
-            branch=request.branch
-        )
+        # Queue ingestion on the job scheduler and return without waiting
+        try:
+            job = github_ingestion_service.submit_ingestion(
+                collection_name=request.collection_name,
+                github_url=github_url_str,
+                branch=request.branch,
+                local_path=request.local_path
+            )
+        except ValueError as e:
+            logger.error(f"[ROUTER] Rejected local path '{request.local_path}': {e}")
+            raise HTTPException(status_code=400, detail=str(e))
         
-        logger.info(f"[ROUTER] Ingestion process completed with success: {result['success']}")
+        logger.info(f"[ROUTER] Ingestion job {job.job_id} queued")
         
-        if result["success"]:
-            return IngestionResponse(
-                success=True,
-                message=result["message"],
-                stats=result.get("stats")
-            )
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail=result["message"]
-            )
+        return IngestionResponse(
+            success=True,
+            message=f"Ingestion job queued for collection '{request.collection_name}'",
+            job_id=job.job_id
+        )
             
     except HTTPException:
         raise
@@ -86,6 +86,57 @@ async def ingest_github_repository(
             detail=f"Internal server error: {str(e)}"
         )
 
+@router.post("/ingest-data/bulk", response_model=IngestionResponse, status_code=202)
+async def ingest_github_repositories_bulk(request: BulkIngestionRequest):
+    """
+    Queue ingestion of many GitHub repositories into one collection.
+    
+    Repositories come from `repositories` (ingested on `branch`) and/or every
+    repository of the GitHub organization `org` (on its default branch). They
+    run as a single job that shares one GitHub rate-limit budget and one
+    embedding engine; the job's stats hold aggregate throughput and
+    per-repository timings.
+    
+    Args:
+        request: BulkIngestionRequest with collection_name and repositories and/or org
+        
+    Returns:
+        IngestionResponse with the queued job id
+    """
+    if not request.collection_name or len(request.collection_name.strip()) == 0:
+        raise HTTPException(status_code=400, detail="Collection name cannot be empty")
+    if not request.repositories and not request.org:
+        raise HTTPException(status_code=400, detail="Provide repositories and/or an org")
+    
+    repositories = [str(url) for url in request.repositories or []]
+    invalid = [url for url in repositories if not url.startswith("https://github.com/")]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid GitHub URL(s): {', '.join(invalid)}. Must start with https://github.com/"
+        )
+    
+    try:
+        job = github_ingestion_service.submit_bulk_ingestion(
+            collection_name=request.collection_name,
+            repositories=repositories,
+            org=request.org,
+            branch=request.branch,
+            include_forks=request.include_forks,
+            include_archived=request.include_archived,
+            max_concurrent_repos=request.max_concurrent_repos
+        )
+    except Exception as e:
+        logger.error(f"[ROUTER] Unexpected error queuing bulk ingestion: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    logger.info(f"[ROUTER] Bulk ingestion job {job.job_id} queued")
+    return IngestionResponse(
+        success=True,
+        message=f"Bulk ingestion job queued for collection '{request.collection_name}'",
+        job_id=job.job_id
+    )
+
 @router.get("/ingest-data/status", response_model=IngestionStatusResponse)
 async def get_ingestion_status():
     """
@@ -95,14 +146,69 @@ async def get_ingestion_status():
         Status information about the ingestion service
     """
     try:
+        counts = github_ingestion_service.scheduler.counts()
         return IngestionStatusResponse(
             success=True,
             message="GitHub ingestion service is running",
-            active_collections=len(github_ingestion_service.ingesters)
+            active_collections=len(github_ingestion_service.ingesters),
+            running_jobs=counts[JOB_RUNNING],
+            queued_jobs=counts[JOB_QUEUED],
+            max_concurrent_jobs=github_ingestion_service.scheduler.max_concurrent_jobs
         )
     except Exception as e:
         logger.error(f"Error getting ingestion status: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Error getting status: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/ingest-data/jobs", response_model=IngestionJobListResponse)
+async def list_ingestion_jobs(collection_name: Optional[str] = None):
+    """
+    List queued, running and recently finished ingestion jobs.
+    
+    Args:
+        collection_name: Optional collection to filter by
+        
+    Returns:
+        IngestionJobListResponse with one entry per job
+    """
+    jobs = github_ingestion_service.list_jobs(collection_name)
+    return IngestionJobListResponse(jobs=[IngestionJobStatus(**job.to_dict()) for job in jobs])
+
+@router.get("/ingest-data/jobs/{job_id}", response_model=IngestionJobStatus)
+async def get_ingestion_job(job_id: str):
+    """
+    Get state and per-stage progress (files, chunks, embeddings, inserts) of a job.
+    
+    Args:
+        job_id: Id returned by POST /ingest-data
+        
+    Returns:
+        IngestionJobStatus for the job
+    """
+    job = github_ingestion_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job not found: {job_id}")
+    return IngestionJobStatus(**job.to_dict())
+
+@router.delete("/ingest-data/jobs/{job_id}", response_model=IngestionJobStatus)
+async def cancel_ingestion_job(job_id: str):
+    """
+    Cancel an ingestion job.
+    
+    Queued jobs are dropped immediately. Running jobs stop at the next file,
+    embedding batch or insert batch boundary; chunks already inserted stay
+    in the collection.
+    
+    Args:
+        job_id: Id returned by POST /ingest-data
+        
+    Returns:
+        IngestionJobStatus for the job after the cancellation request
+    """
+    job = github_ingestion_service.cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job not found: {job_id}")
+    logger.info(f"[ROUTER] Cancellation requested for job {job_id} (state: {job.state})")
+    return IngestionJobStatus(**job.to_dict())
@@ -1,17 +1,40 @@
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import RetrieveRequest, RetrieveResponse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from app.models.schemas import DocumentMetadata, RetrieveDebug, RetrieveRequest, RetrieveResponse
 from app.services.retrieval_service import RetrievalService
-from pymilvus import connections, utility, Collection
+from app.services.metrics import (
+    RETRIEVAL_REQUEST_SECONDS, RETRIEVAL_REQUESTS, RETRIEVAL_STAGE_SECONDS, StageTimer, record_cache
+)
 import os
 
+try:
+    import orjson
+
+    def _json_line(value) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:  # Standard library fallback (slower)
+    def _json_line(value) -> bytes:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False,
+                          default=lambda o: o.tolist() if hasattr(o, "tolist") else str(o)).encode("utf-8") + b"\n"
+
 router = APIRouter()
 retrieval_services = {}
 
+# Streamed metadata carries the same fields as DocumentMetadata in the buffered response
+_METADATA_FIELDS = frozenset(DocumentMetadata.model_fields)
+
 
 @router.post("/retrieve", response_model=RetrieveResponse)
 async def retrieve(request: RetrieveRequest):
     global retrieval_services
+    start_time = time.perf_counter()
     
+    record_cache("retrieval_service", request.collection_name, request.collection_name in retrieval_services)
     if request.collection_name not in retrieval_services:
         try:
             retrieval_service = RetrievalService()
@@ -19,31 +42,205 @@ async def retrieve(request: RetrieveRequest):
             retrieval_service.create_collection(request.collection_name)
             retrieval_services[request.collection_name] = retrieval_service
         except Exception as e:
+            RETRIEVAL_REQUESTS.labels(collection=request.collection_name, status="error").inc()
             raise HTTPException(status_code=500, detail=f"Failed to initialize collection {request.collection_name}: {str(e)}")
     
     retrieval_service = retrieval_services[request.collection_name]
+    # A batch aggregates per-query timers (each feeding the stage histogram) into this one
+    timer = (StageTimer(RETRIEVAL_STAGE_SECONDS, collection=request.collection_name)
+             if request.queries is None else StageTimer())
     
     try:
-        results = retrieval_service.search(
-            query=request.query,
-            n_results=request.n_results,
-            include_metadata=request.include_metadata,
-            rerank=request.rerank
-        )
+        if request.stream and request.queries is None:
+            # Ranked before the response starts (errors still become a 500); texts are read as lines go out
+            total_found, hits = await retrieval_service.astream(request.query, timer=timer, **_search_options(request))
+            return StreamingResponse(
+                _stream_hits(request, total_found, hits, timer, start_time),
+                media_type="application/x-ndjson",
+                # Sent before serialization: serialize and total are in the summary line
+                headers={"Server-Timing": timer.server_timing()}
+            )
+        if request.stream:
+            return StreamingResponse(
+                _stream_queries(request, retrieval_service, timer, start_time),
+                media_type="application/x-ndjson"
+            )
         
-        formatted_metadatas = []
-        for metadata_list in results["metadatas"]:
-            formatted_list = []
-            for metadata in metadata_list:
-                formatted_list.append(metadata)
-            formatted_metadatas.append(formatted_list)
+        if request.queries is None:
+            # Milvus round trips are awaited on the event loop; ONNX work runs on the model threads
+            results = await retrieval_service.asearch(request.query, timer=timer, **_search_options(request))
+        else:
+            results = _merge_results(await asyncio.gather(*(
+                _search_query(retrieval_service, request, query, timer) for query in request.queries
+            )))
         
-        return RetrieveResponse(
+        # Validation and JSON encoding happen here (not in FastAPI) so they are timed
+        serialize_start = time.perf_counter()
+        response = RetrieveResponse(
             documents=results["documents"],
-            metadatas=formatted_metadatas,
+            metadatas=results["metadatas"],
             distances=results["distances"],
             total_found=results["total_found"],
             filtered_results=results["filtered_results"]
         )
+        body = response.model_dump_json(exclude={"debug"})
+        _add_serialize(request, timer, time.perf_counter() - serialize_start)
+        
+        if request.debug:
+            # Serialized a second time so the payload can include the serialize stage itself
+            response.debug = RetrieveDebug(
+                timings_ms={stage: seconds * 1000 for stage, seconds in timer.durations.items()},
+                counts=timer.counts
+            )
+            response.debug.timings_ms["total"] = (time.perf_counter() - start_time) * 1000
+            body = response.model_dump_json()
     except Exception as e:
+        RETRIEVAL_REQUESTS.labels(collection=request.collection_name, status="error").inc()
         raise HTTPException(status_code=500, detail=f"Retrieval failed: {str(e)}")
+    
+    elapsed = time.perf_counter() - start_time
+    RETRIEVAL_REQUESTS.labels(collection=request.collection_name, status="ok").inc()
+    RETRIEVAL_REQUEST_SECONDS.labels(collection=request.collection_name).observe(elapsed)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Server-Timing": timer.server_timing(total=elapsed)}
+    )
+
+
+def _add_serialize(request: RetrieveRequest, timer: StageTimer, seconds: float):
+    """Record the serialize stage; a batch's timer has no histogram, so it is observed there directly."""
+    timer.add("serialize", seconds)
+    if timer.histogram is None:
+        RETRIEVAL_STAGE_SECONDS.labels(stage="serialize", collection=request.collection_name).observe(seconds)
+
+
+def _search_options(request: RetrieveRequest) -> Dict[str, Any]:
+    return {
+        "n_results": request.n_results,
+        "include_metadata": request.include_metadata,
+        "rerank": request.rerank,
+        "ef": request.ef,
+        "nprobe": request.nprobe,
+        "repos": request.repos,
+        "hybrid": request.hybrid,
+        "min_similarity": request.min_similarity,
+        "max_distance": request.max_distance,
+    }
+
+
+async def _search_query(retrieval_service: RetrievalService, request: RetrieveRequest, query: str,
+                        timer: StageTimer) -> Dict[str, Any]:
+    """One query of a batch, on its own timer; its stages and counts are added to the batch timer."""
+    query_timer = StageTimer(RETRIEVAL_STAGE_SECONDS, collection=request.collection_name)
+    try:
+        return await retrieval_service.asearch(query, timer=query_timer, **_search_options(request))
+    finally:
+        for stage, seconds in query_timer.durations.items():
+            timer.add(stage, seconds)
+        for name, value in query_timer.counts.items():
+            timer.count(name, value)
+
+
+def _merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-query search results as one multi-query result (totals are summed)."""
+    return {
+        "documents": [result["documents"][0] for result in results],
+        "metadatas": [result["metadatas"][0] for result in results],
+        "distances": [result["distances"][0] for result in results],
+        "total_found": sum(result["total_found"] for result in results),
+        "filtered_results": sum(result["filtered_results"] for result in results),
+    }
+
+
+def _metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in metadata.items() if key in _METADATA_FIELDS}
+
+
+def _summary_line(request: RetrieveRequest, total_found: int, filtered_results: int, timer: StageTimer,
+                  start_time: float) -> bytes:
+    """Last line of a stream: totals, plus "debug" (timings including serialize and total, counts) when requested."""
+    summary = {"total_found": total_found, "filtered_results": filtered_results}
+    if request.debug:
+        timings_ms = {stage: seconds * 1000 for stage, seconds in timer.durations.items()}
+        timings_ms["total"] = (time.perf_counter() - start_time) * 1000
+        summary["debug"] = {"timings_ms": timings_ms, "counts": timer.counts}
+    return _json_line(summary)
+
+
+async def _stream_hits(request: RetrieveRequest, total_found: int, hits, timer: StageTimer, start_time: float):
+    """
+    NDJSON lines of one query's ranked hits, each encoded as the service hands
+    it out (no result lists, no response model). An async generator, so lines
+    are encoded on the event loop without a thread hop each.
+
+    Each hit is {"query": 0, "rank", "document", "metadata", "distance"}; the
+    last line is the summary. The request counts as ok once that is written.
+    """
+    status = "error"
+    serialize_seconds = 0.0
+    rank = 0
+    try:
+        async for hit in hits:
+            line_start = time.perf_counter()
+            line = _json_line({"query": 0, "rank": rank, "document": hit["document"],
+                               "metadata": _metadata(hit["metadata"]), "distance": hit["distance"]})
+            serialize_seconds += time.perf_counter() - line_start
+            rank += 1
+            yield line
+        _add_serialize(request, timer, serialize_seconds)
+        yield _summary_line(request, total_found, rank, timer, start_time)
+        status = "ok"
+    finally:
+        RETRIEVAL_REQUESTS.labels(collection=request.collection_name, status=status).inc()
+        RETRIEVAL_REQUEST_SECONDS.labels(collection=request.collection_name).observe(time.perf_counter() - start_time)
+
+
+async def _stream_queries(request: RetrieveRequest, retrieval_service: RetrievalService, timer: StageTimer,
+                          start_time: float):
+    """
+    NDJSON lines of a batch: the queries run concurrently and each one's results
+    are written as one line as soon as it finishes, in completion order:
+    {"query": index, "documents", "metadatas", "distances", "total_found",
+    "filtered_results"}, or {"query": index, "error"} for a failed query. The
+    last line is the summary of the whole batch.
+    """
+    async def indexed(index: int, query: str):
+        try:
+            return index, await _search_query(retrieval_service, request, query, timer), None
+        except Exception as e:
+            return index, None, e
+
+    status = "error"
+    failed = 0
+    total_found = filtered_results = 0
+    serialize_seconds = 0.0
+    tasks = [asyncio.ensure_future(indexed(index, query)) for index, query in enumerate(request.queries)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, result, error = await next_done
+            line_start = time.perf_counter()
+            if error is not None:
+                failed += 1
+                line = _json_line({"query": index, "error": f"Retrieval failed: {error}"})
+            else:
+                total_found += result["total_found"]
+                filtered_results += result["filtered_results"]
+                line = _json_line({
+                    "query": index,
+                    "documents": result["documents"][0],
+                    "metadatas": [_metadata(metadata) for metadata in result["metadatas"][0]],
+                    "distances": result["distances"][0],
+                    "total_found": result["total_found"],
+                    "filtered_results": result["filtered_results"]
+                })
+            serialize_seconds += time.perf_counter() - line_start
+            yield line
+        _add_serialize(request, timer, serialize_seconds)
+        yield _summary_line(request, total_found, filtered_results, timer, start_time)
+        status = "ok" if not failed else "error"
+    finally:
+        for task in tasks:
+            task.cancel()
+        RETRIEVAL_REQUESTS.labels(collection=request.collection_name, status=status).inc()
+        RETRIEVAL_REQUEST_SECONDS.labels(collection=request.collection_name).observe(time.perf_counter() - start_time)
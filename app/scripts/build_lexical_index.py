@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Lexical Index Builder
+
+Builds the BM25 lexical index of a collection from the rows it already holds,
+for collections ingested before LEXICAL_INDEX_DIR was set (new ingestions keep
+the index up to date themselves). Texts come from the document store when one
+is configured, otherwise from the collection. Existing entries are replaced,
+so the builder can be run again at any time.
+
+Usage:
+    python -m app.scripts.build_lexical_index beaglemind_col
+    python -m app.scripts.build_lexical_index beaglemind_docs --batch-size 5000
+"""
+
+import argparse
+import logging
+import time
+
+from app.services.document_store import get_document_store
+from app.services.lexical_index import get_lexical_index
+from app.services.vector_store import get_vector_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def build_lexical_index(name: str, batch_size: int = 1000) -> int:
+    """
+    Index every row of a collection.
+
+    Returns:
+        Number of rows indexed
+
+    Raises:
+        ValueError: If the collection does not exist or LEXICAL_INDEX_DIR is unset
+    """
+    index = get_lexical_index(name)
+    if index is None:
+        raise ValueError("LEXICAL_INDEX_DIR is not set")
+    store = get_vector_store()
+    store.connect()
+    if not store.has_collection(name):
+        raise ValueError(f"Collection '{name}' does not exist")
+    collection = store.get_collection(name)
+    collection.load()
+    documents = get_document_store(name)
+
+    indexed = 0
+    start_time = time.time()
+    for batch in collection.rows(batch_size):
+        texts = {row["id"]: row.get("document") or "" for row in batch}
+        if documents is not None:
+            texts.update(documents.get_many([chunk_id for chunk_id, text in texts.items() if not text]))
+        index.add_many((row["id"], row.get("repo_name") or "", texts[row["id"]]) for row in batch)
+        indexed += len(batch)
+        logger.info(f"[LEXICAL] Indexed {indexed} rows ({indexed / max(time.time() - start_time, 1e-6):.0f} rows/sec)")
+    index.flush()
+    logger.info(f"[LEXICAL] '{name}': {index.stats()}")
+    return indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the BM25 lexical index of an existing collection")
+    parser.add_argument("collection", help="Serving collection name (alias or collection)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows read per batch")
+    args = parser.parse_args()
+    build_lexical_index(args.collection, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,32 @@
 # filepath: /home/fayez/gsoc/rag_poc/src/forum_ingest.py
 import os
-import json
 import re
+import time
 import uuid
+import queue
 import logging
-from typing import List, Dict, Any
-from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import onnxruntime as ort
 from transformers import AutoTokenizer
 import numpy as np
 from datetime import datetime
 import dotenv
+from app.services.vector_store import VectorCollection, get_vector_store
+from app.services.document_store import get_document_store, offload_documents
+from app.services.lexical_index import get_lexical_index, index_lexically
+from app.services.near_duplicates import get_duplicate_filter
+from app.services.chunker import TokenAwareChunker
+from app.services.json_stream import iter_json_array
+from app.services.embedding_engine import encode_batch
+from app.services.ingestion_journal import IngestionJournal
+from app.config import (
+    FORUM_BATCH_SIZE, FORUM_MAX_IN_FLIGHT_BATCHES, FORUM_CHUNK_WORKERS, FORUM_EMBED_BATCH_SIZE,
+)
 
 dotenv.load_dotenv()
-MILVUS_HOST = os.getenv("MILVUS_HOST", "localhost")
-MILVUS_PORT = os.getenv("MILVUS_PORT", 19530)
-MILVUS_USER = os.getenv("MILVUS_USER")
-MILVUS_PASSWORD = os.getenv("MILVUS_PASSWORD")
-MILVUS_TOKEN = os.getenv("MILVUS_TOKEN")
-MILVUS_URI = os.getenv("MILVUS_URI")
 
 # Logging setup
 logging.basicConfig(level=logging.INFO)
@@ -55,74 +62,199 @@ def _encode_text(text: str, tokenizer, session) -> List[float]:
     
     return normalized_embedding.tolist()
 
-def semantic_chunk_post(content: str, language: str = "text", chunk_size: int = 512) -> List[str]:
+def semantic_chunk_post(content: str, chunker: TokenAwareChunker, language: str = "text") -> List[str]:
     """
-    Chunk forum post content using RecursiveCharacterTextSplitter.
-    More reliable than semantic chunking for forum posts.
+    Chunk forum post content to the embedding model's token budget.
+    The chunker is created once per ingestion run and shared by all posts.
     """
-    # Use RecursiveCharacterTextSplitter for reliable chunking of forum posts
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=50,  # Small overlap to maintain context
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
-    
-    chunks = text_splitter.split_text(content)
-    return [chunk for chunk in chunks if len(chunk.strip()) > 10]
+    return [content[start:end] for start, end in chunker.spans(content) if end - start > 10]
 
 def connect_milvus():
-    connect_kwargs = {'alias': "default", 'timeout': 30}
-    if MILVUS_URI:
-        connect_kwargs['uri'] = MILVUS_URI
-    else:
-        connect_kwargs['host'] = MILVUS_HOST
-        connect_kwargs['port'] = MILVUS_PORT
-    if MILVUS_USER:
-        connect_kwargs['user'] = MILVUS_USER
-    if MILVUS_PASSWORD:
-        connect_kwargs['password'] = MILVUS_PASSWORD
-    if MILVUS_TOKEN:
-        connect_kwargs['token'] = MILVUS_TOKEN
-    connections.connect(**connect_kwargs)
-
-def get_or_create_collection(collection_name: str, embedding_dim: int) -> Collection:
-    # Use the same 14-field schema as the retrieval service
-    fields = [
-        FieldSchema(name="id", dtype=DataType.VARCHAR, is_primary=True, max_length=100),
-        FieldSchema(name="document", dtype=DataType.VARCHAR, max_length=65535),
-        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=embedding_dim),
-        FieldSchema(name="file_name", dtype=DataType.VARCHAR, max_length=500),
-        FieldSchema(name="file_path", dtype=DataType.VARCHAR, max_length=1000),
-        FieldSchema(name="file_type", dtype=DataType.VARCHAR, max_length=50),
-        FieldSchema(name="source_link", dtype=DataType.VARCHAR, max_length=2000),
-        FieldSchema(name="chunk_index", dtype=DataType.INT64),
-        FieldSchema(name="language", dtype=DataType.VARCHAR, max_length=50),
-        FieldSchema(name="has_code", dtype=DataType.BOOL),
-        FieldSchema(name="repo_name", dtype=DataType.VARCHAR, max_length=200),
-        FieldSchema(name="content_quality_score", dtype=DataType.FLOAT),
-        FieldSchema(name="semantic_density_score", dtype=DataType.FLOAT),
-        FieldSchema(name="information_value_score", dtype=DataType.FLOAT),
-    ]
-    
-    schema = CollectionSchema(fields, "Forum content with semantic chunking")
-    if utility.has_collection(collection_name):
+    get_vector_store().connect()
+
+def get_or_create_collection(collection_name: str, embedding_dim: int) -> VectorCollection:
+    # Same schema as the retrieval service, without the links field
+    store = get_vector_store()
+    if store.has_collection(collection_name):
         logger.info(f"Collection '{collection_name}' already exists")
-        col = Collection(collection_name)
+        col = store.get_collection(collection_name)
     else:
         logger.info(f"Creating collection '{collection_name}'")
-        col = Collection(collection_name, schema)
-        index_params = {"metric_type": "COSINE", "index_type": "IVF_FLAT", "params": {"nlist": 1024}}
-        col.create_index("embedding", index_params)
+        col = store.create_collection(collection_name, embedding_dim, "Forum content with semantic chunking",
+                                      include_links=False)
     col.load()
     return col
 
-def ingest_forum_json(json_path: str, collection_name: str = "beaglemind_docs", model_name: str = "BAAI/bge-base-en-v1.5"):
+def _chunk_id(thread_index: int, thread_link: str, post_idx: int, chunk_idx: int) -> str:
+    """Deterministic chunk id, so a resumed run can replace rows of an interrupted batch."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{thread_index}:{thread_link}#{post_idx}/{chunk_idx}"))
+
+def chunk_thread(thread_index: int, thread: Dict[str, Any], chunker: TokenAwareChunker) -> List[Dict[str, Any]]:
+    """Split one forum thread into posts and chunks, returning chunk metadata rows."""
+    thread_link = thread.get("url", "")
+    thread_name = thread.get("thread_name", "")
+    content = thread.get("content", "")
+    
+    rows = []
+    # Split by 'Post #' (robust for forum dumps)
+    post_splits = [p for p in re.split(r'Post #\d+ by [^:]+:', content) if p.strip()]
+    for post_idx, post_text in enumerate(post_splits):
+        post_text = post_text.strip()
+        if not post_text or len(post_text) < 20:
+            continue
+            
+        # Semantic chunking
+        chunks = semantic_chunk_post(post_text, chunker)
+        for chunk_idx, chunk in enumerate(chunks):
+            if len(chunk.strip()) < 20:
+                continue
+                
+            # Only create metadata for the 14 fields
+            rows.append({
+                'id': _chunk_id(thread_index, thread_link, post_idx, chunk_idx),
+                'document': chunk[:65535],
+                'file_name': f"forum_post_{post_idx}",
+                'file_path': f"forum/{thread_name}",
+                'file_type': '.forum',
+                'source_link': thread_link[:2000],
+                'chunk_index': chunk_idx,
+                'language': 'text',
+                'has_code': False,
+                'repo_name': 'beagleboard_forum',
+                'content_quality_score': 0.7,
+                'semantic_density_score': 0.6,
+                'information_value_score': 0.8
+            })
+    return rows
+
+def iter_forum_threads(json_path: str, skip_threads: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Stream (index, thread) pairs from a forum dump, skipping the first skip_threads.
+    The top-level thread array is parsed incrementally, so the dump is never loaded whole.
+    """
+    with open(json_path, 'r') as f:
+        for index, thread in enumerate(iter_json_array(f)):
+            if index >= skip_threads:
+                yield index, thread
+
+def _iter_chunked_threads(threads: Iterator[Tuple[int, Dict[str, Any]]], chunker: TokenAwareChunker,
+                          workers: int, stats: Dict[str, float]) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Chunk threads on a worker pool, yielding (index, rows) in dump order with a bounded look-ahead."""
+    def timed_chunk(index, thread):
+        start = time.time()
+        rows = chunk_thread(index, thread, chunker)
+        return rows, time.time() - start
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="forum-chunk") as executor:
+        window = deque()
+        for index, thread in threads:
+            window.append((index, executor.submit(timed_chunk, index, thread)))
+            if len(window) >= workers * 2:
+                done_index, future = window.popleft()
+                rows, seconds = future.result()
+                stats['chunking_seconds'] += seconds
+                yield done_index, rows
+        while window:
+            done_index, future = window.popleft()
+            rows, seconds = future.result()
+            stats['chunking_seconds'] += seconds
+            yield done_index, rows
+
+def _put_until_stopped(batches: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put into the bounded queue, giving up if the consumer has stopped."""
+    while not stop.is_set():
+        try:
+            batches.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _produce_batches(chunked_threads: Iterator[Tuple[int, List[Dict[str, Any]]]], batch_size: int,
+                     batches: queue.Queue, stop: threading.Event, errors: List[Exception]):
+    """
+    Group chunk rows into (threads_done, rows) batches that end on thread
+    boundaries, so a committed batch means every thread before threads_done is
+    fully stored. A None sentinel marks the end of the stream.
+    """
+    try:
+        batch = []
+        threads_done = sent_threads_done = None
+        for index, rows in chunked_threads:
+            batch.extend(rows)
+            threads_done = index + 1
+            if len(batch) >= batch_size:
+                if not _put_until_stopped(batches, (threads_done, batch), stop):
+                    return
+                batch = []
+                sent_threads_done = threads_done
+        if threads_done != sent_threads_done:
+            # Sent even when empty so the checkpoint covers trailing threads without chunks
+            _put_until_stopped(batches, (threads_done, batch), stop)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        _put_until_stopped(batches, None, stop)
+
+def _delete_ids(collection: VectorCollection, ids: List[str]):
+    """Remove rows that an interrupted run may already have inserted."""
+    collection.delete(ids)
+
+def ingest_forum_json(json_path: str, collection_name: str = "beaglemind_docs", model_name: str = "BAAI/bge-base-en-v1.5",
+                      bulk_import: bool = False, batch_size: int = FORUM_BATCH_SIZE,
+                      max_in_flight_batches: int = FORUM_MAX_IN_FLIGHT_BATCHES,
+                      chunk_workers: int = FORUM_CHUNK_WORKERS,
+                      embed_batch_size: int = FORUM_EMBED_BATCH_SIZE,
+                      checkpoint_path: Optional[str] = None,
+                      restart: bool = False) -> Dict[str, Any]:
+    """
+    Stream a forum dump into Milvus, resumably.
+
+    Threads are parsed incrementally and chunked on a worker pool; a producer
+    thread hands thread-aligned batches to the embedding/insert loop through a
+    queue of at most max_in_flight_batches batches, so memory stays bounded
+    regardless of the dump size. Chunks are embedded embed_batch_size at a time.
+
+    Progress is recorded in a checkpoint journal (default: next to the dump).
+    A batch is journaled once all of its rows have been acknowledged by Milvus;
+    a restarted run skips the threads covered by the last committed batch and
+    deletes any rows of later, uncommitted batches before re-inserting them.
+
+    Returns:
+        Ingestion summary dictionary
+    """
+    start_time = time.time()
+    checkpoint_path = checkpoint_path or f"{json_path}.{collection_name}.checkpoint.jsonl"
+    journal = IngestionJournal(checkpoint_path)
+    if restart:
+        journal.reset()
+    
+    started = next(journal.events("start"), None)
+    if started and started.get("collection") != collection_name:
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to collection '{started.get('collection')}'; "
+                         f"use --restart or a different --checkpoint")
+    completed = journal.last("complete")
+    if completed:
+        logger.info(f"Forum dump already fully ingested according to {checkpoint_path}; use --restart to ingest again")
+        return {key: value for key, value in completed.items() if key not in ("event", "at")}
+    
+    committed = journal.last("batch")
+    submitted = journal.last("submitted")
+    resume_threads = committed["threads_done"] if committed else 0
+    resume_chunks = committed["chunks_total"] if committed else 0
+    # Rows of threads up to this point may exist without a committed checkpoint
+    uncertain_until = submitted["threads_done"] if submitted else 0
+    if started is None:
+        journal.append("start", json_path=os.path.abspath(json_path), collection=collection_name)
+    elif resume_threads or uncertain_until:
+        logger.info(f"Resuming from checkpoint: {resume_threads} threads / {resume_chunks} chunks already stored")
+    
     connect_milvus()
     
     # Initialize ONNX embedding model
     tokenizer = AutoTokenizer.from_pretrained("BAAI/bge-base-en-v1.5")
     session = ort.InferenceSession("onnx/model.onnx")
+    chunker = TokenAwareChunker(tokenizer)
     
     # Get embedding dimension
     sample_embedding = _encode_text("test", tokenizer, session)
@@ -131,89 +263,127 @@ def ingest_forum_json(json_path: str, collection_name: str = "beaglemind_docs",
     
     collection = get_or_create_collection(collection_name, embedding_dim)
     
-    with open(json_path, 'r') as f:
-        threads = json.load(f)
-    
-    # Prepare data for all 35 fields
-    chunk_data = []
-    for thread in threads:
-        thread_link = thread.get("url", "")
-        thread_name = thread.get("thread_name", "")
-        content = thread.get("content", "")
-        
-        # Split by 'Post #' (robust for forum dumps)
-        post_splits = [p for p in re.split(r'Post #\d+ by [^:]+:', content) if p.strip()]
-        for post_idx, post_text in enumerate(post_splits):
-            post_text = post_text.strip()
-            if not post_text or len(post_text) < 20:
-                continue
+    stats = {'chunking_seconds': 0.0}
+    batches: queue.Queue = queue.Queue(maxsize=max(1, max_in_flight_batches))
+    stop = threading.Event()
+    errors: List[Exception] = []
+    chunked_threads = _iter_chunked_threads(
+        iter_forum_threads(json_path, resume_threads), chunker, max(1, chunk_workers), stats
+    )
+    producer = threading.Thread(
+        target=_produce_batches,
+        args=(chunked_threads, max(1, batch_size), batches, stop, errors),
+        name="forum-batcher",
+        daemon=True,
+    )
+    producer.start()
+    
+    # Insert through the size-batched bulk inserter (single flush at the end),
+    # or write Parquet files and bulk-import them for very large dumps
+    embedding_time = 0.0
+    storage_time = 0.0
+    run_chunks = 0
+    threads_done = resume_threads
+    previous_threads_done = resume_threads
+    pending_checkpoints = deque()  # (rows added this run, threads_done, chunks_total)
+    
+    def commit_checkpoints(rows_committed: int):
+        while pending_checkpoints and pending_checkpoints[0][0] <= rows_committed:
+            _, done, total = pending_checkpoints.popleft()
+            journal.append("batch", threads_done=done, chunks_total=total)
+    
+    duplicates = get_duplicate_filter(collection_name, collection)
+    writer = index_lexically(
+        offload_documents(collection.writer(bulk_import=bulk_import), get_document_store(collection_name)),
+        get_lexical_index(collection_name),
+    )
+    try:
+        with writer:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                threads_done, items = batch
+                if duplicates is not None:
+                    # Quoted posts are not embedded or stored again
+                    items = duplicates.filter(items)
+                
+                step_start = time.time()
+                for i in range(0, len(items), max(1, embed_batch_size)):
+                    group = items[i:i + embed_batch_size]
+                    embeddings = encode_batch([item['document'] for item in group], tokenizer, session)
+                    for item, embedding in zip(group, embeddings):
+                        item['embedding'] = embedding
+                embedding_time += time.time() - step_start
+                
+                step_start = time.time()
+                if previous_threads_done < uncertain_until and items:
+                    _delete_ids(collection, [item['id'] for item in items])
+                # Journaled before the rows are handed over, so a crash mid-insert
+                # still marks them as possibly present
+                journal.append("submitted", threads_done=threads_done)
+                writer.add_rows(items)
+                storage_time += time.time() - step_start
+                
+                run_chunks += len(items)
+                pending_checkpoints.append((run_chunks, threads_done, resume_chunks + run_chunks))
+                commit_checkpoints(writer.rows_committed)
+                previous_threads_done = threads_done
                 
-            # Semantic chunking
-            chunks = semantic_chunk_post(post_text)
-            for chunk_idx, chunk in enumerate(chunks):
-                if len(chunk.strip()) < 20:
-                    continue
-                    
-                # Only create metadata for the 14 fields
-                chunk_data.append({
-                    'id': str(uuid.uuid4()),
-                    'document': chunk[:65535],
-                    'file_name': f"forum_post_{post_idx}",
-                    'file_path': f"forum/{thread_name}",
-                    'file_type': '.forum',
-                    'source_link': thread_link[:2000],
-                    'chunk_index': chunk_idx,
-                    'language': 'text',
-                    'has_code': False,
-                    'repo_name': 'beagleboard_forum',
-                    'content_quality_score': 0.7,
-                    'semantic_density_score': 0.6,
-                    'information_value_score': 0.8
-                })
-    
-    # Generate embeddings
-    logger.info(f"Generating embeddings for {len(chunk_data)} chunks...")
-    documents = [item['document'] for item in chunk_data]
-    
-    embeddings = []
-    for i, doc in enumerate(documents):
-        embedding = _encode_text(doc, tokenizer, session)
-        embeddings.append(embedding)
-        if i % 100 == 0:
-            logger.info(f"Generated embeddings: {i}/{len(documents)}")
-    
-    embeddings = np.array(embeddings)
-    
-    # Insert in batches with 14 fields
-    batch_size = 100
-    for i in range(0, len(chunk_data), batch_size):
-        batch_end = min(i + batch_size, len(chunk_data))
-        batch_data = chunk_data[i:batch_end]
-        batch_embeddings = embeddings[i:batch_end]
+                elapsed = time.time() - start_time
+                logger.info(f"[FORUM PROGRESS] {threads_done} threads, {resume_chunks + run_chunks} chunks "
+                            f"({run_chunks / elapsed:.1f} chunks/sec this run)")
+            if errors:
+                raise errors[0]
+            step_start = time.time()
+        storage_time += time.time() - step_start
+        # Writer closed cleanly: everything added has been inserted and flushed
+        commit_checkpoints(run_chunks)
         
-        # Prepare entities for 14 fields in correct order
-        entities = [
-            [item['id'] for item in batch_data],
-            [item['document'] for item in batch_data],
-            batch_embeddings.tolist(),
-            [item['file_name'] for item in batch_data],
-            [item['file_path'] for item in batch_data],
-            [item['file_type'] for item in batch_data],
-            [item['source_link'] for item in batch_data],
-            [item['chunk_index'] for item in batch_data],
-            [item['language'] for item in batch_data],
-            [item['has_code'] for item in batch_data],
-            [item['repo_name'] for item in batch_data],
-            [item['content_quality_score'] for item in batch_data],
-            [item['semantic_density_score'] for item in batch_data],
-            [item['information_value_score'] for item in batch_data]
-        ]
+        # Create a missing index; a policy change is only logged (rebuilds go through migrate_collection)
+        try:
+            collection.ensure_index()
+        except Exception as e:
+            logger.warning(f"Index check for '{collection_name}' failed (data is stored): {e}")
         
-        collection.insert(entities)
-        collection.flush()
-        logger.info(f"Inserted {batch_end}/{len(chunk_data)} chunks")
+        total_time = time.time() - start_time
+        threads_processed = threads_done - resume_threads
+        summary = {
+            'success': True,
+            'total_time': total_time,
+            'threads_processed': threads_processed,
+            'threads_skipped': resume_threads,
+            'chunks_generated': run_chunks,
+            'chunks_total': resume_chunks + run_chunks,
+            'near_duplicates_dropped': duplicates.dropped if duplicates is not None else 0,
+        }
+        journal.append("complete", **summary)
+    finally:
+        stop.set()
+        producer.join(timeout=5)
+        journal.close()
     
-    logger.info(f"Forum ingestion complete: {len(chunk_data)} chunks stored in '{collection_name}'")
+    logger.info("=" * 80)
+    logger.info("FORUM INGESTION COMPLETE")
+    logger.info("=" * 80)
+    logger.info(f"Dump: {json_path}")
+    logger.info(f"Collection: {collection_name}")
+    logger.info(f"Total Time: {total_time:.2f}s")
+    logger.info("")
+    logger.info("Processing Breakdown:")
+    logger.info(f"  Parsing & Chunking (worker time): {stats['chunking_seconds']:.2f}s")
+    logger.info(f"  Embedding Generation: {embedding_time:.2f}s")
+    logger.info(f"  Milvus Storage: {storage_time:.2f}s")
+    logger.info("")
+    logger.info("Results:")
+    logger.info(f"  Threads Processed: {threads_processed:,} (skipped from checkpoint: {resume_threads:,})")
+    logger.info(f"  Chunks Generated: {run_chunks:,} (total stored: {resume_chunks + run_chunks:,})")
+    if summary['near_duplicates_dropped']:
+        logger.info(f"  Near-Duplicates Dropped: {summary['near_duplicates_dropped']:,}")
+    if total_time > 0:
+        logger.info(f"  Processing Rate: {run_chunks / total_time:.1f} chunks/sec, {threads_processed / total_time:.1f} threads/sec")
+    logger.info("=" * 80)
+    return summary
 
 if __name__ == "__main__":
     import argparse
@@ -221,5 +391,16 @@ if __name__ == "__main__":
     parser.add_argument("json_path", help="Path to scraped_threads_complete.json")
     parser.add_argument("--collection", default="beaglemind_docs", help="Milvus collection name")
     parser.add_argument("--model", default="BAAI/bge-base-en-v1.5", help="Embedding model name")
+    parser.add_argument("--bulk-import", action="store_true", help="Store chunks via Parquet bulk import")
+    parser.add_argument("--batch-size", type=int, default=FORUM_BATCH_SIZE, help="Chunks per embedding/insert batch")
+    parser.add_argument("--max-in-flight", type=int, default=FORUM_MAX_IN_FLIGHT_BATCHES,
+                        help="Batches buffered between parsing and embedding (bounds memory)")
+    parser.add_argument("--chunk-workers", type=int, default=FORUM_CHUNK_WORKERS, help="Parallel chunking workers")
+    parser.add_argument("--embed-batch-size", type=int, default=FORUM_EMBED_BATCH_SIZE, help="Chunks per ONNX inference call")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint journal path (default: <json_path>.<collection>.checkpoint.jsonl)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and ingest from the start")
     args = parser.parse_args()
-    ingest_forum_json(args.json_path, args.collection, args.model)
\ No newline at end of file
+    ingest_forum_json(args.json_path, args.collection, args.model, args.bulk_import,
+                      args.batch_size, args.max_in_flight, args.chunk_workers, args.embed_batch_size,
+                      args.checkpoint, args.restart)
\ No newline at end of file
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+GitHub Fixture Server
+
+Serves recorded repositories over the subset of the GitHub API the ingesters
+use (repository info, recursive trees, raw file content, organization
+listings), so ingestion can be exercised without network access. Point the API
+at it with GITHUB_API_URL=http://host:port and GITHUB_RAW_URL=http://host:port/raw.
+
+Fixture file format (JSON):
+    {"repositories": {"owner/name": {"default_branch": "main",
+                                      "files": {"path/in/repo.md": "content", ...}}}}
+
+Usage:
+    python -m app.scripts.github_fixture_server --synthetic 3 --output fixtures.json
+    python -m app.scripts.github_fixture_server --record https://github.com/beagleboard/docs.beagleboard.io \\
+        --max-files 200 --output fixtures.json
+    python -m app.scripts.github_fixture_server fixtures.json --port 8765
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+from app.services.local_repository import git_blob_sha
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_MARKDOWN_SECTION = """
+## {title}
+
+The {board} exposes {count} GPIO lines on its expansion headers. Configure pins with
+`config-pin` or the device tree overlays in `/boot/dtbs`. See the [pinout](images/{slug}-pinout.png)
+and the ![header diagram](images/{slug}-header.png) before wiring external peripherals.
+
+```bash
+sudo config-pin P9_{pin} gpio
+echo out > /sys/class/gpio/gpio{line}/direction
+```
+"""
+
+_PYTHON_MODULE = '''
+"""Helpers for the {board} {peripheral} peripheral."""
+
+import os
+import time
+
+SYSFS_ROOT = "/sys/bus/iio/devices/iio:device0"
+
+
+def read_{peripheral}(channel: int, samples: int = {count}) -> float:
+    """Average `samples` raw readings of one channel."""
+    total = 0
+    for _ in range(samples):
+        with open(os.path.join(SYSFS_ROOT, f"in_voltage{{channel}}_raw")) as handle:
+            total += int(handle.read().strip())
+        time.sleep(0.001)
+    return total / samples
+'''
+
+_BOARDS = ["BeagleBone Black", "BeagleBone AI-64", "BeaglePlay", "BeagleY-AI", "PocketBeagle", "BeagleV-Fire"]
+_PERIPHERALS = ["adc", "pwm", "i2c", "spi", "uart", "can"]
+
+
+def synthetic_repository(seed: int, files: int = 60) -> Dict[str, Any]:
+    """A deterministic documentation-style repository (markdown, rst, python)."""
+    rng = random.Random(seed)
+    contents = {}
+    for index in range(files):
+        board = rng.choice(_BOARDS)
+        peripheral = rng.choice(_PERIPHERALS)
+        slug = board.lower().replace(" ", "-")
+        if index % 3 == 2:
+            contents[f"src/{peripheral}/{slug}_{index}.py"] = _PYTHON_MODULE.format(
+                board=board, peripheral=peripheral, count=rng.randint(4, 64))
+            continue
+        sections = "".join(
+            _MARKDOWN_SECTION.format(title=f"{board} {peripheral.upper()} part {part + 1}", board=board,
+                                     count=rng.randint(20, 90), slug=slug,
+                                     pin=rng.randint(11, 42), line=rng.randint(20, 120))
+            for part in range(rng.randint(2, 12))
+        )
+        extension = ".md" if index % 3 == 0 else ".rst"
+        contents[f"boards/{slug}/{peripheral}-{index}{extension}"] = f"# {board} {peripheral.upper()}\n{sections}"
+    return {"default_branch": "main", "files": contents}
+
+
+def record_repository(repo_url: str, branch: Optional[str] = None, max_files: int = 200) -> Tuple[str, Dict[str, Any]]:
+    """
+    Record the supported files of a real repository through the GitHub API.
+
+    Returns:
+        ("owner/name", fixture entry)
+    """
+    from app.services.github_client import GitHubClient
+
+    client = GitHubClient()
+    owner, name = urlparse(repo_url).path.strip("/").split("/")[:2]
+    info = client.get(f"https://api.github.com/repos/{owner}/{name}")
+    info.raise_for_status()
+    branch = branch or info.json().get("default_branch", "main")
+    tree = client.get(f"https://api.github.com/repos/{owner}/{name}/git/trees/{branch}?recursive=1")
+    tree.raise_for_status()
+
+    contents = {}
+    for item in tree.json().get("tree", []):
+        if item["type"] != "blob" or Path(item["path"]).suffix.lower() not in {".md", ".rst", ".txt", ".py", ".c", ".h"}:
+            continue
+        response = client.get(f"https://raw.githubusercontent.com/{owner}/{name}/{branch}/{item['path']}")
+        if response.ok:
+            contents[item["path"]] = response.content.decode("utf-8", errors="replace")
+        if len(contents) >= max_files:
+            break
+    logger.info(f"[FIXTURE] Recorded {len(contents)} files from {owner}/{name}@{branch}")
+    return f"{owner}/{name}", {"default_branch": branch, "files": contents}
+
+
+class _FixtureRepository:
+    """Precomputed API views of one fixture repository."""
+
+    def __init__(self, full_name: str, entry: Dict[str, Any], base_url: str):
+        self.full_name = full_name
+        self.default_branch = entry.get("default_branch", "main")
+        self.blobs = {path: content.encode("utf-8") for path, content in entry["files"].items()}
+        self.info = {
+            "full_name": full_name,
+            "name": full_name.split("/")[1],
+            "html_url": f"https://github.com/{full_name}",
+            "default_branch": self.default_branch,
+            "size": sum(len(data) for data in self.blobs.values()) // 1024,
+            "fork": False,
+            "archived": False,
+        }
+        self.tree = {"sha": self.default_branch, "truncated": False, "tree": [
+            {"path": path, "type": "blob", "sha": git_blob_sha(data), "size": len(data),
+             "url": f"{base_url}/repos/{full_name}/git/blobs/{git_blob_sha(data)}"}
+            for path, data in sorted(self.blobs.items())
+        ]}
+
+
+class GitHubFixtureServer:
+    """Threaded HTTP server answering GitHub API and raw-content requests from a fixture."""
+
+    def __init__(self, fixtures: Dict[str, Any], host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            fixtures: Parsed fixture document
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+        """
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.repositories = {
+            full_name.lower(): _FixtureRepository(full_name, entry, self.base_url)
+            for full_name, entry in fixtures["repositories"].items()
+        }
+        self.requests = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def raw_url(self) -> str:
+        return f"{self.base_url}/raw"
+
+    def start(self) -> "GitHubFixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="github-fixture", daemon=True)
+        self._thread.start()
+        logger.info(f"[FIXTURE] Serving {len(self.repositories)} repositories at {self.base_url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _route(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, Any]:
+        """(status, JSON-able body or raw bytes) for one GET request."""
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts[0] == "raw" and len(parts) >= 5:
+            repository = self.repositories.get(f"{parts[1]}/{parts[2]}".lower())
+            data = repository.blobs.get("/".join(parts[4:])) if repository else None
+            return (200, data) if data is not None else (404, {"message": "Not Found"})
+
+        if parts[0] == "repos" and len(parts) >= 3:
+            repository = self.repositories.get(f"{parts[1]}/{parts[2]}".lower())
+            if repository is None:
+                return 404, {"message": "Not Found"}
+            if len(parts) == 3:
+                return 200, repository.info
+            if parts[3:5] == ["git", "trees"]:
+                branch = "/".join(parts[5:])
+                return (200, repository.tree) if branch == repository.default_branch else (404, {"message": "Not Found"})
+
+        if parts[0] in ("orgs", "users") and len(parts) == 3 and parts[2] == "repos":
+            owner = parts[1].lower()
+            page = int(query.get("page", ["1"])[0])
+            per_page = int(query.get("per_page", ["30"])[0])
+            owned = [repo.info for name, repo in sorted(self.repositories.items()) if name.split("/")[0] == owner]
+            if not owned and page == 1:
+                return 404, {"message": "Not Found"}
+            return 200, owned[(page - 1) * per_page:page * per_page]
+
+        return 404, {"message": "Not Found"}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                parsed = urlparse(self.path)
+                status, body = server._route(parsed.path, parse_qs(parsed.query))
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream" if isinstance(body, bytes) else "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def load_fixtures(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve or build GitHub fixtures for offline ingestion")
+    parser.add_argument("fixtures", nargs="?", help="Fixture file to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--synthetic", type=int, default=0, help="Build this many synthetic repositories")
+    parser.add_argument("--files-per-repo", type=int, default=60, help="Files per synthetic repository")
+    parser.add_argument("--record", action="append", default=[], metavar="URL",
+                        help="Record a real repository (needs network; repeatable)")
+    parser.add_argument("--max-files", type=int, default=200, help="Files recorded per repository")
+    parser.add_argument("--output", help="Write the built fixture file here instead of serving")
+    args = parser.parse_args()
+
+    if args.synthetic or args.record:
+        fixtures = {"repositories": {}}
+        for index in range(args.synthetic):
+            fixtures["repositories"][f"loadtest/docs-{index}"] = synthetic_repository(index, args.files_per_repo)
+        for url in args.record:
+            full_name, entry = record_repository(url, max_files=args.max_files)
+            fixtures["repositories"][full_name] = entry
+        if not args.output:
+            parser.error("--output is required when building fixtures")
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(fixtures, f)
+        logger.info(f"[FIXTURE] Wrote {len(fixtures['repositories'])} repositories to {args.output}")
+        return
+
+    if not args.fixtures:
+        parser.error("a fixture file is required to serve")
+    server = GitHubFixtureServer(load_fixtures(args.fixtures), args.host, args.port).start()
+    logger.info(f"[FIXTURE] GITHUB_API_URL={server.base_url} GITHUB_RAW_URL={server.raw_url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,6 @@ import time
 #from app.config import MILVUS_HOST, MILVUS_PORT, MILVUS_USER, MILVUS_PASSWORD, MILVUS_TOKEN, MILVUS_URI
 
 
-import requests
 import os
 import time
 import uuid
@@ -32,16 +31,28 @@ import re
 import numpy as np
 import onnxruntime as ort
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
+from collections import deque
 from dotenv import load_dotenv
 
 #from app.config import MILVUS_HOST, MILVUS_PORT, MILVUS_USER, MILVUS_PASSWORD, MILVUS_TOKEN, MILVUS_URI
-from pymilvus import connections, Collection, CollectionSchema, FieldSchema, DataType, utility
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from transformers import AutoTokenizer
 from concurrent.futures import ThreadPoolExecutor
+from app.services.vector_store import get_vector_store
+from app.services.document_store import get_document_store, offload_documents
+from app.services.lexical_index import get_lexical_index, index_lexically
+from app.services.near_duplicates import get_duplicate_filter
+from app.services.content_analyzer import content_analyzer, assign_links_to_chunks
+from app.services.chunker import TokenAwareChunker
+from app.services.ingestion_journal import RepositoryJournal
+from app.services.github_client import GitHubClient
+from app.services.embedding_engine import EmbeddingEngine
+from app.services.bulk_ingestion import BulkIngestionRunner, list_organization_repositories
+from app.services.local_repository import LocalRepository, decode_file_content
+from app.services.metrics import INGESTION_ITEMS, INGESTION_STAGE_SECONDS, record_cache, record_model_loaded
+from app.config import INGESTION_JOURNAL_DIR, BULK_MAX_CONCURRENT_REPOS
 
 load_dotenv = load_dotenv
 from transformers import AutoTokenizer
@@ -52,23 +63,26 @@ import os
 import dotenv
 
 dotenv.load_dotenv()
-MILVUS_HOST = os.getenv("MILVUS_HOST", "localhost")
-MILVUS_PORT = os.getenv("MILVUS_PORT", 19530)
-MILVUS_USER = os.getenv("MILVUS_USER")
-MILVUS_PASSWORD = os.getenv("MILVUS_PASSWORD")
-MILVUS_TOKEN = os.getenv("MILVUS_TOKEN")
-MILVUS_URI = os.getenv("MILVUS_URI")
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Rows per journaled insert group (granularity of resumable storage)
+JOURNAL_COMMIT_GROUP = 256
+
+# Embedding batches queued ahead on the shared engine per ingestion
+ENGINE_PREFETCH_BATCHES = 4
+
 class GitHubDirectIngester:
     """Direct GitHub repository ingestion with semantic splitting and image metadata."""
     
     def __init__(self, collection_name: str = "beaglemind_col", 
                  model_name: str = "BAAI/bge-base-en-v1.5",
-                 github_token: Optional[str] = None):
+                 github_token: Optional[str] = None,
+                 bulk_import: bool = False,
+                 github_client: Optional[GitHubClient] = None,
+                 embedding_engine: Optional[EmbeddingEngine] = None):
         """
         Initialize the GitHub direct ingester.
         
@@ -76,43 +90,46 @@ class GitHubDirectIngester:
             collection_name: Name of the Milvus collection
             model_name: Embedding model name
             github_token: GitHub API token for higher rate limits
+            bulk_import: Store chunks via Parquet bulk import instead of inserts
+            github_client: Shared GitHub client (connection pool and rate-limit
+                budget); a private one is created if omitted
+            embedding_engine: Shared batching embedding engine; if omitted the
+                ingester loads its own ONNX session and embeds chunk by chunk
         """
         self.collection_name = collection_name
         self.model_name = model_name
         self.github_token = github_token
+        self.bulk_import = bulk_import
+        self.embedding_engine = embedding_engine
         
         # Initialize ONNX embedding model (offline mode)
         try:
-            # Use local tokenizer files instead of downloading from HuggingFace
-            self.embedding_tokenizer = AutoTokenizer.from_pretrained(
-                "onnx/", 
-                local_files_only=True
-            )
-            self.embedding_session = ort.InferenceSession("onnx/model.onnx")
-            logger.info(f"Loaded ONNX embedding model offline: {model_name}")
+            if embedding_engine is not None:
+                self.embedding_tokenizer = embedding_engine.tokenizer
+                self.embedding_session = embedding_engine.session
+                logger.info(f"Using shared embedding engine: {model_name}")
+            else:
+                # Use local tokenizer files instead of downloading from HuggingFace
+                self.embedding_tokenizer = AutoTokenizer.from_pretrained(
+                    "onnx/", 
+                    local_files_only=True
+                )
+                self.embedding_session = ort.InferenceSession("onnx/model.onnx")
+                record_model_loaded("embedding", "onnx/model.onnx")
+                logger.info(f"Loaded ONNX embedding model offline: {model_name}")
+            # Chunks are sized in embedding tokens; one chunker serves every file
+            self.chunker = TokenAwareChunker(self.embedding_tokenizer)
         except Exception as e:
             logger.error(f"Could not load ONNX embedding model: {e}")
             raise
         
-        # Setup GitHub API headers
-        self.github_headers = {
-            'Accept': 'application/vnd.github.v3+json',
-            'User-Agent': 'BeagleMind-Ingester/1.0'
-        }
-        if self.github_token:
-            self.github_headers['Authorization'] = f'token {self.github_token}'
+        # All GitHub requests go through one pooled, rate-limited client
+        self.github = github_client or GitHubClient(github_token)
         
         # Connect to Milvus and setup collection
         self._connect_to_milvus()
         self._setup_enhanced_collection()
         
-        # Image patterns for detection
-        self.image_patterns = [
-            r'!\[([^\]]*)\]\(([^)]+)\)',  # Markdown images
-            r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>',  # HTML images
-            r'\bhttps?://[^\s]+\.(?:png|jpg|jpeg|gif|svg|webp|bmp|ico)\b',  # Direct image URLs
-        ]
-        
         # Supported file types for processing
         self.supported_extensions = {
             '.md', '.txt', '.rst', '.py', '.js', '.ts', '.java', '.cpp', '.c', '.h',
@@ -122,6 +139,9 @@ class GitHubDirectIngester:
     
     def _encode_text(self, text: str) -> List[float]:
         """Encode text using ONNX embedding model"""
+        if self.embedding_engine is not None:
+            return self.embedding_engine.embed([text])[0]
+        
         inputs = self.embedding_tokenizer(
             text, 
             return_tensors="np", 
@@ -151,58 +171,13 @@ class GitHubDirectIngester:
         return normalized_embedding.tolist()
     
     def _connect_to_milvus(self):
-        """Connect to Milvus server with retry logic, using config.py variables."""
-        max_retries = 3
-        retry_delay = 2
-
-        milvus_host = MILVUS_HOST
-        milvus_port = MILVUS_PORT
-        milvus_user = MILVUS_USER
-        milvus_password = MILVUS_PASSWORD
-        milvus_token = MILVUS_TOKEN
-        milvus_uri = MILVUS_URI
-
-        for attempt in range(max_retries):
-            try:
-                # Disconnect any existing connections first
-                try:
-                    connections.disconnect("default")
-                except:
-                    pass
-
-                connect_kwargs = {
-                    'alias': "default",
-                    'timeout': 30
-                }
-                # Prefer URI if available (for Zilliz Cloud)
-                if milvus_uri:
-                    connect_kwargs['uri'] = milvus_uri
-                else:
-                    connect_kwargs['host'] = milvus_host
-                    connect_kwargs['port'] = milvus_port
-                if milvus_user:
-                    connect_kwargs['user'] = milvus_user
-                if milvus_password:
-                    connect_kwargs['password'] = milvus_password
-                if milvus_token:
-                    connect_kwargs['token'] = milvus_token
-
-                connections.connect(**connect_kwargs)
-
-                # Test connection by listing collections
-                utility.list_collections()
-                logger.info(f"Successfully connected to Milvus at {milvus_host}:{milvus_port}")
-                return
-
-            except Exception as e:
-                logger.warning(f"Connection attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    logger.info(f"Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    logger.error(f"Failed to connect to Milvus after {max_retries} attempts")
-                    raise
+        """Connect the configured vector store with retry logic (exponential backoff)."""
+        self.vector_store = get_vector_store()
+        try:
+            self.vector_store.connect(retries=3, retry_delay=2)
+        except Exception:
+            logger.error(f"Failed to connect to the '{self.vector_store.backend}' vector store")
+            raise
     
     def _setup_enhanced_collection(self):
         """Setup enhanced collection schema with comprehensive metadata."""
@@ -210,42 +185,28 @@ class GitHubDirectIngester:
         sample_embedding = self._encode_text("test")
         embedding_dim = len(sample_embedding)
         logger.info(f"Embedding dimension: {embedding_dim}")
-        
-        # Simplified schema matching retrieval service (14 fields)
-        fields = [
-            FieldSchema(name="id", dtype=DataType.VARCHAR, is_primary=True, max_length=100),
-            FieldSchema(name="document", dtype=DataType.VARCHAR, max_length=65535),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=embedding_dim),
-            FieldSchema(name="file_name", dtype=DataType.VARCHAR, max_length=500),
-            FieldSchema(name="file_path", dtype=DataType.VARCHAR, max_length=1000),
-            FieldSchema(name="file_type", dtype=DataType.VARCHAR, max_length=50),
-            FieldSchema(name="source_link", dtype=DataType.VARCHAR, max_length=2000),
-            FieldSchema(name="chunk_index", dtype=DataType.INT64),
-            FieldSchema(name="language", dtype=DataType.VARCHAR, max_length=50),
-            FieldSchema(name="has_code", dtype=DataType.BOOL),
-            FieldSchema(name="repo_name", dtype=DataType.VARCHAR, max_length=200),
-            FieldSchema(name="content_quality_score", dtype=DataType.FLOAT),
-            FieldSchema(name="semantic_density_score", dtype=DataType.FLOAT),
-            FieldSchema(name="information_value_score", dtype=DataType.FLOAT),
-        ]
-        
-        schema = CollectionSchema(fields, "Enhanced repository content with semantic chunking and image metadata")
+        store = self.vector_store
         
         # Handle existing collection with better error handling
         try:
-            if utility.has_collection(self.collection_name):
+            if store.has_collection(self.collection_name):
                 logger.info(f"Collection '{self.collection_name}' already exists, loading to append new data.")
-                self.collection = Collection(self.collection_name)
+                self.collection = store.get_collection(self.collection_name)
                 self.collection.load()
+                self._detect_links_field()
                 logger.info(f"Using existing collection '{self.collection_name}' - new data will be appended")
                 return
             
-            # Create new collection with retry logic
+            # Create new collection (shared 15-field schema, vector and scalar indexes) with retry logic
             max_create_retries = 3
             for attempt in range(max_create_retries):
                 try:
                     logger.info(f"Creating enhanced collection '{self.collection_name}' (attempt {attempt + 1})")
-                    self.collection = Collection(self.collection_name, schema)
+                    self.collection = store.create_collection(
+                        self.collection_name, embedding_dim,
+                        "Enhanced repository content with semantic chunking and image metadata",
+                        scalar_indexes=["file_type", "language", "repo_name", "has_code"],
+                    )
                     break
                 except Exception as create_error:
                     logger.warning(f"Collection creation attempt {attempt + 1} failed: {create_error}")
@@ -253,37 +214,16 @@ class GitHubDirectIngester:
                         time.sleep(3)  # Wait before retry
                         # Try to clean up any partial state
                         try:
-                            if utility.has_collection(self.collection_name):
-                                utility.drop_collection(self.collection_name)
+                            if store.has_collection(self.collection_name):
+                                store.drop_collection(self.collection_name)
                         except:
                             pass
                     else:
                         raise
             
-            # Create indexes with retry logic
-            try:
-                index_params = {
-                    "metric_type": "L2",
-                    "index_type": "IVF_FLAT",
-                    "params": {"nlist": 1024}
-                }
-                self.collection.create_index("embedding", index_params)
-                
-                # Create scalar indexes for efficient filtering
-                scalar_indexes = ["file_type", "language", "repo_name", "has_code"]
-                for field_name in scalar_indexes:
-                    try:
-                        self.collection.create_index(field_name)
-                    except Exception as idx_error:
-                        logger.warning(f"Could not create index for {field_name}: {idx_error}")
-                
-                logger.info("Created indexes for collection")
-            except Exception as index_error:
-                logger.warning(f"Index creation failed: {index_error}")
-                # Continue without indexes if they fail
-            
             # Load collection
             self.collection.load()
+            self._detect_links_field()
             logger.info(f"Collection '{self.collection_name}' ready for use")
             
         except Exception as e:
@@ -296,6 +236,12 @@ class GitHubDirectIngester:
                 logger.error("3. Wait a few minutes and try again")
             raise
     
+    def _detect_links_field(self):
+        """Collections created before the links field existed are written without it."""
+        self.has_links_field = "links" in self.collection.field_names
+        if not self.has_links_field:
+            logger.info(f"Collection '{self.collection_name}' has no 'links' field; chunk link metadata will not be stored")
+    
     def fetch_repository_tree(self, repo_owner: str, repo_name: str, 
                              branch: str = "main") -> List[Dict[str, Any]]:
         """
@@ -314,7 +260,7 @@ class GitHubDirectIngester:
         # Get repository info
         logger.info(f"[FETCH] Retrieving repository information...")
         repo_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}"
-        response = requests.get(repo_url, headers=self.github_headers)
+        response = self.github.get(repo_url)
         
         if response.status_code == 404:
             # Try 'master' branch if 'main' fails
@@ -332,7 +278,7 @@ class GitHubDirectIngester:
         # Get tree recursively
         logger.info(f"[FETCH] Retrieving file tree recursively...")
         tree_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/git/trees/{branch}?recursive=1"
-        response = requests.get(tree_url, headers=self.github_headers)
+        response = self.github.get(tree_url)
         response.raise_for_status()
         
         tree_data = response.json()
@@ -351,18 +297,8 @@ class GitHubDirectIngester:
                 
                 # Filter supported file types
                 if file_extension in self.supported_extensions or not file_extension:
-                    files.append({
-                        'path': file_path,
-                        'name': Path(file_path).name,
-                        'extension': file_extension,
-                        'sha': item['sha'],
-                        'size': item.get('size', 0),
-                        'url': item['url'],
-                        'download_url': f"https://raw.githubusercontent.com/{repo_owner}/{repo_name}/{branch}/{file_path}",
-                        'source_link': f"https://github.com/{repo_owner}/{repo_name}/blob/{branch}/{file_path}",
-                        'raw_url': f"https://raw.githubusercontent.com/{repo_owner}/{repo_name}/{branch}/{file_path}",
-                        'blob_url': f"https://github.com/{repo_owner}/{repo_name}/blob/{branch}/{file_path}"
-                    })
+                    files.append(self._file_info(repo_owner, repo_name, branch, file_path,
+                                                 item['sha'], item.get('size', 0), item['url']))
                     processed_files += 1
                     
                     # Log progress every 100 files
@@ -373,6 +309,64 @@ class GitHubDirectIngester:
         logger.info(f"[FETCH COMPLETE] Supported file types: {', '.join(sorted(self.supported_extensions))}")
         return files
     
+    def list_local_files(self, source: LocalRepository, repo_owner: str,
+                         repo_name: str) -> List[Dict[str, Any]]:
+        """
+        List the supported files of a local repository with the same metadata
+        (paths, blob SHAs, GitHub links) as fetch_repository_tree.
+        
+        Args:
+            source: Local checkout, mirror or directory
+            repo_owner: Repository owner used for links
+            repo_name: Repository name used for links
+            
+        Returns:
+            List of file information dictionaries
+        """
+        logger.info(f"[LOCAL] Listing files of {source.path} as {repo_owner}/{repo_name} (branch: {source.branch})")
+        files = []
+        total_items = 0
+        for file_path, sha, size in source.iter_files():
+            total_items += 1
+            file_extension = Path(file_path).suffix.lower()
+            if file_extension in self.supported_extensions or not file_extension:
+                if sha is None:
+                    # Plain directories: only files that are ingested are read and hashed
+                    try:
+                        sha = source.file_sha(file_path)
+                    except OSError as e:
+                        logger.warning(f"[LOCAL] Failed to read {file_path}: {e}")
+                        continue
+                files.append(self._file_info(
+                    repo_owner, repo_name, source.branch, file_path, sha, size,
+                    f"https://api.github.com/repos/{repo_owner}/{repo_name}/git/blobs/{sha}"
+                ))
+        logger.info(f"[LOCAL] Found {len(files)} supported files out of {total_items} files")
+        return files
+    
+    @staticmethod
+    def _file_info(repo_owner: str, repo_name: str, branch: str, file_path: str,
+                   sha: str, size: int, url: str) -> Dict[str, Any]:
+        """File information dictionary shared by the API and local sources."""
+        return {
+            'path': file_path,
+            'name': Path(file_path).name,
+            'extension': Path(file_path).suffix.lower(),
+            'sha': sha,
+            'size': size,
+            'url': url,
+            'download_url': f"https://raw.githubusercontent.com/{repo_owner}/{repo_name}/{branch}/{file_path}",
+            'source_link': f"https://github.com/{repo_owner}/{repo_name}/blob/{branch}/{file_path}",
+            'raw_url': f"https://raw.githubusercontent.com/{repo_owner}/{repo_name}/{branch}/{file_path}",
+            'blob_url': f"https://github.com/{repo_owner}/{repo_name}/blob/{branch}/{file_path}"
+        }
+    
+    @staticmethod
+    def _chunk_id(repo_owner: str, repo_name: str, branch: str, file_info: Dict[str, Any], chunk_index: int) -> str:
+        """Deterministic chunk id (repo, branch, path, blob SHA, index), stable across retries."""
+        key = f"{repo_owner}/{repo_name}@{branch}:{file_info['path']}@{file_info.get('sha', '')}#{chunk_index}"
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+    
     def fetch_file_content(self, file_info: Dict[str, Any]) -> Optional[str]:
         """
         Fetch content of a single file.
@@ -384,20 +378,11 @@ class GitHubDirectIngester:
             File content as string or None if failed
         """
         try:
-            response = requests.get(file_info['download_url'], headers=self.github_headers)
+            response = self.github.get(file_info['download_url'])
             response.raise_for_status()
             
             # Try to decode as UTF-8, fallback to latin-1
-            try:
-                content = response.content.decode('utf-8')
-            except UnicodeDecodeError:
-                try:
-                    content = response.content.decode('latin-1')
-                except UnicodeDecodeError:
-                    logger.warning(f"Could not decode {file_info['path']}, skipping")
-                    return None
-            
-            return content
+            return decode_file_content(response.content, file_info['path'])
             
         except Exception as e:
             logger.warning(f"Failed to fetch {file_info['path']}: {e}")
@@ -414,282 +399,55 @@ class GitHubDirectIngester:
         Returns:
             Tuple of (image_links, attachment_links, external_links)
         """
-        image_links = []
-        attachment_links = []
-        external_links = []
-        
-        # Extract markdown and HTML images
-        for pattern in self.image_patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE)
-            for match in matches:
-                if pattern.startswith('!\\['):  # Markdown image
-                    image_url = match.group(2)
-                elif pattern.startswith('<img'):  # HTML image
-                    image_url = match.group(1)
-                else:  # Direct URL
-                    image_url = match.group(0)
-                
-                # Resolve relative URLs
-                if base_url and not image_url.startswith(('http://', 'https://')):
-                    image_url = urljoin(base_url, image_url)
-                
-                image_links.append(image_url)
-        
-        # Extract links to attachments (PDFs, documents, etc.)
-        attachment_patterns = [
-            r'\[([^\]]+)\]\(([^)]+\.(?:pdf|doc|docx|ppt|pptx|xls|xlsx|zip|tar|gz))\)',
-            r'href=["\']([^"\']+\.(?:pdf|doc|docx|ppt|pptx|xls|xlsx|zip|tar|gz))["\']'
-        ]
-        
-        for pattern in attachment_patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE)
-            for match in matches:
-                attachment_url = match.group(2) if len(match.groups()) > 1 else match.group(1)
-                if base_url and not attachment_url.startswith(('http://', 'https://')):
-                    attachment_url = urljoin(base_url, attachment_url)
-                attachment_links.append(attachment_url)
-        
-        # Extract external links
-        link_patterns = [
-            r'\[([^\]]+)\]\((https?://[^)]+)\)',  # Markdown links
-            r'href=["\']([^"\']+)["\']',  # HTML links
-            r'\bhttps?://[^\s\)\]\},;"\'`<>]+',  # Direct URLs
-        ]
-        
-        for pattern in link_patterns:
-            matches = re.finditer(pattern, content)
-            for match in matches:
-                if len(match.groups()) > 1:
-                    link_url = match.group(2)
-                else:
-                    link_url = match.group(1) if match.groups() else match.group(0)
-                
-                # Filter out image and attachment links already captured
-                if (link_url.startswith(('http://', 'https://')) and 
-                    not any(ext in link_url.lower() for ext in ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.pdf', '.doc'])):
-                    external_links.append(link_url)
-        
-        # Remove duplicates and clean up
-        image_links = list(set(image_links))
-        attachment_links = list(set(attachment_links))
-        external_links = list(set(external_links))
+        analysis = content_analyzer.analyze(content, base_url=base_url)
+        return analysis['image_links'], analysis['attachment_links'], analysis['external_links']
+    
+    def semantic_chunk_spans(self, content: str, file_info: Dict[str, Any]) -> List[Tuple[int, int]]:
+        """
+        Chunk content to the embedding model's token budget and return chunk spans.
         
-        return image_links, attachment_links, external_links
+        Args:
+            content: Content to chunk
+            file_info: File information for context
+            
+        Returns:
+            List of (start, end) character offsets into content, sorted by start
+        """
+        return [(start, end) for start, end in self.chunker.spans(content) if end - start > 30]
     
-    def semantic_chunk_content(self, content: str, file_info: Dict[str, Any], 
-                              max_chunk_size: int = 1000) -> List[str]:
+    def semantic_chunk_content(self, content: str, file_info: Dict[str, Any]) -> List[str]:
         """
-        Perform chunking of content using RecursiveCharacterTextSplitter.
+        Perform token-aware chunking of content.
         
         Args:
             content: Content to chunk
             file_info: File information for context
-            max_chunk_size: Maximum chunk size
             
         Returns:
             List of chunk texts
         """
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=max_chunk_size,
-            chunk_overlap=100,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
-        
-        chunks = text_splitter.split_text(content)
-        return [chunk for chunk in chunks if len(chunk.strip()) > 30]
+        spans = self.semantic_chunk_spans(content, file_info)
+        return [content[start:end] for start, end in spans]
     
-    def analyze_content(self, content: str, file_info: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_content(self, content: str, file_info: Dict[str, Any], base_url: str = "") -> Dict[str, Any]:
         """
-        Analyze content for language, code elements, and quality metrics.
+        Analyze content for language, code elements, quality metrics and links.
+        
+        All features come from a single scan by the shared ContentAnalyzer.
         
         Args:
             content: Content to analyze
             file_info: File information
+            base_url: Base URL for resolving relative links
             
         Returns:
             Analysis results dictionary
         """
-        # Language detection based on file extension and content patterns
-        language = self._detect_language(content, file_info['extension'])
-        
-        # Extract code elements
-        code_elements = self._extract_code_elements(content, language)
-        
-        # Content type analysis
-        has_code = self._has_code_content(content, language)
-        has_documentation = self._has_documentation_content(content)
-        
-        # Extract keywords
-        keywords = self._extract_keywords(content)
-        
-        # Calculate quality scores
-        quality_scores = self._calculate_quality_scores(content, code_elements, has_documentation)
-        
-        return {
-            'language': language,
-            'has_code': has_code,
-            'has_documentation': has_documentation,
-            'function_names': code_elements['functions'],
-            'class_names': code_elements['classes'],
-            'import_statements': code_elements['imports'],
-            'keywords': keywords,
-            **quality_scores
-        }
-    
-    def _detect_language(self, content: str, file_extension: str) -> str:
-        """Detect programming language from content and extension."""
-        # Extension-based detection
-        extension_map = {
-            '.py': 'python', '.js': 'javascript', '.ts': 'typescript',
-            '.java': 'java', '.cpp': 'cpp', '.c': 'c', '.h': 'c',
-            '.css': 'css', '.html': 'html', '.xml': 'xml',
-            '.md': 'markdown', '.rst': 'rst', '.txt': 'text',
-            '.json': 'json', '.yaml': 'yaml', '.yml': 'yaml',
-            '.sh': 'shell', '.bat': 'batch', '.go': 'go',
-            '.rs': 'rust', '.rb': 'ruby', '.php': 'php', '.sql': 'sql'
-        }
-        
-        if file_extension in extension_map:
-            return extension_map[file_extension]
-        
-        # Pattern-based detection for unknown extensions
-        patterns = {
-            'python': [r'def\s+\w+', r'import\s+\w+', r'from\s+\w+\s+import', r'class\s+\w+'],
-            'javascript': [r'function\s+\w+', r'const\s+\'\w+', r'let\s+\w+', r'var\s+\w+'],
-            'java': [r'public\s+class', r'private\s+\w+', r'public\s+static'],
-            'cpp': [r'#include', r'std::', r'namespace\s+\w+'],
-            'css': [r'\.[\w-]+\s*{', r'#[\w-]+\s*{', r'@media'],
-            'html': [r'<html>', r'<div>', r'<!DOCTYPE'],
-            'markdown': [r'^#{1,6}\s', r'\[.*\]\(.*\)', r'```'],
-        }
-        
-        for lang, lang_patterns in patterns.items():
-            matches = sum(1 for pattern in lang_patterns if re.search(pattern, content, re.MULTILINE))
-            if matches >= 2:
-                return lang
-        
-        return 'unknown'
-    
-    def _extract_code_elements(self, content: str, language: str) -> Dict[str, List[str]]:
-        """Extract functions, classes, and imports from code."""
-        elements = {'functions': [], 'classes': [], 'imports': []}
-        
-        if language == 'python':
-            elements['functions'] = list(set(re.findall(r'def\s+(\w+)', content)))
-            elements['classes'] = list(set(re.findall(r'class\s+(\w+)', content)))
-            elements['imports'] = list(set(re.findall(r'(?:from\s+[\w.]+\s+)?import\s+[\w.,\s*]+', content)))
-            
-        elif language == 'javascript':
-            func_patterns = [
-                r'function\s+(\w+)',
-                r'(\w+)\s*=\s*function',
-                r'const\s+(\w+)\s*=\s*\(',
-                r'(\w+)\s*:\s*function'
-            ]
-            for pattern in func_patterns:
-                elements['functions'].extend(re.findall(pattern, content))
-            
-            elements['classes'] = list(set(re.findall(r'class\s+(\w+)', content)))
-            elements['imports'] = list(set(re.findall(r'import\s+.*?from\s+["\'].*?["\']', content)))
-            
-        elif language == 'java':
-            elements['functions'] = list(set(re.findall(r'(?:public|private|protected)?\s*\w+\s+(\w+)\s*\(', content)))
-            elements['classes'] = list(set(re.findall(r'(?:public\s+)?class\s+(\w+)', content)))
-            elements['imports'] = list(set(re.findall(r'import\s+[\w.]+;', content)))
-        
-        # Remove duplicates and limit size
-        for key in elements:
-            elements[key] = list(set(elements[key]))[:20]  # Limit to 20 items
-        
-        return elements
-    
-    def _has_code_content(self, content: str, language: str) -> bool:
-        """Determine if content contains code."""
-        code_indicators = [
-            r'def\s+\w+', r'function\s+\w+', r'class\s+\w+', r'import\s+\w+',
-            r'#include', r'namespace\s+\w+', r'public\s+class', r'private\s+\w+',
-            r'const\s+\w+\s*=', r'var\s+\w+\s*=', r'let\s+\w+\s*='
-        ]
-        
-        return any(re.search(pattern, content, re.IGNORECASE) for pattern in code_indicators)
-    
-    def _has_documentation_content(self, content: str) -> bool:
-        """Determine if content contains documentation."""
-        doc_indicators = [
-            r'""".*?"""', r"'''.*?'''", r'/\*\*.*?\*/', r'##\s+\w+',
-            r'###\s+\w+', r'#{1,6}\s+[A-Z]', r'@param', r'@return',
-            r'@throws', r'TODO:', r'FIXME:', r'NOTE:'
-        ]
-        
-        return any(re.search(pattern, content, re.DOTALL | re.IGNORECASE) for pattern in doc_indicators)
-    
-    def _extract_keywords(self, content: str) -> List[str]:
-        """Extract relevant keywords from content."""
-        # Remove code and markdown syntax
-        cleaned_content = re.sub(r'```.*?```', '', content, flags=re.DOTALL)
-        cleaned_content = re.sub(r'`[^`]+`', '', cleaned_content)
-        cleaned_content = re.sub(r'[(){}\[\]<>]', ' ', cleaned_content)
-        
-        # Extract words
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', cleaned_content.lower())
-        
-        # Filter stopwords and common terms
-        stopwords = {
-            'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'has', 'had',
-            'this', 'that', 'with', 'from', 'they', 'will', 'been', 'have', 'were',
-            'said', 'each', 'which', 'their', 'time', 'would', 'about', 'into',
-            'function', 'class', 'method', 'return', 'value', 'parameter', 'variable'
-        }
-        
-        # Count word frequency
-        word_freq = {}
-        for word in words:
-            if word not in stopwords and len(word) > 2:
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Return top keywords
-        keywords = sorted(word_freq.keys(), key=lambda x: word_freq[x], reverse=True)[:15]
-        return keywords
-    
-    def _calculate_quality_scores(self, content: str, code_elements: Dict, has_documentation: bool) -> Dict[str, float]:
-        """Calculate quality and information value scores."""
-        # Content quality score based on structure and completeness
-        quality_indicators = [
-            len(content) > 100,  # Reasonable length
-            '\n\n' in content,  # Paragraph structure
-            any(marker in content for marker in ['#', '##', '###']),  # Headers
-            has_documentation,  # Documentation present
-            len(code_elements['functions']) > 0,  # Has functions
-            len(re.findall(r'[.!?]', content)) > 2,  # Has sentences
-        ]
-        content_quality_score = sum(quality_indicators) / len(quality_indicators)
-        
-        # Semantic density based on unique concepts
-        unique_words = len(set(re.findall(r'\b\w{3,}\b', content.lower())))
-        total_words = len(re.findall(r'\b\w+\b', content))
-        semantic_density = (unique_words / total_words) if total_words > 0 else 0
-        
-        # Information value based on content richness
-        info_indicators = [
-            len(code_elements['functions']),
-            len(code_elements['classes']),
-            len(re.findall(r'https?://[^\s]+', content)),  # External references
-            len(re.findall(r'[A-Z][a-z]+(?:[A-Z][a-z]+)*', content)),  # CamelCase terms
-            content.count('```'),  # Code blocks
-        ]
-        max_info_value = sum([10, 5, 5, 20, 10])  # Maximum possible values
-        actual_info_value = sum([min(val, max_val) for val, max_val in zip(info_indicators, [10, 5, 5, 20, 10])])
-        information_value_score = actual_info_value / max_info_value
-        
-        return {
-            'content_quality_score': float(content_quality_score),
-            'semantic_density_score': float(min(semantic_density * 2, 1.0)),  # Scale to 0-1
-            'information_value_score': float(information_value_score)
-        }
+        return content_analyzer.analyze(content, file_info['extension'], base_url)
     
     def process_file(self, file_info: Dict[str, Any], repo_owner: str, 
-                    repo_name: str, branch: str) -> List[Dict[str, Any]]:
+                    repo_name: str, branch: str,
+                    source: Optional[LocalRepository] = None) -> List[Dict[str, Any]]:
         """
         Process a single file: fetch content, chunk semantically, and extract metadata.
         
@@ -698,6 +456,7 @@ class GitHubDirectIngester:
             repo_owner: Repository owner
             repo_name: Repository name
             branch: Repository branch
+            source: Local repository to read the file from instead of GitHub
             
         Returns:
             List of chunk metadata dictionaries
@@ -706,53 +465,42 @@ class GitHubDirectIngester:
         
         # Fetch file content
         logger.info(f"[PROCESS] Fetching content for: {file_info['name']}")
-        content = self.fetch_file_content(file_info)
+        if source is not None:
+            content = source.read_file(file_info['path'], file_info['sha'])
+        else:
+            content = self.fetch_file_content(file_info)
         if not content or len(content.strip()) < 50:
             logger.warning(f"[PROCESS] Skipping {file_info['path']}: content too short or empty (length: {len(content) if content else 0})")
             return []
         
         logger.info(f"[PROCESS] Content fetched successfully, size: {len(content)} characters")
         
-        # Extract images and links
-        logger.info(f"[PROCESS] Extracting images and links...")
+        # Analyze content and extract images and links in one pass
+        logger.info(f"[PROCESS] Analyzing content for language, quality metrics and links...")
         base_url = f"https://github.com/{repo_owner}/{repo_name}/blob/{branch}/"
-        image_links, attachment_links, external_links = self.extract_images_and_links(content, base_url)
+        content_analysis = self.analyze_content(content, file_info, base_url)
+        image_links = content_analysis['image_links']
+        attachment_links = content_analysis['attachment_links']
+        external_links = content_analysis['external_links']
         logger.info(f"[PROCESS] Found {len(image_links)} images, {len(attachment_links)} attachments, {len(external_links)} external links")
-        
-        # Analyze content
-        logger.info(f"[PROCESS] Analyzing content for language and quality metrics...")
-        content_analysis = self.analyze_content(content, file_info)
         logger.info(f"[PROCESS] Content analysis complete - Language: {content_analysis['language']}, Has code: {content_analysis['has_code']}")
         
         # Perform semantic chunking
         logger.info(f"[PROCESS] Performing semantic chunking...")
-        chunks = self.semantic_chunk_content(content, file_info)
-        logger.info(f"[PROCESS] Generated {len(chunks)} initial chunks")
+        spans = self.semantic_chunk_spans(content, file_info)
+        logger.info(f"[PROCESS] Generated {len(spans)} initial chunks")
+        
+        # Map each image/attachment reference to the chunks containing its offset
+        chunk_links = assign_links_to_chunks(spans, content_analysis['link_positions'])
         
         # Create metadata for each chunk
         chunk_metadata_list = []
-        for i, chunk in enumerate(chunks):
-            if len(chunk.strip()) < 30:  # Skip very small chunks
-                continue
-            
-            # Determine which images/attachments are relevant to this chunk
-            chunk_images = []
-            chunk_attachments = []
-            
-            # Simple heuristic: if image/attachment reference is in chunk, it's relevant
-            for img_link in image_links:
-                img_name = Path(img_link).name.lower()
-                if img_name in chunk.lower() or any(part in chunk.lower() for part in img_name.split('.')):
-                    chunk_images.append(img_link)
+        for i, (start, end) in enumerate(spans):
+            chunk = content[start:end]
             
-            for att_link in attachment_links:
-                att_name = Path(att_link).name.lower()
-                if att_name in chunk.lower():
-                    chunk_attachments.append(att_link)
-            
-            # Create metadata matching 14-field schema
+            # Create metadata matching the 15-field schema
             chunk_metadata = {
-                'id': str(uuid.uuid4()),
+                'id': self._chunk_id(repo_owner, repo_name, branch, file_info, i),
                 'document': chunk,
                 'file_name': file_info['name'],
                 'file_path': file_info['path'],
@@ -765,6 +513,7 @@ class GitHubDirectIngester:
                 'content_quality_score': content_analysis['content_quality_score'],
                 'semantic_density_score': content_analysis['semantic_density_score'],
                 'information_value_score': content_analysis['information_value_score'],
+                'links': chunk_links[i],
             }
             
             chunk_metadata_list.append(chunk_metadata)
@@ -773,104 +522,227 @@ class GitHubDirectIngester:
         logger.info(f"[PROCESS STATS] Quality score: {content_analysis['content_quality_score']:.3f}, Semantic density: {content_analysis['semantic_density_score']:.3f}")
         return chunk_metadata_list
     
-    def generate_embeddings_batch(self, chunks: List[str], batch_size: int = 64) -> List[List[float]]:
-        """Generate embeddings for chunks in batches using ONNX model."""
+    def generate_embeddings_batch(self, chunks: List[str], batch_size: int = 64,
+                                  progress=None,
+                                  on_batch: Optional[Callable[[int, List[List[float]]], None]] = None) -> List[List[float]]:
+        """Generate embeddings for chunks in batches using ONNX model.
+
+        If a job progress tracker is given, the "embeddings" stage is advanced per
+        batch and cancellation is checked before each batch. on_batch receives the
+        offset of each finished batch and its embeddings (used to spill them to disk).
+        """
         logger.info(f"[EMBEDDINGS] Starting embedding generation for {len(chunks)} chunks")
         logger.info(f"[EMBEDDINGS] Using batch size: {batch_size}")
         
         all_embeddings = []
         total_batches = (len(chunks) + batch_size - 1) // batch_size
         
-        for i in range(0, len(chunks), batch_size):
-            batch_num = (i // batch_size) + 1
-            batch = chunks[i:i + batch_size]
-            batch_embeddings = []
-            
-            logger.info(f"[EMBEDDINGS] Processing batch {batch_num}/{total_batches} ({len(batch)} chunks)")
-            
-            for j, chunk in enumerate(batch):
-                try:
-                    embedding = self._encode_text(chunk)
-                    batch_embeddings.append(embedding)
-                except Exception as e:
-                    logger.warning(f"[EMBEDDINGS] Failed to generate embedding for chunk {i+j+1}: {e}")
-                    # Add zero vector as placeholder
-                    sample_embedding = self._encode_text("test")
-                    batch_embeddings.append([0.0] * len(sample_embedding))
-            
-            all_embeddings.extend(batch_embeddings)
-            
-            # Log progress every 5 batches or for the last batch
-            if batch_num % 5 == 0 or batch_num == total_batches:
-                completed_chunks = min(i + batch_size, len(chunks))
-                progress_pct = (completed_chunks / len(chunks)) * 100
-                logger.info(f"[EMBEDDINGS PROGRESS] Completed {completed_chunks}/{len(chunks)} chunks ({progress_pct:.1f}%)")
+        batches = self._embed_batches(chunks, batch_size)
+        try:
+            for i, batch_embeddings in batches:
+                batch_num = (i // batch_size) + 1
+                logger.info(f"[EMBEDDINGS] Processing batch {batch_num}/{total_batches} ({len(batch_embeddings)} chunks)")
+                if progress is not None:
+                    progress.raise_if_cancelled()
+                
+                all_embeddings.extend(batch_embeddings)
+                if on_batch is not None:
+                    on_batch(i, batch_embeddings)
+                if progress is not None:
+                    progress.advance("embeddings", len(batch_embeddings))
+                INGESTION_ITEMS.labels(collection=self.collection_name, stage="embeddings").inc(len(batch_embeddings))
+                
+                # Log progress every 5 batches or for the last batch
+                if batch_num % 5 == 0 or batch_num == total_batches:
+                    completed_chunks = min(i + batch_size, len(chunks))
+                    progress_pct = (completed_chunks / len(chunks)) * 100
+                    logger.info(f"[EMBEDDINGS PROGRESS] Completed {completed_chunks}/{len(chunks)} chunks ({progress_pct:.1f}%)")
+        finally:
+            batches.close()
         
         logger.info(f"[EMBEDDINGS COMPLETE] Generated {len(all_embeddings)} embeddings successfully")
         return all_embeddings
     
+    def _embed_batches(self, chunks: List[str], batch_size: int):
+        """
+        Yield (offset, embeddings) per batch of chunks, in order.
+        
+        With the shared engine, up to ENGINE_PREFETCH_BATCHES batches are queued
+        ahead so the engine can pack them with other ingestions' work; requests
+        still queued when the caller stops are cancelled. Without it, chunks are
+        encoded one by one, with a zero vector for any that fail.
+        """
+        if self.embedding_engine is None:
+            for i in range(0, len(chunks), batch_size):
+                batch_embeddings = []
+                for j, chunk in enumerate(chunks[i:i + batch_size]):
+                    try:
+                        embedding = self._encode_text(chunk)
+                        batch_embeddings.append(embedding)
+                    except Exception as e:
+                        logger.warning(f"[EMBEDDINGS] Failed to generate embedding for chunk {i+j+1}: {e}")
+                        # Add zero vector as placeholder
+                        sample_embedding = self._encode_text("test")
+                        batch_embeddings.append([0.0] * len(sample_embedding))
+                yield i, batch_embeddings
+            return
+        
+        offsets = iter(range(0, len(chunks), batch_size))
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < ENGINE_PREFETCH_BATCHES:
+                    i = next(offsets, None)
+                    if i is None:
+                        break
+                    pending.append((i, self.embedding_engine.submit(chunks[i:i + batch_size])))
+                if not pending:
+                    return
+                i, request = pending.popleft()
+                yield i, request.result()
+        finally:
+            for _, request in pending:
+                request.cancel()
+    
     def store_chunks_batch(self, chunk_metadata_list: List[Dict[str, Any]], 
-                          embeddings: List[List[float]], batch_size: int = 100):
-        """Store chunks and embeddings in Milvus."""
-        logger.info(f"[STORAGE] Starting storage of {len(chunk_metadata_list)} chunks in Milvus")
-        logger.info(f"[STORAGE] Using batch size: {batch_size}")
+                          embeddings: List[List[float]], progress=None,
+                          bulk_import: Optional[bool] = None,
+                          journal: Optional[RepositoryJournal] = None):
+        """Store chunks and embeddings in Milvus.
+
+        Rows go through the size-batched, pipelined bulk inserter, which flushes
+        once at the end instead of after every batch. With bulk_import, rows are
+        written to Parquet files and registered with a single bulk-import request.
+
+        If a job progress tracker is given, the "inserts" stage is advanced per
+        inserted batch and cancellation is checked while rows are queued.
+
+        With a journal, rows are handed over in groups recorded as "submitted"
+        first and "committed" once Milvus has acknowledged them; rows submitted by
+        an interrupted earlier attempt are deleted before being inserted again.
+        """
+        if bulk_import is None:
+            bulk_import = self.bulk_import
+        logger.info(f"[STORAGE] Starting storage of {len(chunk_metadata_list)} chunks in Milvus "
+                    f"({'bulk import' if bulk_import else 'pipelined insert'})")
+        
+        on_batch_inserted = None
+        if not bulk_import:
+            inserted_rows = INGESTION_ITEMS.labels(collection=self.collection_name, stage="inserts")
+            
+            def on_batch_inserted(n):
+                inserted_rows.inc(n)
+                if progress is not None:
+                    progress.advance("inserts", n)
+        writer = index_lexically(
+            offload_documents(
+                self.collection.writer(bulk_import=bulk_import, on_batch_inserted=on_batch_inserted),
+                get_document_store(self.collection_name),
+            ),
+            get_lexical_index(self.collection_name),
+        )
         
-        total_batches = (len(chunk_metadata_list) + batch_size - 1) // batch_size
+        rows_added = 0
+        pending_commits = deque()  # (rows added when the group was queued, chunk ids)
         
-        for i in range(0, len(chunk_metadata_list), batch_size):
-            batch_num = (i // batch_size) + 1
-            end_idx = min(i + batch_size, len(chunk_metadata_list))
-            batch_metadata = chunk_metadata_list[i:end_idx]
-            batch_embeddings = embeddings[i:end_idx]
-            
-            logger.info(f"[STORAGE] Processing batch {batch_num}/{total_batches} ({len(batch_metadata)} chunks)")
-            
-            # Prepare insert data (14 fields matching retrieval service schema)
-            insert_data = [
-                [item['id'] for item in batch_metadata],
-                [item['document'][:65535] for item in batch_metadata],
-                batch_embeddings,
-                [item['file_name'][:500] for item in batch_metadata],
-                [item['file_path'][:1000] for item in batch_metadata],
-                [item['file_type'][:50] for item in batch_metadata],
-                [item['source_link'][:2000] for item in batch_metadata],
-                [item['chunk_index'] for item in batch_metadata],
-                [item['language'][:50] for item in batch_metadata],
-                [item['has_code'] for item in batch_metadata],
-                [item['repo_name'][:200] for item in batch_metadata],
-                [item['content_quality_score'] for item in batch_metadata],
-                [item['semantic_density_score'] for item in batch_metadata],
-                [item['information_value_score'] for item in batch_metadata],
-            ]
-            
-            try:
-                self.collection.insert(insert_data)
-                self.collection.flush()
-                logger.info(f"[STORAGE] Batch {batch_num}/{total_batches} stored successfully")
-            except Exception as e:
-                logger.error(f"[STORAGE ERROR] Failed to store batch {batch_num}/{total_batches}: {e}")
-                raise
-            
+        def commit_acknowledged(rows_committed: int):
+            while pending_commits and pending_commits[0][0] <= rows_committed:
+                journal.record_committed(pending_commits.popleft()[1])
+        
+        try:
+            with writer:
+                for group_start in range(0, len(chunk_metadata_list), JOURNAL_COMMIT_GROUP):
+                    group = chunk_metadata_list[group_start:group_start + JOURNAL_COMMIT_GROUP]
+                    if journal is not None:
+                        group_ids = [item['id'] for item in group]
+                        stale_ids = [chunk_id for chunk_id in group_ids if chunk_id in journal.submitted]
+                        if stale_ids:
+                            self.collection.delete(stale_ids)
+                        journal.record_submitted(group_ids)
+                    
+                    for i, item in enumerate(group, start=group_start):
+                        if progress is not None and i % 100 == 0:
+                            progress.raise_if_cancelled()
+                        # Row matching the retrieval service schema
+                        row = {
+                            'id': item['id'],
+                            'document': item['document'][:65535],
+                            'embedding': embeddings[i],
+                            'file_name': item['file_name'][:500],
+                            'file_path': item['file_path'][:1000],
+                            'file_type': item['file_type'][:50],
+                            'source_link': item['source_link'][:2000],
+                            'chunk_index': item['chunk_index'],
+                            'language': item['language'][:50],
+                            'has_code': item['has_code'],
+                            'repo_name': item['repo_name'][:200],
+                            'content_quality_score': item['content_quality_score'],
+                            'semantic_density_score': item['semantic_density_score'],
+                            'information_value_score': item['information_value_score'],
+                        }
+                        if self.has_links_field:
+                            row['links'] = item.get('links', {})
+                        writer.add_row(row)
+                    
+                    rows_added += len(group)
+                    if journal is not None:
+                        pending_commits.append((rows_added, group_ids))
+                        commit_acknowledged(writer.rows_committed)
+            if journal is not None:
+                # Writer closed cleanly: every row is inserted and flushed
+                commit_acknowledged(rows_added)
+        except Exception as e:
+            logger.error(f"[STORAGE ERROR] Failed to store chunks: {e}")
+            raise
+        
+        if bulk_import:
+            INGESTION_ITEMS.labels(collection=self.collection_name, stage="inserts").inc(len(chunk_metadata_list))
+            if progress is not None:
+                progress.advance("inserts", len(chunk_metadata_list))
+        if not bulk_import:
+            logger.info(f"[STORAGE] {writer.batches_inserted} batches inserted, {writer.flushes} flush(es)")
         logger.info(f"[STORAGE COMPLETE] All {len(chunk_metadata_list)} chunks stored successfully in collection '{self.collection_name}'")
     
-    def ingest_repository(self, repo_url: str, branch: str = "main", 
-                         max_workers: int = 8) -> Dict[str, Any]:
+    def ingest_repository(self, repo_url: Optional[str], branch: str = "main", 
+                         max_workers: int = 8, progress=None,
+                         resume: bool = True,
+                         local_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Complete repository ingestion pipeline.
         
         Args:
-            repo_url: GitHub repository URL
+            repo_url: GitHub repository URL (links and ids are built from it);
+                with local_path it may be None if the checkout's origin is on GitHub
             branch: Branch to ingest
             max_workers: Number of parallel workers
+            progress: Optional JobProgress updated per stage (files, chunks,
+                embeddings, inserts); its cancellation flag aborts the run
+                with IngestionCancelled between units of work
+            resume: Journal progress under INGESTION_JOURNAL_DIR so that a
+                retry after a failure or cancellation skips processed files,
+                reuses spilled embeddings and only stores missing chunks
+            local_path: Read files from this local checkout, bare mirror or
+                directory instead of the GitHub API (no network access)
             
         Returns:
             Ingestion results dictionary
         """
         start_time = time.time()
-        logger.info(f"[INGESTION START] Repository: {repo_url}, Branch: {branch}")
+        
+        source = None
+        if local_path:
+            source = LocalRepository(local_path, branch)
+            branch = source.branch
+            if not repo_url:
+                remote = source.github_repository()
+                if remote is None:
+                    raise ValueError(f"{local_path} has no GitHub origin remote; pass the repository URL")
+                repo_url = f"https://github.com/{remote[0]}/{remote[1]}"
+        logger.info(f"[INGESTION START] Repository: {repo_url}, Branch: {branch}"
+                    + (f", Local path: {source.path}" if source else ""))
         
         # Parse repository URL
-        repo_match = re.match(r'https://github\.com/([^/]+)/([^/]+)/?', repo_url.rstrip('/'))
+        repo_match = re.match(r'https://github\.com/([^/]+)/([^/]+)/?', (repo_url or "").rstrip('/'))
         if not repo_match:
             logger.error(f"[INGESTION ERROR] Invalid GitHub repository URL: {repo_url}")
             raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
@@ -878,31 +750,75 @@ class GitHubDirectIngester:
         repo_owner, repo_name = repo_match.groups()
         logger.info(f"[INGESTION] Repository owner: {repo_owner}, name: {repo_name}")
         
+        journal = None
+        if resume and INGESTION_JOURNAL_DIR:
+            journal = RepositoryJournal(INGESTION_JOURNAL_DIR, self.collection_name, repo_owner, repo_name, branch)
+        
         try:
             # Step 1: Fetch repository tree
             logger.info("[STEP 1/4] Fetching repository tree...")
             step_start = time.time()
-            files = self.fetch_repository_tree(repo_owner, repo_name, branch)
+            if progress is not None:
+                progress.set_stage("files")
+            if source is not None:
+                files = self.list_local_files(source, repo_owner, repo_name)
+            else:
+                files = self.fetch_repository_tree(repo_owner, repo_name, branch)
             tree_time = time.time() - step_start
             logger.info(f"[STEP 1 COMPLETE] Repository tree fetched in {tree_time:.2f}s ({len(files)} files)")
+            INGESTION_STAGE_SECONDS.labels(collection=self.collection_name, stage="tree").observe(tree_time)
+            if progress is not None:
+                progress.set_total("files", len(files))
+                progress.raise_if_cancelled()
             
             # Step 2: Process files in parallel
-            logger.info(f"[STEP 2/4] Processing {len(files)} files in parallel (max workers: {max_workers})...")
             step_start = time.time()
             all_chunk_metadata = []
-            processed_files = 0
+            
+            # Files processed by an earlier attempt at the same blob SHA are reused
+            files_to_process = files
+            resumed_files = 0
+            if journal is not None:
+                files_to_process = []
+                for file_info in files:
+                    rows = journal.processed_rows(file_info['path'], file_info['sha'])
+                    if rows is None:
+                        files_to_process.append(file_info)
+                    else:
+                        all_chunk_metadata.extend(rows)
+                        resumed_files += 1
+                if resumed_files:
+                    logger.info(f"[JOURNAL] Reusing {resumed_files} files ({len(all_chunk_metadata)} chunks) from the previous attempt")
+                    if progress is not None:
+                        progress.advance("files", resumed_files)
+                        progress.advance("chunks", len(all_chunk_metadata))
+                record_cache("journal_files", self.collection_name, True, resumed_files)
+                record_cache("journal_files", self.collection_name, False, len(files_to_process))
+            processed_files = resumed_files
+            logger.info(f"[STEP 2/4] Processing {len(files_to_process)} files in parallel (max workers: {max_workers})...")
             
             def process_single_file(file_info):
-                return self.process_file(file_info, repo_owner, repo_name, branch)
+                return self.process_file(file_info, repo_owner, repo_name, branch, source=source)
             
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_file = {executor.submit(process_single_file, file_info): file_info for file_info in files}
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest-file") as executor:
+                future_to_file = {executor.submit(process_single_file, file_info): file_info for file_info in files_to_process}
                 
                 for future in concurrent.futures.as_completed(future_to_file):
+                    if progress is not None and progress.cancelled:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        progress.raise_if_cancelled()
                     try:
                         chunk_metadata = future.result()
+                        if journal is not None:
+                            file_info = future_to_file[future]
+                            journal.record_file(file_info['path'], file_info['sha'], chunk_metadata)
                         all_chunk_metadata.extend(chunk_metadata)
                         processed_files += 1
+                        INGESTION_ITEMS.labels(collection=self.collection_name, stage="files").inc()
+                        INGESTION_ITEMS.labels(collection=self.collection_name, stage="chunks").inc(len(chunk_metadata))
+                        if progress is not None:
+                            progress.advance("files")
+                            progress.advance("chunks", len(chunk_metadata))
                         
                         # Log progress every 10 files
                         if processed_files % 10 == 0 or processed_files == len(files):
@@ -914,25 +830,80 @@ class GitHubDirectIngester:
             
             processing_time = time.time() - step_start
             logger.info(f"[STEP 2 COMPLETE] File processing completed in {processing_time:.2f}s ({len(all_chunk_metadata)} chunks generated)")
+            INGESTION_STAGE_SECONDS.labels(collection=self.collection_name, stage="processing").observe(processing_time)
             
             if not all_chunk_metadata:
                 logger.warning("[INGESTION WARNING] No chunks generated from repository")
+                if journal is not None:
+                    journal.discard()
                 return {'success': False, 'message': 'No processable content found'}
             
-            # Step 3: Generate embeddings
-            logger.info(f"[STEP 3/4] Generating embeddings for {len(all_chunk_metadata)} chunks...")
+            # Chunks an earlier attempt already stored are not embedded or inserted again
+            pending_chunks = all_chunk_metadata
+            if journal is not None:
+                pending_chunks = [item for item in all_chunk_metadata if item['id'] not in journal.committed]
+                if len(pending_chunks) < len(all_chunk_metadata):
+                    logger.info(f"[JOURNAL] {len(all_chunk_metadata) - len(pending_chunks)} chunks already stored by the previous attempt")
+            already_stored = len(all_chunk_metadata) - len(pending_chunks)
+            
+            # Near-duplicates of stored chunks (copied or generated pages) are not embedded or stored
+            duplicates = get_duplicate_filter(self.collection_name, self.collection)
+            if duplicates is not None:
+                pending_chunks = duplicates.filter(pending_chunks)
+            
+            # Step 3: Generate embeddings (reusing embeddings spilled by an earlier attempt)
+            logger.info(f"[STEP 3/4] Generating embeddings for {len(pending_chunks)} chunks...")
             step_start = time.time()
-            chunks = [item['document'] for item in all_chunk_metadata]
-            embeddings = self.generate_embeddings_batch(chunks)
+            spilled = journal.load_embeddings([item['id'] for item in pending_chunks]) if journal is not None else {}
+            to_embed = [item for item in pending_chunks if item['id'] not in spilled]
+            if spilled:
+                logger.info(f"[JOURNAL] Reusing {len(spilled)} spilled embeddings")
+            if journal is not None:
+                record_cache("journal_embeddings", self.collection_name, True, len(spilled))
+                record_cache("journal_embeddings", self.collection_name, False, len(to_embed))
+            if progress is not None:
+                progress.set_total("chunks", len(all_chunk_metadata))
+                progress.set_total("embeddings", len(pending_chunks))
+                progress.advance("embeddings", len(spilled))
+                progress.set_stage("embeddings")
+            
+            on_batch = None
+            if journal is not None:
+                def on_batch(offset, batch_embeddings):
+                    batch_ids = [item['id'] for item in to_embed[offset:offset + len(batch_embeddings)]]
+                    journal.spill_embeddings(batch_ids, batch_embeddings)
+            new_embeddings = []
+            if to_embed:
+                new_embeddings = self.generate_embeddings_batch(
+                    [item['document'] for item in to_embed], progress=progress, on_batch=on_batch
+                )
+            embeddings_by_id = dict(spilled)
+            embeddings_by_id.update(zip((item['id'] for item in to_embed), new_embeddings))
+            embeddings = [embeddings_by_id[item['id']] for item in pending_chunks]
             embedding_time = time.time() - step_start
             logger.info(f"[STEP 3 COMPLETE] Embeddings generated in {embedding_time:.2f}s")
+            INGESTION_STAGE_SECONDS.labels(collection=self.collection_name, stage="embedding").observe(embedding_time)
             
             # Step 4: Store in Milvus
-            logger.info(f"[STEP 4/4] Storing {len(all_chunk_metadata)} chunks in Milvus collection '{self.collection_name}'...")
+            logger.info(f"[STEP 4/4] Storing {len(pending_chunks)} chunks in Milvus collection '{self.collection_name}'...")
             step_start = time.time()
-            self.store_chunks_batch(all_chunk_metadata, embeddings)
+            if progress is not None:
+                progress.set_total("inserts", len(pending_chunks))
+                progress.set_stage("inserts")
+            self.store_chunks_batch(pending_chunks, embeddings, progress=progress, journal=journal)
             storage_time = time.time() - step_start
             logger.info(f"[STEP 4 COMPLETE] Data stored in Milvus in {storage_time:.2f}s")
+            INGESTION_STAGE_SECONDS.labels(collection=self.collection_name, stage="storage").observe(storage_time)
+            
+            # Everything is stored; a later run of the same repository starts fresh
+            if journal is not None:
+                journal.discard()
+            
+            # Create a missing index; a policy change is only logged (rebuilds go through migrate_collection)
+            try:
+                self.collection.ensure_index()
+            except Exception as e:
+                logger.warning(f"[INDEX] Index check for '{self.collection_name}' failed (data is stored): {e}")
             
             # Summary
             total_time = time.time() - start_time
@@ -957,6 +928,11 @@ class GitHubDirectIngester:
             logger.info("Results:")
             logger.info(f"  Files Processed: {len(files):,}")
             logger.info(f"  Chunks Generated: {len(all_chunk_metadata):,}")
+            if resumed_files or spilled or already_stored:
+                logger.info(f"  Resumed: {resumed_files:,} files, {len(spilled):,} embeddings, "
+                            f"{already_stored:,} chunks already stored")
+            if duplicates is not None and duplicates.dropped:
+                logger.info(f"  Near-Duplicates Dropped: {duplicates.dropped:,}")
             logger.info(f"  Files with Code: {files_with_code:,}")
             logger.info(f"  Average Quality Score: {avg_quality:.3f}")
             logger.info(f"  Processing Rate: {len(all_chunk_metadata)/total_time:.1f} chunks/sec")
@@ -967,14 +943,60 @@ class GitHubDirectIngester:
                 'total_time': total_time,
                 'files_processed': len(files),
                 'chunks_generated': len(all_chunk_metadata),
+                'near_duplicates_dropped': duplicates.dropped if duplicates is not None else 0,
                 'files_with_code': files_with_code,
-                'avg_quality_score': avg_quality
+                'avg_quality_score': avg_quality,
+                'timings': {
+                    'tree': tree_time,
+                    'processing': processing_time,
+                    'embedding': embedding_time,
+                    'storage': storage_time
+                }
             }
             
         except Exception as e:
             logger.error(f"[INGESTION ERROR] Critical error during repository ingestion: {e}")
             logger.error(f"[INGESTION ERROR] Repository: {repo_owner}/{repo_name}")
             raise
+        finally:
+            # On failure the journal stays on disk so a retry resumes from it
+            if journal is not None:
+                journal.close()
+            if source is not None:
+                source.close()
+
+
+def run_bulk(args):
+    """Bulk CLI mode: ingest several repositories with one shared GitHub budget and embedding engine."""
+    github_client = GitHubClient(args.github_token)
+    engine = EmbeddingEngine.from_onnx("onnx/")
+    try:
+        ingester = GitHubDirectIngester(
+            collection_name=args.collection,
+            model_name=args.model,
+            bulk_import=args.bulk_import,
+            github_client=github_client,
+            embedding_engine=engine
+        )
+        repositories = [{'url': url, 'branch': args.branch} for url in args.repo_urls]
+        repositories.extend({'local_path': path, 'branch': args.branch} for path in args.local_path)
+        if args.org:
+            repositories.extend(list_organization_repositories(
+                github_client, args.org,
+                include_forks=args.include_forks,
+                include_archived=args.include_archived
+            ))
+        
+        stats = BulkIngestionRunner(
+            ingester,
+            max_concurrent_repos=args.max_concurrent_repos,
+            max_workers_per_repo=args.max_workers
+        ).run(repositories)
+        
+        print(f"\n✅ Bulk ingestion finished: {stats['repositories_succeeded']}/{stats['repositories']} repositories, "
+              f"{stats['chunks_generated']:,} chunks ({stats['chunks_per_second']:.1f} chunks/sec)")
+    finally:
+        engine.close()
 
 
 def main():
@@ -994,31 +1016,56 @@ Examples:
   
   # Use custom collection and model
   python github_direct_ingester.py https://github.com/owner/repo --collection my_collection --model sentence-transformers/all-MiniLM-L6-v2
+  
+  # Bulk: several repositories, or a whole organization, in one run
+  python -m app.scripts.github_ingestor https://github.com/owner/repo1 https://github.com/owner/repo2
+  python -m app.scripts.github_ingestor --org beagleboard --max-concurrent-repos 4
+  
+  # Local checkout or bare mirror (no GitHub API calls; links use the origin remote or the given URL)
+  python -m app.scripts.github_ingestor --local-path /srv/mirrors/docs.beagleboard.io.git
+  python -m app.scripts.github_ingestor https://github.com/beagleboard/docs.beagleboard.io --local-path ./docs
         """
     )
     
-    parser.add_argument('repo_url', help='GitHub repository URL')
+    parser.add_argument('repo_urls', nargs='*', metavar='repo_url', help='GitHub repository URL(s)')
+    parser.add_argument('--local-path', action='append', default=[],
+                        help='Read a local checkout, bare mirror or directory instead of the GitHub API (repeatable)')
+    parser.add_argument('--org', help='Ingest every repository of this GitHub organization (default branches)')
+    parser.add_argument('--include-forks', action='store_true', help='With --org, include forked repositories')
+    parser.add_argument('--include-archived', action='store_true', help='With --org, include archived repositories')
+    parser.add_argument('--max-concurrent-repos', type=int, default=BULK_MAX_CONCURRENT_REPOS,
+                        help='Repositories ingested at the same time in bulk mode')
     parser.add_argument('--branch', default='main', help='Repository branch to ingest')
     parser.add_argument('--collection', default='beaglemind_col', help='Milvus collection name')
     parser.add_argument('--model', default='BAAI/bge-base-en-v1.5', help='Embedding model name')
     parser.add_argument('--github-token', help='GitHub API token for higher rate limits')
     parser.add_argument('--max-workers', type=int, default=8, help='Number of parallel workers')
+    parser.add_argument('--bulk-import', action='store_true',
+                        help='Store chunks via Parquet bulk import (for very large loads)')
     
     args = parser.parse_args()
+    if not args.repo_urls and not args.org and not args.local_path:
+        parser.error("give at least one repo_url, --local-path or --org")
     
     try:
+        if args.org or len(args.repo_urls) > 1 or len(args.local_path) > 1:
+            run_bulk(args)
+            return
+        
         # Initialize ingester
         ingester = GitHubDirectIngester(
             collection_name=args.collection,
             model_name=args.model,
-            github_token=args.github_token
+            github_token=args.github_token,
+            bulk_import=args.bulk_import
         )
         
         # Ingest repository
         result = ingester.ingest_repository(
-            args.repo_url,
+            args.repo_urls[0] if args.repo_urls else None,
             args.branch,
-            args.max_workers
+            args.max_workers,
+            local_path=args.local_path[0] if args.local_path else None
         )
         
         if result['success']:
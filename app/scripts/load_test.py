@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+End-to-End Load Test
+
+Starts the API in a subprocess against local stand-ins (a Milvus Lite database
+file instead of a Milvus server, and the GitHub fixture server instead of
+GitHub), ingests the fixture repositories through /api/ingest-data, then drives
+/api/retrieve at a fixed concurrency: single queries, then batches of queries
+("queries"), buffered and streamed as NDJSON. The report covers throughput,
+latency percentiles, error rates and the API process's RSS over time. With --baseline,
+any metric that regresses beyond the tolerance fails the run (exit code 1).
+
+Needs the ONNX models in ./onnx and Milvus Lite (`pip install "pymilvus[milvus_lite]"`),
+or nothing extra with --vector-store embedded; no network access.
+
+Usage:
+    python -m app.scripts.load_test --output loadtest-report.json
+    python -m app.scripts.load_test --baseline loadtest-baseline.json
+    python -m app.scripts.load_test --write-baseline loadtest-baseline.json
+    python -m app.scripts.load_test --vector-store embedded
+    python -m app.scripts.load_test --batch-size 16 --batch-requests 200
+    python -m app.scripts.load_test --base-url http://localhost:8000 --skip-ingest --collection beaglemind_col
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from app.scripts.github_fixture_server import GitHubFixtureServer, load_fixtures, synthetic_repository
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+_QUERIES = [
+    "How do I configure a GPIO pin as output?",
+    "BeagleBone Black ADC reading example",
+    "Which device tree overlay enables PWM?",
+    "read analog voltage with python",
+    "PocketBeagle pinout diagram",
+    "set up I2C on BeaglePlay",
+    "UART serial console wiring",
+    "CAN bus support on BeagleBone AI-64",
+    "config-pin command usage",
+    "SPI peripheral configuration",
+]
+
+# (scenario metric, direction): "higher" means larger values are better
+_BASELINE_METRICS = [
+    ("throughput_per_second", "higher"),
+    ("latency_p50_ms", "lower"),
+    ("latency_p95_ms", "lower"),
+    ("latency_p99_ms", "lower"),
+    ("error_rate", "lower"),
+    ("queries_per_second", "higher"),
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list (0.0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int, wall_time: float) -> Dict[str, Any]:
+    """Throughput, error rate and latency percentiles (ms) of one scenario."""
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "wall_time_seconds": wall_time,
+        "throughput_per_second": len(latencies) / wall_time if wall_time > 0 else 0.0,
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p90_ms": percentile(latencies, 90) * 1000,
+        "latency_p95_ms": percentile(latencies, 95) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+        "latency_max_ms": max(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+class RssSampler:
+    """Samples a process's resident set size from /proc at a fixed interval."""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Tuple[float, float]] = []  # (seconds since start, RSS MB)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._start = time.monotonic()
+
+    def _read_rss_mb(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self._read_rss_mb()
+            if rss is not None:
+                self.samples.append((time.monotonic() - self._start, rss))
+            self._stop.wait(self.interval)
+
+    def start(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop.set()
+        self._thread.join()
+        values = [rss for _, rss in self.samples]
+        return {
+            "peak_mb": max(values) if values else 0.0,
+            "final_mb": values[-1] if values else 0.0,
+            "series": [[round(t, 2), round(rss, 1)] for t, rss in self.samples],
+        }
+
+
+def start_api_server(port: int, env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    """Launch uvicorn serving main:app and wait until /health answers."""
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env}, stdout=log_file, stderr=subprocess.STDOUT
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}, see {log_path}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                logger.info(f"[LOADTEST] API server ready on port {port} (pid {process.pid})")
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"API server did not become ready, see {log_path}")
+
+
+def run_ingestion(base_url: str, repositories: List[str], collections: List[str],
+                  concurrency: int, timeout: float) -> Dict[str, Any]:
+    """
+    Submit one ingestion job per repository (spread over `collections`) and wait for all of them.
+
+    Returns:
+        Scenario summary over job durations plus chunk throughput
+    """
+    session = requests.Session()
+
+    def ingest(index_and_repo):
+        index, repo = index_and_repo
+        collection = collections[index % len(collections)]
+        start_time = time.perf_counter()
+        response = session.post(f"{base_url}/api/ingest-data", json={
+            "collection_name": collection, "github_url": f"https://github.com/{repo}", "branch": "main"
+        }, timeout=30)
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = session.get(f"{base_url}/api/ingest-data/jobs/{job_id}", timeout=30).json()
+            if job["state"] in ("succeeded", "failed", "cancelled"):
+                return time.perf_counter() - start_time, job
+            time.sleep(0.5)
+        return time.perf_counter() - start_time, {"state": "timeout", "stats": None}
+
+    logger.info(f"[LOADTEST] Ingesting {len(repositories)} repositories into {len(collections)} collections")
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        outcomes = list(executor.map(ingest, enumerate(repositories)))
+    wall_time = time.perf_counter() - start_time
+
+    latencies = [elapsed for elapsed, job in outcomes if job["state"] == "succeeded"]
+    errors = len(outcomes) - len(latencies)
+    for _, job in outcomes:
+        if job["state"] != "succeeded":
+            logger.error(f"[LOADTEST] Ingestion job ended {job['state']}: {job.get('error')}")
+    chunks = sum((job.get("stats") or {}).get("chunks_generated", 0) for _, job in outcomes)
+    summary = summarize(latencies, errors, wall_time)
+    summary.update({"chunks": chunks, "chunks_per_second": chunks / wall_time if wall_time > 0 else 0.0})
+    return summary
+
+
+def _retrieve(session: requests.Session, base_url: str, body: Dict[str, Any]) -> bool:
+    """Send one retrieval; a streamed one only succeeds if every line arrived and no query failed."""
+    if not body.get("stream"):
+        return session.post(f"{base_url}/api/retrieve", json=body, timeout=60).ok
+    with session.post(f"{base_url}/api/retrieve", json=body, timeout=60, stream=True) as response:
+        if not response.ok:
+            return False
+        last = None
+        for line in response.iter_lines():
+            if line:
+                last = json.loads(line)
+                if "error" in last:
+                    return False
+        # The summary line comes last; without it the stream was cut short
+        return last is not None and "total_found" in last
+
+
+def run_retrieval(base_url: str, collections: List[str], concurrency: int, total_requests: int,
+                  n_results: int, rerank: bool, batch_size: int = 0, stream: bool = False) -> Dict[str, Any]:
+    """
+    Closed-loop load: `concurrency` clients send `total_requests` retrievals between them.
+
+    With batch_size, each request carries that many queries ("queries"), optionally
+    streamed; latency is then per batch and `queries_per_second` is reported too.
+    """
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def client(_):
+        nonlocal errors
+        session = requests.Session()
+        for index in counter:
+            body = {
+                "collection_name": collections[index % len(collections)],
+                "n_results": n_results,
+                "rerank": rerank,
+                "stream": stream,
+            }
+            if batch_size:
+                body["queries"] = [_QUERIES[(index * batch_size + offset) % len(_QUERIES)] for offset in range(batch_size)]
+            else:
+                body["query"] = _QUERIES[index % len(_QUERIES)]
+            start_time = time.perf_counter()
+            try:
+                ok = _retrieve(session, base_url, body)
+            except (requests.RequestException, ValueError):
+                ok = False
+            elapsed = time.perf_counter() - start_time
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    # Warm up each collection's retrieval service so model loading isn't measured
+    for collection in collections:
+        requests.post(f"{base_url}/api/retrieve", json={"query": _QUERIES[0], "collection_name": collection,
+                                                        "n_results": n_results, "rerank": rerank}, timeout=120)
+
+    kind = f"batches of {batch_size} queries{' (streamed)' if stream else ''}" if batch_size else "retrievals"
+    logger.info(f"[LOADTEST] Sending {total_requests} {kind} with {concurrency} concurrent clients")
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        list(executor.map(client, range(concurrency)))
+    summary = summarize(latencies, errors, time.perf_counter() - start_time)
+    if batch_size:
+        summary.update({"batch_size": batch_size, "queries_per_second": summary["throughput_per_second"] * batch_size})
+    return summary
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions of `report` against `baseline`.
+
+    Relative metrics may be `tolerance` worse than the baseline; error rates may
+    rise by at most one percentage point.
+
+    Returns:
+        Human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for name, scenario in report["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if not reference:
+            continue
+        for metric, direction in _BASELINE_METRICS:
+            current, expected = scenario.get(metric), reference.get(metric)
+            if current is None or expected is None:
+                continue
+            if metric == "error_rate":
+                failed = current > expected + 0.01
+            elif direction == "higher":
+                failed = current < expected * (1 - tolerance)
+            else:
+                failed = current > expected * (1 + tolerance)
+            if failed:
+                regressions.append(f"{name}.{metric}: {current:.3f} vs baseline {expected:.3f}")
+    peak, expected_peak = report.get("rss", {}).get("peak_mb"), baseline.get("rss", {}).get("peak_mb")
+    if peak and expected_peak and peak > expected_peak * (1 + tolerance):
+        regressions.append(f"rss.peak_mb: {peak:.1f} vs baseline {expected_peak:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test against local Milvus Lite and GitHub fixtures")
+    parser.add_argument("--base-url", help="Test an already running API instead of starting one (no stand-ins)")
+    parser.add_argument("--pid", type=int, help="With --base-url: API process id for RSS sampling")
+    parser.add_argument("--port", type=int, default=8010, help="Port for the API started by the harness")
+    parser.add_argument("--fixtures", help="GitHub fixture file (default: synthetic repositories)")
+    parser.add_argument("--synthetic-repos", type=int, default=4, help="Synthetic repositories when no fixture file is given")
+    parser.add_argument("--files-per-repo", type=int, default=60, help="Files per synthetic repository")
+    parser.add_argument("--vector-store", choices=["milvus", "embedded"], default="milvus",
+                        help="Vector store backend of the harness-started API (milvus = Milvus Lite file)")
+    parser.add_argument("--skip-ingest", action="store_true", help="Only run the retrieval scenarios")
+    parser.add_argument("--collection", action="append", default=[], help="Collection(s) to query with --skip-ingest")
+    parser.add_argument("--ingest-concurrency", type=int, default=2, help="Collections ingested in parallel")
+    parser.add_argument("--ingest-timeout", type=float, default=1800, help="Seconds to wait for each ingestion job")
+    parser.add_argument("--retrieve-concurrency", type=int, default=8, help="Concurrent retrieval clients")
+    parser.add_argument("--retrieve-requests", type=int, default=500, help="Total retrieval requests")
+    parser.add_argument("--batch-size", type=int, default=8,
+                        help="Queries per batch retrieval request (0 skips the batch scenarios; at most 64)")
+    parser.add_argument("--batch-requests", type=int, default=100, help="Total requests of each batch scenario")
+    parser.add_argument("--n-results", type=int, default=5)
+    parser.add_argument("--no-rerank", action="store_true", help="Disable reranking in retrieval requests")
+    parser.add_argument("--output", default="loadtest-report.json", help="Report file")
+    parser.add_argument("--baseline", help="Fail if the run regresses against this report")
+    parser.add_argument("--write-baseline", help="Also save this run's report as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+    if not 0 <= args.batch_size <= 64:
+        parser.error("--batch-size must be between 0 and 64")
+
+    workdir = tempfile.mkdtemp(prefix="beaglemind-loadtest-")
+    fixture_server = None
+    api_process = None
+    base_url = args.base_url
+    try:
+        repositories: List[str] = []
+        if not base_url:
+            fixtures = load_fixtures(args.fixtures) if args.fixtures else {"repositories": {
+                f"loadtest/docs-{index}": synthetic_repository(index, args.files_per_repo)
+                for index in range(args.synthetic_repos)
+            }}
+            repositories = sorted(fixtures["repositories"])
+            fixture_server = GitHubFixtureServer(fixtures).start()
+            api_process = start_api_server(args.port, {
+                "VECTOR_STORE_BACKEND": args.vector_store,
+                "MILVUS_URI": os.path.join(workdir, "milvus.db"),
+                "EMBEDDED_STORE_DIR": os.path.join(workdir, "vector_store"),
+                "GITHUB_API_URL": fixture_server.base_url,
+                "GITHUB_RAW_URL": fixture_server.raw_url,
+                "GITHUB_REQUESTS_PER_SECOND": "0",
+                "GITHUB_RATE_LIMIT_RESERVE": "0",
+                "INGESTION_JOURNAL_DIR": os.path.join(workdir, "journals"),
+            }, os.path.join(workdir, "api.log"))
+            base_url = f"http://127.0.0.1:{args.port}"
+
+        pid = api_process.pid if api_process else args.pid
+        rss_sampler = RssSampler(pid).start() if pid else None
+        scenarios: Dict[str, Any] = {}
+
+        collections = args.collection or ["beaglemind_col"]
+        if not args.skip_ingest:
+            if not repositories:
+                parser.error("--base-url needs --skip-ingest (fixtures are only served to a harness-started API)")
+            collections = [f"loadtest_{index}" for index in range(max(1, min(args.ingest_concurrency, len(repositories))))]
+            scenarios["ingest"] = run_ingestion(base_url, repositories, collections,
+                                                args.ingest_concurrency, args.ingest_timeout)
+        scenarios["retrieve"] = run_retrieval(base_url, collections, args.retrieve_concurrency,
+                                              args.retrieve_requests, args.n_results, not args.no_rerank)
+        if args.batch_size:
+            for name, stream in (("retrieve_batch", False), ("retrieve_batch_stream", True)):
+                scenarios[name] = run_retrieval(base_url, collections, args.retrieve_concurrency,
+                                                args.batch_requests, args.n_results, not args.no_rerank,
+                                                batch_size=args.batch_size, stream=stream)
+
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key not in ("baseline", "write_baseline", "output")},
+            "scenarios": scenarios,
+            "rss": rss_sampler.stop() if rss_sampler else {},
+            "fixture_requests": fixture_server.requests if fixture_server else None,
+        }
+    finally:
+        if api_process is not None:
+            api_process.terminate()
+            api_process.wait(timeout=30)
+        if fixture_server is not None:
+            fixture_server.stop()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if args.write_baseline:
+        with open(args.write_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"\n{'scenario':<22}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in scenarios.items():
+        print(f"{name:<22}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_per_second']:>10.2f}"
+              f"{stats['latency_p50_ms']:>10.1f}{stats['latency_p95_ms']:>10.1f}{stats['latency_p99_ms']:>10.1f}")
+    for name, stats in scenarios.items():
+        if "queries_per_second" in stats:
+            print(f"{name}: {stats['queries_per_second']:.1f} queries/sec in batches of {stats['batch_size']}")
+    if "ingest" in scenarios:
+        print(f"ingest: {scenarios['ingest']['chunks']:,} chunks, {scenarios['ingest']['chunks_per_second']:.1f} chunks/sec")
+    if report["rss"]:
+        print(f"API RSS: peak {report['rss']['peak_mb']:.1f} MB, final {report['rss']['final_mb']:.1f} MB")
+    print(f"Report written to {args.output} (work dir {workdir})")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\n" + "!" * 80)
+            print(f"PERFORMANCE REGRESSION against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            print("!" * 80)
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Collection Migration
+
+Builds a new version of a collection with another metric, index type or
+embedding model while the current version keeps serving queries, then moves the
+serving name over with an atomic alias switch:
+
+    beaglemind_col (alias) -> beaglemind_col_v2   ...build v3...   beaglemind_col -> beaglemind_col_v3
+
+Steps: create `<name>_v<N>` with the target metric and index (sized for the
+source's row count), copy every row (or re-embed the documents with --reembed),
+check that the source did not change meanwhile, compare recall@k of the new
+version against the serving one on vectors sampled during the copy, and switch
+the alias. The previous version is kept for rollback (--switch-to) unless
+--drop-old is given.
+
+A collection that is not behind an alias yet is renamed to `<name>_v1` just
+before the alias is created; searches issued between those two calls (a few
+milliseconds) can fail. Later switches are atomic.
+
+Rows written to the collection during the copy are not carried over: run the
+migration while no ingestion job targets the collection.
+
+With DOCUMENT_STORE_DIR set, texts still stored in the source collection are
+moved to the document store during the copy, so a migration also converts an
+existing collection to the external document layout.
+
+Usage:
+    python -m app.scripts.migrate_collection beaglemind_col --metric IP --index HNSW
+    python -m app.scripts.migrate_collection beaglemind_col --reembed --model-dir onnx/
+    python -m app.scripts.migrate_collection beaglemind_col --switch-to beaglemind_col_v1
+"""
+
+import argparse
+import logging
+import random
+import re
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import VECTOR_METRIC
+from app.services.document_store import DocumentStore, get_document_store
+from app.services.index_policy import INDEX_TYPES, index_type_for
+from app.services.vector_store import VectorStore, get_vector_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def next_version_name(store: VectorStore, name: str) -> str:
+    """`<name>_v<N>` after the highest existing version (v1 is reserved for an unversioned collection)."""
+    pattern = re.compile(rf"^{re.escape(name)}_v(\d+)$")
+    versions = [int(match.group(1)) for collection in store.list_collections() if (match := pattern.match(collection))]
+    return f"{name}_v{max(versions, default=1) + 1}"
+
+
+def copy_rows(source, target, batch_size: int = 1000, engine=None, sample_size: int = 100, seed: int = 0,
+              documents: Optional[DocumentStore] = None) -> Tuple[int, List[Tuple[List[float], List[float]]]]:
+    """
+    Copy all rows of source into target, re-embedding documents if an engine is given.
+
+    With a document store, texts still held in the source are moved into it and
+    the target gets empty `document` values; texts already offloaded are read
+    back from it for re-embedding.
+
+    Returns:
+        (rows copied, reservoir sample of (source vector, target vector) pairs for validation)
+    """
+    rng = random.Random(seed)
+    sample: List[Tuple[List[float], List[float]]] = []
+    copied = 0
+    start_time = time.time()
+    with target.writer() as writer:
+        for batch in source.rows(batch_size):
+            texts = {row["id"]: row.get("document") or "" for row in batch}
+            if documents is not None:
+                inline = [(chunk_id, text) for chunk_id, text in texts.items() if text]
+                if inline:
+                    documents.put_many(inline)
+                if engine is not None:
+                    texts.update(documents.get_many([chunk_id for chunk_id, text in texts.items() if not text]))
+            new_vectors = engine.embed([texts[row["id"]] for row in batch]) if engine is not None else None
+            for index, row in enumerate(batch):
+                source_vector = [float(value) for value in row["embedding"]]
+                target_vector = new_vectors[index] if new_vectors is not None else source_vector
+                target_row = {field: row.get(field) for field in target.field_names}
+                if documents is not None:
+                    target_row["document"] = ""
+                writer.add_row({**target_row, "embedding": target_vector})
+                copied += 1
+                if len(sample) < sample_size:
+                    sample.append((source_vector, target_vector))
+                else:
+                    slot = rng.randrange(copied)
+                    if slot < sample_size:
+                        sample[slot] = (source_vector, target_vector)
+            logger.info(f"[MIGRATE] Copied {copied} rows ({copied / max(time.time() - start_time, 1e-6):.0f} rows/sec)")
+    if documents is not None:
+        documents.flush()
+    return copied, sample
+
+
+def measure_recall(source, target, sample: List[Tuple[List[float], List[float]]], k: int = 10) -> Dict[str, Any]:
+    """Recall@k of target against the serving source on sampled vectors, with search latencies."""
+    recalls, source_ms, target_ms = [], [], []
+    for source_vector, target_vector in sample:
+        step_start = time.perf_counter()
+        expected = {hit.id for hit in source.search(source_vector, k, [])}
+        source_ms.append((time.perf_counter() - step_start) * 1000)
+        step_start = time.perf_counter()
+        found = {hit.id for hit in target.search(target_vector, k, [])}
+        target_ms.append((time.perf_counter() - step_start) * 1000)
+        if expected:
+            recalls.append(len(found & expected) / len(expected))
+    return {
+        "queries": len(recalls),
+        "recall": statistics.fmean(recalls) if recalls else 1.0,
+        "source_p50_ms": statistics.median(source_ms) if source_ms else 0.0,
+        "target_p50_ms": statistics.median(target_ms) if target_ms else 0.0,
+    }
+
+
+def switch_alias(store: VectorStore, name: str, target_name: str) -> Optional[str]:
+    """
+    Serve `name` from target_name.
+
+    Returns:
+        The collection that served `name` before the switch
+    """
+    aliases = store.list_aliases()
+    if name in aliases:
+        previous = aliases[name]
+    else:
+        # First migration: move the physical collection aside so the name can become an alias
+        previous = f"{name}_v1"
+        store.rename_collection(name, previous)
+    store.set_alias(name, target_name)
+    return previous
+
+
+def migrate(name: str, metric: str = VECTOR_METRIC, index_type: Optional[str] = None, reembed: bool = False,
+            model_dir: str = "onnx/", batch_size: int = 1000, validate_queries: int = 100, k: int = 10,
+            min_recall: float = 0.95, switch: bool = True, drop_old: bool = False) -> Dict[str, Any]:
+    """
+    Build, validate and (optionally) switch to a new version of a collection.
+
+    Returns:
+        Migration report
+
+    Raises:
+        ValueError: If the collection does not exist
+        RuntimeError: If the source changed during the copy or recall is below min_recall
+    """
+    store = get_vector_store()
+    store.connect()
+    if not store.has_collection(name):
+        raise ValueError(f"Collection '{name}' does not exist")
+    source = store.get_collection(name)
+    source.load()
+    source_rows = source.count()
+
+    engine = None
+    dim = source.dim
+    if reembed:
+        from app.services.embedding_engine import EmbeddingEngine
+        engine = EmbeddingEngine.from_onnx(model_dir)
+        dim = len(engine.embed(["test"])[0])
+
+    target_name = next_version_name(store, name)
+    logger.info(f"[MIGRATE] Building '{target_name}' from '{store.resolve(name)}' ({source_rows} rows): "
+                f"{source.metric} -> {metric}, {dim} dims, index {index_type or index_type_for(name)}"
+                f"{', re-embedding documents' if reembed else ''}")
+    target = store.create_collection(
+        target_name, dim, f"Version of {name}", metric=metric, include_links="links" in source.field_names,
+        scalar_indexes=["file_type", "language", "repo_name", "has_code"],
+        index_type=index_type, expected_rows=source_rows,
+    )
+
+    report: Dict[str, Any] = {"collection": name, "source": store.resolve(name), "target": target_name,
+                              "metric": metric, "reembed": reembed}
+    try:
+        start_time = time.time()
+        copied, sample = copy_rows(source, target, batch_size, engine, validate_queries,
+                                   documents=get_document_store(name))
+        report["rows_copied"] = copied
+        report["copy_seconds"] = round(time.time() - start_time, 1)
+        if source.count() != source_rows:
+            raise RuntimeError(f"'{name}' changed during the copy ({source_rows} -> {source.count()} rows); "
+                               f"stop ingestion into it and run the migration again")
+        if copied != source_rows:
+            # Milvus counts deleted rows until compaction; the copy only sees live rows
+            logger.warning(f"[MIGRATE] Copied {copied} rows but the source reports {source_rows}")
+
+        # The new version serves nothing yet, so its index may be rebuilt in place
+        report["index"] = target.ensure_index(rebuild=True)
+        target.load()
+        report["validation"] = measure_recall(source, target, sample, k)
+        logger.info(f"[MIGRATE] Validation: {report['validation']}")
+        if report["validation"]["recall"] < min_recall:
+            raise RuntimeError(f"Recall@{k} of '{target_name}' is {report['validation']['recall']:.3f} "
+                               f"(minimum {min_recall}); '{name}' was not switched")
+    except Exception:
+        logger.error(f"[MIGRATE] Migration failed; dropping '{target_name}'")
+        if engine is not None:
+            engine.close()
+        store.drop_collection(target_name)
+        raise
+    if engine is not None:
+        engine.close()
+
+    if switch:
+        previous = switch_alias(store, name, target_name)
+        report["previous"] = previous
+        logger.info(f"[MIGRATE] '{name}' now served by '{target_name}' (previous version: '{previous}')")
+        if drop_old and previous:
+            store.drop_collection(previous)
+            logger.info(f"[MIGRATE] Dropped '{previous}'")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild a collection as a new version and switch its alias")
+    parser.add_argument("collection", help="Serving collection name (alias or collection)")
+    parser.add_argument("--metric", default=VECTOR_METRIC, type=str.upper, choices=["L2", "IP", "COSINE"],
+                        help="Metric of the new version (embeddings are normalized: IP ranks like L2)")
+    parser.add_argument("--index", type=str.upper, choices=list(INDEX_TYPES),
+                        help="Index type of the new version (default: the index policy)")
+    parser.add_argument("--reembed", action="store_true", help="Re-embed documents instead of copying vectors")
+    parser.add_argument("--model-dir", default="onnx/", help="ONNX embedding model for --reembed")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows read and written per batch")
+    parser.add_argument("--validate-queries", type=int, default=100, help="Sampled vectors used to measure recall")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours compared per validation query")
+    parser.add_argument("--min-recall", type=float, default=0.95,
+                        help="Minimum recall@k against the serving version (lower it when changing models)")
+    parser.add_argument("--no-switch", action="store_true", help="Build and validate only")
+    parser.add_argument("--drop-old", action="store_true", help="Drop the previous version after switching")
+    parser.add_argument("--switch-to", metavar="VERSION", help="Only point the alias at an existing version (rollback)")
+    args = parser.parse_args()
+
+    if args.switch_to:
+        store = get_vector_store()
+        store.connect()
+        previous = switch_alias(store, args.collection, args.switch_to)
+        logger.info(f"[MIGRATE] '{args.collection}' now served by '{args.switch_to}' (was '{previous}')")
+        return
+
+    report = migrate(args.collection, metric=args.metric, index_type=args.index, reembed=args.reembed,
+                     model_dir=args.model_dir, batch_size=args.batch_size, validate_queries=args.validate_queries,
+                     k=args.k, min_recall=args.min_recall, switch=not args.no_switch, drop_old=args.drop_old)
+    logger.info(f"[MIGRATE] Report: {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Bulk Repository Ingestion
+
+Ingests many repositories (an explicit list or every repository of a GitHub
+organization) into one collection in a single run. Repositories are processed
+concurrently by one ingester, so they share its GitHub client (connection pool
+and rate-limit budget) and its embedding engine: while one repository is
+fetching files, another's chunks keep the engine's batches full. The run
+reports aggregate throughput plus per-repository stage timings.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from app.config import BULK_MAX_CONCURRENT_REPOS
+from app.services.github_client import GitHubClient
+from app.services.ingestion_jobs import IngestionCancelled
+
+logger = logging.getLogger(__name__)
+
+
+def list_organization_repositories(client: GitHubClient, org: str,
+                                   include_forks: bool = False,
+                                   include_archived: bool = False) -> List[Dict[str, Any]]:
+    """
+    List the repositories of a GitHub organization (or user).
+
+    Args:
+        client: Shared GitHub client
+        org: Organization or user login
+        include_forks: Also return forked repositories
+        include_archived: Also return archived repositories
+
+    Returns:
+        List of {"url", "branch", "size"} dictionaries (size in KB), largest first
+    """
+    repositories = []
+    base_url = f"https://api.github.com/orgs/{org}/repos"
+    page = 1
+    while True:
+        response = client.get(base_url, params={'per_page': 100, 'page': page, 'type': 'all'})
+        if response.status_code == 404 and page == 1 and "/orgs/" in base_url:
+            # Not an organization; try it as a user account
+            base_url = f"https://api.github.com/users/{org}/repos"
+            continue
+        response.raise_for_status()
+        items = response.json()
+        if not items:
+            break
+        for item in items:
+            if item.get('fork') and not include_forks:
+                continue
+            if item.get('archived') and not include_archived:
+                continue
+            repositories.append({
+                'url': item['html_url'],
+                'branch': item.get('default_branch') or 'main',
+                'size': item.get('size', 0),
+            })
+        page += 1
+
+    # Longest repositories first so they don't end up alone at the tail of the run
+    repositories.sort(key=lambda repo: repo['size'], reverse=True)
+    logger.info(f"[BULK] Found {len(repositories)} repositories in '{org}'")
+    return repositories
+
+
+class _RepositoryProgress:
+    """
+    Per-repository view of a bulk job's JobProgress.
+
+    Totals set by one repository's run are added to the job's totals, so the
+    job reports the sum over all repositories; cancellation is shared.
+    """
+
+    def __init__(self, parent):
+        self.parent = parent
+        self._totals: Dict[str, int] = {}
+
+    def set_stage(self, stage: str):
+        self.parent.set_stage(stage)
+
+    def set_total(self, stage: str, total: int):
+        self.parent.add_total(stage, total - self._totals.get(stage, 0))
+        self._totals[stage] = total
+
+    def advance(self, stage: str, amount: int = 1):
+        self.parent.advance(stage, amount)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.parent.cancelled
+
+    def raise_if_cancelled(self):
+        self.parent.raise_if_cancelled()
+
+
+class BulkIngestionRunner:
+    """Runs a batch of repository ingestions concurrently on one shared ingester."""
+
+    def __init__(self, ingester, max_concurrent_repos: int = BULK_MAX_CONCURRENT_REPOS,
+                 max_workers_per_repo: int = 4):
+        """
+        Args:
+            ingester: GitHubDirectIngester for the target collection (ideally built
+                with a shared GitHubClient and EmbeddingEngine)
+            max_concurrent_repos: Repositories ingested at the same time
+            max_workers_per_repo: File-processing workers per repository
+        """
+        self.ingester = ingester
+        self.max_concurrent_repos = max(1, max_concurrent_repos)
+        self.max_workers_per_repo = max_workers_per_repo
+
+    def _ingest_one(self, repository: Dict[str, Any], progress=None) -> Dict[str, Any]:
+        """Ingest one repository and return its outcome; failures are recorded, not raised."""
+        outcome = {
+            'repository': repository.get('url') or repository.get('local_path'),
+            'branch': repository.get('branch', 'main'),
+        }
+        start_time = time.time()
+        try:
+            if progress is not None:
+                progress.raise_if_cancelled()
+            result = self.ingester.ingest_repository(
+                repo_url=repository.get('url'),
+                branch=outcome['branch'],
+                max_workers=self.max_workers_per_repo,
+                progress=_RepositoryProgress(progress) if progress is not None else None,
+                local_path=repository.get('local_path')
+            )
+            outcome.update({
+                'success': result['success'],
+                'files_processed': result.get('files_processed', 0),
+                'chunks_generated': result.get('chunks_generated', 0),
+                'timings': result.get('timings', {}),
+            })
+            if not result['success']:
+                outcome['error'] = result.get('message')
+        except IngestionCancelled:
+            outcome.update({'success': False, 'error': 'cancelled'})
+        except Exception as e:
+            logger.error(f"[BULK] {outcome['repository']} failed: {e}")
+            outcome.update({'success': False, 'error': str(e)})
+        outcome['total_time'] = time.time() - start_time
+        return outcome
+
+    def run(self, repositories: List[Dict[str, Any]], progress=None) -> Dict[str, Any]:
+        """
+        Ingest all repositories.
+
+        Args:
+            repositories: {"url", "branch"} dictionaries, in scheduling order; a
+                "local_path" entry reads that repository from disk
+            progress: Optional JobProgress shared by all repositories
+
+        Returns:
+            Aggregate stats plus a per-repository list of outcomes and timings
+
+        Raises:
+            IngestionCancelled: If the job was cancelled during the run
+        """
+        logger.info(f"[BULK] Ingesting {len(repositories)} repositories into '{self.ingester.collection_name}' "
+                    f"({self.max_concurrent_repos} at a time)")
+        engine = self.ingester.embedding_engine
+        engine_before = engine.stats() if engine is not None else None
+        github_before = self.ingester.github.stats()
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_repos, thread_name_prefix="bulk-repo") as executor:
+            outcomes = list(executor.map(lambda repo: self._ingest_one(repo, progress), repositories))
+
+        wall_time = time.time() - start_time
+        if progress is not None:
+            progress.raise_if_cancelled()
+
+        succeeded = [outcome for outcome in outcomes if outcome['success']]
+        chunks = sum(outcome.get('chunks_generated', 0) for outcome in succeeded)
+        files = sum(outcome.get('files_processed', 0) for outcome in succeeded)
+        github_after = self.ingester.github.stats()
+        stats = {
+            'repositories': len(outcomes),
+            'repositories_succeeded': len(succeeded),
+            'repositories_failed': len(outcomes) - len(succeeded),
+            'files_processed': files,
+            'chunks_generated': chunks,
+            'total_time': wall_time,
+            'chunks_per_second': chunks / wall_time if wall_time > 0 else 0.0,
+            'files_per_second': files / wall_time if wall_time > 0 else 0.0,
+            'github_requests': github_after['requests'] - github_before['requests'],
+            'github_throttled_seconds': github_after['throttled_seconds'] - github_before['throttled_seconds'],
+            'per_repository': outcomes,
+        }
+        if engine is not None:
+            engine_after = engine.stats()
+            batches = engine_after['batches'] - engine_before['batches']
+            texts = engine_after['texts'] - engine_before['texts']
+            busy = engine_after['busy_seconds'] - engine_before['busy_seconds']
+            stats['embedding_batches'] = batches
+            stats['embedding_avg_batch_size'] = texts / batches if batches else 0.0
+            stats['embedding_utilization'] = busy / wall_time if wall_time > 0 else 0.0
+
+        logger.info("=" * 80)
+        logger.info("BULK INGESTION COMPLETE")
+        logger.info("=" * 80)
+        logger.info(f"  Repositories: {stats['repositories_succeeded']}/{stats['repositories']} succeeded")
+        logger.info(f"  Files: {files:,}  Chunks: {chunks:,}  Wall time: {wall_time:.2f}s")
+        logger.info(f"  Throughput: {stats['chunks_per_second']:.1f} chunks/sec, {stats['files_per_second']:.1f} files/sec")
+        logger.info(f"  GitHub: {stats['github_requests']:,} requests, {stats['github_throttled_seconds']:.1f}s throttled")
+        if engine is not None:
+            logger.info(f"  Embedding engine: {stats['embedding_batches']:,} batches, "
+                        f"avg {stats['embedding_avg_batch_size']:.1f} texts, {stats['embedding_utilization'] * 100:.0f}% busy")
+        for outcome in outcomes:
+            timings = outcome.get('timings') or {}
+            stage_times = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in timings.items())
+            status = "ok" if outcome['success'] else f"failed ({outcome.get('error')})"
+            logger.info(f"  {outcome['repository']}: {status}, {outcome.get('chunks_generated', 0):,} chunks "
+                        f"in {outcome['total_time']:.1f}s" + (f" [{stage_times}]" if stage_times else ""))
+        logger.info("=" * 80)
+        return stats
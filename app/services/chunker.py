@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Token-Aware Chunker
+
+Splits text into overlapping chunks that fit the embedding model's token budget.
+The text is tokenized once with the embedding (fast) tokenizer; its offset
+mapping gives the character span of every token, so chunk boundaries are chosen
+in characters but sized in tokens. Chunks are returned as (start, end) offsets
+into the original text rather than copied strings.
+
+Within each token window the cut is placed at the last paragraph break, line
+break, sentence end or space in the second half of the window (in that order of
+preference), falling back to a word boundary.
+"""
+
+import logging
+from bisect import bisect_left
+from typing import List, Tuple
+
+from tokenizers import Tokenizer
+
+from app.config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# (separator, characters of the separator kept at the end of the chunk)
+_SEPARATORS = (("\n\n", 0), ("\n", 0), (". ", 1), (" ", 0))
+
+# Tokens examined when backing a hard cut off to the start of a word
+_WORD_BACKOFF_TOKENS = 32
+
+
+class TokenAwareChunker:
+    """
+    Reusable chunker bound to one tokenizer. Thread-safe: it keeps no per-call
+    state and never reconfigures its tokenizer, so one instance can be shared by
+    all ingestion workers.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int = CHUNK_MAX_TOKENS,
+                 overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+                 model_max_length: int = 512):
+        """
+        Args:
+            tokenizer: Hugging Face fast tokenizer used by the embedding model
+            max_tokens: Target chunk size in tokens, capped to what the model
+                accepts after special tokens ([CLS]/[SEP])
+            overlap_tokens: Tokens shared by consecutive chunks
+            model_max_length: Sequence length the embedder truncates to
+        """
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("TokenAwareChunker requires a fast tokenizer (offset mapping support)")
+        self.tokenizer = tokenizer
+        # Private copy of the Rust tokenizer with padding/truncation off: the shared
+        # one is reconfigured by padded embedding calls, which would race with ours
+        self._backend = Tokenizer.from_str(tokenizer.backend_tokenizer.to_str())
+        self._backend.no_padding()
+        self._backend.no_truncation()
+        budget = model_max_length - tokenizer.num_special_tokens_to_add()
+        self.max_tokens = max(1, min(max_tokens, budget) if max_tokens > 0 else budget)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+
+    def token_offsets(self, text: str) -> List[Tuple[int, int]]:
+        """Character (start, end) of every token in text, without special tokens."""
+        return self._backend.encode(text, add_special_tokens=False).offsets
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens text encodes to, excluding special tokens."""
+        return len(self.token_offsets(text))
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split text into chunks of at most max_tokens tokens.
+
+        Args:
+            text: Text to chunk
+
+        Returns:
+            List of (start, end) character offsets into text, sorted by start,
+            with surrounding whitespace excluded
+        """
+        offsets = self.token_offsets(text)
+        if not offsets:
+            return []
+        starts = [start for start, _ in offsets]
+        ends = [end for _, end in offsets]
+        token_count = len(offsets)
+
+        spans = []
+        ti = 0
+        while ti < token_count:
+            limit = min(ti + self.max_tokens, token_count)
+            chunk_start = starts[ti]
+            if limit == token_count:
+                end = ends[-1]
+                end_ti = token_count
+            else:
+                end = self._cut(text, starts, ends, ti, limit)
+                # Tokens starting before the cut belong to this chunk
+                end_ti = bisect_left(starts, end, ti + 1, limit + 1)
+
+            trimmed_end = end
+            while trimmed_end > chunk_start and text[trimmed_end - 1].isspace():
+                trimmed_end -= 1
+            if trimmed_end > chunk_start:
+                spans.append((chunk_start, trimmed_end))
+
+            if end_ti >= token_count:
+                break
+            next_ti = max(end_ti - self.overlap_tokens, ti + 1)
+            # Start the overlap on a word boundary so it re-tokenizes the same way
+            while next_ti < end_ti and not self._word_start(text, starts, ends, next_ti):
+                next_ti += 1
+            ti = next_ti
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        """Convenience wrapper returning chunk strings."""
+        return [text[start:end] for start, end in self.spans(text)]
+
+    @staticmethod
+    def _word_start(text: str, starts: List[int], ends: List[int], index: int) -> bool:
+        """True if token `index` starts a new word rather than continuing the previous one."""
+        if index == 0 or starts[index] != ends[index - 1]:
+            return True
+        return not (text[starts[index] - 1].isalnum() and text[starts[index]].isalnum())
+
+    def _cut(self, text: str, starts: List[int], ends: List[int], ti: int, limit: int) -> int:
+        """Choose the end offset of the chunk starting at token ti with tokens [ti, limit) available."""
+        chunk_start = starts[ti]
+        # Anything up to the start of the first token past the budget is in range
+        window_end = starts[limit]
+        floor = chunk_start + (ends[limit - 1] - chunk_start) // 2
+        for separator, keep in _SEPARATORS:
+            position = text.rfind(separator, floor, window_end)
+            if position > chunk_start:
+                return position + keep
+        # No separator: cut before the last whole word that fits
+        for index in range(limit, max(ti + 1, limit - _WORD_BACKOFF_TOKENS) - 1, -1):
+            if self._word_start(text, starts, ends, index):
+                return starts[index]
+        return starts[limit]
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+Single-Pass Content Analyzer
+
+Computes everything the ingestion pipeline needs to know about a file - language,
+code elements, code/documentation flags, keywords, quality scores and image /
+attachment / external links - from one scan with a precompiled master tokenizer.
+
+All quantifiers in the tokenizer are bounded, there are no DOTALL patterns, and
+the scan checks a wall-clock deadline, so pathological inputs (unterminated
+docstrings, megabyte-long lines) cost linear time and degrade to partial
+features instead of stalling a worker.
+"""
+
+import logging
+import re
+import time
+from bisect import bisect_right
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urljoin
+
+from app.config import ANALYZER_MAX_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Extension-based language detection
+EXTENSION_LANGUAGES = {
+    '.py': 'python', '.js': 'javascript', '.ts': 'typescript',
+    '.java': 'java', '.cpp': 'cpp', '.c': 'c', '.h': 'c',
+    '.css': 'css', '.html': 'html', '.xml': 'xml',
+    '.md': 'markdown', '.rst': 'rst', '.txt': 'text',
+    '.json': 'json', '.yaml': 'yaml', '.yml': 'yaml',
+    '.sh': 'shell', '.bat': 'batch', '.go': 'go',
+    '.rs': 'rust', '.rb': 'ruby', '.php': 'php', '.sql': 'sql'
+}
+
+KEYWORD_STOPWORDS = frozenset({
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'has', 'had',
+    'this', 'that', 'with', 'from', 'they', 'will', 'been', 'have', 'were',
+    'said', 'each', 'which', 'their', 'time', 'would', 'about', 'into',
+    'function', 'class', 'method', 'return', 'value', 'parameter', 'variable'
+})
+
+IMAGE_EXTENSIONS = ('png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'bmp', 'ico')
+ATTACHMENT_EXTENSIONS = ('pdf', 'doc', 'docx', 'ppt', 'pptx', 'xls', 'xlsx', 'zip', 'tar', 'gz')
+# Substrings that exclude a URL from the external link list
+NON_EXTERNAL_MARKERS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.pdf', '.doc')
+
+# Master tokenizer. Alternatives are tried in order at each position; every
+# repetition is bounded so no alternative can backtrack over the whole file.
+# Constructs that begin with a word character (URLs, href=, std::, TODO:) are
+# recognised from the word token and finished with an anchored sub-match.
+_TOKEN_RE = re.compile(r"""
+      (?P<word>\w{1,256})
+    | (?P<sym>[.?=(:;{]|!(?!\[))
+    | (?P<fence>```)
+    | (?P<doc>\"\"\"|''')
+    | (?P<jdoc>/\*\*)
+    | (?P<cend>\*/)
+    | (?P<mdimg>!\[[^\]]{0,300}\]\((?P<mdimg_url>[^)]{1,1000})\))
+    | (?P<mdlink>\[[^\]]{1,300}\]\((?P<mdlink_url>[^)]{1,1000})\))
+    | (?P<img>(?i:<img\b)[^<>]{0,512}?(?i:src)=["'](?P<img_url>[^"'>]{1,1000})["'])
+    | (?P<header>\#{1,6}[ \t\n]{1,64}(?=\w))
+    | (?P<marker>(?i:@param|@return|@throws)|@media|\#include|<!DOCTYPE|<html>|<div>)
+    | (?P<inline>`[^`\n]{1,1000}`)
+""", re.VERBOSE)
+
+_URL_RE = re.compile(r"""https?://[^\s)\]},;"'`<>]{1,2000}""")
+_HREF_RE = re.compile(r"""href=["']([^"']{1,2000})["']""", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+_CAMEL_RE = re.compile(r"[A-Z][a-z]+(?:[A-Z][a-z]+)*")
+_IMAGE_TAIL_RE = re.compile(r"\.(?:%s)\b" % "|".join(IMAGE_EXTENSIONS), re.IGNORECASE)
+_ATTACHMENT_TAIL_RE = re.compile(r"\.(?:%s)$" % "|".join(ATTACHMENT_EXTENSIONS), re.IGNORECASE)
+_CSS_SELECTOR_RE = re.compile(r"[.#][\w-]{1,128}\s{0,64}$")
+# Parenthesized Python and braced JS imports may span lines; everything else stays on one line
+_PY_IMPORT_RE = re.compile(r"(?:from[ \t]+[\w.]{1,256}[ \t]+)?import[ \t]+(?:\([\w.,*\s]{0,512}\)|[\w.,* \t]{1,512})")
+_PY_FROM_IMPORT_RE = re.compile(r"from[ \t]+\w{1,256}[ \t]+import\b")
+_JS_IMPORT_RE = re.compile(r"""import\s[^;]{0,512}?from\s+["'][^"'\n]{0,512}["']""")
+_JAVA_IMPORT_RE = re.compile(r"import\s+[\w.]{1,512};")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Words that start a "<keyword> <name>" pair, matched case-insensitively
+_PAIR_KEYWORDS = frozenset({
+    'def', 'class', 'function', 'import', 'namespace', 'private',
+    'public', 'const', 'var', 'let'
+})
+# Pairs whose presence marks content as code
+_CODE_PAIRS = frozenset({'def', 'function', 'class', 'import', 'namespace', 'private'})
+# Pairs that additionally need a following "=" to count as code
+_ASSIGN_PAIRS = frozenset({'const', 'var', 'let'})
+# "<word>:" documentation markers
+_DOC_LABELS = frozenset({'todo', 'fixme', 'note'})
+
+# Per-language detection signals; a language wins with at least 2 distinct signals
+_LANGUAGE_SIGNALS = (
+    ('python', ('def', 'import', 'from_import', 'class')),
+    ('javascript', ('function', 'const', 'let', 'var')),
+    ('java', ('public_class', 'private', 'public_static')),
+    ('cpp', ('#include', 'std::', 'namespace')),
+    ('css', ('css_selector', '@media')),
+    ('html', ('<html>', '<div>', '<!DOCTYPE')),
+    ('markdown', ('md_header', 'md_link', 'fence')),
+)
+
+# Caps mirroring the information value score maxima
+_INFO_CAPS = {'functions': 10, 'classes': 5, 'urls': 5, 'camel': 20, 'fences': 10}
+
+# Characters examined on either side of an import statement (bounds work on huge single-line files)
+_IMPORT_WINDOW = 600
+
+# Tokens between deadline checks
+_DEADLINE_CHECK_INTERVAL = 4096
+
+# Per-chunk link metadata limits (keeps the JSON field well under Milvus' 64 KB)
+MAX_CHUNK_LINKS_PER_KIND = 10
+MAX_CHUNK_LINK_LENGTH = 2000
+_LINK_KINDS = {'image': 'images', 'attachment': 'attachments'}
+
+
+def _sentence_marks(text: str) -> int:
+    """Count sentence punctuation inside a token consumed as a whole."""
+    return text.count('.') + text.count('!') + text.count('?')
+
+
+def _ws_gap(content: str, end: int, start: int, required: bool = True) -> bool:
+    """True if content[end:start] is whitespace (or empty when not required)."""
+    if start == end:
+        return not required
+    return content[end:start].isspace()
+
+
+def assign_links_to_chunks(spans: List[Tuple[int, int]],
+                           link_positions: List[Tuple[int, str, str]],
+                           max_links_per_kind: int = MAX_CHUNK_LINKS_PER_KIND) -> List[Dict[str, List[str]]]:
+    """
+    Map image/attachment references to the chunks whose span contains them.
+
+    Each reference is located with a binary search over the sorted chunk start
+    offsets, so the cost is O((chunks + links) log chunks) regardless of chunk
+    size. Overlapping chunks all receive references in their shared region.
+
+    Args:
+        spans: (start, end) character offsets of each chunk, sorted by start
+        link_positions: (offset, kind, url) tuples from ContentAnalyzer.analyze
+        max_links_per_kind: Cap on URLs kept per kind and chunk
+
+    Returns:
+        One compact dict per span, e.g. {"images": [...], "attachments": [...]};
+        kinds without links are omitted
+    """
+    starts = [start for start, _ in spans]
+    assigned: List[Dict[str, Dict[str, None]]] = [{} for _ in spans]
+    for offset, kind, url in link_positions:
+        if len(url) > MAX_CHUNK_LINK_LENGTH:
+            continue
+        key = _LINK_KINDS[kind]
+        index = bisect_right(starts, offset) - 1
+        # Walk back over earlier chunks that still overlap this offset
+        while index >= 0 and spans[index][1] > offset:
+            urls = assigned[index].setdefault(key, {})
+            if len(urls) < max_links_per_kind:
+                urls[url] = None
+            index -= 1
+    return [{key: list(urls) for key, urls in chunk.items()} for chunk in assigned]
+
+
+class ContentAnalyzer:
+    """
+    Stateless, thread-safe single-pass analyzer. One instance can be shared by
+    all ingestion workers; patterns are compiled once at import time.
+    """
+
+    def __init__(self, max_seconds: float = ANALYZER_MAX_SECONDS):
+        """
+        Args:
+            max_seconds: Wall-clock budget for one scan; when exceeded the scan
+                stops and features are computed from the part already seen
+        """
+        self.max_seconds = max_seconds
+
+    def analyze(self, content: str, file_extension: str = "", base_url: str = "") -> Dict[str, Any]:
+        """
+        Analyze content in one pass.
+
+        Args:
+            content: Text content to analyze
+            file_extension: File extension including the dot (e.g. ".py")
+            base_url: Base URL for resolving relative image/attachment links
+
+        Returns:
+            Dictionary with language, has_code, has_documentation, function_names,
+            class_names, import_statements, keywords, the three quality scores,
+            image_links, attachment_links, external_links, link_positions
+            (sorted (offset, kind, url) tuples for each image/attachment reference,
+            kind being 'image' or 'attachment') and analysis_truncated
+        """
+        deadline = time.perf_counter() + self.max_seconds if self.max_seconds else None
+
+        signals = set()          # language detection signals (case-sensitive)
+        has_code = False
+        has_documentation = False
+        doc_quotes = {'"""': 0, "'''": 0}
+        jdoc_open = False
+
+        words: List[str] = []          # every \w+ token (density, CamelCase)
+        prose_words: List[str] = []    # words outside code fences and inline code (keywords)
+        fenced_words: List[str] = []   # words of the currently open fence
+        in_fence = False
+        fences = 0
+        sentence_marks = 0
+
+        py_functions: List[str] = []
+        js_functions: List[str] = []
+        java_functions: List[str] = []
+        classes: List[str] = []
+        import_positions: List[int] = []
+
+        links = _LinkCollector(base_url)
+
+        # Last three tokens as (kind, text, start, end) for multi-token patterns
+        h1 = h2 = h3 = None
+        # "const/var/let <name>" waiting for an "=" to count as code
+        pending_assign = None
+        # End of a construct finished by a sub-match; tokens before it are skipped
+        skip_to = -1
+        truncated = False
+        tokens = 0
+
+        for m in _TOKEN_RE.finditer(content):
+            start, end = m.span()
+            if start < skip_to:
+                continue
+            kind = m.lastgroup
+            text = m.group()
+            tokens += 1
+            if deadline is not None and tokens % _DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                truncated = True
+                break
+
+            if kind == 'word':
+                next_char = content[end:end + 1]
+                if next_char == ':' or next_char == '=':
+                    lowered = text.lower()
+                    sub = None
+                    if (lowered == 'http' or lowered == 'https') and content.startswith('://', end):
+                        sub = _URL_RE.match(content, start)
+                        if sub:
+                            links.bare_url(sub.group(), start)
+                    elif lowered == 'href':
+                        sub = _HREF_RE.match(content, start)
+                        if sub:
+                            links.href(sub.group(1), start)
+                    elif text == 'std' and content.startswith('::', end):
+                        signals.add('std::')
+                    elif lowered in _DOC_LABELS and next_char == ':':
+                        has_documentation = True
+                    if sub is not None:
+                        sentence_marks += _sentence_marks(sub.group())
+                        inner = _WORD_RE.findall(sub.group())
+                        words.extend(inner)
+                        (fenced_words if in_fence else prose_words).extend(inner)
+                        skip_to = sub.end()
+                        h3, h2, h1 = h2, h1, ('link', sub.group(), start, sub.end())
+                        continue
+
+                words.append(text)
+                (fenced_words if in_fence else prose_words).append(text)
+
+                if h1 is not None and h1[0] == 'kw' and _ws_gap(content, h1[3], start):
+                    keyword = h1[1]
+                    lowered_keyword = keyword.lower()
+                    if lowered_keyword in _CODE_PAIRS:
+                        has_code = True
+                    elif lowered_keyword in _ASSIGN_PAIRS:
+                        pending_assign = end
+                    if keyword == 'def':
+                        signals.add('def')
+                        py_functions.append(text)
+                    elif keyword == 'class':
+                        signals.add('class')
+                        classes.append(text)
+                    elif keyword == 'function':
+                        signals.add('function')
+                        js_functions.append(text)
+                    elif keyword == 'public':
+                        if text == 'class' or text == 'static':
+                            signals.add('public_' + text)
+                    elif keyword == lowered_keyword:
+                        signals.add(keyword)  # import, namespace, private, const, let, var
+                if text == 'import':
+                    import_positions.append(start)
+                elif (text == 'function' and h1 is not None and h1[0] == 'sym' and h1[1] in '=:'
+                      and h2 is not None and h2[0] == 'word'
+                      and _ws_gap(content, h1[3], start, False) and _ws_gap(content, h2[3], h1[2], False)):
+                    js_functions.append(h2[1])  # "name = function" / "name: function"
+
+                h3, h2, h1 = h2, h1, ('kw' if text.lower() in _PAIR_KEYWORDS else 'word', text, start, end)
+                continue
+
+            if kind == 'sym':
+                if text == '.' or text == '!' or text == '?':
+                    sentence_marks += 1
+                elif text == '=':
+                    if pending_assign is not None and _ws_gap(content, pending_assign, start, False):
+                        has_code = True
+                    pending_assign = None
+                elif text == '(':
+                    if h1 is not None and (h1[0] == 'word' or h1[0] == 'kw') and _ws_gap(content, h1[3], start, False):
+                        if h2 is not None and (h2[0] == 'word' or h2[0] == 'kw') and _ws_gap(content, h2[3], h1[2]):
+                            java_functions.append(h1[1])  # "type name("
+                    elif (h1 is not None and h1[1] == '=' and h2 is not None and h2[0] == 'word'
+                          and h3 is not None and h3[1] == 'const'):
+                        js_functions.append(h2[1])  # "const name = ("
+                elif text == '{':
+                    if _CSS_SELECTOR_RE.search(content, max(0, start - 200), start):
+                        signals.add('css_selector')
+                h3, h2, h1 = h2, h1, ('sym', text, start, end)
+                continue
+
+            sentence_marks += _sentence_marks(text)
+            if kind == 'fence':
+                fences += 1
+                signals.add('fence')
+                in_fence = not in_fence
+                fenced_words = []  # opening: start collecting; closing: drop the block
+            elif kind == 'doc':
+                doc_quotes[text] += 1
+                if doc_quotes[text] >= 2:
+                    has_documentation = True
+            elif kind == 'jdoc':
+                jdoc_open = True
+            elif kind == 'cend':
+                if jdoc_open:
+                    has_documentation = True
+            elif kind == 'header':
+                has_documentation = True
+                if start == 0 or content[start - 1] == '\n':
+                    signals.add('md_header')
+            elif kind == 'marker':
+                if text[0] == '@' and text.lower() != '@media':
+                    has_documentation = True
+                else:
+                    signals.add(text)
+                    if text == '#include':
+                        has_code = True
+                inner = _WORD_RE.findall(text)
+                words.extend(inner)
+                (fenced_words if in_fence else prose_words).extend(inner)
+            elif kind == 'inline':
+                words.extend(_WORD_RE.findall(text))
+                if '://' in text:
+                    for um in _URL_RE.finditer(text):
+                        links.bare_url(um.group(), start + um.start())
+            else:  # mdimg, mdlink, img
+                url = m.group(kind + '_url')
+                if kind == 'mdlink':
+                    signals.add('md_link')
+                    links.markdown_link(url, start)
+                else:
+                    if kind == 'mdimg':
+                        signals.add('md_link')
+                    links.image(url, start, markdown=kind == 'mdimg')
+                inner = _WORD_RE.findall(text)
+                words.extend(inner)
+                (fenced_words if in_fence else prose_words).extend(inner)
+            h3, h2, h1 = h2, h1, (kind, text, start, end)
+
+        # An unterminated fence leaves its text in the prose
+        if in_fence:
+            prose_words.extend(fenced_words)
+
+        language = EXTENSION_LANGUAGES.get(file_extension)
+        if language is None:
+            if 'import' in signals and self._has_from_import(content, import_positions):
+                signals.add('from_import')
+            language = self._detect_language(signals)
+
+        elements = {'functions': [], 'classes': [], 'imports': []}
+        if language == 'python':
+            elements['functions'] = py_functions
+            elements['classes'] = classes
+            elements['imports'] = self._extract_imports(content, import_positions, _PY_IMPORT_RE, True)
+        elif language == 'javascript':
+            elements['functions'] = js_functions
+            elements['classes'] = classes
+            elements['imports'] = self._extract_imports(content, import_positions, _JS_IMPORT_RE, False)
+        elif language == 'java':
+            elements['functions'] = java_functions
+            elements['classes'] = classes
+            elements['imports'] = self._extract_imports(content, import_positions, _JAVA_IMPORT_RE, False)
+        for key in elements:
+            elements[key] = list(dict.fromkeys(elements[key]))[:20]  # Dedupe, limit to 20 items
+
+        # Content quality score based on structure and completeness
+        quality_indicators = [
+            len(content) > 100,  # Reasonable length
+            '\n\n' in content,  # Paragraph structure
+            '#' in content,  # Headers
+            has_documentation,  # Documentation present
+            len(elements['functions']) > 0,  # Has functions
+            sentence_marks > 2,  # Has sentences
+        ]
+        content_quality_score = sum(quality_indicators) / len(quality_indicators)
+
+        # Semantic density based on unique concepts
+        total_words = len(words)
+        unique_words = len({word.lower() for word in words if len(word) >= 3})
+        semantic_density = (unique_words / total_words) if total_words > 0 else 0
+
+        # Information value based on content richness; counts stop at their caps
+        camel_terms = 0
+        for word in words:
+            if not word.islower():
+                camel_terms += len(_CAMEL_RE.findall(word))
+                if camel_terms >= _INFO_CAPS['camel']:
+                    break
+        info_values = [
+            min(len(elements['functions']), _INFO_CAPS['functions']),
+            min(len(elements['classes']), _INFO_CAPS['classes']),
+            min(links.url_count, _INFO_CAPS['urls']),  # External references
+            min(camel_terms, _INFO_CAPS['camel']),  # CamelCase terms
+            min(fences, _INFO_CAPS['fences']),  # Code blocks
+        ]
+        information_value_score = sum(info_values) / sum(_INFO_CAPS.values())
+
+        if truncated:
+            logger.warning(f"[ANALYZE] Scan stopped after {self.max_seconds}s "
+                           f"({len(content)} chars); features computed from a prefix")
+
+        return {
+            'language': language,
+            'has_code': has_code,
+            'has_documentation': has_documentation,
+            'function_names': elements['functions'],
+            'class_names': elements['classes'],
+            'import_statements': elements['imports'],
+            'keywords': self._keywords(prose_words),
+            'content_quality_score': float(content_quality_score),
+            'semantic_density_score': float(min(semantic_density * 2, 1.0)),  # Scale to 0-1
+            'information_value_score': float(information_value_score),
+            'image_links': links.images(),
+            'attachment_links': links.attachments(),
+            'external_links': links.externals(),
+            'link_positions': links.positions,
+            'analysis_truncated': truncated,
+        }
+
+    @staticmethod
+    def _detect_language(signals: set) -> str:
+        """Pattern-based detection for unknown extensions."""
+        for language, language_signals in _LANGUAGE_SIGNALS:
+            if sum(1 for signal in language_signals if signal in signals) >= 2:
+                return language
+        return 'unknown'
+
+    @staticmethod
+    def _keywords(prose_words: List[str]) -> List[str]:
+        """Top 15 non-stopword alphabetic words (3+ letters) outside code."""
+        counts = Counter(
+            word for word in map(str.lower, prose_words)
+            if len(word) >= 3 and word.isascii() and word.isalpha() and word not in KEYWORD_STOPWORDS
+        )
+        return [word for word, _ in counts.most_common(15)]
+
+    @staticmethod
+    def _line_start(content: str, position: int) -> int:
+        """Start of the line containing position, looking back at most _IMPORT_WINDOW chars."""
+        floor = max(0, position - _IMPORT_WINDOW)
+        newline = content.rfind('\n', floor, position)
+        return newline + 1 if newline >= 0 else floor
+
+    def _has_from_import(self, content: str, positions: List[int]) -> bool:
+        """True if any recorded `import` is preceded by `from <module>` on its line."""
+        for position in positions[:64]:
+            if _PY_FROM_IMPORT_RE.search(content, self._line_start(content, position), position + 7):
+                return True
+        return False
+
+    def _extract_imports(self, content: str, positions: List[int], pattern: "re.Pattern",
+                         include_from: bool) -> List[str]:
+        """Match an import pattern on the line around each recorded `import` word."""
+        imports = []
+        for position in positions[:64]:
+            start = self._line_start(content, position) if include_from else position
+            match = pattern.search(content, start, position + _IMPORT_WINDOW)
+            if match and match.start() <= position:
+                # One line per statement, however it was wrapped
+                imports.append(_WHITESPACE_RE.sub(" ", match.group()).strip())
+        return imports
+
+
+class _LinkCollector:
+    """Accumulates image, attachment and external links found during a scan."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self._images: Dict[str, None] = {}
+        self._attachments: Dict[str, None] = {}
+        self._externals: Dict[str, None] = {}
+        # (offset, kind, url) for every image/attachment reference, in scan order
+        self.positions: List[Tuple[int, str, str]] = []
+        self.url_count = 0
+
+    def _resolve(self, url: str) -> str:
+        if self.base_url and not url.startswith(('http://', 'https://')):
+            return urljoin(self.base_url, url)
+        return url
+
+    def _add_image(self, url: str, position: int):
+        self._images[url] = None
+        self.positions.append((position, 'image', url))
+
+    def _add_attachment(self, url: str, position: int):
+        self._attachments[url] = None
+        self.positions.append((position, 'attachment', url))
+
+    def _external(self, url: str):
+        if url.startswith(('http://', 'https://')):
+            lowered = url.lower()
+            if not any(marker in lowered for marker in NON_EXTERNAL_MARKERS):
+                self._externals[url] = None
+
+    def _embedded_url(self, url: str, position: int):
+        """Apply the bare-URL rules to an absolute URL found inside a link or tag."""
+        if url.startswith(('http://', 'https://')):
+            bare = _URL_RE.match(url)
+            if bare:
+                self.bare_url(bare.group(), position)
+
+    def bare_url(self, url: str, position: int):
+        """Bare URL: an image if it carries an image extension, external otherwise."""
+        self.url_count += 1
+        tails = list(_IMAGE_TAIL_RE.finditer(url))
+        if tails:
+            # Up to the last image extension, as the greedy direct-image pattern did
+            self._add_image(url[:tails[-1].end()], position)
+        self._external(url)
+
+    def image(self, url: str, position: int, markdown: bool):
+        """Markdown or HTML image reference."""
+        self._add_image(self._resolve(url), position)
+        if markdown and _ATTACHMENT_TAIL_RE.search(url):
+            self._add_attachment(self._resolve(url), position)
+        self._embedded_url(url, position)
+
+    def markdown_link(self, url: str, position: int):
+        """Markdown link: attachment if it ends in a document extension, external if absolute."""
+        if _ATTACHMENT_TAIL_RE.search(url):
+            self._add_attachment(self._resolve(url), position)
+        self._external(url)
+        self._embedded_url(url, position)
+
+    def href(self, url: str, position: int):
+        """HTML href attribute."""
+        if _ATTACHMENT_TAIL_RE.search(url):
+            self._add_attachment(self._resolve(url), position)
+        self._external(url)
+        self._embedded_url(url, position)
+
+    def images(self) -> List[str]:
+        return list(self._images)
+
+    def attachments(self) -> List[str]:
+        return list(self._attachments)
+
+    def externals(self) -> List[str]:
+        return list(self._externals)
+
+
+# Shared instance used by the ingesters
+content_analyzer = ContentAnalyzer()
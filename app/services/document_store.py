@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Document Store
+
+Keeps chunk text outside the vector store when DOCUMENT_STORE_DIR is set:
+Milvus (or the embedded store) then holds vectors and filterable scalars with
+an empty `document`, and the retrieval service fetches text by chunk id only for
+the hits it needs (rerank candidates, or just the final results).
+
+One directory per collection under DOCUMENT_STORE_DIR:
+
+    documents.bin    zlib-compressed texts, appended back to back, read via mmap
+    documents.idx    "id<TAB>offset<TAB>length" lines, append-only; the last line
+                     for an id wins and offset -1 marks a deletion
+
+Writes go to the OS after every batch (a crashed process loses nothing it
+reported as stored) and are fsynced on flush(). Appends hold an exclusive
+flock on documents.idx, so the API and CLI ingesters can write the same store,
+and readers apply index lines appended by other processes when the file grows.
+"""
+
+import fcntl
+import logging
+import mmap
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import DOCUMENT_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+_COMPRESSION_LEVEL = 6
+
+
+class DocumentStore:
+    """Compressed chunk texts of one collection, keyed by chunk id."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._data_path = os.path.join(path, "documents.bin")
+        self._index_path = os.path.join(path, "documents.idx")
+        self._data = open(self._data_path, "ab")
+        self._index_file = open(self._index_path, "ab")
+        self._reader = open(self._data_path, "rb")
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._index_read = 0  # bytes of documents.idx applied to _index
+        self._size = 0
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        """Apply index lines appended since the last read, by this or another process. Caller holds the lock."""
+        if os.fstat(self._index_file.fileno()).st_size <= self._index_read:
+            return
+        with open(self._index_path, "rb") as f:
+            f.seek(self._index_read)
+            tail = f.read()
+        # Data is written before its index line, so the data size read now covers every complete line
+        self._size = os.fstat(self._data.fileno()).st_size
+        end = tail.rfind(b"\n") + 1  # a partial last line is still being written
+        for line in tail[:end].decode("utf-8").splitlines():
+            parts = line.split("\t")
+            if len(parts) != 3:
+                continue  # torn line of an interrupted write
+            chunk_id, offset, length = parts[0], int(parts[1]), int(parts[2])
+            if offset < 0:
+                self._index.pop(chunk_id, None)
+            elif offset + length <= self._size:
+                self._index[chunk_id] = (offset, length)
+        self._index_read += end
+
+    @contextmanager
+    def _exclusive(self):
+        """Process lock for appends: ingesters in other processes write the same files."""
+        with self._lock:
+            fcntl.flock(self._index_file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(self._index_file.fileno(), fcntl.LOCK_UN)
+
+    def _append_index(self, lines: List[str]):
+        """Append index lines and apply them (caller is inside _exclusive)."""
+        data = "".join(lines).encode("utf-8")
+        size = os.fstat(self._index_file.fileno()).st_size
+        if size > self._index_read:
+            # Torn line left by a crashed writer: terminate it so it stays one skipped line
+            data = b"\n" + data
+            self._index_read = size
+        self._index_file.write(data)
+        self._index_file.flush()
+        self._index_read += len(data)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        """Store (chunk id, text) pairs; an existing id is replaced."""
+        blobs = [(chunk_id, zlib.compress(text.encode("utf-8"), _COMPRESSION_LEVEL)) for chunk_id, text in items]
+        for chunk_id, _ in blobs:
+            if "\t" in chunk_id or "\n" in chunk_id:
+                raise ValueError(f"Invalid chunk id for the document store: {chunk_id!r}")
+        with self._exclusive():
+            offset = os.fstat(self._data.fileno()).st_size
+            lines = []
+            for chunk_id, blob in blobs:
+                self._data.write(blob)
+                self._index[chunk_id] = (offset, len(blob))
+                lines.append(f"{chunk_id}\t{offset}\t{len(blob)}\n")
+                offset += len(blob)
+            # Data before index, so every index line points at written bytes
+            self._data.flush()
+            self._size = offset
+            self._append_index(lines)
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, str]:
+        """Texts of the given chunk ids (ids not in the store are left out)."""
+        with self._lock:
+            # Picks up texts stored by ingesters running in other processes
+            self._refresh()
+            entries = sorted((self._index[chunk_id], chunk_id) for chunk_id in set(ids) if chunk_id in self._index)
+            if not entries:
+                return {}
+            if self._mapped_size < self._size:
+                self._map = mmap.mmap(self._reader.fileno(), self._size, access=mmap.ACCESS_READ)
+                self._mapped_size = self._size
+            data = self._map
+        # Reads in file order; an older map stays valid for the entries it covers
+        return {chunk_id: zlib.decompress(data[offset:offset + length]).decode("utf-8")
+                for (offset, length), chunk_id in entries}
+
+    def delete(self, ids: Iterable[str]):
+        with self._exclusive():
+            lines = [f"{chunk_id}\t-1\t0\n" for chunk_id in ids if self._index.pop(chunk_id, None) is not None]
+            if lines:
+                self._append_index(lines)
+
+    def flush(self):
+        """Make stored texts durable."""
+        with self._lock:
+            os.fsync(self._data.fileno())
+            os.fsync(self._index_file.fileno())
+
+    def stats(self) -> Dict[str, int]:
+        return {"documents": len(self._index), "bytes": self._size}
+
+    def close(self):
+        with self._lock:
+            self._data.close()
+            self._index_file.close()
+            self._reader.close()
+
+
+class OffloadingWriter:
+    """
+    Vector-store writer wrapper that puts each row's text into the document
+    store and forwards the row with an empty `document`.
+
+    Rows are forwarded in batches only after their texts are stored, so every
+    row the inner writer reports as committed has its text available.
+    """
+
+    def __init__(self, writer, documents: DocumentStore, batch_rows: int = 256):
+        self.writer = writer
+        self.documents = documents
+        self.batch_rows = batch_rows
+        self._pending: List[dict] = []
+
+    def add_row(self, row: dict):
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_rows:
+            self._forward()
+
+    def add_rows(self, rows: List[dict]):
+        for row in rows:
+            self.add_row(row)
+
+    def _forward(self):
+        rows, self._pending = self._pending, []
+        self.documents.put_many((row["id"], row.get("document") or "") for row in rows)
+        self.writer.add_rows([{**row, "document": ""} for row in rows])
+
+    def __getattr__(self, attr):
+        # rows_committed, batches_inserted, flushes, ... of the inner writer
+        return getattr(self.writer, attr)
+
+    def __enter__(self):
+        self.writer.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and self._pending:
+                self._forward()
+        finally:
+            self.documents.flush()
+        return self.writer.__exit__(exc_type, exc, tb)
+
+
+_stores: Dict[str, DocumentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_document_store(collection_name: str) -> Optional[DocumentStore]:
+    """The process-wide document store of a collection, or None when DOCUMENT_STORE_DIR is unset."""
+    if not DOCUMENT_STORE_DIR:
+        return None
+    with _stores_lock:
+        if collection_name not in _stores:
+            _stores[collection_name] = DocumentStore(os.path.join(DOCUMENT_STORE_DIR, collection_name))
+            logger.info(f"[DOCUMENTS] Opened document store of '{collection_name}' "
+                        f"({len(_stores[collection_name])} documents)")
+        return _stores[collection_name]
+
+
+def offload_documents(writer, documents: Optional[DocumentStore]):
+    """Wrap a vector-store writer so texts go to the document store (unchanged if documents is None)."""
+    return OffloadingWriter(writer, documents) if documents is not None else writer
@@ -0,0 +1,834 @@
+#!/usr/bin/env python3
+"""
+Embedded Vector Store
+
+In-process VectorStore backend for deployments without a Milvus server. Each
+collection is a directory under EMBEDDED_STORE_DIR:
+
+    meta.json        name, dimension, metric, schema, row count
+    vectors.f32      float32 matrix (capacity x dim), memory-mapped
+    columns/*.json   one file per scalar field (columnar metadata)
+    alive.npy        row liveness (deletes and id overwrites clear it)
+    graph.npy        neighbour lists of the graph index, when built
+
+Aliases (name -> collection) are kept in aliases.json at the root.
+
+Search is exact (brute force over the memory-mapped matrix) by default. From
+EMBEDDED_GRAPH_MIN_ROWS live rows, or with EMBEDDED_INDEX=graph, a navigable
+small-world graph is built at flush time and searched with a beam of `ef`
+candidates (VECTOR_SEARCH_EF unless the request sets it; nprobe is ignored). Rows added since the last build are always scanned exactly.
+Filters use the Milvus expression syntax (==, !=, <, <=, >, >=, in, not in,
+like, and/or/not) and are evaluated column-wise with NumPy. Rows are also
+indexed by repo_name, so repo-scoped searches scan only those repositories.
+
+Distances follow Milvus: squared L2 distance for "L2" (lower is better), and
+the inner product or cosine similarity for "IP"/"COSINE" (higher is better).
+"""
+
+import heapq
+import json
+import logging
+import operator
+import os
+import re
+import shutil
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.config import EMBEDDED_STORE_DIR, EMBEDDED_INDEX, EMBEDDED_GRAPH_MIN_ROWS, VECTOR_METRIC, VECTOR_SEARCH_EF
+from app.services.vector_store import VectorCollection, VectorStore, chunk_fields
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_CAPACITY = 1024
+_GRAPH_DEGREE = 16
+_GRAPH_EF_CONSTRUCTION = 64
+_GRAPH_ENTRY_POINTS = 8
+# Rewrite the files without deleted rows once this fraction of rows is dead
+_COMPACT_DEAD_FRACTION = 0.25
+_COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class SearchHit:
+    """Search result with the attribute surface of a pymilvus hit."""
+
+    __slots__ = ("id", "distance", "entity")
+
+    def __init__(self, id: str, distance: float, entity: Dict[str, Any]):
+        self.id = id
+        self.distance = distance
+        self.entity = entity
+
+    @property
+    def score(self) -> float:
+        return self.distance
+
+
+# Filter expressions
+
+_TOKEN_PATTERN = re.compile(
+    r"\s*(?:(?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)"
+    r"|(?P<string>\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*')"
+    r"|(?P<op>==|!=|<=|>=|<|>|&&|\|\||!|\(|\)|\[|\]|,)"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*))"
+)
+_COMPARISONS = {
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt,
+    "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+
+
+class FilterExpression:
+    """A parsed Milvus-style boolean filter, evaluated as a row mask."""
+
+    def __init__(self, expr: str):
+        """
+        Raises:
+            ValueError: If the expression cannot be parsed
+        """
+        self.expr = expr
+        self.tokens = self._tokenize(expr.strip())
+        self.pos = 0
+        self.fields = set()
+        self.root = self._parse_or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.pos][1]}' in filter: {expr}")
+
+    @staticmethod
+    def _tokenize(expr: str):
+        tokens, pos = [], 0
+        while pos < len(expr):
+            match = _TOKEN_PATTERN.match(expr, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"Invalid filter near {expr[pos:pos + 20]!r}")
+            pos = match.end()
+            kind = match.lastgroup
+            text = match.group(kind)
+            if kind == "name" and text.lower() in ("and", "or", "not", "in", "like", "true", "false"):
+                kind, text = "keyword", text.lower()
+            tokens.append((kind, text))
+        return tokens
+
+    def _peek(self, *values) -> bool:
+        return self.pos < len(self.tokens) and self.tokens[self.pos][1] in values
+
+    def _next(self):
+        if self.pos >= len(self.tokens):
+            raise ValueError(f"Unexpected end of filter: {self.expr}")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _expect(self, value: str):
+        kind, text = self._next()
+        if text != value:
+            raise ValueError(f"Expected '{value}' but found '{text}' in filter: {self.expr}")
+
+    def _parse_or(self):
+        node = self._parse_and()
+        while self._peek("or", "||"):
+            self._next()
+            node = ("or", node, self._parse_and())
+        return node
+
+    def _parse_and(self):
+        node = self._parse_not()
+        while self._peek("and", "&&"):
+            self._next()
+            node = ("and", node, self._parse_not())
+        return node
+
+    def _parse_not(self):
+        if self._peek("not", "!"):
+            self._next()
+            return ("not", self._parse_not())
+        return self._parse_atom()
+
+    def _parse_literal(self):
+        kind, text = self._next()
+        if kind == "number":
+            return float(text) if any(c in text for c in ".eE") else int(text)
+        if kind == "string":
+            if text[0] == "'":
+                text = '"' + text[1:-1].replace('\\\'', '\'').replace('"', '\\"') + '"'
+            return json.loads(text)
+        if kind == "keyword" and text in ("true", "false"):
+            return text == "true"
+        raise ValueError(f"Expected a literal but found '{text}' in filter: {self.expr}")
+
+    def _parse_atom(self):
+        if self._peek("("):
+            self._next()
+            node = self._parse_or()
+            self._expect(")")
+            return node
+        kind, field = self._next()
+        if kind != "name":
+            raise ValueError(f"Expected a field name but found '{field}' in filter: {self.expr}")
+        self.fields.add(field)
+
+        negate = False
+        if self._peek("not"):
+            self._next()
+            negate = True
+            if not self._peek("in"):
+                raise ValueError(f"Expected 'in' after 'not' in filter: {self.expr}")
+        if self._peek("in"):
+            self._next()
+            self._expect("[")
+            values = []
+            while not self._peek("]"):
+                values.append(self._parse_literal())
+                if not self._peek("]"):
+                    self._expect(",")
+            self._expect("]")
+            return ("in", field, values, negate)
+        if self._peek("like"):
+            self._next()
+            pattern = self._parse_literal()
+            regex = re.compile("".join(
+                ".*" if char == "%" else "." if char == "_" else re.escape(char) for char in str(pattern)
+            ), re.DOTALL)
+            return ("like", field, regex)
+        kind, op = self._next()
+        if op not in _COMPARISONS:
+            raise ValueError(f"Expected a comparison after '{field}' but found '{op}' in filter: {self.expr}")
+        return ("cmp", field, _COMPARISONS[op], self._parse_literal())
+
+    def evaluate(self, column: Callable[[str], np.ndarray]) -> np.ndarray:
+        """Boolean mask over rows; `column(name)` returns a field's values as an array."""
+        return self._evaluate(self.root, column)
+
+    def _evaluate(self, node, column) -> np.ndarray:
+        kind = node[0]
+        if kind == "or":
+            return self._evaluate(node[1], column) | self._evaluate(node[2], column)
+        if kind == "and":
+            return self._evaluate(node[1], column) & self._evaluate(node[2], column)
+        if kind == "not":
+            return ~self._evaluate(node[1], column)
+        values = column(node[1])
+        if kind == "in":
+            allowed = set(node[2])
+            mask = np.fromiter((value in allowed for value in values), dtype=bool, count=len(values))
+            return ~mask if node[3] else mask
+        if kind == "like":
+            regex = node[2]
+            return np.fromiter((isinstance(value, str) and regex.fullmatch(value) is not None for value in values),
+                               dtype=bool, count=len(values))
+        try:
+            return np.asarray(node[2](values, node[3]), dtype=bool)
+        except TypeError as e:
+            raise ValueError(f"Cannot compare field '{node[1]}' with {node[3]!r}: {e}")
+
+
+# Storage
+
+def _write_json(path: str, data: Any):
+    """Write JSON atomically (temporary file + rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _save_array(path: str, array: np.ndarray):
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+class EmbeddedCollection(VectorCollection):
+    """
+    One collection of the embedded store. Thread-safe; searches and writes are
+    serialized, while flushes write their files and build the graph index
+    outside that lock (one flush at a time) and swap the result in.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.name = meta["name"]
+        self.dim = meta["dim"]
+        self.metric = meta["metric"].upper()
+        self.description = meta.get("description", "")
+        self.field_types = dict(meta["fields"])
+        self.field_names = [name for name, _ in meta["fields"]]
+
+        self._lock = threading.RLock()
+        # Serializes flushes, which hold _lock only to snapshot and to swap in the new graph
+        self._flush_lock = threading.Lock()
+        self._rows = meta["rows"]
+        self._capacity = max(_INITIAL_CAPACITY, self._rows)
+        self._vectors = self._open_vectors(self._capacity)
+        self._columns: Dict[str, List[Any]] = {
+            name: self._load_column(name) for name in self.field_names if name != "embedding"
+        }
+        alive_path = os.path.join(path, "alive.npy")
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._alive[:self._rows] = np.load(alive_path)[:self._rows] if os.path.exists(alive_path) else True
+        self._ids = {row_id: row for row, row_id in enumerate(self._columns["id"]) if self._alive[row]}
+        self._sq_norms = np.zeros(self._capacity, dtype=np.float32)
+        self._sq_norms[:self._rows] = np.einsum("ij,ij->i", self._vectors[:self._rows], self._vectors[:self._rows])
+
+        self._graph: Optional[np.ndarray] = None
+        self._graph_rows = 0
+        graph_path = os.path.join(path, "graph.npy")
+        if os.path.exists(graph_path):
+            graph = np.load(graph_path)
+            self._graph = np.full((self._capacity, _GRAPH_DEGREE), -1, dtype=np.int32)
+            self._graph_rows = min(len(graph), self._rows)
+            self._graph[:self._graph_rows] = graph[:self._graph_rows]
+
+        self._column_arrays: Dict[str, np.ndarray] = {}
+        self._compactions = 0
+        self._partitions: Dict[Any, List[int]] = {}
+        self._index_partitions()
+
+    @classmethod
+    def create(cls, path: str, name: str, dim: int, metric: str, description: str,
+               fields: List[List[str]]) -> "EmbeddedCollection":
+        os.makedirs(os.path.join(path, "columns"), exist_ok=True)
+        _write_json(os.path.join(path, "meta.json"), {
+            "name": name, "dim": dim, "metric": metric.upper(), "description": description,
+            "fields": fields, "rows": 0,
+        })
+        return cls(path)
+
+    def _open_vectors(self, capacity: int) -> np.memmap:
+        """Map the vector file, growing it to `capacity` rows first."""
+        vectors_path = os.path.join(self.path, "vectors.f32")
+        size = capacity * self.dim * 4
+        with open(vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _load_column(self, name: str) -> List[Any]:
+        column_path = os.path.join(self.path, "columns", f"{name}.json")
+        if not os.path.exists(column_path):
+            return [None] * self._rows
+        with open(column_path, encoding="utf-8") as f:
+            return json.load(f)[:self._rows]
+
+    def _index_partitions(self):
+        """Rows per repo_name value, so repo-scoped searches touch only those rows."""
+        self._partitions = {}
+        for row, repo in enumerate(self._columns.get("repo_name", [])):
+            if self._alive[row]:
+                self._partitions.setdefault(repo, []).append(row)
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self._capacity:
+            return
+        capacity = max(self._capacity * 2, rows)
+        self._vectors.flush()
+        self._vectors = self._open_vectors(capacity)
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - self._capacity, dtype=bool)])
+        self._sq_norms = np.concatenate([self._sq_norms, np.zeros(capacity - self._capacity, dtype=np.float32)])
+        if self._graph is not None:
+            self._graph = np.concatenate([
+                self._graph, np.full((capacity - self._capacity, _GRAPH_DEGREE), -1, dtype=np.int32)
+            ])
+        self._capacity = capacity
+
+    def _column_array(self, name: str) -> np.ndarray:
+        """A field's values for all rows as an array, cached until the next write."""
+        if name not in self._columns:
+            raise ValueError(f"Unknown field '{name}' in filter for collection '{self.name}'")
+        array = self._column_arrays.get(name)
+        if array is None:
+            values = self._columns[name]
+            dtype = {"int64": np.int64, "float": np.float64, "bool": bool}.get(self.field_types[name])
+            try:
+                array = np.array(values, dtype=dtype) if dtype is not None and None not in values else None
+            except (TypeError, ValueError):
+                array = None
+            if array is None:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+            self._column_arrays[name] = array
+        return array
+
+    # VectorCollection API
+
+    def load(self):
+        pass
+
+    def insert(self, rows: List[Dict[str, Any]]):
+        """Append rows; a row whose id already exists replaces the stored one."""
+        if not rows:
+            return
+        vectors = np.asarray([row["embedding"] for row in rows], dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings for '{self.name}', got {vectors.shape}")
+        with self._lock:
+            start = self._rows
+            self._ensure_capacity(start + len(rows))
+            self._vectors[start:start + len(rows)] = vectors
+            self._sq_norms[start:start + len(rows)] = np.einsum("ij,ij->i", vectors, vectors)
+            self._alive[start:start + len(rows)] = True
+            for offset, row in enumerate(rows):
+                previous = self._ids.get(row["id"])
+                if previous is not None:
+                    self._alive[previous] = False
+                self._ids[row["id"]] = start + offset
+                self._partitions.setdefault(row.get("repo_name"), []).append(start + offset)
+                for name, column in self._columns.items():
+                    column.append(row.get(name))
+            self._rows += len(rows)
+            self._column_arrays.clear()
+
+    def query(self, ids, output_fields):
+        fields = ["id"] + [name for name in output_fields if name in self._columns and name != "id"]
+        with self._lock:
+            rows = [self._ids[row_id] for row_id in ids if row_id in self._ids]
+            results = [{name: self._columns[name][row] for name in fields} for row in rows]
+            if "embedding" in output_fields:
+                for values, row in zip(results, rows):
+                    values["embedding"] = self._vectors[row].tolist()
+            return results
+
+    def delete(self, ids):
+        with self._lock:
+            for row_id in ids:
+                row = self._ids.pop(row_id, None)
+                if row is not None:
+                    self._alive[row] = False
+
+    def count(self):
+        with self._lock:
+            return len(self._ids)
+
+    def rows(self, batch_size=1000):
+        with self._lock:
+            live = np.flatnonzero(self._alive[:self._rows])
+            compactions = self._compactions
+        for start in range(0, len(live), batch_size):
+            with self._lock:
+                if self._compactions != compactions:
+                    raise RuntimeError(f"Collection '{self.name}' was compacted while its rows were being read")
+                batch = []
+                for row in live[start:start + batch_size].tolist():
+                    # Skip rows deleted or compacted away since the snapshot
+                    if row >= self._rows or not self._alive[row]:
+                        continue
+                    values = {name: column[row] for name, column in self._columns.items()}
+                    values["embedding"] = self._vectors[row].tolist()
+                    batch.append(values)
+            if batch:
+                yield batch
+
+    def ensure_index(self, rebuild=False):
+        """The graph index follows EMBEDDED_INDEX / EMBEDDED_GRAPH_MIN_ROWS and is extended on flush."""
+        if self._use_graph() and self._graph_rows < self._rows:
+            self.flush()
+        with self._lock:
+            index_type = "GRAPH" if self._use_graph() else "FLAT"
+            params = {"M": _GRAPH_DEGREE, "efConstruction": _GRAPH_EF_CONSTRUCTION} if index_type == "GRAPH" else {}
+            return {"index_type": index_type, "metric_type": self.metric, "params": params}
+
+    def writer(self, bulk_import=False, on_batch_inserted=None):
+        if bulk_import:
+            logger.info(f"[STORAGE] Bulk import is not available for the embedded store; inserting into '{self.name}'")
+        return EmbeddedWriter(self, on_batch_inserted=on_batch_inserted)
+
+    def flush(self):
+        """
+        Persist rows to disk, compacting deleted rows and extending the graph index as needed.
+
+        Only compaction and snapshotting the rows hold the lock searches take:
+        column files are written from the snapshot and the graph is extended
+        on a copy, which is swapped in afterwards. Rows inserted meanwhile are
+        persisted by the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                dead = self._rows - len(self._ids)
+                if self._rows and dead / self._rows > _COMPACT_DEAD_FRACTION:
+                    self._compact()
+                rows = self._rows
+                vectors = self._vectors
+                columns = {name: list(column) for name, column in self._columns.items()}
+                alive = self._alive[:rows].copy()
+                extend = self._use_graph() and self._graph_rows < rows
+                if extend:
+                    graph = (np.full((rows, _GRAPH_DEGREE), -1, dtype=np.int32) if self._graph is None
+                             else self._graph[:rows].copy())
+                    graph_rows = self._graph_rows if self._graph is not None else 0
+
+            vectors.flush()
+            for name, column in columns.items():
+                _write_json(os.path.join(self.path, "columns", f"{name}.json"), column)
+            _save_array(os.path.join(self.path, "alive.npy"), alive)
+            if extend:
+                # Rows below `rows` keep their numbers and vectors until the next compaction (under _flush_lock)
+                self._extend_graph(graph, graph_rows, rows)
+                _save_array(os.path.join(self.path, "graph.npy"), graph)
+                with self._lock:
+                    self._graph = np.concatenate([
+                        graph, np.full((self._capacity - rows, _GRAPH_DEGREE), -1, dtype=np.int32)
+                    ])
+                    self._graph_rows = rows
+            _write_json(os.path.join(self.path, "meta.json"), {
+                "name": self.name, "dim": self.dim, "metric": self.metric, "description": self.description,
+                "fields": [[name, self.field_types[name]] for name in self.field_names], "rows": rows,
+            })
+
+    def _compact(self):
+        """Drop deleted rows from the matrix and columns. Caller holds the lock."""
+        keep = np.flatnonzero(self._alive[:self._rows])
+        logger.info(f"[STORAGE] Compacting '{self.name}': {self._rows - len(keep)} deleted rows removed")
+        self._vectors[:len(keep)] = np.array(self._vectors[keep])
+        self._sq_norms[:len(keep)] = self._sq_norms[keep]
+        for name in self._columns:
+            column = self._columns[name]
+            self._columns[name] = [column[row] for row in keep]
+        self._rows = len(keep)
+        self._compactions += 1
+        self._alive[:] = False
+        self._alive[:self._rows] = True
+        self._ids = {row_id: row for row, row_id in enumerate(self._columns["id"])}
+        self._index_partitions()
+        self._column_arrays.clear()
+        # Row numbers changed: the graph is rebuilt from scratch
+        self._graph = None
+        self._graph_rows = 0
+        graph_path = os.path.join(self.path, "graph.npy")
+        if os.path.exists(graph_path):
+            os.remove(graph_path)
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+
+    # Search
+
+    def _distances(self, rows: Optional[np.ndarray], query: np.ndarray, query_sq_norm: float) -> np.ndarray:
+        """Distances from the query to stored rows (all rows if None); lower is better for every metric."""
+        vectors = self._vectors[:self._rows] if rows is None else self._vectors[rows]
+        sq_norms = self._sq_norms[:self._rows] if rows is None else self._sq_norms[rows]
+        dots = vectors @ query
+        if self.metric == "L2":
+            return np.maximum(sq_norms - 2 * dots + query_sq_norm, 0.0)
+        if self.metric == "COSINE":
+            denominators = np.sqrt(sq_norms * query_sq_norm)
+            return -np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators > 0)
+        return -dots
+
+    def _reported_distance(self, distance: float) -> float:
+        """Milvus convention: L2 distances as-is, similarities (IP/COSINE) positive."""
+        return float(distance) if self.metric == "L2" else -float(distance)
+
+    def _use_graph(self) -> bool:
+        if EMBEDDED_INDEX == "graph":
+            return True
+        return EMBEDDED_INDEX == "auto" and len(self._ids) >= EMBEDDED_GRAPH_MIN_ROWS
+
+    def _graph_search(self, query: np.ndarray, query_sq_norm: float, ef: int, row_limit: int,
+                      graph: Optional[np.ndarray] = None):
+        """Beam search over graph rows < row_limit; returns up to ef (distance, row) pairs, best first."""
+        graph = self._graph if graph is None else graph
+        entries = np.unique(np.linspace(0, row_limit - 1, min(_GRAPH_ENTRY_POINTS, row_limit)).astype(np.int64))
+        distances = self._distances(entries, query, query_sq_norm)
+        visited = set(entries.tolist())
+        candidates = list(zip(distances.tolist(), entries.tolist()))
+        heapq.heapify(candidates)
+        results = [(-distance, row) for distance, row in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            distance, row = heapq.heappop(candidates)
+            if len(results) >= ef and distance > -results[0][0]:
+                break
+            neighbours = graph[row]
+            new = [n for n in neighbours[(neighbours >= 0) & (neighbours < row_limit)].tolist() if n not in visited]
+            if not new:
+                continue
+            visited.update(new)
+            for neighbour_distance, neighbour in zip(self._distances(np.array(new), query, query_sq_norm).tolist(), new):
+                if len(results) < ef or neighbour_distance < -results[0][0]:
+                    heapq.heappush(candidates, (neighbour_distance, neighbour))
+                    heapq.heappush(results, (-neighbour_distance, neighbour))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted((-negative, row) for negative, row in results)
+
+    def _extend_graph(self, graph: np.ndarray, start: int, end: int):
+        """Insert rows start..end into `graph`, a copy of the index that searches do not read yet."""
+        for row in range(max(1, start), end):
+            vector = np.array(self._vectors[row])
+            sq_norm = float(self._sq_norms[row])
+            found = self._graph_search(vector, sq_norm, _GRAPH_EF_CONSTRUCTION, row, graph)
+            neighbours = [n for _, n in found[:_GRAPH_DEGREE]]
+            graph[row, :len(neighbours)] = neighbours
+            for neighbour in neighbours:
+                self._link(graph, neighbour, row)
+        logger.info(f"[STORAGE] Graph index of '{self.name}' covers {end} rows ({end - start} added)")
+
+    def _link(self, graph: np.ndarray, row: int, new_row: int):
+        """Add new_row to row's neighbours, replacing the farthest one when the list is full."""
+        neighbours = graph[row]
+        free = np.flatnonzero(neighbours < 0)
+        if free.size:
+            neighbours[free[0]] = new_row
+            return
+        vector = np.array(self._vectors[row])
+        distances = self._distances(np.append(neighbours, new_row), vector, float(self._sq_norms[row]))
+        farthest = int(np.argmax(distances[:-1]))
+        if distances[-1] < distances[farthest]:
+            neighbours[farthest] = new_row
+
+    def _exact_search(self, query, query_sq_norm, rows: np.ndarray, limit: int):
+        """(distance, row) pairs of the best `limit` of the given rows, best first."""
+        if rows.size == 0:
+            return []
+        if rows.size == self._rows:
+            distances = self._distances(None, query, query_sq_norm)
+        else:
+            distances = self._distances(rows, query, query_sq_norm)
+        k = min(limit, rows.size)
+        best = np.argpartition(distances, k - 1)[:k]
+        best = best[np.argsort(distances[best])]
+        return list(zip(distances[best].tolist(), rows[best].tolist()))
+
+    def _partition_rows(self, repos: List[str]) -> np.ndarray:
+        """Live rows whose repo_name is one of repos, ascending."""
+        parts = [self._partitions[repo] for repo in set(repos) if repo in self._partitions]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        rows = np.sort(np.concatenate([np.asarray(part, dtype=np.int64) for part in parts]))
+        return rows[self._alive[rows]]
+
+    def search(self, vector, limit, output_fields, expr=None, ef=None, nprobe=None, repos=None, radius=None):
+        query = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-dimensional query for '{self.name}', got {query.shape[0]}")
+        query_sq_norm = float(query @ query)
+
+        with self._lock:
+            if self._rows == 0 or limit <= 0:
+                return []
+            if repos:
+                # Only the scoped repositories' rows are filtered and scanned
+                rows = self._partition_rows(repos)
+                if expr and rows.size:
+                    rows = rows[FilterExpression(expr).evaluate(lambda name: self._column_array(name)[rows])]
+                found = self._exact_search(query, query_sq_norm, rows, limit)
+            else:
+                found = self._search_all(query, query_sq_norm, limit, expr, ef)
+            if radius is not None:
+                # Internal distances are lower-is-better: similarities are negated
+                bound = radius if self.metric == "L2" else -radius
+                found = [(distance, row) for distance, row in found if distance < bound]
+
+            fields = [name for name in output_fields if name in self._columns]
+            return [
+                SearchHit(self._columns["id"][row], self._reported_distance(distance),
+                          {name: self._columns[name][row] for name in fields})
+                for distance, row in found
+            ]
+
+    def _search_all(self, query, query_sq_norm, limit, expr, ef):
+        """Search the whole collection, through the graph index when there is one. Caller holds the lock."""
+        mask = self._alive[:self._rows].copy()
+        if expr:
+            mask &= FilterExpression(expr).evaluate(self._column_array)
+        selected = int(mask.sum())
+
+        graph_rows = self._graph_rows if self._graph is not None and self._use_graph() else 0
+        # Selective filters are cheaper (and exact) to scan than to chase through the graph
+        if graph_rows and selected > _GRAPH_EF_CONSTRUCTION * 4:
+            ef = max(ef or VECTOR_SEARCH_EF, limit)
+            found = [(d, row) for d, row in self._graph_search(query, query_sq_norm, ef, graph_rows) if mask[row]]
+            found += self._exact_search(query, query_sq_norm, np.flatnonzero(mask[graph_rows:]) + graph_rows, limit)
+            if len(found) < min(limit, selected):
+                found = self._exact_search(query, query_sq_norm, np.flatnonzero(mask), limit)
+            return sorted(found)[:limit]
+        return self._exact_search(query, query_sq_norm, np.flatnonzero(mask), limit)
+
+
+class EmbeddedWriter:
+    """
+    Row writer for an embedded collection with the inserter interface.
+
+    Rows are inserted in batches and are searchable immediately; close() always
+    persists them to disk (also after an error), so `rows_committed` never
+    counts rows that would be lost on restart.
+    """
+
+    def __init__(self, collection: EmbeddedCollection, on_batch_inserted: Optional[Callable[[int], None]] = None,
+                 batch_rows: int = 1024):
+        self.collection = collection
+        self.on_batch_inserted = on_batch_inserted
+        self.batch_rows = batch_rows
+        self._buffer: List[Dict[str, Any]] = []
+        self.rows_inserted = 0
+        self.rows_committed = 0
+        self.batches_inserted = 0
+        self.flushes = 0
+
+    def add_row(self, row: Dict[str, Any]):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_rows:
+            self._insert_buffer()
+
+    def add_rows(self, rows: List[Dict[str, Any]]):
+        for row in rows:
+            self.add_row(row)
+
+    def _insert_buffer(self):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        self.collection.insert(rows)
+        self.rows_inserted += len(rows)
+        self.rows_committed += len(rows)
+        self.batches_inserted += 1
+        if self.on_batch_inserted is not None:
+            self.on_batch_inserted(len(rows))
+
+    def close(self):
+        try:
+            self._insert_buffer()
+        finally:
+            self.collection.flush()
+            self.flushes += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class CollectionHandle:
+    """
+    A collection looked up by name on every use, so alias switches and renames
+    reach handles held elsewhere (as with Milvus, which resolves names per request).
+    """
+
+    def __init__(self, store: "EmbeddedVectorStore", name: str):
+        self.name = name
+        self._store = store
+
+    def __getattr__(self, attr):
+        return getattr(self._store._open(self._store.resolve(self.name)), attr)
+
+
+class EmbeddedVectorStore(VectorStore):
+    """Collections stored as directories under one root, opened once per process."""
+
+    backend = "embedded"
+
+    def __init__(self, root: str = EMBEDDED_STORE_DIR):
+        self.root = root
+        self._collections: Dict[str, EmbeddedCollection] = {}
+        self._aliases: Optional[Dict[str, str]] = None
+        self._lock = threading.RLock()
+
+    def _path(self, name: str) -> str:
+        if not _COLLECTION_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid collection name '{name}' (letters, digits and underscores only)")
+        return os.path.join(self.root, name)
+
+    def _exists(self, name: str) -> bool:
+        return name in self._collections or os.path.exists(os.path.join(self._path(name), "meta.json"))
+
+    def _open(self, name: str) -> EmbeddedCollection:
+        with self._lock:
+            if name not in self._collections:
+                if not self._exists(name):
+                    raise ValueError(f"Collection '{name}' does not exist")
+                self._collections[name] = EmbeddedCollection(self._path(name))
+            return self._collections[name]
+
+    def connect(self, force=False, retries=3, retry_delay=0.0):
+        os.makedirs(self.root, exist_ok=True)
+
+    def has_collection(self, name):
+        return name in self.list_aliases() or self._exists(name)
+
+    def list_collections(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, "meta.json")))
+
+    def get_collection(self, name):
+        if not self.has_collection(name):
+            raise ValueError(f"Collection '{name}' does not exist")
+        return CollectionHandle(self, name)
+
+    def create_collection(self, name, dim, description="", metric=VECTOR_METRIC, include_links=True, scalar_indexes=(),
+                          index_type=None, expected_rows=0):
+        with self._lock:
+            if self.has_collection(name):
+                raise ValueError(f"Collection '{name}' already exists")
+            fields = [[field_name, field_type] for field_name, field_type, _ in chunk_fields(include_links)]
+            self._collections[name] = EmbeddedCollection.create(self._path(name), name, dim, metric, description, fields)
+            logger.info(f"[STORAGE] Created embedded collection '{name}' ({dim} dims, {metric}) in {self.root}")
+            return CollectionHandle(self, name)
+
+    def drop_collection(self, name):
+        with self._lock:
+            aliases = [alias for alias, target in self.list_aliases().items() if target == name]
+            if aliases:
+                raise ValueError(f"Collection '{name}' is still referenced by alias(es) {', '.join(aliases)}")
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            shutil.rmtree(self._path(name), ignore_errors=True)
+
+    def rename_collection(self, old_name, new_name):
+        with self._lock:
+            if self._exists(new_name) or new_name in self.list_aliases():
+                raise ValueError(f"Collection '{new_name}' already exists")
+            collection = self._open(old_name)
+            collection.flush()
+            collection.close()
+            del self._collections[old_name]
+            os.rename(self._path(old_name), self._path(new_name))
+            meta_path = os.path.join(self._path(new_name), "meta.json")
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            meta["name"] = new_name
+            _write_json(meta_path, meta)
+            aliases = {alias: (new_name if target == old_name else target) for alias, target in self.list_aliases().items()}
+            self._save_aliases(aliases)
+
+    def list_aliases(self):
+        with self._lock:
+            if self._aliases is None:
+                aliases_path = os.path.join(self.root, "aliases.json")
+                self._aliases = {}
+                if os.path.exists(aliases_path):
+                    with open(aliases_path, encoding="utf-8") as f:
+                        self._aliases = json.load(f)
+            return dict(self._aliases)
+
+    def _save_aliases(self, aliases: Dict[str, str]):
+        os.makedirs(self.root, exist_ok=True)
+        _write_json(os.path.join(self.root, "aliases.json"), aliases)
+        self._aliases = aliases
+
+    def set_alias(self, alias, collection_name):
+        with self._lock:
+            if self._exists(alias):
+                raise ValueError(f"Alias '{alias}' conflicts with an existing collection")
+            if not self._exists(collection_name):
+                raise ValueError(f"Collection '{collection_name}' does not exist")
+            self._save_aliases({**self.list_aliases(), alias: collection_name})
+            logger.info(f"[ALIAS] '{alias}' -> '{collection_name}'")
+
+    def drop_alias(self, alias):
+        with self._lock:
+            aliases = self.list_aliases()
+            aliases.pop(alias, None)
+            self._save_aliases(aliases)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Shared Embedding Engine
+
+One ONNX embedding session shared by every ingester in the process. Callers
+submit lists of texts from any thread; a single worker thread packs pending
+texts from all callers into full batches, so concurrent repository ingestions
+keep the model busy with large batches instead of each running its own
+small ones.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config import EMBEDDING_BATCH_SIZE
+from app.services.metrics import EMBEDDING_BATCH_SECONDS, EMBEDDING_BATCH_SIZE as EMBEDDING_BATCH_SIZE_HISTOGRAM, record_model_loaded
+
+logger = logging.getLogger(__name__)
+
+
+def encode_batch(texts: List[str], tokenizer, session, max_length: int = 512) -> List[List[float]]:
+    """Encode several texts in one ONNX run (padded batch, mask-aware mean pooling)"""
+    inputs = tokenizer(
+        texts,
+        return_tensors="np",
+        padding=True,
+        truncation=True,
+        max_length=max_length
+    )
+
+    attention_mask = inputs["attention_mask"].astype(np.int64)
+    onnx_inputs = {
+        "input_ids": inputs["input_ids"].astype(np.int64),
+        "attention_mask": attention_mask
+    }
+
+    if "token_type_ids" in inputs:
+        onnx_inputs["token_type_ids"] = inputs["token_type_ids"].astype(np.int64)
+
+    outputs = session.run(None, onnx_inputs)
+
+    # Mean over real tokens only, so padding doesn't change a text's embedding
+    mask = attention_mask[:, :, None].astype(np.float32)
+    embeddings = (outputs[0] * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings / np.where(norms == 0, 1.0, norms)
+
+    return embeddings.tolist()
+
+
+class EmbeddingRequest:
+    """Handle for texts submitted to the engine; `result` blocks until all are embedded."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        self._remaining = len(texts)
+        self._done = threading.Event()
+        self._cancelled = False
+        if not texts:
+            self._done.set()
+
+    def _complete(self, index: int, embedding: List[float]):
+        """Called by the engine worker only."""
+        self.embeddings[index] = embedding
+        self._remaining -= 1
+        if self._remaining == 0:
+            self._done.set()
+
+    def cancel(self):
+        """Drop texts of this request that have not been embedded yet."""
+        self._cancelled = True
+        self._done.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def result(self, timeout: Optional[float] = None) -> List[List[float]]:
+        """
+        Wait for the embeddings.
+
+        Raises:
+            TimeoutError: If they are not ready within timeout
+            RuntimeError: If the request was cancelled
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("Embedding request did not finish in time")
+        if self._cancelled:
+            raise RuntimeError("Embedding request was cancelled")
+        return self.embeddings
+
+
+class EmbeddingEngine:
+    """Batching front end for one tokenizer + ONNX session, safe to share across threads."""
+
+    def __init__(self, tokenizer, session, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 max_length: int = 512, max_wait_seconds: float = 0.005):
+        """
+        Args:
+            tokenizer: Hugging Face tokenizer of the embedding model
+            session: ONNX Runtime InferenceSession of the embedding model
+            batch_size: Texts per ONNX run
+            max_length: Sequence length texts are truncated to
+            max_wait_seconds: How long the worker waits for more texts to fill
+                a partial batch before running it
+        """
+        self.tokenizer = tokenizer
+        self.session = session
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length
+        self.max_wait_seconds = max_wait_seconds
+        self.dimension: Optional[int] = None
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._started_at = time.time()
+        self._busy_seconds = 0.0
+        self._batches = 0
+        self._texts = 0
+        self._worker = threading.Thread(target=self._run, name="embedding-engine", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_onnx(cls, model_dir: str = "onnx/", **kwargs) -> "EmbeddingEngine":
+        """Load the local (offline) ONNX model and its tokenizer."""
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+        model_path = f"{model_dir.rstrip('/')}/model.onnx"
+        session = ort.InferenceSession(model_path)
+        record_model_loaded("embedding", model_path)
+        logger.info(f"[EMBEDDINGS] Loaded shared embedding engine from {model_dir}")
+        return cls(tokenizer, session, **kwargs)
+
+    def submit(self, texts: List[str]) -> EmbeddingRequest:
+        """Queue texts for embedding and return immediately."""
+        if self._closed:
+            raise RuntimeError("Embedding engine is closed")
+        request = EmbeddingRequest(list(texts))
+        for index, text in enumerate(request.texts):
+            self._queue.put((request, index, text))
+        return request
+
+    @property
+    def queue_depth(self) -> int:
+        """Texts submitted but not yet picked up by the worker."""
+        return self._queue.qsize()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, blocking until done."""
+        return self.submit(texts).result()
+
+    def _next_batch(self) -> List[Any]:
+        """Block for one pending text, then gather more up to batch_size."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stop = any(item is None for item in batch)
+            batch = [item for item in batch if item is not None and not item[0].cancelled]
+            if batch:
+                self._embed_batch(batch)
+            if stop:
+                return
+
+    def _embed_batch(self, batch: List[Any]):
+        """Run one ONNX batch and hand each embedding to its request."""
+        start_time = time.time()
+        texts = [text for _, _, text in batch]
+        try:
+            embeddings = encode_batch(texts, self.tokenizer, self.session, self.max_length)
+            self.dimension = len(embeddings[0])
+        except Exception as e:
+            logger.warning(f"[EMBEDDINGS] Batch of {len(texts)} failed, encoding texts one by one: {e}")
+            embeddings = [self._encode_one(text) for text in texts]
+        elapsed = time.time() - start_time
+        EMBEDDING_BATCH_SECONDS.observe(elapsed)
+        EMBEDDING_BATCH_SIZE_HISTOGRAM.observe(len(texts))
+        with self._stats_lock:
+            self._busy_seconds += elapsed
+            self._batches += 1
+            self._texts += len(texts)
+
+        for (request, index, _), embedding in zip(batch, embeddings):
+            request._complete(index, embedding)
+
+    def _encode_one(self, text: str) -> List[float]:
+        """Encode a single text, falling back to a zero vector like the per-chunk path."""
+        try:
+            embedding = encode_batch([text], self.tokenizer, self.session, self.max_length)[0]
+            self.dimension = len(embedding)
+            return embedding
+        except Exception as e:
+            logger.warning(f"[EMBEDDINGS] Failed to generate embedding, using zero vector: {e}")
+            if self.dimension is None:
+                self.dimension = len(encode_batch(["test"], self.tokenizer, self.session, self.max_length)[0])
+            return [0.0] * self.dimension
+
+    def stats(self) -> Dict[str, Any]:
+        """Batches and texts embedded so far and the fraction of time the model was busy."""
+        with self._stats_lock:
+            uptime = time.time() - self._started_at
+            return {
+                'batches': self._batches,
+                'texts': self._texts,
+                'avg_batch_size': self._texts / self._batches if self._batches else 0.0,
+                'busy_seconds': self._busy_seconds,
+                'utilization': self._busy_seconds / uptime if uptime > 0 else 0.0,
+            }
+
+    def close(self):
+        """Stop the worker after the texts already queued are embedded."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join()
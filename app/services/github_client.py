@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Shared GitHub Client
+
+Pooled HTTP session for GitHub with one request budget for the whole process.
+Every ingester (and every repository in a bulk run) sends its API and raw
+content requests through the same client, so concurrent ingestions reuse
+connections and are throttled together:
+
+- a token bucket caps requests per second across all threads
+- X-RateLimit-Remaining/-Reset headers pause every caller once fewer than
+  the reserve of API calls remain, until the window resets
+- 403/429 rate-limit responses are retried after Retry-After / the reset time
+
+Callers always build public github.com URLs; GITHUB_API_URL / GITHUB_RAW_URL
+redirect them to another server (an enterprise mirror or a local fixture server).
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import (
+    GITHUB_TOKEN, GITHUB_REQUESTS_PER_SECOND, GITHUB_RATE_LIMIT_RESERVE, GITHUB_HTTP_POOL_SIZE,
+    GITHUB_API_URL, GITHUB_RAW_URL
+)
+
+logger = logging.getLogger(__name__)
+
+# Longest single pause for a rate-limit window (GitHub windows are one hour)
+_MAX_PAUSE_SECONDS = 3600.0
+
+_PUBLIC_API_URL = "https://api.github.com"
+_PUBLIC_RAW_URL = "https://raw.githubusercontent.com"
+
+
+class GitHubClient:
+    """Thread-safe GitHub HTTP client with a shared rate-limit budget."""
+
+    def __init__(self, github_token: Optional[str] = None,
+                 requests_per_second: float = GITHUB_REQUESTS_PER_SECOND,
+                 rate_limit_reserve: int = GITHUB_RATE_LIMIT_RESERVE,
+                 pool_size: int = GITHUB_HTTP_POOL_SIZE,
+                 max_retries: int = 3, timeout: float = 30.0):
+        """
+        Args:
+            github_token: GitHub API token (defaults to GITHUB_TOKEN)
+            requests_per_second: Request budget shared by all callers, 0 for none
+            rate_limit_reserve: Remaining API calls at which callers pause until reset
+            pool_size: Connections kept open per host
+            max_retries: Retries of a rate-limited request
+            timeout: Per-request timeout in seconds
+        """
+        self.github_token = github_token or GITHUB_TOKEN
+        self.requests_per_second = requests_per_second
+        self.rate_limit_reserve = rate_limit_reserve
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._url_overrides = [
+            (public, base) for public, base in ((_PUBLIC_API_URL, GITHUB_API_URL), (_PUBLIC_RAW_URL, GITHUB_RAW_URL))
+            if public != base
+        ]
+
+        self.headers = {
+            'Accept': 'application/vnd.github.v3+json',
+            'User-Agent': 'BeagleMind-Ingester/1.0'
+        }
+        if self.github_token:
+            self.headers['Authorization'] = f'token {self.github_token}'
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._tokens = max(1.0, requests_per_second)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._requests = 0
+        self._throttled_seconds = 0.0
+        self._rate_limit_remaining: Optional[int] = None
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        GET a GitHub URL within the shared budget.
+
+        Rate-limited responses are retried; other error statuses are returned
+        to the caller unchanged.
+
+        Args:
+            url: API or raw content URL
+            **kwargs: Extra arguments for requests.Session.get
+
+        Returns:
+            The response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        for public, base in self._url_overrides:
+            if url.startswith(public):
+                url = base + url[len(public):]
+                break
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            response = self.session.get(url, headers=self.headers, **kwargs)
+            wait = self._observe(response)
+            if wait is None or attempt == self.max_retries:
+                return response
+            logger.warning(f"[GITHUB] Rate limited on {url}, retrying in {wait:.0f}s (attempt {attempt + 1}/{self.max_retries})")
+            self._pause(wait)
+        return response
+
+    def _acquire(self):
+        """Block until the budget allows one more request."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    sleep_for = self._paused_until - now
+                elif self.requests_per_second <= 0:
+                    self._requests += 1
+                    return
+                else:
+                    capacity = max(1.0, self.requests_per_second)
+                    self._tokens = min(capacity, self._tokens + (now - self._updated) * self.requests_per_second)
+                    self._updated = now
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        self._requests += 1
+                        return
+                    sleep_for = (1.0 - self._tokens) / self.requests_per_second
+                self._throttled_seconds += sleep_for
+            time.sleep(sleep_for)
+
+    def _pause(self, seconds: float):
+        """Hold back every caller for the given time."""
+        seconds = min(max(0.0, seconds), _MAX_PAUSE_SECONDS)
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _observe(self, response: requests.Response) -> Optional[float]:
+        """
+        Track the API rate-limit headers of a response.
+
+        Returns:
+            Seconds to wait before retrying if the response was rate limited, else None
+        """
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        reset_in = max(0.0, float(reset) - time.time()) if reset and reset.isdigit() else None
+
+        if remaining is not None and remaining.isdigit():
+            self._rate_limit_remaining = int(remaining)
+            if int(remaining) <= self.rate_limit_reserve and reset_in:
+                logger.warning(f"[GITHUB] {remaining} API calls left, pausing requests for {reset_in:.0f}s until the limit resets")
+                self._pause(reset_in)
+
+        if response.status_code in (403, 429):
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+            if remaining == '0':
+                return reset_in if reset_in is not None else 60.0
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests sent, seconds callers spent throttled and the last seen API budget."""
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'throttled_seconds': self._throttled_seconds,
+                'rate_limit_remaining': self._rate_limit_remaining,
+            }
@@ -7,9 +7,16 @@ This service handles the ingestion of GitHub repositories into Milvus collection
 
 import logging
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List, Optional
+from app.config import INGESTION_MAX_CONCURRENT_JOBS, INGESTION_JOB_HISTORY, BULK_MAX_CONCURRENT_REPOS
 from app.scripts.github_ingestor import GitHubDirectIngester
+from app.services.bulk_ingestion import BulkIngestionRunner, list_organization_repositories
+from app.services.embedding_engine import EmbeddingEngine
+from app.services.github_client import GitHubClient
+from app.services.local_repository import resolve_local_repository_path
+from app.services.ingestion_jobs import IngestionJob, IngestionJobScheduler, JOB_SUCCEEDED, JOB_QUEUED, JOB_RUNNING
+from app.services.metrics import record_cache, register_gauge_callback
 
 logger = logging.getLogger(__name__)
 
@@ -18,110 +25,228 @@ class GitHubIngestionService:
     
     def __init__(self):
         self.ingesters = {}  # Cache ingesters by collection name
-        self.executor = ThreadPoolExecutor(max_workers=2)  # Limit concurrent ingestions
+        # Shared by every ingester: one GitHub connection pool / rate-limit budget
+        # and one batching embedding engine (loaded with the first ingester)
+        self.github_client = GitHubClient()
+        self.embedding_engine: Optional[EmbeddingEngine] = None
+        self._engine_lock = threading.Lock()
+        # Jobs for one collection run serially; distinct collections share the global limit
+        self.scheduler = IngestionJobScheduler(
+            max_concurrent_jobs=INGESTION_MAX_CONCURRENT_JOBS,
+            history_size=INGESTION_JOB_HISTORY
+        )
+        
+        register_gauge_callback(
+            "beaglemind_ingestion_jobs_current",
+            "Ingestion jobs currently queued or running",
+            ["collection", "state"], self._job_gauge
+        )
+        register_gauge_callback(
+            "beaglemind_embedding_queue_depth",
+            "Texts waiting for the shared embedding engine",
+            [], lambda: [((), self.embedding_engine.queue_depth)] if self.embedding_engine is not None else []
+        )
+    
+    def _job_gauge(self):
+        """(collection, state) -> number of queued/running jobs, for the metrics endpoint."""
+        counts: Dict[tuple, int] = {}
+        for job in self.scheduler.list_jobs():
+            if job.state in (JOB_QUEUED, JOB_RUNNING):
+                key = (job.collection_name, job.state)
+                counts[key] = counts.get(key, 0) + 1
+        return list(counts.items())
+    
+    def get_embedding_engine(self) -> EmbeddingEngine:
+        """Return the shared embedding engine, loading it on first use."""
+        with self._engine_lock:
+            if self.embedding_engine is None:
+                self.embedding_engine = EmbeddingEngine.from_onnx("onnx/")
+            return self.embedding_engine
     
     def get_or_create_ingester(self, collection_name: str) -> GitHubDirectIngester:
         """Get existing ingester or create new one for collection."""
+        record_cache("ingester", collection_name, collection_name in self.ingesters)
         if collection_name not in self.ingesters:
             logger.info(f"[SERVICE] Creating new ingester for collection: {collection_name}")
             self.ingesters[collection_name] = GitHubDirectIngester(
                 collection_name=collection_name,
-                model_name="BAAI/bge-base-en-v1.5"
+                model_name="BAAI/bge-base-en-v1.5",
+                github_client=self.github_client,
+                embedding_engine=self.get_embedding_engine()
             )
         else:
             logger.info(f"[SERVICE] Using existing ingester for collection: {collection_name}")
         return self.ingesters[collection_name]
     
-    def _sync_ingest_repository(self, collection_name: str, github_url: str, 
-                               branch: str = "main") -> Dict[str, Any]:
+    def _run_job(self, job: IngestionJob) -> Dict[str, Any]:
+        """
+        Job runner - executes one repository ingestion on a scheduler worker thread.
+
+        Raises on failure so the scheduler records the job as failed; cancellation
+        surfaces as IngestionCancelled from the ingester's progress checks.
         """
-        Synchronous repository ingestion - runs in thread pool.
+        github_url = job.params["github_url"]
+        branch = job.params["branch"]
+        logger.info(f"[SERVICE] Job {job.job_id} started for ingesting {github_url}")
+        
+        # Get or create ingester for this collection
+        ingester = self.get_or_create_ingester(job.collection_name)
+        
+        # Ingest repository (this is the blocking operation)
+        result = ingester.ingest_repository(
+            repo_url=github_url,
+            branch=branch,
+            max_workers=4,  # Reduced to avoid overwhelming the system
+            progress=job.progress,
+            local_path=job.params.get("local_path")
+        )
+        
+        if not result['success']:
+            raise RuntimeError(f"Failed to ingest repository: {result.get('message', 'Unknown error')}")
+        
+        logger.info(f"[SERVICE] Job {job.job_id} completed successfully for {github_url}")
+        logger.info(f"[SERVICE STATS] Files processed: {result['files_processed']}, "
+                   f"Chunks generated: {result['chunks_generated']}")
+        return {
+            "files_processed": result['files_processed'],
+            "chunks_generated": result['chunks_generated'],
+            "files_with_code": result['files_with_code'],
+            "avg_quality_score": result['avg_quality_score'],
+            "total_time": result['total_time'],
+            "timings": result.get('timings')
+        }
+    
+    def submit_ingestion(self, collection_name: str, github_url: str,
+                         branch: str = "main", local_path: Optional[str] = None) -> IngestionJob:
         """
-        try:
-            logger.info(f"[SERVICE] Thread started for ingesting {github_url}")
+        Queue a repository ingestion job and return it without waiting.
+        
+        Args:
+            collection_name: Name of the Milvus collection
+            github_url: GitHub repository URL
+            branch: Repository branch to ingest
+            local_path: Checkout or mirror under LOCAL_REPOSITORY_ROOT to read
+                instead of the GitHub API (github_url still provides the links)
             
-            # Get or create ingester for this collection
-            ingester = self.get_or_create_ingester(collection_name)
+        Returns:
+            The queued IngestionJob (poll it via get_job)
             
-            # Ingest repository (this is the blocking operation)
-            result = ingester.ingest_repository(
-                repo_url=github_url,
-                branch=branch,
-                max_workers=4  # Reduced to avoid overwhelming the system
-            )
+        Raises:
+            ValueError: If local_path is given but not allowed
+        """
+        params = {"github_url": github_url, "branch": branch}
+        if local_path:
+            params["local_path"] = resolve_local_repository_path(local_path)
+        logger.info(f"[SERVICE START] Repository: {github_url}, Collection: {collection_name}, Branch: {branch}"
+                    + (f", Local path: {params['local_path']}" if local_path else ""))
+        return self.scheduler.submit(collection_name, params, self._run_job)
+    
+    def _run_bulk_job(self, job: IngestionJob) -> Dict[str, Any]:
+        """
+        Job runner for bulk ingestion: resolves the repository list (expanding an
+        organization if given) and ingests the repositories concurrently.
+        """
+        params = job.params
+        repositories = [{"url": url, "branch": params["branch"]} for url in params.get("repositories") or []]
+        if params.get("org"):
+            repositories.extend(list_organization_repositories(
+                self.github_client, params["org"],
+                include_forks=params.get("include_forks", False),
+                include_archived=params.get("include_archived", False)
+            ))
+        if not repositories:
+            raise RuntimeError("No repositories to ingest")
+        
+        ingester = self.get_or_create_ingester(job.collection_name)
+        runner = BulkIngestionRunner(
+            ingester,
+            max_concurrent_repos=params.get("max_concurrent_repos") or BULK_MAX_CONCURRENT_REPOS
+        )
+        stats = runner.run(repositories, progress=job.progress)
+        if not stats["repositories_succeeded"]:
+            raise RuntimeError(f"All {stats['repositories']} repositories failed to ingest")
+        return stats
+    
+    def submit_bulk_ingestion(self, collection_name: str, repositories: Optional[List[str]] = None,
+                              org: Optional[str] = None, branch: str = "main",
+                              include_forks: bool = False, include_archived: bool = False,
+                              max_concurrent_repos: Optional[int] = None) -> IngestionJob:
+        """
+        Queue one job that ingests many repositories into a collection.
+        
+        Args:
+            collection_name: Name of the Milvus collection
+            repositories: GitHub repository URLs (ingested on `branch`)
+            org: GitHub organization whose repositories are ingested on their default branch
+            branch: Branch for the explicitly listed repositories
+            include_forks: Include forked repositories of the organization
+            include_archived: Include archived repositories of the organization
+            max_concurrent_repos: Repositories ingested at the same time
             
-            if result['success']:
-                logger.info(f"[SERVICE] Thread completed successfully for {github_url}")
-                return {
-                    "success": True,
-                    "message": f"Successfully ingested repository into collection '{collection_name}'",
-                    "stats": {
-                        "files_processed": result['files_processed'],
-                        "chunks_generated": result['chunks_generated'],
-                        "files_with_code": result['files_with_code'],
-                        "avg_quality_score": result['avg_quality_score'],
-                        "total_time": result['total_time']
-                    }
-                }
-            else:
-                logger.error(f"[SERVICE] Thread failed for {github_url}: {result.get('message', 'Unknown error')}")
-                return {
-                    "success": False,
-                    "message": f"Failed to ingest repository: {result.get('message', 'Unknown error')}"
-                }
-                
-        except Exception as e:
-            logger.error(f"[SERVICE] Thread exception for {github_url}: {e}")
-            return {
-                "success": False,
-                "message": f"Error during ingestion: {str(e)}"
-            }
+        Returns:
+            The queued IngestionJob; its stats hold aggregate and per-repository results
+        """
+        logger.info(f"[SERVICE START] Bulk ingestion into {collection_name}: "
+                    f"org={org}, {len(repositories or [])} listed repositories")
+        return self.scheduler.submit(
+            collection_name,
+            {
+                "org": org,
+                "repositories": list(repositories or []),
+                "branch": branch,
+                "include_forks": include_forks,
+                "include_archived": include_archived,
+                "max_concurrent_repos": max_concurrent_repos,
+            },
+            self._run_bulk_job
+        )
+    
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Look up a job by id."""
+        return self.scheduler.get(job_id)
+    
+    def list_jobs(self, collection_name: Optional[str] = None) -> List[IngestionJob]:
+        """List known jobs, optionally for a single collection."""
+        return self.scheduler.list_jobs(collection_name)
+    
+    def cancel_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Cancel a queued or running job."""
+        return self.scheduler.cancel(job_id)
     
     async def ingest_repository(self, collection_name: str, github_url: str, 
-                              branch: str = "main") -> Dict[str, Any]:
+                              branch: str = "main", poll_interval: float = 1.0) -> Dict[str, Any]:
         """
-        Ingest a GitHub repository into the specified collection.
+        Ingest a GitHub repository and wait for the job to finish.
         
-        This method runs the blocking ingestion in a thread pool to avoid
-        blocking the FastAPI event loop.
+        The work runs on the job scheduler, so it obeys the same per-collection
+        serialization and concurrency limit as jobs queued via submit_ingestion.
         
         Args:
             collection_name: Name of the Milvus collection
             github_url: GitHub repository URL
             branch: Repository branch to ingest
+            poll_interval: Seconds between job state checks
             
         Returns:
             Dictionary with success status and ingestion results
         """
-        logger.info(f"[SERVICE START] Repository: {github_url}, Collection: {collection_name}, Branch: {branch}")
+        job = self.submit_ingestion(collection_name, github_url, branch)
+        while job.finished_at is None:
+            await asyncio.sleep(poll_interval)
         
-        try:
-            # Run the blocking ingestion in a thread pool
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor,
-                self._sync_ingest_repository,
-                collection_name,
-                github_url,
-                branch
-            )
-            
-            if result["success"]:
-                logger.info(f"[SERVICE SUCCESS] Repository {github_url} successfully processed")
-                logger.info(f"[SERVICE STATS] Files processed: {result.get('stats', {}).get('files_processed', 0)}, "
-                           f"Chunks generated: {result.get('stats', {}).get('chunks_generated', 0)}")
-            else:
-                logger.error(f"[SERVICE FAILED] Repository {github_url}: {result.get('message', 'Unknown error')}")
-            
-            return result
-                
-        except Exception as e:
-            logger.error(f"[SERVICE ERROR] Critical error during repository ingestion: {e}")
-            logger.error(f"[SERVICE ERROR] Repository: {github_url}, Collection: {collection_name}")
+        if job.state == JOB_SUCCEEDED:
+            logger.info(f"[SERVICE SUCCESS] Repository {github_url} successfully processed")
             return {
-                "success": False,
-                "message": f"Error during ingestion: {str(e)}"
+                "success": True,
+                "message": f"Successfully ingested repository into collection '{collection_name}'",
+                "stats": job.result
             }
+        
+        logger.error(f"[SERVICE FAILED] Repository {github_url}: {job.error or job.state}")
+        return {
+            "success": False,
+            "message": f"Error during ingestion: {job.error or 'job ' + job.state}"
+        }
 
 # Global service instance
 github_ingestion_service = GitHubIngestionService()
\ No newline at end of file
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Vector Index Policy
+
+Chooses the Milvus vector index of a collection from its row count and
+dimension instead of a fixed IVF_FLAT/nlist=1024:
+
+- HNSW up to VECTOR_INDEX_HNSW_MAX_ROWS rows: best recall/latency while the
+  graph fits in memory; M grows with the collection
+- IVF_SQ8 up to VECTOR_INDEX_PQ_MIN_ROWS rows: 4x smaller than IVF_FLAT
+- IVF_PQ beyond: product quantization with ~8 dimensions per sub-quantizer
+
+IVF nlist is ~4*sqrt(rows) rounded to a power of two, so the chosen index only
+changes when the collection grows by a large factor; `ensure_index()` builds
+it for new collections and logs when the choice changes, and migrate_collection
+rebuilds it into a new collection. VECTOR_INDEX_TYPE (or a
+per-collection entry in VECTOR_INDEX_OVERRIDES) pins the index type, with
+parameters still derived from the size.
+"""
+
+import math
+from typing import Any, Dict, Optional
+
+from app.config import (
+    VECTOR_INDEX_TYPE, VECTOR_INDEX_OVERRIDES, VECTOR_INDEX_HNSW_MAX_ROWS, VECTOR_INDEX_PQ_MIN_ROWS,
+    VECTOR_SEARCH_EF, VECTOR_SEARCH_NPROBE,
+)
+
+INDEX_TYPES = ("HNSW", "IVF_FLAT", "IVF_SQ8", "IVF_PQ")
+
+# Milvus limits
+_MAX_EF = 32768
+_MAX_NLIST = 65536
+
+
+def index_type_for(collection_name: str) -> str:
+    """The configured index type of a collection ("auto" or one of INDEX_TYPES)."""
+    for entry in VECTOR_INDEX_OVERRIDES.split(","):
+        name, _, index_type = entry.strip().partition(":")
+        if name == collection_name and index_type:
+            return index_type.strip().upper() if index_type.strip().lower() != "auto" else "auto"
+    return VECTOR_INDEX_TYPE.upper() if VECTOR_INDEX_TYPE.lower() != "auto" else "auto"
+
+
+def _nlist(rows: int) -> int:
+    target = 4 * math.sqrt(max(rows, 1))
+    return int(min(_MAX_NLIST, max(64, 2 ** round(math.log2(target)))))
+
+
+def _pq_m(dim: int) -> int:
+    """Largest divisor of dim giving sub-vectors of at least 8 dimensions (Milvus needs dim % m == 0)."""
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def choose_index(rows: int, dim: int, metric: str, index_type: str = "auto") -> Dict[str, Any]:
+    """
+    Index parameters for the embedding field of a collection.
+
+    Args:
+        rows: Current (or expected) number of rows
+        dim: Embedding dimension
+        metric: L2, IP or COSINE
+        index_type: "auto" or one of INDEX_TYPES
+
+    Returns:
+        Milvus index params: {"index_type", "metric_type", "params"}
+
+    Raises:
+        ValueError: If the index type is unknown
+    """
+    if index_type == "auto":
+        if rows < VECTOR_INDEX_HNSW_MAX_ROWS:
+            index_type = "HNSW"
+        elif rows < VECTOR_INDEX_PQ_MIN_ROWS:
+            index_type = "IVF_SQ8"
+        else:
+            index_type = "IVF_PQ"
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type '{index_type}' (expected auto or one of {', '.join(INDEX_TYPES)})")
+
+    if index_type == "HNSW":
+        m = 16 if rows < 250_000 else 32
+        params = {"M": m, "efConstruction": 8 * m if dim <= 512 else 16 * m}
+    elif index_type == "IVF_PQ":
+        params = {"nlist": _nlist(rows), "m": _pq_m(dim), "nbits": 8}
+    else:
+        params = {"nlist": _nlist(rows)}
+    return {"index_type": index_type, "metric_type": metric, "params": params}
+
+
+def search_params(index: Optional[Dict[str, Any]], metric: str, limit: int,
+                  ef: Optional[int] = None, nprobe: Optional[int] = None,
+                  radius: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Search parameters matching an index, with per-request ef / nprobe overrides.
+
+    HNSW needs ef >= limit; IVF nprobe defaults to ~nlist/64 (at least 8) and
+    never exceeds nlist. With an unknown index both parameters are sent. A
+    radius turns the search into a Milvus range search (see range_radius).
+    """
+    index_type = (index or {}).get("index_type", "")
+    index_params = (index or {}).get("params", {})
+    params: Dict[str, Any] = {}
+    if index_type in ("HNSW", ""):
+        params["ef"] = min(_MAX_EF, max(ef or VECTOR_SEARCH_EF, limit))
+    if index_type.startswith("IVF") or index_type == "":
+        nlist = int(index_params.get("nlist", 1024))
+        default_nprobe = VECTOR_SEARCH_NPROBE or max(8, nlist // 64)
+        params["nprobe"] = max(1, min(nlist, nprobe or default_nprobe))
+    if radius is not None:
+        params["radius"] = radius
+    return {"metric_type": metric, "params": params}
+
+
+def range_radius(metric: str, min_similarity: Optional[float] = None,
+                 max_distance: Optional[float] = None) -> Optional[float]:
+    """
+    Range search radius in a metric's reported units from score bounds.
+
+    Embeddings are normalized, so squared L2 distance = 2 - 2 * cosine
+    similarity and either bound applies to any metric; with both, the stricter
+    one wins.
+
+    Args:
+        metric: L2, IP or COSINE
+        min_similarity: Minimum cosine similarity (-1..1)
+        max_distance: Maximum squared L2 distance (0..4), as reported by L2 collections
+
+    Returns:
+        Maximum distance (L2) or minimum similarity (IP, COSINE), or None without bounds
+    """
+    similarities = []
+    if min_similarity is not None:
+        similarities.append(min_similarity)
+    if max_distance is not None:
+        similarities.append(1 - max_distance / 2)
+    if not similarities:
+        return None
+    similarity = max(similarities)
+    return 2 - 2 * similarity if metric == "L2" else similarity
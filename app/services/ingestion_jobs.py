@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Ingestion Job Scheduler
+
+Background job queue for repository ingestion. Jobs are accepted immediately and
+executed on a bounded worker pool; jobs targeting the same collection run one at
+a time, while jobs for different collections run concurrently up to the global
+limit. Each job carries a progress tracker that the ingester updates per stage
+and that doubles as the cancellation handle.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.services.metrics import INGESTION_JOBS
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = {JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED}
+
+# Progress stages reported by the ingestion pipeline, in pipeline order
+PROGRESS_STAGES = ("files", "chunks", "embeddings", "inserts")
+
+
+class IngestionCancelled(Exception):
+    """Raised inside an ingestion run when its job has been cancelled."""
+
+
+class JobProgress:
+    """
+    Thread-safe per-stage progress counters plus a cancellation flag.
+
+    The ingester receives one of these and calls `set_total`/`advance` as work
+    completes, and `raise_if_cancelled` at safe points between units of work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self.stage: Optional[str] = None
+        self.stages: Dict[str, Dict[str, Optional[int]]] = {
+            name: {"done": 0, "total": None} for name in PROGRESS_STAGES
+        }
+
+    def set_stage(self, stage: str):
+        """Mark the stage the pipeline is currently working on."""
+        with self._lock:
+            self.stage = stage
+
+    def set_total(self, stage: str, total: int):
+        """Set the expected amount of work for a stage."""
+        with self._lock:
+            self.stages.setdefault(stage, {"done": 0, "total": None})["total"] = total
+
+    def add_total(self, stage: str, amount: int):
+        """Grow the expected amount of work for a stage (for jobs made of several runs)."""
+        with self._lock:
+            counts = self.stages.setdefault(stage, {"done": 0, "total": None})
+            counts["total"] = (counts["total"] or 0) + amount
+
+    def advance(self, stage: str, amount: int = 1):
+        """Record completed work for a stage."""
+        with self._lock:
+            self.stages.setdefault(stage, {"done": 0, "total": None})["done"] += amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of the current progress suitable for serialization."""
+        with self._lock:
+            return {
+                "stage": self.stage,
+                "stages": {name: dict(counts) for name, counts in self.stages.items()},
+            }
+
+    def cancel(self):
+        """Request cancellation; the running pipeline stops at its next check."""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def raise_if_cancelled(self):
+        """Abort the current run if cancellation has been requested."""
+        if self._cancel_event.is_set():
+            raise IngestionCancelled("Ingestion job was cancelled")
+
+
+class IngestionJob:
+    """A single queued or executed ingestion request."""
+
+    def __init__(self, collection_name: str, params: Dict[str, Any],
+                 runner: Callable[["IngestionJob"], Dict[str, Any]]):
+        self.job_id = uuid.uuid4().hex
+        self.collection_name = collection_name
+        self.params = params
+        self.runner = runner
+        self.state = JOB_QUEUED
+        self.progress = JobProgress()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the job for API responses."""
+        return {
+            "job_id": self.job_id,
+            "collection_name": self.collection_name,
+            "params": dict(self.params),
+            "state": self.state,
+            "progress": self.progress.snapshot(),
+            "stats": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestionJobScheduler:
+    """
+    Bounded scheduler for ingestion jobs.
+
+    At most `max_concurrent_jobs` jobs run at once, and at most one job per
+    collection is running at any time; later jobs for a busy collection wait
+    in that collection's queue and are dispatched when it frees up.
+    """
+
+    def __init__(self, max_concurrent_jobs: int = 2, history_size: int = 100):
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.history_size = history_size
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_jobs,
+            thread_name_prefix="ingestion-job"
+        )
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._pending: Dict[str, Deque[IngestionJob]] = {}
+        self._busy_collections: set = set()
+        self._ready: Deque[IngestionJob] = deque()
+        self._running = 0
+
+    def submit(self, collection_name: str, params: Dict[str, Any],
+               runner: Callable[[IngestionJob], Dict[str, Any]]) -> IngestionJob:
+        """
+        Enqueue a job and return it immediately.
+
+        Args:
+            collection_name: Collection the job writes to (serialization key)
+            params: Job parameters, echoed back in status responses
+            runner: Callable executed on a worker thread; receives the job and
+                returns a stats dictionary
+
+        Returns:
+            The queued IngestionJob
+        """
+        job = IngestionJob(collection_name, params, runner)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._pending.setdefault(collection_name, deque()).append(job)
+            self._trim_history()
+            self._dispatch()
+        logger.info(f"[JOBS] Queued job {job.job_id} for collection '{collection_name}'")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, collection_name: Optional[str] = None) -> List[IngestionJob]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if collection_name:
+            jobs = [job for job in jobs if job.collection_name == collection_name]
+        return jobs
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Cancel a job. Queued jobs are dropped immediately; running jobs are
+        signalled and stop at the pipeline's next cancellation check.
+
+        Returns:
+            The job, or None if the id is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED_STATES:
+                return job
+            job.progress.cancel()
+            if job.state == JOB_QUEUED:
+                queue = self._pending.get(job.collection_name)
+                if queue and job in queue:
+                    queue.remove(job)
+                if job in self._ready:
+                    self._ready.remove(job)
+                    self._busy_collections.discard(job.collection_name)
+                job.state = JOB_CANCELLED
+                job.finished_at = datetime.now(timezone.utc)
+                INGESTION_JOBS.labels(collection=job.collection_name, state=job.state).inc()
+                self._dispatch()
+        logger.info(f"[JOBS] Cancellation requested for job {job_id}")
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs per state."""
+        with self._lock:
+            counts = {state: 0 for state in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)}
+            for job in self._jobs.values():
+                counts[job.state] += 1
+            return counts
+
+    def _dispatch(self):
+        """Start queued jobs while slots and idle collections are available. Caller holds the lock."""
+        for collection_name, queue in self._pending.items():
+            if queue and collection_name not in self._busy_collections:
+                self._busy_collections.add(collection_name)
+                self._ready.append(queue.popleft())
+
+        while self._ready and self._running < self.max_concurrent_jobs:
+            job = self._ready.popleft()
+            job.state = JOB_RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            self._running += 1
+            self.executor.submit(self._run_job, job)
+
+    def _run_job(self, job: IngestionJob):
+        """Execute a job on a worker thread and record its outcome."""
+        start_time = time.time()
+        logger.info(f"[JOBS] Job {job.job_id} started for collection '{job.collection_name}'")
+        try:
+            job.progress.raise_if_cancelled()
+            job.result = job.runner(job)
+            job.state = JOB_SUCCEEDED
+            logger.info(f"[JOBS] Job {job.job_id} succeeded in {time.time() - start_time:.2f}s")
+        except IngestionCancelled:
+            job.state = JOB_CANCELLED
+            logger.info(f"[JOBS] Job {job.job_id} cancelled after {time.time() - start_time:.2f}s")
+        except Exception as e:
+            job.state = JOB_FAILED
+            job.error = str(e)
+            logger.error(f"[JOBS] Job {job.job_id} failed: {e}")
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            INGESTION_JOBS.labels(collection=job.collection_name, state=job.state).inc()
+            with self._lock:
+                self._running -= 1
+                self._busy_collections.discard(job.collection_name)
+                self._dispatch()
+
+    def _trim_history(self):
+        """Drop the oldest finished jobs beyond the history limit. Caller holds the lock."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Ingestion Journal
+
+Append-only JSON-lines journal used to checkpoint long ingestion runs. Every
+record is flushed and fsynced before `append` returns, so a record that is in
+the file describes work that really finished; a torn last line from a crash is
+ignored on replay. A restarted run replays the journal to find where to resume.
+
+RepositoryJournal builds the repository ingestion checkpoint on top of it:
+processed files by blob SHA, embeddings spilled to .npy files, and the chunk
+ids submitted to and acknowledged by Milvus.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionJournal:
+    """Durable, append-only event log for one ingestion run."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Journal file; created on first append, replayed if it exists
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.records: List[Dict[str, Any]] = self._replay()
+        self._file = None
+
+    def _replay(self) -> List[Dict[str, Any]]:
+        """Load existing records, stopping at the first unreadable line."""
+        self._valid_bytes = 0
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "rb") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.endswith(b"\n"):
+                    logger.warning(f"[JOURNAL] Ignoring torn record at {self.path}:{line_number}")
+                    break
+                if line.strip():
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"[JOURNAL] Ignoring unreadable record at {self.path}:{line_number} and everything after it")
+                        break
+                self._valid_bytes += len(line)
+        logger.info(f"[JOURNAL] Replayed {len(records)} records from {self.path}")
+        return records
+
+    def append(self, event: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Durably append one record.
+
+        Args:
+            event: Record type (e.g. "start", "batch", "complete")
+            **fields: JSON-serializable payload
+
+        Returns:
+            The record written
+        """
+        record = {"event": event, "at": time.time(), **fields}
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+                # Drop a torn tail so new records start on a clean line
+                if self._file.tell() > self._valid_bytes:
+                    self._file.truncate(self._valid_bytes)
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            # Records of this run are valid too: a reopen after close() must not truncate them
+            self._valid_bytes += len(line.encode("utf-8"))
+            self.records.append(record)
+        return record
+
+    def events(self, event: str) -> Iterator[Dict[str, Any]]:
+        """Records of one type, oldest first."""
+        return (record for record in self.records if record.get("event") == event)
+
+    def last(self, event: str) -> Optional[Dict[str, Any]]:
+        """Most recent record of one type, or None."""
+        for record in reversed(self.records):
+            if record.get("event") == event:
+                return record
+        return None
+
+    def reset(self):
+        """Discard all records and start an empty journal."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.records = []
+            self._valid_bytes = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class RepositoryJournal:
+    """
+    Resumable state of one repository ingestion (collection + repo + branch).
+
+    Records, in one IngestionJournal:
+      - "file":      a processed file (path, blob SHA) and its chunk rows
+      - "embedded":  a batch of chunk ids whose embeddings were spilled to an .npy file
+      - "submitted": chunk ids handed to the writer (may or may not be stored)
+      - "committed": chunk ids whose insert Milvus acknowledged
+
+    A retried run reuses rows of files whose SHA is unchanged, loads spilled
+    embeddings instead of recomputing them, and skips committed chunks. The
+    journal and spill files are removed once a run completes.
+    """
+
+    def __init__(self, directory: str, collection_name: str, repo_owner: str,
+                 repo_name: str, branch: str):
+        key = "__".join(re.sub(r"[^\w.-]", "_", part) for part in (collection_name, repo_owner, repo_name, branch))
+        self.path = os.path.join(directory, f"{key}.jsonl")
+        self.spill_dir = os.path.join(directory, f"{key}.spill")
+        self.journal = IngestionJournal(self.path)
+
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.embedded: Dict[str, Tuple[str, int]] = {}
+        self.submitted: Set[str] = set()
+        self.committed: Set[str] = set()
+        for record in self.journal.records:
+            event = record.get("event")
+            if event == "file":
+                self.files[record["path"]] = {"sha": record["sha"], "rows": record["rows"]}
+            elif event == "embedded":
+                for index, chunk_id in enumerate(record["ids"]):
+                    self.embedded[chunk_id] = (record["file"], index)
+            elif event == "submitted":
+                self.submitted.update(record["ids"])
+            elif event == "committed":
+                self.committed.update(record["ids"])
+        self._spill_sequence = 1 + max(
+            (int(re.sub(r"\D", "", name)) for name, _ in self.embedded.values()), default=-1
+        )
+        self._spill_lock = threading.Lock()
+
+        if self.journal.records:
+            logger.info(f"[JOURNAL] Resuming {repo_owner}/{repo_name}@{branch}: {len(self.files)} files processed, "
+                        f"{len(self.embedded)} embeddings spilled, {len(self.committed)} chunks committed")
+
+    def processed_rows(self, path: str, sha: str) -> Optional[List[Dict[str, Any]]]:
+        """Chunk rows of a file processed in an earlier attempt, if its SHA is unchanged."""
+        entry = self.files.get(path)
+        if entry is not None and entry["sha"] == sha:
+            return entry["rows"]
+        return None
+
+    def record_file(self, path: str, sha: str, rows: List[Dict[str, Any]]):
+        self.journal.append("file", path=path, sha=sha, rows=rows)
+        self.files[path] = {"sha": sha, "rows": rows}
+
+    def spill_embeddings(self, chunk_ids: List[str], embeddings: List[List[float]]):
+        """Write a batch of embeddings to disk and record which chunks they belong to."""
+        with self._spill_lock:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            name = f"embeddings_{self._spill_sequence:06d}.npy"
+            self._spill_sequence += 1
+            with open(os.path.join(self.spill_dir, name), "wb") as f:
+                np.save(f, np.asarray(embeddings, dtype=np.float32))
+                f.flush()
+                os.fsync(f.fileno())
+            self.journal.append("embedded", file=name, ids=chunk_ids)
+            for index, chunk_id in enumerate(chunk_ids):
+                self.embedded[chunk_id] = (name, index)
+
+    def load_embeddings(self, chunk_ids: List[str]) -> Dict[str, List[float]]:
+        """Spilled embeddings for the given chunk ids (ids without one are omitted)."""
+        by_file: Dict[str, List[Tuple[str, int]]] = {}
+        for chunk_id in chunk_ids:
+            if chunk_id in self.embedded:
+                name, index = self.embedded[chunk_id]
+                by_file.setdefault(name, []).append((chunk_id, index))
+        loaded = {}
+        for name, entries in by_file.items():
+            try:
+                array = np.load(os.path.join(self.spill_dir, name), mmap_mode="r")
+            except (OSError, ValueError) as e:
+                logger.warning(f"[JOURNAL] Spill file {name} unreadable, embeddings will be recomputed: {e}")
+                continue
+            for chunk_id, index in entries:
+                loaded[chunk_id] = array[index].tolist()
+        return loaded
+
+    def record_submitted(self, chunk_ids: List[str]):
+        self.journal.append("submitted", ids=chunk_ids)
+        self.submitted.update(chunk_ids)
+
+    def record_committed(self, chunk_ids: List[str]):
+        self.journal.append("committed", ids=chunk_ids)
+        self.committed.update(chunk_ids)
+
+    def discard(self):
+        """Remove the journal and spilled embeddings after a successful run."""
+        self.journal.reset()
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def close(self):
+        self.journal.close()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON Array Reader
+
+Yields the elements of a top-level JSON array one at a time while reading the
+file in fixed-size blocks, so multi-gigabyte dumps can be processed with memory
+bounded by the largest single element rather than the whole document.
+"""
+
+import json
+from typing import Any, Iterator, TextIO
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+def iter_json_array(fp: TextIO, read_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Incrementally parse a top-level JSON array.
+
+    Args:
+        fp: Text file object positioned at the start of the document
+        read_size: Characters read per block
+
+    Yields:
+        Each element of the array, in order
+
+    Raises:
+        ValueError: If the document is not a JSON array or is malformed
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill(min_size: int = read_size) -> bool:
+        """Append at least one block to the buffer, dropping consumed text. Returns False at EOF."""
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        block = fp.read(max(read_size, min_size))
+        if not block:
+            eof = True
+            return False
+        buffer = buffer[position:] + block
+        position = 0
+        return True
+
+    def skip_whitespace() -> bool:
+        """Advance past whitespace, reading more as needed. Returns False at EOF."""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return True
+            if not fill():
+                return False
+
+    if not skip_whitespace() or buffer[position] != "[":
+        raise ValueError("Expected a JSON array at the top level")
+    position += 1
+
+    expect_element = True
+    first = True
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Unexpected end of input inside the top-level array")
+        char = buffer[position]
+        if char == "]" and (first or not expect_element):
+            return
+        if not expect_element:
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' at offset {position} of the current block")
+            position += 1
+            expect_element = True
+            continue
+
+        # Decode one element; if it runs past the buffer, read more (growing the
+        # read so a single large element costs O(n log n), not O(n^2))
+        grow = read_size
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not fill(grow):
+                    raise ValueError("Malformed or truncated element in JSON array")
+                grow *= 2
+                continue
+            # A number is only complete once a delimiter follows it; "1." may be "1.5e3"
+            if (not eof and isinstance(element, (int, float)) and
+                    (end == len(buffer) or buffer[end] not in _DELIMITERS)):
+                if fill(grow):
+                    grow *= 2
+                    continue
+            break
+        position = end
+        first = False
+        expect_element = False
+        yield element
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Lexical Index
+
+BM25 inverted index over chunk text, built at ingest time next to the vector
+store, for the queries dense embeddings handle poorly: part numbers, pin and
+ball names, device-tree symbols (`AM3358`, `P9_12`, `gpio1_28`,
+`am335x-boneblack.dts`). The retrieval service runs it alongside the dense
+search and fuses both rankings with reciprocal rank fusion.
+
+Tokens are lowercased alphanumeric runs, joined by `_`, `-` and `.`; a joined
+token is indexed both whole and by its parts, so `P9_12` matches `p9_12`,
+`p9` and `12`.
+
+One directory per collection under LEXICAL_INDEX_DIR holds `postings.tsv`,
+an append-only log of "id<TAB>repo<TAB>term:tf term:tf ..." lines (the last
+line for an id wins, "id<TAB>" alone marks a deletion). It is loaded into
+memory on first use and rewritten without superseded lines when those
+outnumber the live ones. Appends and the rewrite hold an exclusive flock on the
+log, so the API and CLI ingesters can index into the same collection, and
+searches apply lines appended by other processes when the log grows.
+"""
+
+import fcntl
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import LEXICAL_INDEX_DIR, LEXICAL_MAX_DF_RATIO
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[_\-.][a-z0-9]+)*")
+_SEPARATORS = re.compile(r"[_\-.]")
+_MAX_TOKEN_LENGTH = 64
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """Index terms of a text (joined identifiers are also split into their parts)."""
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        if len(token) > _MAX_TOKEN_LENGTH:
+            continue
+        yield token
+        if token != (parts := _SEPARATORS.split(token))[0]:
+            yield from parts
+
+
+class LexicalIndex:
+    """In-memory BM25 index of one collection, persisted as an append-only postings log."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._log_path = os.path.join(path, "postings.tsv")
+        self._lock = threading.Lock()
+        self._log = open(self._log_path, "ab")
+        self._reset()
+        with self._lock:
+            self._refresh()
+            if self._lines > 2 * len(self._numbers):
+                self._compact()
+
+    def _reset(self):
+        """Empty in-memory state, to be filled from the log by _refresh()."""
+        self._ids: List[Optional[str]] = []  # document number -> chunk id (None once deleted)
+        self._numbers: Dict[str, int] = {}
+        self._terms: List[Tuple[str, ...]] = []
+        self._lengths: List[int] = []
+        self._repos: List[int] = []
+        self._repo_codes: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._total_length = 0
+        # Array views for scoring, rebuilt after changes
+        self._term_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._length_array: Optional[np.ndarray] = None
+        self._repo_array: Optional[np.ndarray] = None
+        self._log_read = 0  # bytes of the log applied
+        self._lines = 0
+
+    def _refresh(self):
+        """
+        Apply log lines appended since the last read, by this or another process
+        (CLI ingesters write the same log). Caller holds the lock.
+        """
+        status = os.stat(self._log_path)
+        if status.st_ino != os.fstat(self._log.fileno()).st_ino:
+            # Another process compacted the log: reopen it and read it from the start
+            self._log.close()
+            self._log = open(self._log_path, "ab")
+            self._reset()
+        if status.st_size <= self._log_read:
+            return
+        with open(self._log_path, "rb") as f:
+            f.seek(self._log_read)
+            tail = f.read()
+        end = tail.rfind(b"\n") + 1  # a partial last line is still being written
+        latest: Dict[str, str] = {}
+        lines = tail[:end].decode("utf-8").splitlines()
+        for line in lines:
+            chunk_id = line.split("\t", 1)[0]
+            latest.pop(chunk_id, None)
+            latest[chunk_id] = line
+        for chunk_id, line in latest.items():
+            parts = line.split("\t")
+            if len(parts) == 2:
+                self._remove(chunk_id)
+            elif len(parts) == 3:
+                tf = {}
+                for entry in parts[2].split(" ") if parts[2] else []:
+                    term, _, count = entry.rpartition(":")
+                    tf[term] = int(count)
+                self._add(chunk_id, parts[1], tf)
+        self._lines += len(lines)
+        self._log_read += end
+
+    def _lock_log(self):
+        """Take the process lock on the current log file (a compaction may replace it meanwhile)."""
+        while True:
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_EX)
+            if os.stat(self._log_path).st_ino == os.fstat(self._log.fileno()).st_ino:
+                return
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_UN)
+            self._refresh()
+
+    @contextmanager
+    def _exclusive(self):
+        """Process lock for appends, with the log applied up to its end."""
+        with self._lock:
+            self._lock_log()
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(self._log.fileno(), fcntl.LOCK_UN)
+
+    def _append(self, lines: List[str]):
+        """Append log lines already applied in memory (caller is inside _exclusive)."""
+        data = "".join(lines).encode("utf-8")
+        size = os.fstat(self._log.fileno()).st_size
+        if size > self._log_read:
+            # Torn line left by a crashed writer: terminate it so it stays one skipped line
+            data = b"\n" + data
+            self._log_read = size
+        self._log.write(data)
+        self._log.flush()
+        self._log_read += len(data)
+        self._lines += len(lines)
+
+    def _compact(self):
+        """Rewrite the log without superseded lines. Caller holds the lock."""
+        self._lock_log()
+        try:
+            self._refresh()
+            lines = self._lines
+            repo_names = {code: repo for repo, code in self._repo_codes.items()}
+            tmp_path = self._log_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for chunk_id, number in self._numbers.items():
+                    postings = " ".join(f"{term}:{self._postings[term][number]}" for term in self._terms[number])
+                    f.write(f"{chunk_id}\t{repo_names[self._repos[number]]}\t{postings}\n".encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            os.replace(tmp_path, self._log_path)
+        finally:
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_UN)
+        self._log.close()
+        self._log = open(self._log_path, "ab")
+        self._log_read = size
+        self._lines = len(self._numbers)
+        logger.info(f"[LEXICAL] Compacted {self.path}: {lines} -> {self._lines} lines")
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def _add(self, chunk_id: str, repo: str, tf: Dict[str, int]):
+        self._remove(chunk_id)
+        number = len(self._ids)
+        self._ids.append(chunk_id)
+        self._numbers[chunk_id] = number
+        self._terms.append(tuple(tf))
+        length = sum(tf.values())
+        self._lengths.append(length)
+        self._total_length += length
+        self._repos.append(self._repo_codes.setdefault(repo, len(self._repo_codes)))
+        for term, count in tf.items():
+            self._postings.setdefault(term, {})[number] = count
+            self._term_arrays.pop(term, None)
+        self._length_array = None
+        self._repo_array = None
+
+    def _remove(self, chunk_id: str):
+        number = self._numbers.pop(chunk_id, None)
+        if number is None:
+            return
+        self._ids[number] = None
+        self._total_length -= self._lengths[number]
+        for term in self._terms[number]:
+            postings = self._postings[term]
+            del postings[number]
+            if not postings:
+                del self._postings[term]
+            self._term_arrays.pop(term, None)
+        self._terms[number] = ()
+
+    def add_many(self, rows: Iterable[Tuple[str, str, str]]):
+        """Index (chunk id, repo name, text) triples; an existing id is replaced."""
+        entries = []
+        for chunk_id, repo, text in rows:
+            if "\t" in chunk_id or "\n" in chunk_id or "\t" in repo or "\n" in repo:
+                raise ValueError(f"Invalid chunk id or repo name for the lexical index: {chunk_id!r}, {repo!r}")
+            entries.append((chunk_id, repo, Counter(tokenize(text))))
+        with self._exclusive():
+            for chunk_id, repo, tf in entries:
+                self._add(chunk_id, repo, tf)
+            self._append([
+                f"{chunk_id}\t{repo}\t{' '.join(f'{term}:{count}' for term, count in tf.items())}\n"
+                for chunk_id, repo, tf in entries
+            ])
+
+    def delete(self, ids: Iterable[str]):
+        with self._exclusive():
+            lines = []
+            for chunk_id in ids:
+                if chunk_id in self._numbers:
+                    self._remove(chunk_id)
+                    lines.append(f"{chunk_id}\t\n")
+            if lines:
+                self._append(lines)
+
+    def flush(self):
+        with self._lock:
+            os.fsync(self._log.fileno())
+
+    def _arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        if term not in self._term_arrays:
+            postings = self._postings[term]
+            self._term_arrays[term] = (np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                                       np.fromiter(postings.values(), dtype=np.float32, count=len(postings)))
+        return self._term_arrays[term]
+
+    def search(self, query: str, limit: int, repos: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """
+        BM25 ranking of the indexed chunks for a query.
+
+        Terms found in more than LEXICAL_MAX_DF_RATIO of the chunks are skipped
+        (they barely change the ranking but dominate the cost) unless the query
+        has no rarer term.
+
+        Returns:
+            (chunk id, BM25 score) pairs, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            # Picks up chunks indexed by ingesters running in other processes
+            self._refresh()
+            documents = len(self._numbers)
+            if not documents or not terms:
+                return []
+            weighted = []
+            for term in terms:
+                frequency = len(self._postings.get(term, ()))
+                if frequency:
+                    idf = math.log(1 + (documents - frequency + 0.5) / (frequency + 0.5))
+                    weighted.append((idf, frequency, term))
+            if not weighted:
+                return []
+            selective = [entry for entry in weighted if entry[1] <= documents * LEXICAL_MAX_DF_RATIO]
+            if not selective:
+                selective = [max(weighted)]
+
+            if self._length_array is None:
+                self._length_array = np.asarray(self._lengths, dtype=np.float32)
+                self._repo_array = np.asarray(self._repos, dtype=np.int32)
+            length_norm = _K1 * (1 - _B + _B * self._length_array / (self._total_length / documents))
+            numbers, contributions = [], []
+            for idf, _, term in selective:
+                term_numbers, tf = self._arrays(term)
+                numbers.append(term_numbers)
+                contributions.append(idf * tf * (_K1 + 1) / (tf + length_norm[term_numbers]))
+            numbers = np.concatenate(numbers)
+            contributions = np.concatenate(contributions)
+            if repos is not None:
+                codes = [self._repo_codes[repo] for repo in repos if repo in self._repo_codes]
+                keep = np.isin(self._repo_array[numbers], codes)
+                numbers, contributions = numbers[keep], contributions[keep]
+            if not len(numbers):
+                return []
+            unique, inverse = np.unique(numbers, return_inverse=True)
+            scores = np.bincount(inverse, weights=contributions)
+            if len(scores) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._ids[unique[i]], float(scores[i])) for i in top]
+
+    def stats(self) -> Dict[str, int]:
+        return {"documents": len(self._numbers), "terms": len(self._postings)}
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+
+
+class IndexingWriter:
+    """
+    Vector-store writer wrapper that adds each row's text to the lexical index
+    before forwarding it. Wrap it around the document-store wrapper, which
+    empties `document`.
+    """
+
+    def __init__(self, writer, index: LexicalIndex, batch_rows: int = 256):
+        self.writer = writer
+        self.index = index
+        self.batch_rows = batch_rows
+        self._pending: List[dict] = []
+
+    def add_row(self, row: dict):
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_rows:
+            self._forward()
+
+    def add_rows(self, rows: List[dict]):
+        for row in rows:
+            self.add_row(row)
+
+    def _forward(self):
+        rows, self._pending = self._pending, []
+        self.index.add_many((row["id"], row.get("repo_name") or "", row.get("document") or "") for row in rows)
+        self.writer.add_rows(rows)
+
+    def __getattr__(self, attr):
+        # rows_committed, batches_inserted, flushes, ... of the inner writer
+        return getattr(self.writer, attr)
+
+    def __enter__(self):
+        self.writer.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and self._pending:
+                self._forward()
+        finally:
+            self.index.flush()
+        return self.writer.__exit__(exc_type, exc, tb)
+
+
+_indexes: Dict[str, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(collection_name: str) -> Optional[LexicalIndex]:
+    """The process-wide lexical index of a collection, or None when LEXICAL_INDEX_DIR is unset."""
+    if not LEXICAL_INDEX_DIR:
+        return None
+    with _indexes_lock:
+        if collection_name not in _indexes:
+            _indexes[collection_name] = LexicalIndex(os.path.join(LEXICAL_INDEX_DIR, collection_name))
+            logger.info(f"[LEXICAL] Opened lexical index of '{collection_name}' ({len(_indexes[collection_name])} chunks)")
+        return _indexes[collection_name]
+
+
+def index_lexically(writer, index: Optional[LexicalIndex]):
+    """Wrap a vector-store writer so row texts are added to the lexical index (unchanged if index is None)."""
+    return IndexingWriter(writer, index) if index is not None else writer
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in.
+
+    Returns:
+        (id, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
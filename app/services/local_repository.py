@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Local Repository Source
+
+Reads repository content from disk instead of the GitHub API: a git working
+tree, a bare repository / mirror, or a plain directory. For git repositories
+the tree of the requested branch is listed with `git ls-tree` and blobs are
+streamed from one long-lived `git cat-file --batch` process, so files are read
+exactly as committed and carry the same blob SHAs the GitHub API reports.
+Plain directories are listed from os.stat; only the files that are ingested
+are read and hashed the way git hashes blobs (file_sha).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import stat
+import subprocess
+import threading
+from typing import Iterator, Optional, Tuple
+
+from app.config import LOCAL_REPOSITORY_ROOT
+
+logger = logging.getLogger(__name__)
+
+# GitHub remotes: https://github.com/owner/repo(.git), git@github.com:owner/repo(.git), ssh://git@github.com/owner/repo
+_GITHUB_REMOTE_PATTERN = re.compile(r'github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$')
+
+# Git tree modes that are not regular files (symlinks, submodules)
+_SKIPPED_MODES = {"120000", "160000"}
+
+
+def decode_file_content(raw: bytes, path: str) -> Optional[str]:
+    """Decode file bytes as UTF-8, falling back to latin-1 (None if neither works)."""
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            return raw.decode('latin-1')
+        except UnicodeDecodeError:
+            logger.warning(f"Could not decode {path}, skipping")
+            return None
+
+
+def git_blob_sha(data: bytes) -> str:
+    """SHA-1 git assigns to a blob with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def resolve_local_repository_path(path: str, root: str = LOCAL_REPOSITORY_ROOT) -> str:
+    """
+    Resolve a repository path given to the API against LOCAL_REPOSITORY_ROOT.
+
+    Raises:
+        ValueError: If local ingestion is disabled or the path leaves the root
+    """
+    if not root:
+        raise ValueError("Local repository ingestion is disabled (LOCAL_REPOSITORY_ROOT is not set)")
+    root = os.path.realpath(root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Local repository path must be inside {root}")
+    return resolved
+
+
+class LocalRepository:
+    """Read-only view of one branch of a local repository. Safe to share between threads."""
+
+    def __init__(self, path: str, branch: Optional[str] = None):
+        """
+        Args:
+            path: Working tree, bare repository / mirror, or plain directory
+            branch: Branch to read; "main" falls back to "master", and a missing
+                branch falls back to the checked-out HEAD
+
+        Raises:
+            ValueError: If the path is not a directory
+        """
+        self.path = os.path.abspath(path)
+        if not os.path.isdir(self.path):
+            raise ValueError(f"Local repository not found: {path}")
+        self.is_git = self._is_git_repository()
+        if self.is_git:
+            self.ref, self.branch = self._resolve_ref(branch)
+        else:
+            self.ref, self.branch = None, branch or "main"
+        self._cat_file = None
+        self._cat_file_lock = threading.Lock()
+        logger.info(f"[LOCAL] Reading {'git repository' if self.is_git else 'directory'} {self.path} "
+                    f"(branch: {self.branch}{', ref: ' + self.ref if self.ref else ''})")
+
+    def _git(self, *args: str) -> str:
+        return subprocess.run(
+            ["git", "-C", self.path, *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    def _is_git_repository(self) -> bool:
+        """True for the top of a working tree or a bare repository (not a directory nested in one)."""
+        try:
+            if self._git("rev-parse", "--is-bare-repository") == "true":
+                top = self._git("rev-parse", "--absolute-git-dir")
+            else:
+                top = self._git("rev-parse", "--show-toplevel")
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return False
+        return os.path.realpath(top) == os.path.realpath(self.path)
+
+    def _ref_exists(self, ref: str) -> bool:
+        try:
+            self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{tree}}")
+            return True
+        except subprocess.CalledProcessError:
+            return False
+
+    def _resolve_ref(self, branch: Optional[str]) -> Tuple[str, str]:
+        """Find the ref to read: the branch (local or origin/), main->master, else HEAD."""
+        candidates = [branch] if branch else []
+        if branch == "main":
+            candidates.append("master")
+        for name in candidates:
+            for ref in (f"refs/heads/{name}", f"refs/remotes/origin/{name}"):
+                if self._ref_exists(ref):
+                    return ref, name
+        try:
+            head_branch = self._git("symbolic-ref", "--short", "-q", "HEAD")
+        except subprocess.CalledProcessError:
+            head_branch = ""
+        if branch:
+            logger.warning(f"[LOCAL] Branch '{branch}' not found in {self.path}, reading HEAD ({head_branch or 'detached'})")
+        return "HEAD", head_branch or branch or "main"
+
+    def github_repository(self) -> Optional[Tuple[str, str]]:
+        """(owner, name) of the GitHub `origin` remote, if there is one."""
+        if not self.is_git:
+            return None
+        try:
+            remote = self._git("config", "--get", "remote.origin.url")
+        except subprocess.CalledProcessError:
+            return None
+        match = _GITHUB_REMOTE_PATTERN.search(remote)
+        return match.groups() if match else None
+
+    def iter_files(self) -> Iterator[Tuple[str, Optional[str], int]]:
+        """
+        Yield (path, blob sha, size) for every regular file of the branch, paths relative to the root.
+
+        For plain directories the sha is None: listing never reads file contents,
+        so callers hash the files they keep with file_sha().
+        """
+        if self.is_git:
+            listing = subprocess.run(
+                ["git", "-C", self.path, "ls-tree", "-r", "-l", "-z", self.ref],
+                capture_output=True, check=True
+            ).stdout
+            for entry in listing.split(b"\0"):
+                if not entry:
+                    continue
+                meta, _, path = entry.partition(b"\t")
+                mode, object_type, sha, size = meta.split()
+                if object_type != b"blob" or mode.decode() in _SKIPPED_MODES:
+                    continue
+                yield path.decode("utf-8", errors="surrogateescape"), sha.decode(), int(size)
+            return
+
+        for directory, subdirectories, filenames in os.walk(self.path):
+            subdirectories[:] = sorted(name for name in subdirectories if name != ".git")
+            for filename in sorted(filenames):
+                full_path = os.path.join(directory, filename)
+                try:
+                    info = os.lstat(full_path)
+                except OSError:
+                    continue
+                if not stat.S_ISREG(info.st_mode):
+                    continue
+                relative_path = os.path.relpath(full_path, self.path).replace(os.sep, "/")
+                yield relative_path, None, info.st_size
+
+    def file_sha(self, path: str) -> str:
+        """
+        Blob sha of a file listed without one (plain directories).
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        with open(os.path.join(self.path, path), "rb") as f:
+            return git_blob_sha(f.read())
+
+    def read_bytes(self, path: str, sha: str) -> bytes:
+        """Content of one file, by blob sha for git repositories or by path otherwise."""
+        if not self.is_git:
+            with open(os.path.join(self.path, path), "rb") as f:
+                return f.read()
+        with self._cat_file_lock:
+            if self._cat_file is None or self._cat_file.poll() is not None:
+                self._cat_file = subprocess.Popen(
+                    ["git", "-C", self.path, "cat-file", "--batch"],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE
+                )
+            self._cat_file.stdin.write(sha.encode() + b"\n")
+            self._cat_file.stdin.flush()
+            header = self._cat_file.stdout.readline().split()
+            if len(header) != 3:
+                raise FileNotFoundError(f"Blob {sha} ({path}) missing from {self.path}")
+            data = self._cat_file.stdout.read(int(header[2]))
+            self._cat_file.stdout.read(1)  # trailing newline
+            return data
+
+    def read_file(self, path: str, sha: str) -> Optional[str]:
+        """Decoded content of one file, or None if it cannot be read or decoded."""
+        try:
+            return decode_file_content(self.read_bytes(path, sha), path)
+        except (OSError, FileNotFoundError) as e:
+            logger.warning(f"[LOCAL] Failed to read {path}: {e}")
+            return None
+
+    def close(self):
+        with self._cat_file_lock:
+            if self._cat_file is not None:
+                self._cat_file.stdin.close()
+                self._cat_file.wait()
+                self._cat_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
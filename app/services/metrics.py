@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics
+
+Process-wide metric definitions for retrieval and ingestion, exposed on
+GET /metrics. Collection-scoped metrics carry a `collection` label. Values that
+only exist as live state (job queues, executor backlogs) are read at scrape
+time through registered callbacks instead of being pushed on every change.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+_FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_SLOW_BUCKETS = (0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+# Retrieval
+RETRIEVAL_STAGE_SECONDS = Histogram(
+    "beaglemind_retrieval_stage_seconds",
+    "Time spent per retrieval stage (tokenize, embed, search, rerank, serialize)",
+    ["collection", "stage"], buckets=_FAST_BUCKETS
+)
+RETRIEVAL_REQUEST_SECONDS = Histogram(
+    "beaglemind_retrieval_request_seconds",
+    "End-to-end /api/retrieve handling time",
+    ["collection"], buckets=_FAST_BUCKETS
+)
+RETRIEVAL_REQUESTS = Counter(
+    "beaglemind_retrieval_requests_total",
+    "Retrieval requests by outcome",
+    ["collection", "status"]
+)
+
+# Ingestion
+INGESTION_STAGE_SECONDS = Histogram(
+    "beaglemind_ingestion_stage_seconds",
+    "Duration of each repository ingestion stage (tree, processing, embedding, storage)",
+    ["collection", "stage"], buckets=_SLOW_BUCKETS
+)
+INGESTION_ITEMS = Counter(
+    "beaglemind_ingestion_items_total",
+    "Units of ingestion work completed (files fetched, chunks created, embeddings, rows inserted)",
+    ["collection", "stage"]
+)
+INGESTION_JOBS = Counter(
+    "beaglemind_ingestion_jobs_total",
+    "Finished ingestion jobs by final state",
+    ["collection", "state"]
+)
+
+# Caches: hit ratio = hits / (hits + misses) per cache
+CACHE_REQUESTS = Counter(
+    "beaglemind_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "collection", "result"]
+)
+
+# Embedding engine
+EMBEDDING_BATCH_SECONDS = Histogram(
+    "beaglemind_embedding_batch_seconds",
+    "ONNX run time per shared embedding engine batch",
+    buckets=_FAST_BUCKETS
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "beaglemind_embedding_batch_size",
+    "Texts per shared embedding engine batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+# Models
+MODEL_MEMORY_BYTES = Gauge(
+    "beaglemind_model_memory_bytes",
+    "Weights loaded into ONNX sessions, summed over every loaded copy of a model",
+    ["model"]
+)
+
+
+def record_cache(cache: str, collection: str, hit: bool, count: int = 1):
+    """Count `count` lookups of one cache as hits or misses."""
+    if count:
+        CACHE_REQUESTS.labels(cache=cache, collection=collection, result="hit" if hit else "miss").inc(count)
+
+
+def record_model_loaded(model: str, path: str):
+    """Account for an ONNX session loaded from `path` (approximated by the model file size)."""
+    try:
+        MODEL_MEMORY_BYTES.labels(model=model).inc(os.path.getsize(path))
+    except OSError:
+        pass
+
+
+class StageTimer:
+    """
+    Per-request stage durations. Each stage is added to `durations` and, if a
+    histogram is given, observed with the timer's labels plus `stage`. Stages
+    can also record sizes (candidates, padded tokens) in `counts`.
+    """
+
+    def __init__(self, histogram: Optional[Histogram] = None, **labels: str):
+        self.histogram = histogram
+        self.labels = labels
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+        if self.histogram is not None:
+            self.histogram.labels(stage=stage, **self.labels).observe(seconds)
+
+    def count(self, name: str, value: int):
+        self.counts[name] = self.counts.get(name, 0) + int(value)
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Durations as a Server-Timing header value (milliseconds), optionally with a `total` entry."""
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.durations.items()]
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+    @contextmanager
+    def stage(self, stage: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start_time)
+
+
+class _CallbackCollector:
+    """Gauges whose values are read from live objects at scrape time."""
+
+    def __init__(self):
+        self._gauges: List[Tuple[str, str, Sequence[str], Callable[[], Iterable[Tuple[Sequence[str], float]]]]] = []
+
+    def register(self, name: str, documentation: str, labels: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[Sequence[str], float]]]):
+        self._gauges.append((name, documentation, labels, callback))
+
+    def collect(self):
+        for name, documentation, labels, callback in self._gauges:
+            family = GaugeMetricFamily(name, documentation, labels=list(labels))
+            try:
+                for label_values, value in callback():
+                    family.add_metric(list(label_values), value)
+            except Exception as e:
+                logger.warning(f"[METRICS] Could not collect {name}: {e}")
+            yield family
+
+
+_callback_collector = _CallbackCollector()
+REGISTRY.register(_callback_collector)
+
+
+def register_gauge_callback(name: str, documentation: str, labels: Sequence[str],
+                            callback: Callable[[], Iterable[Tuple[Sequence[str], float]]]):
+    """
+    Expose a gauge computed on each scrape.
+
+    Args:
+        name: Metric name
+        documentation: Help text
+        labels: Label names
+        callback: Returns (label values, value) pairs
+    """
+    _callback_collector.register(name, documentation, labels, callback)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Milvus Connection Pools
+
+Every pymilvus connection alias is one gRPC channel. Instead of funnelling all
+traffic through the "default" alias, the process keeps named pools of aliases:
+
+- "query" (MILVUS_QUERY_POOL_SIZE): searches and reads of the retrieval path
+- "ingest" (MILVUS_INGEST_POOL_SIZE): inserts and deletes of ingestion jobs
+- "default": the single admin alias used for collection management
+
+`checkout()` hands out a pool's aliases round-robin, skipping unhealthy ones,
+so concurrent searches spread over several channels and never queue behind a
+large insert. A background thread probes every alias each
+MILVUS_HEALTH_CHECK_SECONDS and reconnects failed ones; callers report
+failures with `report_failure()` to have an alias probed right away. No call
+on the request path pings the server.
+
+The retrieval path awaits Milvus through `get_async_client()` instead: one
+AsyncMilvusClient per event loop, whose gRPC channel multiplexes every
+in-flight search, so a pending search costs a coroutine rather than a thread.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+
+from app.config import (
+    MILVUS_HOST, MILVUS_PORT, MILVUS_USER, MILVUS_PASSWORD, MILVUS_TOKEN, MILVUS_URI,
+    MILVUS_QUERY_POOL_SIZE, MILVUS_INGEST_POOL_SIZE, MILVUS_HEALTH_CHECK_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+_PROBE_TIMEOUT = 5
+
+
+def milvus_connect_kwargs(alias: str) -> Dict[str, Any]:
+    """Build `connections.connect` kwargs for an alias from the environment config."""
+    connect_kwargs = {'alias': alias, 'timeout': 30}
+    if MILVUS_URI:
+        connect_kwargs['uri'] = MILVUS_URI
+    else:
+        connect_kwargs['host'] = MILVUS_HOST
+        connect_kwargs['port'] = MILVUS_PORT
+    if MILVUS_USER:
+        connect_kwargs['user'] = MILVUS_USER
+    if MILVUS_PASSWORD:
+        connect_kwargs['password'] = MILVUS_PASSWORD
+    if MILVUS_TOKEN:
+        connect_kwargs['token'] = MILVUS_TOKEN
+    return connect_kwargs
+
+
+def connect_alias(alias: str, retries: int = 1, retry_delay: float = 0.0):
+    """
+    (Re)connect one alias, trying MILVUS_URI first and host/port second.
+
+    Raises:
+        RuntimeError: If no attempt succeeds
+    """
+    from pymilvus import connections, utility
+
+    attempts = [milvus_connect_kwargs(alias)]
+    if "uri" in attempts[0]:
+        # Host/port attempt as fallback for the URI
+        fallback = {key: value for key, value in attempts[0].items() if key != "uri"}
+        attempts.append({**fallback, "host": MILVUS_HOST, "port": MILVUS_PORT})
+
+    last_error = None
+    for attempt_idx, params in enumerate(attempts, start=1):
+        delay = retry_delay
+        for retry in range(max(1, retries)):
+            try:
+                try:
+                    connections.disconnect(alias)
+                except Exception:
+                    pass
+                connections.connect(**params)
+                utility.get_server_version(using=alias, timeout=_PROBE_TIMEOUT)
+                logger.info(f"[POOL] Connected '{alias}' to Milvus (attempt {attempt_idx}, retry {retry}) at "
+                            f"{params.get('uri') or str(params.get('host')) + ':' + str(params.get('port'))}")
+                return
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[POOL] Connection attempt {attempt_idx}.{retry + 1} for '{alias}' failed: {e}")
+                if retry < retries - 1 and delay:
+                    time.sleep(delay)
+                    delay *= 2
+    raise RuntimeError(f"Failed to connect to Milvus after retries: {last_error}")
+
+
+class MilvusConnectionPool:
+    """A fixed set of connection aliases handed out round-robin."""
+
+    def __init__(self, name: str, aliases: List[str]):
+        self.name = name
+        self.aliases = aliases
+        self._healthy: Dict[str, bool] = {alias: False for alias in aliases}
+        self._cycle = itertools.cycle(aliases)
+        self._lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self.checkouts = 0
+        self.reconnects = 0
+
+    def connect(self, retries: int = 1, retry_delay: float = 0.0, force: bool = False):
+        """
+        Connect every alias not connected yet (all of them with force).
+
+        Raises:
+            RuntimeError: If no alias of the pool can be connected
+        """
+        with self._connect_lock:
+            errors = []
+            for alias in self.aliases:
+                if self._healthy[alias] and not force:
+                    continue
+                try:
+                    connect_alias(alias, retries, retry_delay)
+                    self._healthy[alias] = True
+                except RuntimeError as e:
+                    self._healthy[alias] = False
+                    errors.append(e)
+            if not any(self._healthy.values()):
+                raise errors[0]
+
+    @property
+    def connected(self) -> bool:
+        return any(self._healthy.values())
+
+    def checkout(self) -> str:
+        """The next healthy alias (the next alias at all if none is healthy)."""
+        with self._lock:
+            self.checkouts += 1
+            for _ in range(len(self.aliases)):
+                alias = next(self._cycle)
+                if self._healthy[alias]:
+                    return alias
+            return next(self._cycle)
+
+    def report_failure(self, alias: str):
+        """Take an alias out of rotation until the health check, run right away, has probed it."""
+        self._healthy[alias] = False
+        _health_checker.wake()
+
+    def check(self):
+        """Probe every alias and reconnect the ones that fail."""
+        from pymilvus import utility
+
+        for alias in self.aliases:
+            try:
+                utility.get_server_version(using=alias, timeout=_PROBE_TIMEOUT)
+                healthy = True
+            except Exception as e:
+                logger.warning(f"[POOL] '{alias}' failed its health check ({e}); reconnecting")
+                try:
+                    connect_alias(alias)
+                    self.reconnects += 1
+                    healthy = True
+                except RuntimeError:
+                    healthy = False
+            if self._healthy[alias] != healthy:
+                logger.info(f"[POOL] '{alias}' is now {'healthy' if healthy else 'unhealthy'}")
+            self._healthy[alias] = healthy
+
+    def stats(self) -> Dict[str, Any]:
+        return {"aliases": len(self.aliases), "healthy": sum(self._healthy.values()),
+                "checkouts": self.checkouts, "reconnects": self.reconnects}
+
+
+class _HealthChecker:
+    """Daemon thread running the pools' health checks in the background."""
+
+    def __init__(self):
+        self._pools: List[MilvusConnectionPool] = []
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def register(self, pool: MilvusConnectionPool):
+        with self._lock:
+            self._pools.append(pool)
+            if self._thread is None and MILVUS_HEALTH_CHECK_SECONDS > 0:
+                self._thread = threading.Thread(target=self._run, name="milvus-health", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(MILVUS_HEALTH_CHECK_SECONDS)
+            self._wake.clear()
+            with self._lock:
+                pools = list(self._pools)
+            for pool in pools:
+                try:
+                    pool.check()
+                except Exception as e:
+                    logger.warning(f"[POOL] Health check of the '{pool.name}' pool failed: {e}")
+
+
+_health_checker = _HealthChecker()
+_pools: Dict[str, MilvusConnectionPool] = {}
+_pools_lock = threading.Lock()
+_POOL_SIZES = {"query": MILVUS_QUERY_POOL_SIZE, "ingest": MILVUS_INGEST_POOL_SIZE, "default": 1}
+
+
+def get_pool(name: str, retries: int = 1, retry_delay: float = 0.0) -> MilvusConnectionPool:
+    """
+    The process-wide pool "query", "ingest" or "default", connected on first use.
+
+    Raises:
+        ValueError: If the pool name is unknown
+        RuntimeError: If none of its aliases can be connected
+    """
+    if name not in _POOL_SIZES:
+        raise ValueError(f"Unknown Milvus pool '{name}' (expected one of {', '.join(_POOL_SIZES)})")
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            aliases = ["default"] if name == "default" else [f"{name}_{i}" for i in range(max(1, _POOL_SIZES[name]))]
+            pool = _pools[name] = MilvusConnectionPool(name, aliases)
+            _health_checker.register(pool)
+    if not pool.connected:
+        pool.connect(retries, retry_delay)
+    return pool
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """
+    The AsyncMilvusClient of the running event loop (gRPC aio channels are bound
+    to the loop that created them). It connects on its first call.
+
+    Raises:
+        RuntimeError: If called outside a running event loop
+    """
+    from pymilvus import AsyncMilvusClient
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        uri = MILVUS_URI or f"http://{MILVUS_HOST}:{MILVUS_PORT}"
+        client = _async_clients[loop] = AsyncMilvusClient(
+            uri=uri, user=MILVUS_USER or "", password=MILVUS_PASSWORD or "", token=MILVUS_TOKEN or "", timeout=30
+        )
+        logger.info(f"[POOL] Created async Milvus client for {uri}")
+    return client
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Alias health and checkout counts per pool."""
+    with _pools_lock:
+        return {name: pool.stats() for name, pool in _pools.items()}
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection
+
+Ingestion stage that drops chunks nearly identical to a chunk already in the
+collection (forum posts quoting each other, generated or copied doc pages)
+before they are embedded.
+
+Each chunk gets a 64-value MinHash signature over its 5-word shingles; the
+fraction of equal values estimates the Jaccard similarity of two chunks. An
+LSH index (8 bands of 8 values) finds candidates, which count as duplicates at
+NEAR_DUPLICATE_THRESHOLD estimated similarity (default 0.85; pairs above ~0.77
+become candidates with probability >= 0.5).
+
+Chunks are only compared within their repository (`repo_name`): a page copied
+into another repository is kept there, so repo-scoped searches still find it.
+A chunk is only dropped in favour of a chunk that was kept earlier in the
+same ingestion run or still exists in the collection, so signatures left by
+failed runs or deleted rows never cause content to be lost. A chunk whose id is
+already indexed was kept before and is always kept again, so re-ingesting a
+repository or resuming a run stores the same rows.
+
+One directory per collection under NEAR_DUPLICATE_DIR:
+
+    signatures.bin    64 little-endian uint32 per indexed chunk, appended
+    ids.txt           "id<TAB>repo_name" of each signature, one per line
+"""
+
+import logging
+import os
+import re
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.config import NEAR_DUPLICATE_DIR, NEAR_DUPLICATE_THRESHOLD
+from app.services.metrics import INGESTION_ITEMS
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 64
+BANDS = 8
+SHINGLE_WORDS = 5
+
+_WORD = re.compile(r"\w+")
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(0x5EED)  # fixed: persisted signatures must stay comparable
+_A = _rng.integers(1, (1 << 31) - 1, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 31) - 1, NUM_PERMUTATIONS, dtype=np.uint64)
+_BAND_MULTIPLIERS = _rng.integers(1, 1 << 63, NUM_PERMUTATIONS // BANDS, dtype=np.uint64) | np.uint64(1)
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature of a text's word shingles (uint32[NUM_PERMUTATIONS])."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        shingles = [" ".join(words)]
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64)
+    # (a * h + b) mod p for every permutation; a, h < 2^32 keeps the product within uint64
+    permuted = (np.outer(hashes, _A) + _B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def _repo(item: dict) -> str:
+    return (item.get('repo_name') or "").replace("\t", " ").replace("\n", " ")
+
+
+def _band_keys(signature: np.ndarray) -> List[int]:
+    rows = signature.reshape(BANDS, -1).astype(np.uint64)
+    return [int(key) for key in (rows * _BAND_MULTIPLIERS).sum(axis=1)]
+
+
+class NearDuplicateIndex:
+    """Persistent MinHash LSH index of the chunks of one collection."""
+
+    def __init__(self, path: str, threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._signatures_path = os.path.join(path, "signatures.bin")
+        self._ids_path = os.path.join(path, "ids.txt")
+        self._ids: List[str] = []
+        self._records: Dict[str, int] = {}
+        self._signatures = np.zeros((0, NUM_PERMUTATIONS), dtype=np.uint32)
+        self._count = 0
+        # (repo_name, band key) -> records, so candidates come from the same repository only
+        self._buckets: List[Dict[Tuple[str, int], List[int]]] = [{} for _ in range(BANDS)]
+        self._load()
+        self._signature_file = open(self._signatures_path, "ab")
+        self._ids_file = open(self._ids_path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self._ids_path) or not os.path.exists(self._signatures_path):
+            return
+        with open(self._ids_path, encoding="utf-8") as f:
+            ids = [line[:-1] for line in f if line.endswith("\n")]
+        signatures = np.fromfile(self._signatures_path, dtype="<u4")
+        # An interrupted append leaves more of one file than of the other
+        count = min(len(ids), len(signatures) // NUM_PERMUTATIONS)
+        signatures = signatures[:count * NUM_PERMUTATIONS].reshape(count, NUM_PERMUTATIONS)
+        for line, signature in zip(ids[:count], signatures):
+            chunk_id, _, repo = line.partition("\t")
+            self._add(chunk_id, repo, signature)
+        if count != len(ids) or count * NUM_PERMUTATIONS * 4 != os.path.getsize(self._signatures_path):
+            with open(self._ids_path, "w", encoding="utf-8") as f:
+                f.writelines(f"{chunk_id}\n" for chunk_id in ids[:count])
+            with open(self._signatures_path, "r+b") as f:
+                f.truncate(count * NUM_PERMUTATIONS * 4)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _add(self, chunk_id: str, repo: str, signature: np.ndarray):
+        record = self._count
+        if record == len(self._signatures):
+            grown = np.zeros((max(1024, 2 * record), NUM_PERMUTATIONS), dtype=np.uint32)
+            grown[:record] = self._signatures[:record]
+            self._signatures = grown
+        self._signatures[record] = signature
+        self._ids.append(chunk_id)
+        self._records[chunk_id] = record
+        self._count += 1
+        for band, key in enumerate(_band_keys(signature)):
+            self._buckets[band].setdefault((repo, key), []).append(record)
+
+    def _matches(self, chunk_id: str, repo: str, signature: np.ndarray) -> List[Tuple[float, str]]:
+        """(estimated similarity, chunk id) of indexed chunks of the same repo at or above the threshold, best first."""
+        candidates: Set[int] = set()
+        for band, key in enumerate(_band_keys(signature)):
+            candidates.update(self._buckets[band].get((repo, key), ()))
+        candidates.discard(self._records.get(chunk_id, -1))
+        if not candidates:
+            return []
+        records = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarities = (self._signatures[records] == signature).mean(axis=1)
+        return sorted(((float(similarity), self._ids[record]) for similarity, record in zip(similarities, records)
+                       if similarity >= self.threshold), reverse=True)
+
+    def filter(self, items: List[dict], exists: Callable[[List[str]], Set[str]],
+               kept_ids: Optional[Set[str]] = None) -> Tuple[List[dict], List[Tuple[str, str]]]:
+        """
+        Split chunks into the ones to store and near-duplicates to drop, and index the kept ones.
+
+        Args:
+            items: Chunks with `id`, `document` and `repo_name`, in ingestion order
+            exists: Returns which of the given chunk ids are stored in the collection
+            kept_ids: Ids kept earlier in the same ingestion run (not stored yet);
+                updated with the ids kept by this call
+
+        Returns:
+            (kept items, [(dropped id, id of the chunk it duplicates)])
+        """
+        kept_ids = kept_ids if kept_ids is not None else set()
+        signatures = [minhash(item.get('document') or "") for item in items]
+        with self._lock:
+            # Existence of previously indexed matches is checked in one round trip
+            earlier = {chunk_id for item, signature in zip(items, signatures) if item['id'] not in self._records
+                       for _, chunk_id in self._matches(item['id'], _repo(item), signature)
+                       if chunk_id not in kept_ids}
+            stored = exists(sorted(earlier)) if earlier else set()
+
+            kept, duplicates = [], []
+            new_records = []
+            for item, signature in zip(items, signatures):
+                if item['id'] in self._records:
+                    # Kept by an earlier run: storing it again replaces the same row
+                    kept.append(item)
+                    kept_ids.add(item['id'])
+                    continue
+                original = next((chunk_id for _, chunk_id in self._matches(item['id'], _repo(item), signature)
+                                 if chunk_id in kept_ids or chunk_id in stored), None)
+                if original is not None:
+                    duplicates.append((item['id'], original))
+                    continue
+                kept.append(item)
+                kept_ids.add(item['id'])
+                self._add(item['id'], _repo(item), signature)
+                new_records.append((item['id'], _repo(item), signature))
+            if new_records:
+                # Signatures before ids, so every id line has its signature on disk
+                self._signature_file.write(np.stack([signature for _, _, signature in new_records]).astype("<u4").tobytes())
+                self._signature_file.flush()
+                self._ids_file.writelines(f"{chunk_id}\t{repo}\n" for chunk_id, repo, _ in new_records)
+                self._ids_file.flush()
+        return kept, duplicates
+
+    def stats(self) -> Dict[str, int]:
+        return {"chunks": self._count}
+
+    def close(self):
+        with self._lock:
+            self._signature_file.close()
+            self._ids_file.close()
+
+
+class DuplicateFilter:
+    """Near-duplicate filtering for one ingestion run into a collection."""
+
+    def __init__(self, index: NearDuplicateIndex, collection):
+        self.index = index
+        self.collection = collection
+        self.kept_ids: Set[str] = set()
+        self.dropped = 0
+
+    def _exists(self, ids: List[str]) -> Set[str]:
+        return {row["id"] for row in self.collection.query(ids, [])}
+
+    def filter(self, items: List[dict]) -> List[dict]:
+        """Chunks to store (near-duplicates removed and logged)."""
+        kept, duplicates = self.index.filter(items, self._exists, self.kept_ids)
+        if duplicates:
+            self.dropped += len(duplicates)
+            INGESTION_ITEMS.labels(collection=self.collection.name, stage="near_duplicates").inc(len(duplicates))
+            logger.info(f"[DEDUP] Dropped {len(duplicates)} of {len(items)} chunks as near-duplicates "
+                        f"(e.g. {duplicates[0][0]} ~ {duplicates[0][1]})")
+        return kept
+
+
+_indexes: Dict[str, NearDuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_duplicate_filter(collection_name: str, collection) -> Optional[DuplicateFilter]:
+    """A filter for one ingestion run, or None when NEAR_DUPLICATE_DIR is unset."""
+    if not NEAR_DUPLICATE_DIR:
+        return None
+    with _indexes_lock:
+        if collection_name not in _indexes:
+            _indexes[collection_name] = NearDuplicateIndex(os.path.join(NEAR_DUPLICATE_DIR, collection_name))
+            logger.info(f"[DEDUP] Opened near-duplicate index of '{collection_name}' "
+                        f"({len(_indexes[collection_name])} chunks)")
+        return DuplicateFilter(_indexes[collection_name], collection)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Sampling Profiler
+
+In-process wall-clock sampler for the running API. A background loop reads
+every thread's current Python stack through `sys._current_frames()` at a fixed
+interval, keeps the threads selected by a target (request handling or the
+ingestion executors) and aggregates identical stacks. Nothing is installed in
+the profiled threads, so the overhead is one stack walk per thread per sample
+and disappears when the profile ends.
+
+Results are exported as collapsed stacks (flamegraph.pl / speedscope import)
+or as a speedscope JSON document with one profile per thread.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Thread name prefixes per profiling target. Request handlers run on the event
+# loop (MainThread under uvicorn) and sync work is offloaded to AnyIO workers,
+# ONNX inference of searches to retrieval-model threads and blocking vector
+# store calls of async searches to vector-store threads.
+PROFILE_TARGETS: Dict[str, Tuple[str, ...]] = {
+    "requests": ("MainThread", "AnyIO worker thread", "retrieval-model", "lexical", "vector-store"),
+    "ingestion": ("ingestion-job", "bulk-repo", "ingest-file", "milvus-insert", "embedding-engine", "forum-chunk"),
+    "all": ("",),
+}
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+class SamplingProfiler:
+    """Samples thread stacks of the current process for a fixed duration."""
+
+    def __init__(self, target: str = "all", interval: float = 0.01):
+        """
+        Args:
+            target: Key of PROFILE_TARGETS selecting which threads to sample
+            interval: Seconds between samples
+
+        Raises:
+            ValueError: If the target is unknown
+        """
+        if target not in PROFILE_TARGETS:
+            raise ValueError(f"Unknown profile target '{target}' (expected one of {', '.join(PROFILE_TARGETS)})")
+        self.target = target
+        self.prefixes = PROFILE_TARGETS[target]
+        self.interval = max(0.001, interval)
+        # (thread name, root-first stack) -> seconds of wall time observed
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+
+    def run(self, seconds: float) -> "SamplingProfiler":
+        """Sample for `seconds` on the calling thread (which is never sampled itself)."""
+        own_ident = threading.get_ident()
+        start_time = last_sample = time.perf_counter()
+        deadline = start_time + seconds
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            weight = now - last_sample if self.samples else self.interval
+            last_sample = now
+            self._sample(own_ident, weight)
+            time.sleep(min(self.interval, max(0.0, deadline - time.perf_counter())))
+        self.duration = time.perf_counter() - start_time
+        logger.info(f"[PROFILE] {self.samples} samples of '{self.target}' threads over {self.duration:.1f}s, "
+                    f"{len(self.stacks)} distinct stacks")
+        return self
+
+    def _sample(self, own_ident: int, weight: float):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, f"thread-{ident}")
+            if ident == own_ident or not name.startswith(self.prefixes):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[(name, tuple(stack))] += weight
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text: `thread;outer;...;inner <microseconds>` per line."""
+        lines = []
+        for (thread_name, stack), seconds in self.stacks.most_common():
+            frames = ";".join([thread_name] + [_frame_label(frame) for frame in stack])
+            lines.append(f"{frames} {max(1, int(seconds * 1_000_000))}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        """Speedscope file-format document with one sampled profile per thread."""
+        frame_index: Dict[Frame, int] = {}
+        frames: List[Dict[str, Any]] = []
+        profiles: Dict[str, Dict[str, Any]] = {}
+        for (thread_name, stack), seconds in self.stacks.most_common():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(frame_index[frame])
+            profile = profiles.setdefault(thread_name, {
+                "type": "sampled", "name": thread_name, "unit": "seconds",
+                "startValue": 0, "endValue": 0, "samples": [], "weights": [],
+            })
+            profile["samples"].append(indices)
+            profile["weights"].append(seconds)
+            profile["endValue"] += seconds
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"BeagleMind {self.target} ({self.duration:.1f}s)",
+            "exporter": "beaglemind-profiler",
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+
+_profile_lock = threading.Lock()
+
+
+def profile_process(seconds: float, target: str = "all", interval: float = 0.01) -> Optional[SamplingProfiler]:
+    """
+    Profile the process, allowing one profile at a time.
+
+    Returns:
+        The finished profiler, or None if another profile is already running
+
+    Raises:
+        ValueError: If the target is unknown
+    """
+    profiler = SamplingProfiler(target, interval)
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        return profiler.run(seconds)
+    finally:
+        _profile_lock.release()
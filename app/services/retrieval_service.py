@@ -1,13 +1,23 @@
+import asyncio
 import json
 import uuid
 import logging
 import re
 from typing import List, Dict, Any, Optional
-from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
 import onnxruntime as ort
 from transformers import AutoTokenizer
 import numpy as np
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import HYBRID_RERANK_FACTOR, HYBRID_RRF_K, HYBRID_SEARCH, RETRIEVAL_MODEL_WORKERS
+from app.services.metrics import RETRIEVAL_STAGE_SECONDS, StageTimer, record_model_loaded
+from app.services.document_store import get_document_store
+from app.services.embedded_store import SearchHit
+from app.services.index_policy import range_radius
+from app.services.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from app.services.vector_store import get_vector_store
 
 
 
@@ -15,6 +25,14 @@ logging.basicConfig(level=logging.CRITICAL)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.CRITICAL)
 
+# Lexical searches (and document-store reads of async searches) run here while the request
+# thread embeds the query and searches vectors
+_lexical_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lexical")
+# ONNX inference (query embedding, reranking) of async searches; Milvus round trips are awaited instead
+_model_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_MODEL_WORKERS, thread_name_prefix="retrieval-model")
+# Hits whose texts are fetched together while a streamed response is written
+_STREAM_DOCUMENT_BATCH = 16
+
 
 class RetrievalService:
     def __init__(self):
@@ -26,6 +44,7 @@ class RetrievalService:
                 local_files_only=True
             )
             self.embedding_session = ort.InferenceSession("onnx/model.onnx")
+            record_model_loaded("embedding", "onnx/model.onnx")
             self.has_embedding_model = True
         except Exception as e:
             logger.warning(f"Could not load embedding model: {e}")
@@ -41,6 +60,7 @@ class RetrievalService:
                 local_files_only=True
             )
             self.reranker_session = ort.InferenceSession("onnx/cross_encoder.onnx")
+            record_model_loaded("reranker", "onnx/cross_encoder.onnx")
             self.has_reranker = True
         except Exception as e:
             logger.warning(f"Could not load reranker model: {e}")
@@ -48,90 +68,34 @@ class RetrievalService:
             self.reranker_session = None
             self.has_reranker = False
         
+        self.vector_store = get_vector_store()
         self.collection = None
+        self.documents = None
+        self.lexical = None
         
     def connect_to_milvus(self, force: bool = False):
-        """Establish a Milvus connection using env vars with retries.
-
-        Priority:
-          1. MILVUS_URI (cloud / standalone URI)
-          2. MILVUS_HOST + MILVUS_PORT (defaults localhost:19530)
+        """Connect the configured vector store (MILVUS_URI, then MILVUS_HOST/MILVUS_PORT for Milvus).
 
         Raises:
             RuntimeError if connection cannot be established.
         """
-        if not force:
-            # If already connected, avoid reconnect unless forced
-            try:
-                utility.list_collections()  # will fail if no connection
-                return
-            except Exception:
-                pass
-
-        host = os.getenv("MILVUS_HOST", "localhost")
-        port = os.getenv("MILVUS_PORT", "19530")
-        uri = os.getenv("MILVUS_URI")
-        user = os.getenv("MILVUS_USER")
-        password = os.getenv("MILVUS_PASSWORD")
-        token = os.getenv("MILVUS_TOKEN")
-
-        connect_attempts = []
-
-        if uri:
-            connect_attempts.append({
-                "alias": "default",
-                "uri": uri,
-                **({"user": user} if user else {}),
-                **({"password": password} if password else {}),
-                **({"token": token} if token else {}),
-                "timeout": 30
-            })
-
-        # Host/port attempt always appended (fallback / default)
-        connect_attempts.append({
-            "alias": "default",
-            "host": host,
-            "port": port,
-            **({"user": user} if user else {}),
-            **({"password": password} if password else {}),
-            **({"token": token} if token else {}),
-            "timeout": 30
-        })
-
-        last_error = None
-        for attempt_idx, params in enumerate(connect_attempts, start=1):
-            for retry in range(3):
-                try:
-                    try:
-                        connections.disconnect("default")
-                    except Exception:
-                        pass
-                    connections.connect(**params)
-                    # simple probe
-                    utility.list_collections()
-                    print(f"Connected to Milvus (attempt {attempt_idx}, retry {retry}) using params: "
-                          f"{('uri='+uri) if uri and 'uri' in params else f'{host}:{port}'}")
-                    return
-                except Exception as e:
-                    last_error = e
-                    if retry < 2:
-                        continue
-                    break  # move to next attempt set
-
-        raise RuntimeError(f"Failed to connect to Milvus after retries: {last_error}")
+        self.vector_store.connect(force=force)
         
-    def _encode_text(self, text: str) -> List[float]:
-        """Encode text using ONNX embedding model"""
+    def _encode_text(self, text: str, timer: Optional[StageTimer] = None) -> List[float]:
+        """Encode text using ONNX embedding model; tokenize/embed time goes to timer if given"""
         if not self.has_embedding_model:
             raise ValueError("Embedding model not loaded")
-            
-        inputs = self.embedding_tokenizer(
-            text, 
-            return_tensors="np", 
-            padding=True, 
-            truncation=True, 
-            max_length=512
-        )
+        timer = timer or StageTimer()
+        
+        with timer.stage("tokenize"):
+            inputs = self.embedding_tokenizer(
+                text, 
+                return_tensors="np", 
+                padding=True, 
+                truncation=True, 
+                max_length=512
+            )
+        timer.count("query_tokens", inputs["input_ids"].shape[1])
         
         onnx_inputs = {
             "input_ids": inputs["input_ids"].astype(np.int64),
@@ -142,7 +106,8 @@ class RetrievalService:
             onnx_inputs["token_type_ids"] = inputs["token_type_ids"].astype(np.int64)
         
         # Get outputs from the ONNX model
-        outputs = self.embedding_session.run(None, onnx_inputs)
+        with timer.stage("embed"):
+            outputs = self.embedding_session.run(None, onnx_inputs)
         
         # Use mean pooling over token embeddings
         embedding = outputs[0][0].mean(axis=0)
@@ -173,163 +138,305 @@ class RetrievalService:
                 # Fallback to common dimensions
                 embedding_dim = 768
         
-        fields = [
-            FieldSchema(name="id", dtype=DataType.VARCHAR, is_primary=True, max_length=100),
-            FieldSchema(name="document", dtype=DataType.VARCHAR, max_length=65535),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=embedding_dim),
-            FieldSchema(name="file_name", dtype=DataType.VARCHAR, max_length=500),
-            FieldSchema(name="file_path", dtype=DataType.VARCHAR, max_length=1000),
-            FieldSchema(name="file_type", dtype=DataType.VARCHAR, max_length=50),
-            FieldSchema(name="source_link", dtype=DataType.VARCHAR, max_length=2000),
-            FieldSchema(name="chunk_index", dtype=DataType.INT64),
-            FieldSchema(name="language", dtype=DataType.VARCHAR, max_length=50),
-            FieldSchema(name="has_code", dtype=DataType.BOOL),
-            FieldSchema(name="repo_name", dtype=DataType.VARCHAR, max_length=200),
-            FieldSchema(name="content_quality_score", dtype=DataType.FLOAT),
-            FieldSchema(name="semantic_density_score", dtype=DataType.FLOAT),
-            FieldSchema(name="information_value_score", dtype=DataType.FLOAT),
-        ]
-        
-        schema = CollectionSchema(fields, "Repository content with semantic chunking")       
-        if utility.has_collection(collection_name):
+        store = self.vector_store
+        if store.has_collection(collection_name):
             # Check if existing collection has matching dimension
-            existing_collection = Collection(collection_name)
-            existing_dim = None
-            for field in existing_collection.schema.fields:
-                if field.name == "embedding":
-                    existing_dim = field.params.get('dim')
-                    break
+            existing_collection = store.get_collection(collection_name)
+            existing_dim = existing_collection.dim
             
             if existing_dim != embedding_dim:
-                logger.info(f"Dimension mismatch: existing collection has {existing_dim}, but model produces {embedding_dim}")
-                logger.info("Dropping and recreating collection...")
-                utility.drop_collection(collection_name)
-                self.collection = Collection(collection_name, schema)
-                
-                index_params = {
-                    "metric_type": "L2",
-                    "index_type": "IVF_FLAT",
-                    "params": {"nlist": 1024}
-                }
-                self.collection.create_index("embedding", index_params)
-            else:
-                self.collection = existing_collection
+                # Never drop live data in the request path: migrate to a new version behind an alias instead
+                raise RuntimeError(
+                    f"Collection '{collection_name}' has {existing_dim}-dimensional embeddings but the model produces "
+                    f"{embedding_dim}; re-embed it with: python -m app.scripts.migrate_collection {collection_name} --reembed"
+                )
+            self.collection = existing_collection
         else:
-            self.collection = Collection(collection_name, schema)
-            
-            index_params = {
-                "metric_type": "L2",
-                "index_type": "IVF_FLAT",
-                "params": {"nlist": 1024}
-            }
-            self.collection.create_index("embedding", index_params)
+            self.collection = store.create_collection(
+                collection_name, embedding_dim, "Repository content with semantic chunking"
+            )
         
         self.collection.load()
+        # Chunk text lives in the document store when DOCUMENT_STORE_DIR is set
+        self.documents = get_document_store(collection_name)
+        self.lexical = get_lexical_index(collection_name)
         
-    def search(self, query: str, n_results: int = 10, include_metadata: bool = True, rerank: bool = True) -> Dict[str, Any]:
+    async def asearch(self, query: str, n_results: int = 10, include_metadata: bool = True, rerank: bool = True,
+                      timer: Optional[StageTimer] = None, ef: Optional[int] = None,
+                      nprobe: Optional[int] = None, repos: Optional[List[str]] = None,
+                      hybrid: Optional[bool] = None, min_similarity: Optional[float] = None,
+                      max_distance: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Embed the query, search the collection and optionally rerank.
+        
+        Stage durations (tokenize, embed, search, lexical, documents, rerank) are
+        added to `timer`; by default a timer feeding the retrieval stage histogram.
+        `ef` (HNSW) and `nprobe` (IVF) override the index policy's search breadth;
+        `repos` restricts the search to those repositories' partitions.
+        
+        With `hybrid` (default HYBRID_SEARCH) and a lexical index for the
+        collection, a BM25 search runs in parallel with the dense one and both
+        rankings are fused by reciprocal rank fusion; the reranker then only sees
+        the top n_results * HYBRID_RERANK_FACTOR fused candidates.
+        
+        `min_similarity` (cosine) and `max_distance` (squared L2) make the vector
+        search a range search: weaker candidates never leave the store, lexical
+        candidates are held to the same bound, and only the survivors are
+        reranked. No candidate passing returns an empty result.
+
+        Milvus searches and reads (lexical-only candidates, texts missing from
+        the document store) are awaited on the loop's async client, so a pending
+        search holds no thread; query embedding and reranking run on the
+        RETRIEVAL_MODEL_WORKERS model threads.
+        """
+        timer, hits, texts, output_fields, total_found = await self._arank(
+            query, n_results, include_metadata, rerank, timer, ef, nprobe, repos, hybrid, min_similarity, max_distance
+        )
+        if not hits:
+            return self._empty_results()
+        if texts is None:
+            texts = await self._afetch_documents(hits, timer)
+        return self._format_results(hits, texts, output_fields, total_found)
+
+    async def astream(self, query: str, n_results: int = 10, include_metadata: bool = True, rerank: bool = True,
+                      timer: Optional[StageTimer] = None, ef: Optional[int] = None,
+                      nprobe: Optional[int] = None, repos: Optional[List[str]] = None,
+                      hybrid: Optional[bool] = None, min_similarity: Optional[float] = None,
+                      max_distance: Optional[float] = None):
+        """
+        asearch() for streaming responses: rank the hits, then hand them out one by one.
+
+        No result lists are built. Texts not needed for reranking are fetched
+        _STREAM_DOCUMENT_BATCH hits at a time as the iterator advances, so the
+        first hit is available without reading the texts of the others.
+
+        Returns:
+            (total_found, async iterator of {"document", "metadata", "distance"} in rank order)
+        """
+        timer, hits, texts, output_fields, total_found = await self._arank(
+            query, n_results, include_metadata, rerank, timer, ef, nprobe, repos, hybrid, min_similarity, max_distance
+        )
+
+        async def ranked_hits():
+            for start in range(0, len(hits), _STREAM_DOCUMENT_BATCH):
+                batch = hits[start:start + _STREAM_DOCUMENT_BATCH]
+                batch_texts = texts if texts is not None else await self._afetch_documents(batch, timer)
+                for hit in batch:
+                    document, metadata, distance = self._format_hit(hit, batch_texts, output_fields)
+                    yield {"document": document, "metadata": metadata, "distance": distance}
+
+        return total_found, ranked_hits()
+
+    async def _arank(self, query: str, n_results: int, include_metadata: bool, rerank: bool,
+                     timer: Optional[StageTimer], ef: Optional[int], nprobe: Optional[int],
+                     repos: Optional[List[str]], hybrid: Optional[bool], min_similarity: Optional[float],
+                     max_distance: Optional[float]):
+        """
+        The ranking part of asearch().
+
+        Returns:
+            (timer, final hits, texts or None if not fetched yet, output_fields, total_found)
+        """
+        loop = asyncio.get_running_loop()
+        timer, search_limit, use_lexical = self._plan(n_results, rerank, hybrid, timer)
+        lexical_future = (loop.run_in_executor(_lexical_executor, self._lexical_search, query, search_limit, repos)
+                          if use_lexical else None)
+
+        embedding = await loop.run_in_executor(_model_executor, self._encode_text, query, timer)
+        query_vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+
+        output_fields = self._output_fields(include_metadata)
+        radius = range_radius(self.collection.metric, min_similarity, max_distance)
+        with timer.stage("search"):
+            await self.collection.aload()
+            try:
+                hits = await self.collection.asearch(query_vector, search_limit, output_fields,
+                                                     ef=ef, nprobe=nprobe, repos=repos, radius=radius)
+            except Exception as e:
+                logger.warning(f"Search with enhanced fields failed: {e}")
+                basic_fields = ["document"] if self.documents is None else []
+                hits = await self.collection.asearch(query_vector, search_limit, basic_fields,
+                                                     ef=ef, nprobe=nprobe, repos=repos, radius=radius)
+
+        if lexical_future is not None:
+            lexical_ranking, seconds = await lexical_future
+            fused, missing = self._fuse_rankings(hits, lexical_ranking, n_results, rerank, timer, seconds)
+            rows = []
+            if missing:
+                with timer.stage("lexical"):
+                    rows = await self.collection.aquery(missing, output_fields + ["embedding"])
+            hits = self._fused_hits(hits, fused, rows, query_vector, timer, radius)
+
+        if not hits:
+            return timer, [], {}, output_fields, 0
+
+        total_found = len(hits)
+        timer.count("candidates", total_found)
+
+        texts = None
+        if rerank and len(hits) > n_results:
+            # The cross-encoder needs the text of every candidate
+            texts = await self._afetch_documents(hits, timer)
+            with timer.stage("rerank"):
+                hits = await loop.run_in_executor(
+                    _model_executor, self._rerank_results, hits, query, n_results, timer, texts
+                )
+        else:
+            hits = hits[:n_results]
+        timer.count("results", len(hits))
+        return timer, hits, texts, output_fields, total_found
+
+    def _plan(self, n_results: int, rerank: bool, hybrid: Optional[bool],
+              timer: Optional[StageTimer]):
+        """(timer, vector search limit, whether a lexical search runs) for a search request."""
         if self.collection is None:
             raise ValueError("Collection not created.")
-            
-        self.collection.load()
+        timer = timer or StageTimer(RETRIEVAL_STAGE_SECONDS, collection=self.collection.name)
         
         # Use ONNX embedding model
         if not self.has_embedding_model:
             raise ValueError("Embedding model not loaded")
-            
-        embedding = self._encode_text(query)
         
-        # Convert to numpy array with correct shape (1, embedding_dim)
-        query_embedding = np.array([embedding], dtype=np.float32)
-        
-        # Verify the shape is correct
-        if query_embedding.ndim != 2:
-            query_embedding = query_embedding.reshape(1, -1)
-        search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
-        
-        output_fields = ["document"]
+        search_limit = n_results * 3 if rerank else n_results
+        timer.count("search_limit", search_limit)
+        use_lexical = (HYBRID_SEARCH if hybrid is None else hybrid) and self.lexical is not None and len(self.lexical) > 0
+        return timer, search_limit, use_lexical
+
+    def _output_fields(self, include_metadata: bool) -> List[str]:
+        # With a document store, texts are fetched by id for the hits that need them only
+        output_fields = ["document"] if self.documents is None else []
         enhanced_fields = [
             "file_name", "file_path", "file_type", "source_link", "chunk_index", 
             "language", "has_code", "repo_name", "content_quality_score", 
-            "semantic_density_score", "information_value_score"
+            "semantic_density_score", "information_value_score", "links"
         ]
         
         if include_metadata:
             try:
-                collection_fields = [field.name for field in self.collection.schema.fields]
-                output_fields.extend([field for field in enhanced_fields if field in collection_fields])
+                output_fields.extend([field for field in enhanced_fields if field in self.collection.field_names])
             except:
                 pass
-        
-        search_limit = n_results * 3 if rerank else n_results
-        
-        try:
-            results = self.collection.search(
-                query_embedding, 
-                "embedding", 
-                search_params, 
-                limit=search_limit,
-                output_fields=output_fields,
-                expr=None
-            )
-        except Exception as e:
-            logger.warning(f"Search with enhanced fields failed: {e}")
-            basic_fields = ["document"]
-            results = self.collection.search(
-                query_embedding, 
-                "embedding", 
-                search_params, 
-                limit=search_limit,
-                output_fields=basic_fields,
-            )
-        
-        if not results or len(results[0]) == 0:
-            return {
-                "documents": [[]],
-                "metadatas": [[]],
-                "distances": [[]],
-                "total_found": 0,
-                "filtered_results": 0
-            }
-        
-        hits = results[0]
-        
-        if rerank and len(hits) > n_results:
-            hits = self._rerank_results(hits, query, n_results)
-        else:
-            hits = hits[:n_results]
-        
+        return output_fields
+
+    @staticmethod
+    def _empty_results() -> Dict[str, Any]:
+        return {
+            "documents": [[]],
+            "metadatas": [[]],
+            "distances": [[]],
+            "total_found": 0,
+            "filtered_results": 0
+        }
+
+    @staticmethod
+    def _format_hit(hit: Any, texts: Dict[str, str], output_fields: List[str]):
+        """(document, metadata, distance) of one hit."""
+        document = texts.get(hit.id, hit.entity.get("document", ""))
+        metadata = {
+            "score": float(hit.score) if hasattr(hit, 'score') else (1 - hit.distance),
+            "distance": float(hit.distance)
+        }
+        for field in output_fields:
+            if field != "document":
+                value = hit.entity.get(field)
+                if value is not None:
+                    metadata[field] = value
+        return document, metadata, float(hit.distance)
+
+    @classmethod
+    def _format_results(cls, hits: List[Any], texts: Dict[str, str], output_fields: List[str],
+                        total_found: int) -> Dict[str, Any]:
         documents = []
         metadatas = []
         distances = []
         
         for hit in hits:
-            doc_text = hit.entity.get("document", "")
-            documents.append(doc_text)
-            
-            metadata = {
-                "score": float(hit.score) if hasattr(hit, 'score') else (1 - hit.distance),
-                "distance": float(hit.distance)
-            }
-            
-            for field in output_fields:
-                if field != "document":
-                    value = hit.entity.get(field)
-                    if value is not None:
-                        metadata[field] = value
-            
+            document, metadata, distance = cls._format_hit(hit, texts, output_fields)
+            documents.append(document)
             metadatas.append(metadata)
-            distances.append(float(hit.distance))
+            distances.append(distance)
         
         return {
             "documents": [documents],
             "metadatas": [metadatas], 
             "distances": [distances],
-            "total_found": len(results[0]),
+            "total_found": total_found,
             "filtered_results": len(hits)
         }
     
-    def _rerank_results(self, hits: List[Any], query: str, n_results: int) -> List[Any]:
-        documents = [hit.entity.get("document", "") for hit in hits]
+    def _lexical_search(self, query: str, limit: int, repos: Optional[List[str]]):
+        start_time = time.perf_counter()
+        ranking = [chunk_id for chunk_id, _ in self.lexical.search(query, limit, repos)]
+        return ranking, time.perf_counter() - start_time
+
+    def _fuse_rankings(self, hits: List[Any], lexical_ranking: List[str], n_results: int, rerank: bool,
+                       timer: StageTimer, seconds: float):
+        """
+        Reciprocal rank fusion of the dense hits and the lexical ranking.
+
+        Returns:
+            (fused [(chunk id, score)], ids found only lexically, to read from the collection)
+        """
+        timer.add("lexical", seconds)
+        timer.count("lexical_candidates", len(lexical_ranking))
+        limit = n_results * HYBRID_RERANK_FACTOR if rerank else n_results
+        dense_ids = {hit.id for hit in hits}
+        fused = reciprocal_rank_fusion([[hit.id for hit in hits], lexical_ranking], HYBRID_RRF_K)[:limit]
+        return fused, [chunk_id for chunk_id, _ in fused if chunk_id not in dense_ids]
+
+    def _fused_hits(self, hits: List[Any], fused: List[Any], rows: List[Dict[str, Any]],
+                    query_vector: np.ndarray, timer: StageTimer, radius: Optional[float] = None) -> List[Any]:
+        """
+        Hits in fused order, with the lexical-only chunks built from their rows.
+
+        Their distance to the query is computed from the stored embedding so they
+        report the same distance a dense hit would, and they are dropped if it
+        misses the range search radius.
+        """
+        by_id = {hit.id: hit for hit in hits}
+        if rows:
+            metric = self.collection.metric
+            added = 0
+            for row in rows:
+                vector = np.asarray(row.pop("embedding"), dtype=np.float32)
+                if metric == "L2":
+                    distance = float(np.sum((vector - query_vector) ** 2))
+                elif metric == "COSINE":
+                    distance = float(vector @ query_vector / max(np.linalg.norm(vector) * np.linalg.norm(query_vector), 1e-12))
+                else:
+                    distance = float(vector @ query_vector)
+                if radius is not None and (distance >= radius if metric == "L2" else distance <= radius):
+                    continue
+                by_id[row["id"]] = SearchHit(row["id"], distance, row)
+                added += 1
+            # Ids missing from the collection (rows deleted after indexing) are dropped
+            timer.count("lexical_only", added)
+        return [by_id[chunk_id] for chunk_id, _ in fused if chunk_id in by_id]
+
+    async def _afetch_documents(self, hits: List[Any], timer: StageTimer) -> Dict[str, str]:
+        """
+        Texts of the hits from the document store ({} without one; hits then carry `document`).
+
+        Store reads run on a worker thread; the collection read is awaited.
+        """
+        if self.documents is None:
+            return {}
+        with timer.stage("documents"):
+            ids = [hit.id for hit in hits]
+            # mmap reads and zlib decompression of every hit would stall other requests on the loop
+            texts = await asyncio.get_running_loop().run_in_executor(_lexical_executor, self.documents.get_many, ids)
+            missing = [chunk_id for chunk_id in ids if chunk_id not in texts]
+            if missing:
+                # Rows ingested before the document store was enabled still hold their text
+                for row in await self.collection.aquery(missing, ["document"]):
+                    texts[row["id"]] = row.get("document") or ""
+        timer.count("documents_fetched", len(ids))
+        return texts
+
+    def _rerank_results(self, hits: List[Any], query: str, n_results: int,
+                        timer: Optional[StageTimer] = None, texts: Optional[Dict[str, str]] = None) -> List[Any]:
+        texts = texts or {}
+        documents = [texts.get(hit.id, hit.entity.get("document", "")) for hit in hits]
         rerank_scores = None
         
         if self.has_reranker:
@@ -345,6 +452,9 @@ class RetrievalService:
                     return_tensors='np',
                     max_length=512
                 )
+                if timer is not None:
+                    timer.count("rerank_pairs", len(sentence_pairs))
+                    timer.count("rerank_padded_tokens", inputs['input_ids'].size)
                 
                 # Run ONNX inference
                 outputs = self.reranker_session.run(
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Vector Store Abstraction
+
+Retrieval and both ingesters talk to a `VectorStore` instead of pymilvus
+directly. Two backends implement it:
+
+- `MilvusVectorStore` (default): the existing Milvus deployment, with the
+  pipelined bulk inserter / Parquet bulk importer as its write path
+- `EmbeddedVectorStore` (app.services.embedded_store): an in-process store
+  keeping vectors in a memory-mapped float32 matrix with columnar metadata,
+  for small, edge or single-board deployments without etcd, MinIO and Milvus
+
+The backend is selected with VECTOR_STORE_BACKEND ("milvus" or "embedded").
+Search hits expose the same surface for both backends: `id`, `distance`,
+`score` and `entity.get(field)`.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import MILVUS_ASYNC_CLIENT, VECTOR_STORE_BACKEND, VECTOR_METRIC, VECTOR_PARTITIONS
+from app.services.index_policy import choose_index, index_type_for, search_params
+from app.services.milvus_pool import get_async_client, get_pool
+
+logger = logging.getLogger(__name__)
+
+# Seconds between re-reads of a Milvus collection's index description
+_INDEX_REFRESH_SECONDS = 30
+_index_locks: Dict[str, threading.Lock] = {}
+_index_locks_guard = threading.Lock()
+# Blocking store calls of async callers (backends without an async client, index re-reads);
+# named threads so the "requests" profile samples them
+_blocking_executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4),
+                                        thread_name_prefix="vector-store")
+
+
+async def _run_blocking(function: Callable, *args) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(_blocking_executor, function, *args)
+
+# Chunk schema shared by repository ingestion, forum ingestion and retrieval:
+# (name, type, params). The embedding dimension is supplied when a collection is created.
+CHUNK_FIELDS: List[Tuple[str, str, Dict[str, Any]]] = [
+    ("id", "varchar", {"is_primary": True, "max_length": 100}),
+    ("document", "varchar", {"max_length": 65535}),
+    ("embedding", "float_vector", {}),
+    ("file_name", "varchar", {"max_length": 500}),
+    ("file_path", "varchar", {"max_length": 1000}),
+    ("file_type", "varchar", {"max_length": 50}),
+    ("source_link", "varchar", {"max_length": 2000}),
+    ("chunk_index", "int64", {}),
+    ("language", "varchar", {"max_length": 50}),
+    ("has_code", "bool", {}),
+    ("repo_name", "varchar", {"max_length": 200}),
+    ("content_quality_score", "float", {}),
+    ("semantic_density_score", "float", {}),
+    ("information_value_score", "float", {}),
+    # Per-chunk image/attachment references: {"images": [...], "attachments": [...]}
+    ("links", "json", {}),
+]
+
+
+def chunk_fields(include_links: bool = True) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """The chunk schema, optionally without the `links` JSON field (forum collections)."""
+    return [field for field in CHUNK_FIELDS if include_links or field[0] != "links"]
+
+
+class VectorCollection(ABC):
+    """One collection of chunk rows with an `embedding` vector field."""
+
+    name: str
+    dim: int
+    metric: str
+    field_names: List[str]
+
+    @abstractmethod
+    def load(self):
+        """Make the collection searchable (no-op where data is always resident)."""
+
+    @abstractmethod
+    def search(self, vector: Sequence[float], limit: int, output_fields: List[str],
+               expr: Optional[str] = None, ef: Optional[int] = None, nprobe: Optional[int] = None,
+               repos: Optional[List[str]] = None, radius: Optional[float] = None) -> List[Any]:
+        """
+        Nearest neighbours of one query vector.
+
+        Args:
+            vector: Query embedding
+            limit: Maximum number of hits
+            output_fields: Fields returned in each hit's entity
+            expr: Optional Milvus-style boolean filter, e.g. 'repo_name == "docs"'
+            ef: Graph search breadth (HNSW); default from the index policy
+            nprobe: IVF lists probed; default from the index policy
+            repos: Only rows of these repo_name values; the backend prunes to their partitions
+            radius: Range search bound in the metric's reported units: only hits with
+                a distance below it (L2) or a similarity above it (IP, COSINE)
+
+        Returns:
+            Hits ordered best first, each with id, distance, score and entity.get()
+        """
+
+    @abstractmethod
+    def query(self, ids: List[str], output_fields: List[str]) -> List[Dict[str, Any]]:
+        """Rows by primary key (missing ids are left out), with the given fields and `id`."""
+
+    async def aload(self):
+        """load() for async callers; backends without an async client run it on a worker thread."""
+        await _run_blocking(self.load)
+
+    async def asearch(self, vector: Sequence[float], limit: int, output_fields: List[str],
+                      expr: Optional[str] = None, ef: Optional[int] = None, nprobe: Optional[int] = None,
+                      repos: Optional[List[str]] = None, radius: Optional[float] = None) -> List[Any]:
+        """search() for async callers; backends without an async client run it on a worker thread."""
+        return await _run_blocking(self.search, vector, limit, output_fields, expr, ef, nprobe, repos, radius)
+
+    async def aquery(self, ids: List[str], output_fields: List[str]) -> List[Dict[str, Any]]:
+        """query() for async callers; backends without an async client run it on a worker thread."""
+        return await _run_blocking(self.query, ids, output_fields)
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Delete rows by primary key."""
+
+    @abstractmethod
+    def writer(self, bulk_import: bool = False, on_batch_inserted: Optional[Callable[[int], None]] = None):
+        """
+        Context-managed row writer with add_row/add_rows and a `rows_committed`
+        count of leading rows acknowledged by the store.
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored rows."""
+
+    @abstractmethod
+    def rows(self, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """All rows (every field, including the embedding) in batches, for copying a collection."""
+
+    @abstractmethod
+    def ensure_index(self, rebuild: bool = False) -> Dict[str, Any]:
+        """
+        Check the vector index against the index policy for the collection's
+        size (call after ingesting).
+
+        A missing index is created. An existing one is kept and a different
+        policy choice only logged, unless `rebuild` is set: rebuilding releases
+        the collection, so it is only done on versions that serve no queries
+        (migrate_collection builds one behind the alias).
+
+        Returns:
+            The index in effect: {"index_type", "metric_type", "params"}
+        """
+
+
+class VectorStore(ABC):
+    """A set of named collections in one backend."""
+
+    backend: str
+
+    @abstractmethod
+    def connect(self, force: bool = False, retries: int = 3, retry_delay: float = 0.0):
+        """Establish the backend connection (no-op for in-process stores)."""
+
+    @abstractmethod
+    def has_collection(self, name: str) -> bool:
+        pass
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def get_collection(self, name: str) -> VectorCollection:
+        """Open an existing collection (ValueError if it does not exist)."""
+
+    @abstractmethod
+    def create_collection(self, name: str, dim: int, description: str = "", metric: str = VECTOR_METRIC,
+                          include_links: bool = True, scalar_indexes: Sequence[str] = (),
+                          index_type: Optional[str] = None, expected_rows: int = 0) -> VectorCollection:
+        """
+        Create a chunk collection with the shared schema and a vector index.
+
+        The index follows the index policy for `expected_rows` rows; `index_type`
+        overrides the configured type for this collection.
+        """
+
+    @abstractmethod
+    def drop_collection(self, name: str):
+        """Drop a collection (ValueError while an alias points to it)."""
+
+    @abstractmethod
+    def rename_collection(self, old_name: str, new_name: str):
+        pass
+
+    @abstractmethod
+    def list_aliases(self) -> Dict[str, str]:
+        """Alias -> collection name."""
+
+    @abstractmethod
+    def set_alias(self, alias: str, collection_name: str):
+        """Point an alias at a collection, creating it or switching it atomically."""
+
+    @abstractmethod
+    def drop_alias(self, alias: str):
+        pass
+
+    def resolve(self, name: str) -> str:
+        """The collection behind a name (the name itself unless it is an alias)."""
+        return self.list_aliases().get(name, name)
+
+
+class MilvusVectorCollection(VectorCollection):
+    """
+    VectorCollection over a pymilvus Collection.
+
+    Management calls (load, index, count) use the "default" alias; searches and
+    reads go through the query pool and deletes through the ingest pool, with one
+    Collection handle per alias. The async methods use the event loop's
+    AsyncMilvusClient (unless MILVUS_ASYNC_CLIENT is off).
+    """
+
+    def __init__(self, collection):
+        self._handles: Dict[str, Any] = {}
+        self._describe(collection)
+        self.index: Optional[Dict[str, Any]] = None
+        self._index_checked = 0.0
+        self._refresh_index()
+
+    def _describe(self, collection):
+        self.collection = collection
+        self.name = collection.name
+        self.field_names = [field.name for field in collection.schema.fields]
+        self.dim = next(
+            (field.params.get("dim") for field in collection.schema.fields if field.name == "embedding"), None
+        )
+        self.metric = VECTOR_METRIC
+        self.partition_key = any(getattr(field, "is_partition_key", False) for field in collection.schema.fields)
+        self._handles = {}
+
+    def _checkout(self, pool_name: str):
+        """(pool, alias, Collection handle on that alias) for the next connection of a pool."""
+        from pymilvus import Collection
+        pool = get_pool(pool_name)
+        alias = pool.checkout()
+        handle = self._handles.get(alias)
+        if handle is None:
+            handle = self._handles[alias] = Collection(self.name, using=alias)
+        return pool, alias, handle
+
+    def _reopen(self):
+        """Describe the collection again (an alias may now point at another version)."""
+        from pymilvus import Collection
+        self._describe(Collection(self.name))
+        self._refresh_index()
+
+    def _refresh_index(self):
+        """Read the embedding index (type, metric, params) from the server."""
+        try:
+            for index in self.collection.indexes:
+                if index.field_name == "embedding":
+                    params = dict(index.params)
+                    if isinstance(params.get("params"), str):
+                        params["params"] = json.loads(params["params"])
+                    params["index_name"] = index.index_name
+                    self.index = params
+                    self.metric = params.get("metric_type", self.metric)
+        except Exception:
+            pass
+        self._index_checked = time.monotonic()
+
+    def load(self):
+        self.collection.load()
+        # Another process (or ingester) may have rebuilt the index since it was read
+        if time.monotonic() - self._index_checked > _INDEX_REFRESH_SECONDS:
+            self._refresh_index()
+
+    def search(self, vector, limit, output_fields, expr=None, ef=None, nprobe=None, repos=None, radius=None):
+        # With repo_name as partition key, Milvus only searches the partitions the scope hashes to
+        expr = repo_scope_expr(repos, expr)
+        pool, alias, handle = self._checkout("query")
+        try:
+            results = handle.search(
+                [list(vector)], "embedding",
+                search_params(self.index, self.metric, limit, ef=ef, nprobe=nprobe, radius=radius),
+                limit=limit, output_fields=output_fields, expr=expr
+            )
+        except Exception as e:
+            # After an alias switch the metric or index may differ, or the channel broke:
+            # retry once on another connection with a fresh description
+            logger.info(f"[SEARCH] Search on '{self.name}' via '{alias}' failed ({e}); re-reading the collection and retrying")
+            pool.report_failure(alias)
+            self._reopen()
+            self.collection.load()
+            _, _, handle = self._checkout("query")
+            results = handle.search(
+                [list(vector)], "embedding",
+                search_params(self.index, self.metric, limit, ef=ef, nprobe=nprobe, radius=radius),
+                limit=limit, output_fields=[name for name in output_fields if name in self.field_names], expr=expr
+            )
+        return list(results[0]) if results else []
+
+    def query(self, ids, output_fields):
+        _, _, handle = self._checkout("query")
+        rows = []
+        for i in range(0, len(ids), 1000):
+            rows.extend(handle.query(f"id in {json.dumps(ids[i:i + 1000])}",
+                                              output_fields=list(dict.fromkeys(["id"] + output_fields))))
+        return rows
+
+    async def aload(self):
+        if not MILVUS_ASYNC_CLIENT:
+            return await super().aload()
+        await get_async_client().load_collection(self.name)
+        if time.monotonic() - self._index_checked > _INDEX_REFRESH_SECONDS:
+            await _run_blocking(self._refresh_index)
+
+    async def asearch(self, vector, limit, output_fields, expr=None, ef=None, nprobe=None, repos=None, radius=None):
+        if not MILVUS_ASYNC_CLIENT:
+            return await super().asearch(vector, limit, output_fields, expr, ef, nprobe, repos, radius)
+        client = get_async_client()
+        expr = repo_scope_expr(repos, expr) or ""
+        try:
+            results = await client.search(
+                self.name, [list(vector)], filter=expr, limit=limit, output_fields=output_fields,
+                search_params=search_params(self.index, self.metric, limit, ef=ef, nprobe=nprobe, radius=radius),
+                anns_field="embedding"
+            )
+        except Exception as e:
+            # Same recovery as search(): the alias may point at a version with another metric or index
+            logger.info(f"[SEARCH] Async search on '{self.name}' failed ({e}); re-reading the collection and retrying")
+            await _run_blocking(self._reopen)
+            results = await client.search(
+                self.name, [list(vector)], filter=expr, limit=limit,
+                output_fields=[name for name in output_fields if name in self.field_names],
+                search_params=search_params(self.index, self.metric, limit, ef=ef, nprobe=nprobe, radius=radius),
+                anns_field="embedding"
+            )
+        return list(results[0]) if results else []
+
+    async def aquery(self, ids, output_fields):
+        if not MILVUS_ASYNC_CLIENT:
+            return await super().aquery(ids, output_fields)
+        client = get_async_client()
+        batches = await asyncio.gather(*(
+            client.query(self.name, filter=f"id in {json.dumps(ids[i:i + 1000])}",
+                         output_fields=list(dict.fromkeys(["id"] + output_fields)))
+            for i in range(0, len(ids), 1000)
+        ))
+        return [dict(row) for batch in batches for row in batch]
+
+    def delete(self, ids):
+        _, _, handle = self._checkout("ingest")
+        for i in range(0, len(ids), 1000):
+            handle.delete(f"id in {json.dumps(ids[i:i + 1000])}")
+
+    def writer(self, bulk_import=False, on_batch_inserted=None):
+        from app.services.bulk_insert import MilvusBulkImporter, MilvusBulkInserter
+        if bulk_import:
+            return MilvusBulkImporter(self.name)
+        return MilvusBulkInserter(self.name, on_batch_inserted=on_batch_inserted)
+
+    def count(self):
+        return self.collection.num_entities
+
+    def rows(self, batch_size=1000):
+        _, _, handle = self._checkout("query")
+        iterator = handle.query_iterator(batch_size=batch_size, output_fields=self.field_names)
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                yield [dict(row) for row in batch]
+        finally:
+            iterator.close()
+
+    def ensure_index(self, rebuild=False):
+        with _index_locks_guard:
+            lock = _index_locks.setdefault(self.name, threading.Lock())
+        with lock:
+            self._refresh_index()
+            desired = choose_index(self.count(), self.dim, self.metric, index_type_for(self.name))
+            if self.index and _same_index(self.index, desired):
+                return self.index
+            if self.index and not rebuild:
+                # Never release or drop the index of a collection that may be serving queries
+                logger.info(f"[INDEX] '{self.name}' keeps its {self.index.get('index_type')} index; the policy now "
+                            f"picks {desired['index_type']} {desired['params']}. Rebuild it behind the alias with: "
+                            f"python -m app.scripts.migrate_collection {self.name} --index {desired['index_type']}")
+                return self.index
+
+            logger.info(f"[INDEX] Rebuilding '{self.name}' index: {(self.index or {}).get('index_type')} "
+                        f"{(self.index or {}).get('params')} -> {desired['index_type']} {desired['params']}")
+            start_time = time.time()
+            if self.index:
+                self.collection.release()
+                self.collection.drop_index(index_name=self.index.get("index_name", ""))
+            self.collection.create_index("embedding", desired)
+            self.collection.load()
+            self._refresh_index()
+            logger.info(f"[INDEX] '{self.name}' index rebuilt in {time.time() - start_time:.1f}s")
+            return self.index
+
+
+def repo_scope_expr(repos: Optional[Sequence[str]], expr: Optional[str] = None) -> Optional[str]:
+    """Combine a filter expression with a repo_name scope (JSON strings are valid Milvus string literals)."""
+    if not repos:
+        return expr
+    scope = f"repo_name in {json.dumps(list(repos))}"
+    return f"({expr}) and {scope}" if expr else scope
+
+
+def _same_index(current: Dict[str, Any], desired: Dict[str, Any]) -> bool:
+    """Index type and parameters match (the server may report parameter values as strings)."""
+    if current.get("index_type") != desired["index_type"]:
+        return False
+    current_params = {key: str(value) for key, value in (current.get("params") or {}).items()}
+    return current_params == {key: str(value) for key, value in desired["params"].items()}
+
+
+class MilvusVectorStore(VectorStore):
+    """The Milvus server configured through MILVUS_URI or MILVUS_HOST/MILVUS_PORT."""
+
+    backend = "milvus"
+
+    def connect(self, force=False, retries=3, retry_delay=0.0):
+        """
+        Connect the "default" admin alias, trying MILVUS_URI first and host/port second.
+
+        Once connected this is a no-op: the background health check keeps the
+        pools' aliases alive, so callers need not ping the server. With force,
+        the admin alias is reconnected.
+
+        Raises:
+            RuntimeError: If no attempt succeeds
+        """
+        pool = get_pool("default", retries, retry_delay)
+        if force:
+            pool.connect(retries, retry_delay, force=True)
+
+    def has_collection(self, name):
+        from pymilvus import utility
+        return utility.has_collection(name) or name in self.list_aliases()
+
+    def list_collections(self):
+        from pymilvus import utility
+        return utility.list_collections()
+
+    def get_collection(self, name):
+        from pymilvus import Collection
+        if not self.has_collection(name):
+            raise ValueError(f"Collection '{name}' does not exist")
+        return MilvusVectorCollection(Collection(name))
+
+    def create_collection(self, name, dim, description="", metric=VECTOR_METRIC, include_links=True, scalar_indexes=(),
+                          index_type=None, expected_rows=0):
+        from pymilvus import Collection, CollectionSchema, DataType, FieldSchema
+
+        dtypes = {
+            "varchar": DataType.VARCHAR, "float_vector": DataType.FLOAT_VECTOR, "int64": DataType.INT64,
+            "bool": DataType.BOOL, "float": DataType.FLOAT, "json": DataType.JSON,
+        }
+        fields = []
+        for field_name, field_type, params in chunk_fields(include_links):
+            if field_type == "float_vector":
+                params = {**params, "dim": dim}
+            if field_name == "repo_name" and VECTOR_PARTITIONS:
+                params = {**params, "is_partition_key": True}
+            fields.append(FieldSchema(name=field_name, dtype=dtypes[field_type], **params))
+        if VECTOR_PARTITIONS:
+            collection = Collection(name, CollectionSchema(fields, description), num_partitions=VECTOR_PARTITIONS)
+        else:
+            collection = Collection(name, CollectionSchema(fields, description))
+
+        # Sized for the expected rows; ensure_index() adapts it as rows are ingested
+        collection.create_index("embedding", choose_index(expected_rows, dim, metric, index_type or index_type_for(name)))
+        # Scalar indexes for efficient filtering
+        for field_name in scalar_indexes:
+            try:
+                collection.create_index(field_name)
+            except Exception as idx_error:
+                logger.warning(f"Could not create index for {field_name}: {idx_error}")
+        return MilvusVectorCollection(collection)
+
+    def drop_collection(self, name):
+        from pymilvus import utility
+        aliases = utility.list_aliases(name)
+        if aliases:
+            raise ValueError(f"Collection '{name}' is still referenced by alias(es) {', '.join(aliases)}")
+        utility.drop_collection(name)
+
+    def rename_collection(self, old_name, new_name):
+        from pymilvus import utility
+        utility.rename_collection(old_name, new_name)
+
+    def list_aliases(self):
+        from pymilvus import utility
+        return {alias: name for name in utility.list_collections() for alias in utility.list_aliases(name)}
+
+    def set_alias(self, alias, collection_name):
+        from pymilvus import utility
+        if alias in self.list_aliases():
+            utility.alter_alias(collection_name, alias)
+        else:
+            utility.create_alias(collection_name, alias)
+        logger.info(f"[ALIAS] '{alias}' -> '{collection_name}'")
+
+    def drop_alias(self, alias):
+        from pymilvus import utility
+        utility.drop_alias(alias)
+
+
+_stores: Dict[str, VectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(backend: Optional[str] = None) -> VectorStore:
+    """
+    The process-wide store for a backend (default: VECTOR_STORE_BACKEND).
+
+    One instance per backend is shared, so an embedded collection written by an
+    ingestion job is immediately searchable by the retrieval service.
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = (backend or VECTOR_STORE_BACKEND).lower()
+    with _stores_lock:
+        if backend not in _stores:
+            if backend == "milvus":
+                _stores[backend] = MilvusVectorStore()
+            elif backend == "embedded":
+                from app.services.embedded_store import EmbeddedVectorStore
+                _stores[backend] = EmbeddedVectorStore()
+            else:
+                raise ValueError(f"Unknown VECTOR_STORE_BACKEND '{backend}' (expected 'milvus' or 'embedded')")
+        return _stores[backend]
@@ -3,6 +3,8 @@ import sys
 from fastapi import FastAPI
 from app.routes.retrieval import router as retrieval_router
 from app.routes.github_ingestion import router as github_ingestion_router
+from app.routes.metrics import router as metrics_router
+from app.routes.admin import router as admin_router
 
 # Configure logging to ensure all logs are visible
 logging.basicConfig(
@@ -27,6 +29,8 @@ app = FastAPI(
 
 app.include_router(retrieval_router, prefix="/api", tags=["retrieval"])
 app.include_router(github_ingestion_router, prefix="/api", tags=["github_ingestion"])
+app.include_router(metrics_router, tags=["metrics"])
+app.include_router(admin_router, prefix="/api", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,100 @@
+import string
+
+import pytest
+
+pytest.importorskip("transformers")
+
+from tokenizers import Tokenizer, models, pre_tokenizers, processors
+from transformers import PreTrainedTokenizerFast
+
+from app.services.chunker import TokenAwareChunker
+
+PROSE = " ".join(
+    f"Sentence {index} tells the board to toggle pin {index % 7} and wait."
+    + ("\n\n" if index % 5 == 4 else "")
+    for index in range(60)
+)
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    """A character-level WordPiece tokenizer: every character is one token, words stay whole."""
+    characters = string.ascii_letters + string.digits + string.punctuation
+    vocab = {"[UNK]": 0, "[CLS]": 1, "[SEP]": 2}
+    for character in characters:
+        vocab[character] = len(vocab)
+        vocab[f"##{character}"] = len(vocab)
+    backend = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]", max_input_chars_per_word=100_000))
+    backend.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 1), ("[SEP]", 2)]
+    )
+    return PreTrainedTokenizerFast(tokenizer_object=backend, unk_token="[UNK]", cls_token="[CLS]", sep_token="[SEP]")
+
+
+def _check_spans(chunker, text, spans):
+    assert spans == sorted(spans)
+    for start, end in spans:
+        assert 0 < chunker.count_tokens(text[start:end]) <= chunker.max_tokens
+        assert not text[start].isspace() and not text[end - 1].isspace()
+    # Every non-whitespace character is in some chunk
+    covered = set()
+    for start, end in spans:
+        covered.update(range(start, end))
+    assert all(index in covered for index, character in enumerate(text) if not character.isspace())
+
+
+def test_chunks_fit_the_budget_and_cover_the_text(tokenizer):
+    chunker = TokenAwareChunker(tokenizer, max_tokens=64, overlap_tokens=8)
+    spans = chunker.spans(PROSE)
+
+    assert len(spans) > 10
+    _check_spans(chunker, PROSE, spans)
+
+
+def test_consecutive_chunks_share_the_configured_overlap(tokenizer):
+    chunker = TokenAwareChunker(tokenizer, max_tokens=64, overlap_tokens=8)
+    spans = chunker.spans(PROSE)
+
+    for (_, previous_end), (start, _) in zip(spans, spans[1:]):
+        assert start < previous_end
+        assert 0 < chunker.count_tokens(PROSE[start:previous_end]) <= 8
+
+
+def test_cuts_prefer_separators(tokenizer):
+    chunker = TokenAwareChunker(tokenizer, max_tokens=64, overlap_tokens=0)
+
+    chunks = chunker.split_text(PROSE)
+
+    assert all(chunk.endswith(".") for chunk in chunks)
+
+
+def test_budget_is_capped_by_the_model_length(tokenizer):
+    chunker = TokenAwareChunker(tokenizer, max_tokens=1000, overlap_tokens=900, model_max_length=20)
+
+    assert chunker.max_tokens == 18
+    assert chunker.overlap_tokens == 9
+
+
+@pytest.mark.parametrize("text", ["", "   \n\n  "])
+def test_empty_text_has_no_chunks(tokenizer, text):
+    assert TokenAwareChunker(tokenizer, max_tokens=16).spans(text) == []
+
+
+def test_over_long_word_is_cut_into_budget_sized_pieces(tokenizer):
+    chunker = TokenAwareChunker(tokenizer, max_tokens=16, overlap_tokens=4)
+    text = "x" * 100
+    spans = chunker.spans(text)
+
+    _check_spans(chunker, text, spans)
+    assert spans[0] == (0, 16)
+    assert spans[-1][1] == 100
+
+
+def test_text_without_separators_is_cut_at_word_starts(tokenizer):
+    chunker = TokenAwareChunker(tokenizer, max_tokens=16, overlap_tokens=0)
+    text = "abc,def;ghi:jkl|" * 20
+    spans = chunker.spans(text)
+
+    _check_spans(chunker, text, spans)
+    assert "".join(text[start:end] for start, end in spans) == text
@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from app.services.content_analyzer import MAX_CHUNK_LINK_LENGTH, ContentAnalyzer, assign_links_to_chunks
+
+PYTHON = '''"""GPIO helpers."""
+from gpio import (
+    Pin,
+    PWM,
+)
+import os
+
+class Blinker:
+    def toggle(self, pin):
+        return pin
+
+def main():
+    pass
+'''
+
+JAVASCRIPT = """import {
+  add,
+  sub
+} from './math';
+import './side.css';
+const double = (x) => add(x, x);
+function run() { return double(2); }
+"""
+
+MARKDOWN = """# Setup
+
+Flash the board first. Then boot it! See [the guide](https://example.com/guide).
+
+```
+echo ready
+```
+"""
+
+
+def test_links_go_to_every_chunk_containing_them():
+    spans = [(0, 100), (80, 180), (160, 260)]
+    links = [(10, "image", "a.png"), (90, "image", "b.png"), (170, "attachment", "c.pdf"), (250, "image", "d.png")]
+
+    assert assign_links_to_chunks(spans, links) == [
+        {"images": ["a.png", "b.png"]},
+        {"images": ["b.png"], "attachments": ["c.pdf"]},
+        {"attachments": ["c.pdf"], "images": ["d.png"]},
+    ]
+
+
+def test_chunk_boundaries_are_half_open():
+    spans = [(0, 10), (10, 20)]
+
+    assert assign_links_to_chunks(spans, [(10, "image", "x.png"), (20, "image", "y.png")]) == [{}, {"images": ["x.png"]}]
+
+
+def test_links_are_deduplicated_capped_and_length_limited():
+    links = [(offset, "image", f"{offset % 3}.png") for offset in range(9)]
+    links.append((5, "attachment", "x" * (MAX_CHUNK_LINK_LENGTH + 1)))
+
+    assert assign_links_to_chunks([(0, 10)], links, max_links_per_kind=2) == [{"images": ["0.png", "1.png"]}]
+
+
+def test_analyzer_link_positions_map_to_chunks():
+    content = "See ![a](img/a.png) first.\n\n" + "filler " * 20 + "\n\nThen [manual](docs/manual.pdf)."
+    positions = ContentAnalyzer().analyze(content, ".md", "https://host/repo/blob/main/")["link_positions"]
+    middle = len(content) // 2
+
+    assert assign_links_to_chunks([(0, middle), (middle, len(content))], positions) == [
+        {"images": ["https://host/repo/blob/main/img/a.png"]},
+        {"attachments": ["https://host/repo/blob/main/docs/manual.pdf"]},
+    ]
+
+
+@pytest.mark.parametrize("content, extension, language", [
+    (PYTHON, ".py", "python"),
+    (PYTHON, "", "python"),
+    (JAVASCRIPT, "", "javascript"),
+    ("public class Main {\n  private int x;\n  public static void main(String[] a) {}\n}\n", "", "java"),
+    (MARKDOWN, ".md", "markdown"),
+    ("just some words", "", "unknown"),
+])
+def test_language_detection(content, extension, language):
+    assert ContentAnalyzer().analyze(content, extension)["language"] == language
+
+
+def test_python_elements_including_multi_line_imports():
+    result = ContentAnalyzer().analyze(PYTHON, ".py")
+
+    assert result["has_code"] and result["has_documentation"]
+    assert result["function_names"] == ["toggle", "main"]
+    assert result["class_names"] == ["Blinker"]
+    assert result["import_statements"] == ["from gpio import ( Pin, PWM, )", "import os"]
+
+
+def test_javascript_elements_including_multi_line_imports():
+    result = ContentAnalyzer().analyze(JAVASCRIPT, ".js")
+
+    assert result["has_code"]
+    assert result["function_names"] == ["double", "run"]
+    assert result["import_statements"] == ["import { add, sub } from './math'"]
+
+
+def test_prose_has_no_code_and_scores_its_structure():
+    result = ContentAnalyzer().analyze(MARKDOWN, ".md")
+
+    assert not result["has_code"] and result["has_documentation"]
+    assert {"setup", "flash", "board", "guide"} <= set(result["keywords"])
+    assert "echo" not in result["keywords"]
+    assert result["external_links"] == ["https://example.com/guide"]
+    # Length, paragraphs, headers, documentation and sentences; no functions
+    assert result["content_quality_score"] == pytest.approx(5 / 6)
+    assert 0 < result["information_value_score"] < 1
+
+
+def test_pathological_input_stops_at_the_deadline():
+    content = '"""' + "x = 1; " * 400_000
+
+    start = time.perf_counter()
+    result = ContentAnalyzer(max_seconds=0.01).analyze(content, ".py")
+
+    assert time.perf_counter() - start < 2
+    assert result["analysis_truncated"]
+    assert result["language"] == "python"
+    assert not ContentAnalyzer().analyze(PYTHON, ".py")["analysis_truncated"]
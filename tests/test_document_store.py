@@ -0,0 +1,87 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from app.services.document_store import DocumentStore, OffloadingWriter
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def write_in_other_process(path, prefix, count):
+    script = textwrap.dedent(f"""
+        from app.services.document_store import DocumentStore
+        store = DocumentStore({str(path)!r})
+        for i in range({count}):
+            store.put_many([("{prefix}-%d" % i, "text of {prefix} %d" % i)])
+        store.flush()
+    """)
+    return subprocess.Popen([sys.executable, "-c", script], cwd=ROOT)
+
+
+def test_put_get_replace_delete(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    store.put_many([("a", "first"), ("b", "second")])
+    store.put_many([("a", "replaced")])
+    store.delete(["b"])
+
+    assert store.get_many(["a", "b", "missing"]) == {"a": "replaced"}
+    reopened = DocumentStore(str(tmp_path))
+    assert reopened.get_many(["a", "b"]) == {"a": "replaced"}
+
+
+def test_reads_texts_written_by_another_process(tmp_path):
+    reader = DocumentStore(str(tmp_path))
+    reader.put_many([("local", "written here")])
+
+    assert write_in_other_process(tmp_path, "cli", 20).wait(timeout=30) == 0
+
+    texts = reader.get_many([f"cli-{i}" for i in range(20)] + ["local"])
+    assert texts["cli-7"] == "text of cli 7"
+    assert len(texts) == 21
+
+
+def test_concurrent_writers_do_not_corrupt_offsets(tmp_path):
+    writers = [write_in_other_process(tmp_path, f"w{n}", 200) for n in range(3)]
+    local = DocumentStore(str(tmp_path))
+    for i in range(200):
+        local.put_many([(f"api-{i}", f"text of api {i}")])
+    assert all(writer.wait(timeout=60) == 0 for writer in writers)
+
+    ids = [f"{prefix}-{i}" for prefix in ("w0", "w1", "w2", "api") for i in range(200)]
+    expected = {chunk_id: "text of " + chunk_id.replace("-", " ") for chunk_id in ids}
+    assert local.get_many(ids) == expected
+    assert DocumentStore(str(tmp_path)).get_many(ids) == expected
+
+
+def test_torn_index_line_is_skipped(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    store.put_many([("a", "kept")])
+    with open(tmp_path / "documents.idx", "ab") as f:
+        f.write(b"half-written\t12")
+    store.put_many([("b", "after the crash")])
+
+    assert DocumentStore(str(tmp_path)).get_many(["a", "b", "half-written"]) == {"a": "kept", "b": "after the crash"}
+
+
+def test_offloading_writer_blanks_documents(tmp_path):
+    class Writer:
+        def __init__(self):
+            self.rows = []
+
+        def add_rows(self, rows):
+            self.rows.extend(rows)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    inner = Writer()
+    store = DocumentStore(str(tmp_path))
+    with OffloadingWriter(inner, store, batch_rows=2) as writer:
+        writer.add_rows([{"id": f"c{i}", "document": f"text {i}"} for i in range(3)])
+
+    assert [row["document"] for row in inner.rows] == ["", "", ""]
+    assert store.get_many(["c0", "c2"]) == {"c0": "text 0", "c2": "text 2"}
@@ -0,0 +1,64 @@
+import threading
+
+import numpy as np
+
+from app.services import embedded_store
+from app.services.embedded_store import EmbeddedCollection
+
+DIM = 8
+
+
+def _collection(tmp_path, rows):
+    collection = EmbeddedCollection.create(str(tmp_path / "col"), "col", DIM, "L2", "",
+                                           [["id", "varchar"], ["embedding", "float_vector"], ["repo_name", "varchar"]])
+    vectors = np.random.default_rng(0).standard_normal((rows, DIM)).astype(np.float32)
+    collection.insert([{"id": f"c{row}", "embedding": vectors[row], "repo_name": "r"} for row in range(rows)])
+    return collection, vectors
+
+
+def test_search_is_not_blocked_while_flush_builds_the_graph(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedded_store, "EMBEDDED_INDEX", "graph")
+    collection, vectors = _collection(tmp_path, 300)
+    building = threading.Event()
+    release = threading.Event()
+    extend_graph = collection._extend_graph
+
+    def slow_extend_graph(*args):
+        building.set()
+        release.wait(10)
+        extend_graph(*args)
+
+    monkeypatch.setattr(collection, "_extend_graph", slow_extend_graph)
+    flush = threading.Thread(target=collection.flush)
+    flush.start()
+    try:
+        assert building.wait(10)
+        hits = []
+        search = threading.Thread(target=lambda: (
+            hits.extend(collection.search(vectors[5], 1, ["repo_name"])),
+            collection.insert([{"id": "late", "embedding": vectors[7], "repo_name": "r"}])
+        ))
+        search.start()
+        search.join(5)
+        assert not search.is_alive()
+    finally:
+        release.set()
+        flush.join(10)
+
+    assert [hit.id for hit in hits] == ["c5"]
+    assert collection._graph_rows == 300
+    assert collection.ensure_index()["index_type"] == "GRAPH"
+    assert collection._graph_rows == 301
+
+
+def test_flushed_graph_finds_the_exact_neighbours(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedded_store, "EMBEDDED_INDEX", "graph")
+    collection, vectors = _collection(tmp_path, 600)
+    collection.flush()
+
+    for row in (0, 123, 599):
+        assert collection.search(vectors[row], 1, [])[0].id == f"c{row}"
+
+    reopened = EmbeddedCollection(str(tmp_path / "col"))
+    assert reopened._graph_rows == 600
+    assert reopened.count() == 600
@@ -0,0 +1,31 @@
+import time
+
+import pytest
+
+pytest.importorskip("onnxruntime")
+
+from app.services.github_ingestion_service import GitHubIngestionService
+from app.services.ingestion_jobs import JOB_SUCCEEDED
+
+
+def wait_finished(service, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = service.get_job(job_id)
+        if job.finished_at is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_submit_ingestion_and_read_status(monkeypatch):
+    service = GitHubIngestionService()
+    monkeypatch.setattr(service, "_run_job", lambda job: {"files_processed": 3, "url": job.params["github_url"]})
+
+    job = service.submit_ingestion("test_col", "https://github.com/beagleboard/docs.beagleboard.io")
+    finished = wait_finished(service, job.job_id)
+
+    assert finished.state == JOB_SUCCEEDED
+    assert finished.to_dict()["stats"] == {"files_processed": 3, "url": "https://github.com/beagleboard/docs.beagleboard.io"}
+    assert [listed.job_id for listed in service.list_jobs("test_col")] == [job.job_id]
+    assert service._job_gauge() == []
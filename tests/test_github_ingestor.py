@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("transformers")
+
+from app.scripts import github_ingestor
+from app.scripts.github_ingestor import GitHubDirectIngester
+from app.services.embedded_store import EmbeddedVectorStore
+from app.services.ingestion_journal import RepositoryJournal
+
+
+def _item(chunk_id):
+    return {
+        "id": chunk_id, "document": f"text of {chunk_id}", "file_name": "a.py", "file_path": "src/a.py",
+        "file_type": ".py", "source_link": "https://example.com/a.py", "chunk_index": 0, "language": "python",
+        "has_code": True, "repo_name": "repo", "content_quality_score": 0.5, "semantic_density_score": 0.5,
+        "information_value_score": 0.5,
+    }
+
+
+@pytest.fixture
+def ingester(tmp_path, monkeypatch):
+    # Rows go to the vector store only, not to the default lexical index directory
+    monkeypatch.setattr(github_ingestor, "get_lexical_index", lambda collection_name: None)
+    store = EmbeddedVectorStore(str(tmp_path / "store"))
+    ingester = GitHubDirectIngester.__new__(GitHubDirectIngester)
+    ingester.collection_name = "col"
+    ingester.collection = store.create_collection("col", 2, include_links=False)
+    ingester.has_links_field = False
+    ingester.bulk_import = False
+    return ingester
+
+
+def test_submitted_but_uncommitted_chunks_are_deleted_before_reinsert(ingester, tmp_path, monkeypatch):
+    journal = RepositoryJournal(str(tmp_path / "journal"), "col", "owner", "repo", "main")
+    # An interrupted attempt handed "a" and "b" over; only "a" may have been stored
+    journal.record_submitted(["a", "b"])
+    ingester.collection.insert([{**_item("a"), "embedding": [0.0, 1.0]}])
+    deleted = []
+    delete = ingester.collection.delete
+    monkeypatch.setattr(ingester.collection, "delete", lambda ids: (deleted.extend(ids), delete(ids)))
+
+    ingester.store_chunks_batch([_item("a"), _item("b"), _item("c")], [[1.0, 0.0]] * 3, journal=journal)
+
+    assert deleted == ["a", "b"]
+    assert journal.committed == {"a", "b", "c"}
+    assert ingester.collection.count() == 3
+    rows = ingester.collection.query(["a"], ["embedding"])
+    assert rows[0]["embedding"] == [1.0, 0.0]
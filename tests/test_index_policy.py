@@ -0,0 +1,59 @@
+import pytest
+
+from app.services.index_policy import choose_index, range_radius, search_params
+
+
+@pytest.mark.parametrize("rows, index_type", [
+    (0, "HNSW"),
+    (999_999, "HNSW"),
+    (1_000_000, "IVF_SQ8"),
+    (10_000_000, "IVF_PQ"),
+])
+def test_auto_index_type_follows_the_row_count(rows, index_type):
+    assert choose_index(rows, 384, "L2")["index_type"] == index_type
+
+
+def test_hnsw_parameters_grow_with_the_collection():
+    assert choose_index(1_000, 384, "COSINE") == {
+        "index_type": "HNSW", "metric_type": "COSINE", "params": {"M": 16, "efConstruction": 128}
+    }
+    assert choose_index(500_000, 768, "L2")["params"] == {"M": 32, "efConstruction": 512}
+
+
+def test_ivf_nlist_is_a_bounded_power_of_two():
+    assert choose_index(1_000, 384, "L2", "IVF_FLAT")["params"] == {"nlist": 128}
+    assert choose_index(4_000_000, 384, "L2")["params"] == {"nlist": 8192}
+    assert choose_index(10, 384, "L2", "IVF_SQ8")["params"] == {"nlist": 64}
+    assert choose_index(10 ** 12, 384, "L2", "IVF_FLAT")["params"]["nlist"] == 65536
+
+
+def test_pq_sub_quantizers_divide_the_dimension():
+    assert choose_index(20_000_000, 384, "L2")["params"]["m"] == 48
+    params = choose_index(20_000_000, 100, "L2")["params"]
+    assert 100 % params["m"] == 0 and params["m"] <= 12
+    assert params["nbits"] == 8
+
+
+def test_unknown_index_type_is_rejected():
+    with pytest.raises(ValueError, match="Unknown vector index type"):
+        choose_index(1_000, 384, "L2", "DISKANN")
+
+
+def test_range_radius_converts_bounds_to_the_metric():
+    assert range_radius("L2") is None
+    assert range_radius("COSINE", min_similarity=0.8) == 0.8
+    assert range_radius("L2", min_similarity=0.8) == pytest.approx(0.4)
+    assert range_radius("IP", max_distance=0.4) == pytest.approx(0.8)
+
+
+def test_range_radius_keeps_the_stricter_bound():
+    assert range_radius("COSINE", min_similarity=0.5, max_distance=0.4) == pytest.approx(0.8)
+    assert range_radius("L2", min_similarity=0.9, max_distance=0.4) == pytest.approx(0.2)
+
+
+def test_search_params_carry_the_radius():
+    hnsw = {"index_type": "HNSW", "params": {"M": 16}}
+
+    params = search_params(hnsw, "L2", 10, radius=0.4)["params"]
+    assert params["radius"] == 0.4 and params["ef"] >= 10
+    assert "radius" not in search_params(hnsw, "L2", 10)["params"]
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from app.services.ingestion_jobs import (
+    IngestionJobScheduler, JOB_CANCELLED, JOB_FAILED, JOB_QUEUED, JOB_SUCCEEDED
+)
+
+
+def wait_finished(scheduler, job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if scheduler.get(job.job_id).finished_at is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job.job_id} did not finish")
+
+
+def test_job_result_and_failure_are_recorded():
+    scheduler = IngestionJobScheduler(max_concurrent_jobs=2)
+    ok = scheduler.submit("a", {}, lambda job: {"chunks": 5})
+    failed = scheduler.submit("b", {}, lambda job: 1 / 0)
+
+    assert wait_finished(scheduler, ok).state == JOB_SUCCEEDED
+    assert ok.result == {"chunks": 5}
+    assert wait_finished(scheduler, failed).state == JOB_FAILED
+    assert "division by zero" in failed.error
+
+
+def test_jobs_for_one_collection_run_one_at_a_time():
+    scheduler = IngestionJobScheduler(max_concurrent_jobs=4)
+    release = threading.Event()
+    running = []
+    overlap = []
+
+    def runner(job):
+        running.append(job.job_id)
+        overlap.append(len(running))
+        release.wait(5)
+        running.remove(job.job_id)
+        return {}
+
+    first = scheduler.submit("same", {}, runner)
+    second = scheduler.submit("same", {}, runner)
+    time.sleep(0.05)
+    assert second.state == JOB_QUEUED
+    release.set()
+    wait_finished(scheduler, first)
+    wait_finished(scheduler, second)
+    assert max(overlap) == 1
+
+
+def test_cancel_queued_job():
+    scheduler = IngestionJobScheduler(max_concurrent_jobs=1)
+    release = threading.Event()
+    blocker = scheduler.submit("a", {}, lambda job: release.wait(5) and {})
+    queued = scheduler.submit("a", {}, lambda job: {})
+
+    assert scheduler.cancel(queued.job_id).state == JOB_CANCELLED
+    release.set()
+    wait_finished(scheduler, blocker)
+    assert scheduler.counts()[JOB_CANCELLED] == 1
@@ -0,0 +1,121 @@
+import json
+import os
+
+from app.services.ingestion_journal import IngestionJournal, RepositoryJournal
+
+
+def _events(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["event"] for line in f]
+
+
+def test_append_after_close_keeps_earlier_records(tmp_path):
+    path = tmp_path / "run.jsonl"
+    journal = IngestionJournal(str(path))
+    journal.append("start", collection="col")
+    journal.append("batch", threads_done=10)
+    journal.close()
+    journal.append("complete", success=True)
+    journal.close()
+
+    assert _events(path) == ["start", "batch", "complete"]
+    assert [record["event"] for record in IngestionJournal(str(path)).records] == ["start", "batch", "complete"]
+
+
+def test_torn_tail_is_ignored_and_dropped_on_append(tmp_path):
+    path = tmp_path / "run.jsonl"
+    with IngestionJournal(str(path)) as journal:
+        journal.append("start")
+        journal.append("batch", threads_done=1)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"event":"batch","threads_')
+
+    journal = IngestionJournal(str(path))
+    assert [record["event"] for record in journal.records] == ["start", "batch"]
+    journal.append("batch", threads_done=2)
+    journal.close()
+
+    assert _events(path) == ["start", "batch", "batch"]
+    assert IngestionJournal(str(path)).last("batch")["threads_done"] == 2
+
+
+def test_unreadable_record_stops_replay(tmp_path):
+    path = tmp_path / "run.jsonl"
+    path.write_text('{"event":"start"}\nnot json\n{"event":"batch"}\n', encoding="utf-8")
+
+    journal = IngestionJournal(str(path))
+
+    assert [record["event"] for record in journal.records] == ["start"]
+    journal.reset()
+    assert not path.exists() and journal.records == []
+
+
+def _repository_journal(directory):
+    return RepositoryJournal(str(directory), "col", "owner", "repo", "main")
+
+
+def test_resumed_run_reuses_files_with_unchanged_sha(tmp_path):
+    journal = _repository_journal(tmp_path)
+    journal.record_file("src/a.py", "sha-a", [{"id": "a0"}])
+    journal.record_file("src/b.py", "sha-b", [{"id": "b0"}, {"id": "b1"}])
+    journal.record_file("src/a.py", "sha-a2", [{"id": "a0"}, {"id": "a1"}])
+    journal.close()
+
+    resumed = _repository_journal(tmp_path)
+
+    assert resumed.processed_rows("src/a.py", "sha-a") is None
+    assert resumed.processed_rows("src/a.py", "sha-a2") == [{"id": "a0"}, {"id": "a1"}]
+    assert resumed.processed_rows("src/b.py", "sha-b") == [{"id": "b0"}, {"id": "b1"}]
+    assert resumed.processed_rows("src/c.py", "sha-c") is None
+
+
+def test_spilled_embeddings_are_reloaded(tmp_path):
+    journal = _repository_journal(tmp_path)
+    journal.spill_embeddings(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    journal.spill_embeddings(["c"], [[5.0, 6.0]])
+    journal.close()
+
+    resumed = _repository_journal(tmp_path)
+
+    assert resumed.load_embeddings(["c", "a", "missing"]) == {"a": [1.0, 2.0], "c": [5.0, 6.0]}
+    # New spills continue the sequence instead of overwriting earlier files
+    resumed.spill_embeddings(["d"], [[7.0, 8.0]])
+    assert resumed.load_embeddings(["b", "d"]) == {"b": [3.0, 4.0], "d": [7.0, 8.0]}
+    assert len(os.listdir(resumed.spill_dir)) == 3
+
+
+def test_unreadable_spill_file_is_recomputed(tmp_path):
+    journal = _repository_journal(tmp_path)
+    journal.spill_embeddings(["a"], [[1.0]])
+    journal.spill_embeddings(["b"], [[2.0]])
+    journal.close()
+    first_spill = sorted(os.listdir(journal.spill_dir))[0]
+    with open(os.path.join(journal.spill_dir, first_spill), "wb") as f:
+        f.write(b"torn")
+
+    assert _repository_journal(tmp_path).load_embeddings(["a", "b"]) == {"b": [2.0]}
+
+
+def test_submitted_and_committed_chunks_survive_a_restart(tmp_path):
+    journal = _repository_journal(tmp_path)
+    journal.record_submitted(["a", "b"])
+    journal.record_committed(["a", "b"])
+    journal.record_submitted(["c", "d"])
+    journal.close()
+
+    resumed = _repository_journal(tmp_path)
+
+    assert resumed.submitted == {"a", "b", "c", "d"}
+    assert resumed.committed == {"a", "b"}
+    assert resumed.submitted - resumed.committed == {"c", "d"}
+
+
+def test_discard_removes_journal_and_spills(tmp_path):
+    journal = _repository_journal(tmp_path)
+    journal.record_file("a.py", "sha", [])
+    journal.spill_embeddings(["a"], [[1.0]])
+
+    journal.discard()
+
+    assert not os.path.exists(journal.path) and not os.path.exists(journal.spill_dir)
+    assert _repository_journal(tmp_path).files == {}
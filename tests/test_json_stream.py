@@ -0,0 +1,59 @@
+import io
+import json
+
+import pytest
+
+from app.services.json_stream import iter_json_array
+
+ELEMENTS = [{"title": "t", "posts": ["a" * 50, {"nested": [1, 2.5e3, None]}]}, 12, -0.5, "x]y,", [], {}, True]
+
+
+@pytest.mark.parametrize("read_size", [1, 3, 7, 1 << 20])
+def test_elements_are_yielded_in_order_across_block_boundaries(read_size):
+    document = json.dumps(ELEMENTS, indent=2)
+
+    assert list(iter_json_array(io.StringIO(document), read_size=read_size)) == ELEMENTS
+
+
+def test_numbers_split_across_blocks_are_read_whole():
+    assert list(iter_json_array(io.StringIO("[1.5e3, 12345, 6]"), read_size=2)) == [1500.0, 12345, 6]
+
+
+@pytest.mark.parametrize("document", ["[]", "  [ ]\n", "\n[\n]"])
+def test_empty_array(document):
+    assert list(iter_json_array(io.StringIO(document), read_size=1)) == []
+
+
+@pytest.mark.parametrize("document, message", [
+    ('{"a": 1}', "Expected a JSON array"),
+    ("", "Expected a JSON array"),
+    ('[{"a": 1}, {"b": ', "Malformed or truncated element"),
+    ('[{"a": 1}, {"b" 2}]', "Malformed or truncated element"),
+    ('[1, 2', "Unexpected end of input"),
+    ('[1 2]', "Expected ',' or ']'"),
+    ('[1,]', "Malformed or truncated element"),
+])
+def test_torn_or_malformed_documents_raise(document, message):
+    with pytest.raises(ValueError, match=message):
+        list(iter_json_array(io.StringIO(document), read_size=4))
+
+
+def test_elements_before_a_torn_tail_are_still_yielded():
+    elements = iter_json_array(io.StringIO('[{"a": 1}, {"b": 2}, {"c": '), read_size=4)
+
+    assert next(elements) == {"a": 1}
+    assert next(elements) == {"b": 2}
+    with pytest.raises(ValueError):
+        next(elements)
+
+
+def test_forum_threads_skip_already_ingested_ones(tmp_path):
+    pytest.importorskip("onnxruntime")
+    from app.scripts.forum_ingestor import iter_forum_threads
+
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps([{"title": f"thread {index}"} for index in range(5)]), encoding="utf-8")
+
+    assert [index for index, _ in iter_forum_threads(str(path), skip_threads=3)] == [3, 4]
+    assert list(iter_forum_threads(str(path), skip_threads=9)) == []
+    assert next(iter_forum_threads(str(path)))[1] == {"title": "thread 0"}
@@ -0,0 +1,93 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from app.services.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def index_in_other_process(path, prefix, count):
+    script = textwrap.dedent(f"""
+        from app.services.lexical_index import LexicalIndex
+        index = LexicalIndex({str(path)!r})
+        for i in range({count}):
+            index.add_many([("{prefix}-%d" % i, "repo", "token{prefix} number%d" % i)])
+        index.flush()
+    """)
+    return subprocess.Popen([sys.executable, "-c", script], cwd=ROOT)
+
+
+def test_tokenize_keeps_identifiers_whole_and_split():
+    assert list(tokenize("Set P9_12 on am335x-boneblack.dts")) == [
+        "set", "p9_12", "p9", "12", "on", "am335x-boneblack.dts", "am335x", "boneblack", "dts"
+    ]
+
+
+def test_search_ranks_exact_identifier_first_and_scopes_repos(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add_many([
+        ("pin", "docs", "Configure P9_12 as a GPIO output"),
+        ("other", "docs", "Configure the GPIO subsystem"),
+        ("forum", "forum", "P9_12 does not toggle"),
+    ])
+
+    assert index.search("P9_12", 10)[0][0] in {"pin", "forum"}
+    assert {chunk_id for chunk_id, _ in index.search("P9_12", 10)} == {"pin", "forum"}
+    assert [chunk_id for chunk_id, _ in index.search("P9_12", 10, repos=["docs"])] == ["pin"]
+
+
+def test_replace_and_delete_survive_reopen(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add_many([("a", "r", "alpha"), ("b", "r", "beta")])
+    index.add_many([("a", "r", "gamma")])
+    index.delete(["b"])
+
+    reopened = LexicalIndex(str(tmp_path))
+    assert len(reopened) == 1
+    assert reopened.search("alpha", 10) == []
+    assert [chunk_id for chunk_id, _ in reopened.search("gamma", 10)] == ["a"]
+
+
+def test_reopen_compacts_superseded_lines(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    for version in range(5):
+        index.add_many([("a", "r", f"version{version}")])
+    index.close()
+
+    reopened = LexicalIndex(str(tmp_path))
+    assert (tmp_path / "postings.tsv").read_text().count("\n") == 1
+    assert [chunk_id for chunk_id, _ in reopened.search("version4", 10)] == ["a"]
+
+
+def test_search_sees_chunks_indexed_by_other_processes(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    writers = [index_in_other_process(tmp_path, f"w{n}", 100) for n in range(3)]
+    for i in range(100):
+        index.add_many([(f"api-{i}", "repo", f"tokenapi number{i}")])
+    assert all(writer.wait(timeout=60) == 0 for writer in writers)
+
+    assert len(index.search("tokenw1", 1000)) == 100
+    assert len(index.search("number7", 10)) == 4
+    assert len(LexicalIndex(str(tmp_path))) == 400
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+
+    assert [chunk_id for chunk_id, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] == 1 / 61 + 1 / 62
+    assert fused[2][1] == 1 / 62
+
+
+def test_writer_follows_log_compacted_by_another_opener(tmp_path):
+    first = LexicalIndex(str(tmp_path))
+    for version in range(5):
+        first.add_many([("a", "r", f"version{version}")])
+    second = LexicalIndex(str(tmp_path))  # compacts the log and replaces the file
+
+    first.add_many([("b", "r", "afterwards")])
+    assert [chunk_id for chunk_id, _ in second.search("afterwards", 10)] == ["b"]
+    assert [chunk_id for chunk_id, _ in first.search("version4", 10)] == ["a"]
+    assert len(LexicalIndex(str(tmp_path))) == 2
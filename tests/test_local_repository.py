@@ -0,0 +1,114 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from app.services.local_repository import LocalRepository, git_blob_sha, resolve_local_repository_path
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(path, *args):
+    return subprocess.run(["git", "-C", str(path), *args], capture_output=True, text=True, check=True).stdout.strip()
+
+
+@pytest.fixture
+def working_tree(tmp_path):
+    path = tmp_path / "repo"
+    path.mkdir()
+    _git(path, "init", "-q", "-b", "master")
+    _git(path, "config", "user.email", "test@example.com")
+    _git(path, "config", "user.name", "Test")
+    (path / "docs").mkdir()
+    (path / "docs" / "guide.md").write_text("# Guide\n", encoding="utf-8")
+    (path / "README.md").write_text("readme\n", encoding="utf-8")
+    os.symlink("README.md", path / "link.md")
+    _git(path, "add", "-A")
+    _git(path, "commit", "-q", "-m", "initial")
+    _git(path, "remote", "add", "origin", "git@github.com:beagleboard/docs.git")
+    return path
+
+
+def test_main_falls_back_to_master(working_tree):
+    with LocalRepository(str(working_tree), "main") as source:
+        assert source.is_git
+        assert (source.ref, source.branch) == ("refs/heads/master", "master")
+        assert source.github_repository() == ("beagleboard", "docs")
+
+
+def test_missing_branch_falls_back_to_head(working_tree):
+    with LocalRepository(str(working_tree), "feature") as source:
+        assert (source.ref, source.branch) == ("HEAD", "master")
+
+
+def test_git_files_carry_blob_shas_and_skip_symlinks(working_tree):
+    with LocalRepository(str(working_tree), "master") as source:
+        files = {path: (sha, size) for path, sha, size in source.iter_files()}
+
+        assert set(files) == {"README.md", "docs/guide.md"}
+        assert files["README.md"] == (_git(working_tree, "rev-parse", "HEAD:README.md"), 7)
+        assert source.read_file("docs/guide.md", files["docs/guide.md"][0]) == "# Guide\n"
+
+
+def test_bare_mirror_is_read_from_its_branches(working_tree, tmp_path):
+    mirror = tmp_path / "mirror.git"
+    subprocess.run(["git", "clone", "-q", "--mirror", str(working_tree), str(mirror)], check=True)
+    (working_tree / "README.md").write_text("changed after mirroring\n", encoding="utf-8")
+
+    with LocalRepository(str(mirror), "master") as source:
+        assert source.is_git
+        files = {path: sha for path, sha, _ in source.iter_files()}
+        assert source.read_file("README.md", files["README.md"]) == "readme\n"
+
+
+def test_directory_inside_a_working_tree_is_a_plain_directory(working_tree):
+    assert not LocalRepository(str(working_tree / "docs")).is_git
+
+
+def test_plain_directory_is_listed_without_reading_files(tmp_path):
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "firmware.bin").write_bytes(b"\0" * 4096)
+    (tmp_path / "notes.md").write_text("notes\n", encoding="utf-8")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config").write_text("", encoding="utf-8")
+    os.symlink("notes.md", tmp_path / "alias.md")
+
+    source = LocalRepository(str(tmp_path))
+
+    assert sorted(source.iter_files()) == [("build/firmware.bin", None, 4096), ("notes.md", None, 6)]
+    assert source.file_sha("notes.md") == git_blob_sha(b"notes\n")
+    assert source.read_file("notes.md", None) == "notes\n"
+
+
+def test_plain_directory_hashes_only_ingested_files(tmp_path):
+    pytest.importorskip("onnxruntime")
+    from app.scripts.github_ingestor import GitHubDirectIngester
+
+    (tmp_path / "firmware.bin").write_bytes(b"\0" * 4096)
+    (tmp_path / "notes.md").write_text("notes\n", encoding="utf-8")
+    source = LocalRepository(str(tmp_path))
+    hashed = []
+    file_sha = source.file_sha
+    source.file_sha = lambda path: hashed.append(path) or file_sha(path)
+    ingester = GitHubDirectIngester.__new__(GitHubDirectIngester)
+    ingester.supported_extensions = {".md"}
+
+    files = ingester.list_local_files(source, "owner", "repo")
+
+    assert hashed == ["notes.md"]
+    assert [(info["path"], info["sha"], info["size"]) for info in files] == [("notes.md", git_blob_sha(b"notes\n"), 6)]
+
+
+def test_repository_paths_stay_inside_the_root(tmp_path):
+    root = tmp_path / "root"
+    (root / "repo").mkdir(parents=True)
+    (tmp_path / "outside").mkdir()
+    os.symlink(tmp_path / "outside", root / "escape")
+
+    assert resolve_local_repository_path("repo", str(root)) == str((root / "repo").resolve())
+    for path in ("../outside", "escape", str(tmp_path / "outside")):
+        with pytest.raises(ValueError, match="must be inside"):
+            resolve_local_repository_path(path, str(root))
+    with pytest.raises(ValueError, match="disabled"):
+        resolve_local_repository_path("repo", "")
@@ -0,0 +1,57 @@
+from app.services.near_duplicates import NearDuplicateIndex, minhash
+
+PAGE = ("The BeagleBone Black has two 46 pin headers. P9_12 is GPIO1_28 and can be "
+        "configured as a digital output with config-pin before exporting it through sysfs. ") * 3
+
+
+def chunk(chunk_id, text, repo="docs"):
+    return {"id": chunk_id, "document": text, "repo_name": repo}
+
+
+def no_rows(ids):
+    return set()
+
+
+def test_minhash_is_deterministic_and_similarity_tracks_overlap():
+    assert (minhash(PAGE) == minhash(PAGE)).all()
+    edited = PAGE.replace("sysfs", "libgpiod", 1)
+    unrelated = "Install the Debian image with balenaEtcher and boot from the microSD card."
+    assert (minhash(PAGE) == minhash(edited)).mean() > 0.8
+    assert (minhash(PAGE) == minhash(unrelated)).mean() < 0.2
+
+
+def test_drops_near_duplicate_of_chunk_kept_in_same_run(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path), threshold=0.8)
+    kept, duplicates = index.filter([chunk("a", PAGE), chunk("b", PAGE + "Thanks!")], no_rows)
+
+    assert [item["id"] for item in kept] == ["a"]
+    assert duplicates == [("b", "a")]
+
+
+def test_copies_in_other_repositories_are_kept(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path), threshold=0.8)
+    kept, duplicates = index.filter([chunk("a", PAGE, "docs"), chunk("b", PAGE, "forum")], no_rows)
+
+    assert [item["id"] for item in kept] == ["a", "b"]
+    assert duplicates == []
+
+
+def test_original_must_still_be_stored_in_a_later_run(tmp_path):
+    NearDuplicateIndex(str(tmp_path), threshold=0.8).filter([chunk("a", PAGE)], no_rows)
+
+    reopened = NearDuplicateIndex(str(tmp_path), threshold=0.8)
+    kept, _ = reopened.filter([chunk("b", PAGE)], no_rows)
+    assert [item["id"] for item in kept] == ["b"]  # "a" was deleted from the collection
+
+    again = NearDuplicateIndex(str(tmp_path), threshold=0.8)
+    kept, duplicates = again.filter([chunk("c", PAGE)], lambda ids: set(ids))
+    assert kept == [] and duplicates[0][0] == "c"
+
+
+def test_reingested_chunks_are_always_kept(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path), threshold=0.8)
+    index.filter([chunk("a", PAGE), chunk("b", PAGE + "Thanks!")], no_rows)
+
+    kept, duplicates = NearDuplicateIndex(str(tmp_path), threshold=0.8).filter([chunk("a", PAGE)], lambda ids: set(ids))
+    assert [item["id"] for item in kept] == ["a"]
+    assert duplicates == []
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("transformers")
+
+from app.services.document_store import DocumentStore
+from app.services.embedded_store import SearchHit
+from app.services.metrics import StageTimer
+from app.services.retrieval_service import RetrievalService
+
+
+class RecordingStore(DocumentStore):
+    def get_many(self, ids):
+        self.thread = threading.current_thread().name
+        return super().get_many(ids)
+
+
+class Collection:
+    async def aquery(self, ids, output_fields):
+        return [{"id": chunk_id, "document": f"inline {chunk_id}"} for chunk_id in ids]
+
+
+def test_async_document_fetch_runs_off_the_event_loop(tmp_path):
+    service = RetrievalService()
+    service.documents = RecordingStore(str(tmp_path))
+    service.documents.put_many([("a", "stored a")])
+    service.collection = Collection()
+    timer = StageTimer()
+
+    hits = [SearchHit("a", 0.1, {}), SearchHit("old", 0.2, {})]
+    texts = asyncio.run(service._afetch_documents(hits, timer))
+
+    assert texts == {"a": "stored a", "old": "inline old"}
+    assert service.documents.thread != threading.main_thread().name
+    assert timer.counts["documents_fetched"] == 2
+    assert "documents" in timer.durations
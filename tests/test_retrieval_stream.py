@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("transformers")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.schemas import RetrieveRequest
+from app.routes import retrieval
+from app.services.metrics import RETRIEVAL_REQUESTS, RETRIEVAL_STAGE_SECONDS, StageTimer
+
+
+def _metadata(index):
+    return {"score": 1 - index / 10, "distance": index / 10, "file_name": f"f{index}.md", "internal": "x"}
+
+
+class Service:
+    async def astream(self, query, n_results=10, timer=None, **options):
+        timer.add("search", 0.001)
+
+        async def hits():
+            for index in range(n_results):
+                yield {"document": f"{query} {index}", "metadata": _metadata(index), "distance": index / 10}
+
+        return 20, hits()
+
+    async def asearch(self, query, n_results=10, timer=None, **options):
+        if query == "fail":
+            raise RuntimeError("boom")
+        timer.add("search", 0.001)
+        timer.count("results", n_results)
+        return {
+            "documents": [[f"{query} {index}" for index in range(n_results)]],
+            "metadatas": [[_metadata(index) for index in range(n_results)]],
+            "distances": [[index / 10 for index in range(n_results)]],
+            "total_found": 20,
+            "filtered_results": n_results,
+        }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(retrieval.retrieval_services, "test_col", Service())
+    app = FastAPI()
+    app.include_router(retrieval.router)
+    return TestClient(app)
+
+
+def _requests(status):
+    return RETRIEVAL_REQUESTS.labels(collection="test_col", status=status)._value.get()
+
+
+def _stage_observations(stage):
+    for metric in RETRIEVAL_STAGE_SECONDS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count") and sample.labels == {"collection": "test_col", "stage": stage}:
+                return sample.value
+    return 0
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_writes_one_line_per_hit_then_summary(client):
+    ok = _requests("ok")
+    response = client.post("/retrieve", json={"query": "q", "collection_name": "test_col", "n_results": 3,
+                                              "stream": True, "debug": True})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "search;dur=" in response.headers["server-timing"]
+    assert "serialize" not in response.headers["server-timing"]
+    lines = _lines(response)
+    assert lines[:3] == [
+        {"query": 0, "rank": index, "document": f"q {index}",
+         "metadata": {"score": 1 - index / 10, "distance": index / 10, "file_name": f"f{index}.md"},
+         "distance": index / 10}
+        for index in range(3)
+    ]
+    summary = lines[3]
+    assert (summary["total_found"], summary["filtered_results"]) == (20, 3)
+    assert {"search", "serialize", "total"} <= set(summary["debug"]["timings_ms"])
+    assert _requests("ok") == ok + 1
+
+
+def test_batch_stream_writes_one_line_per_query(client):
+    error = _requests("error")
+    response = client.post("/retrieve", json={"queries": ["a", "fail", "b"], "collection_name": "test_col",
+                                              "n_results": 2, "stream": True})
+
+    lines = _lines(response)
+    by_query = {line["query"]: line for line in lines[:-1]}
+    assert sorted(by_query) == [0, 1, 2]
+    assert by_query[0]["documents"] == ["a 0", "a 1"]
+    assert by_query[0]["metadatas"][1] == {"score": 0.9, "distance": 0.1, "file_name": "f1.md"}
+    assert by_query[2]["distances"] == [0.0, 0.1]
+    assert by_query[1] == {"query": 1, "error": "Retrieval failed: boom"}
+    assert lines[-1] == {"total_found": 40, "filtered_results": 4}
+    assert _requests("error") == error + 1
+
+
+def test_buffered_batch_returns_results_per_query(client):
+    response = client.post("/retrieve", json={"queries": ["a", "b"], "collection_name": "test_col",
+                                              "n_results": 2, "debug": True})
+
+    body = response.json()
+    assert body["documents"] == [["a 0", "a 1"], ["b 0", "b 1"]]
+    assert body["total_found"] == 40
+    assert body["debug"]["counts"]["results"] == 4
+
+
+def test_request_needs_exactly_one_query_form(client):
+    assert client.post("/retrieve", json={"collection_name": "test_col"}).status_code == 422
+    assert client.post("/retrieve", json={"query": "a", "queries": ["b"], "collection_name": "test_col"}).status_code == 422
+
+
+def test_abandoned_stream_counts_as_error():
+    request = RetrieveRequest(query="q", collection_name="test_col", stream=True)
+
+    async def consume_one():
+        total_found, hits = await Service().astream("q", n_results=3, timer=StageTimer())
+        lines = retrieval._stream_hits(request, total_found, hits, StageTimer(), 0.0)
+        first = await lines.__anext__()
+        await lines.aclose()
+        return first
+
+    error = _requests("error")
+    assert json.loads(asyncio.run(consume_one()))["rank"] == 0
+    assert _requests("error") == error + 1
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_batch_serialization_is_observed_once_per_request(client, stream):
+    serialize, search = _stage_observations("serialize"), _stage_observations("search")
+
+    client.post("/retrieve", json={"queries": ["a", "b", "c"], "collection_name": "test_col", "stream": stream})
+
+    assert _stage_observations("serialize") == serialize + 1
+    # Per-query stages come from each query's own timer, not again from the batch
+    assert _stage_observations("search") == search + 3